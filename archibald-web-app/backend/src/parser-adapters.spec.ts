@@ -120,6 +120,20 @@ describe('adaptOrder', () => {
     expect(result.date).toBe('2025-06-01');
     expect(result.status).toBe('Open');
     expect(result.total).toBe('1234.56');
+    expect(result.fingerprint).toBeUndefined();
+  });
+
+  test('passes the parser fingerprint through', () => {
+    const parsed = {
+      id: 'ORD001', order_number: null, customer_profile_id: null, customer_name: null,
+      creation_date: '2025-06-01', sales_status: null, total_amount: null,
+      delivery_name: null, delivery_address: null, delivery_date: null, order_description: null,
+      customer_reference: null, order_type: null, document_status: null, sales_origin: null,
+      transfer_status: null, transfer_date: null, completion_date: null, discount_percent: null,
+      gross_amount: null, fingerprint: '1:5f0c6a2e9b3d7c41',
+    };
+
+    expect(adaptOrder(parsed).fingerprint).toBe('1:5f0c6a2e9b3d7c41');
   });
 });
 
@@ -86,6 +86,7 @@ function adaptOrder(p: ParserOrder): ParsedOrder {
     orderDescription: n(p.order_description),
     customerReference: n(p.customer_reference),
     email: n(p.email),
+    fingerprint: p.fingerprint,
   };
 }
 
@@ -0,0 +1,64 @@
+import { describe, expect, test } from "vitest";
+import { extractLatestProgress, parseProgressLine } from "./parser-progress";
+
+const line = (fields: Record<string, unknown>) =>
+  `PROGRESS:${JSON.stringify({
+    parser: "orders",
+    pages_done: 70,
+    pages_total: 700,
+    cycles_done: 10,
+    cycles_total: 100,
+    records: 200,
+    expected_records: 1980,
+    elapsed_s: 12.3,
+    eta_s: 110.7,
+    done: false,
+    ...fields,
+  })}`;
+
+describe("parseProgressLine", () => {
+  test("parses a progress line", () => {
+    expect(parseProgressLine(line({}))).toEqual({
+      parser: "orders",
+      pages_done: 70,
+      pages_total: 700,
+      cycles_done: 10,
+      cycles_total: 100,
+      records: 200,
+      expected_records: 1980,
+      elapsed_s: 12.3,
+      eta_s: 110.7,
+      done: false,
+    });
+  });
+
+  test("returns null for other stderr lines", () => {
+    expect(parseProgressLine("Detected cycle size: 7 pages")).toBeNull();
+    expect(
+      parseProgressLine('CYCLE_SIZE_WARNING:{"parser":"orders","detected":7,"expected":7,"status":"OK"}'),
+    ).toBeNull();
+  });
+
+  test("returns null for malformed or incomplete lines", () => {
+    expect(parseProgressLine("PROGRESS:{broken json")).toBeNull();
+    expect(parseProgressLine('PROGRESS:{"parser":"orders"}')).toBeNull();
+  });
+});
+
+describe("extractLatestProgress", () => {
+  test("returns the last progress line in stderr", () => {
+    const stderr = [
+      line({ cycles_done: 0, eta_s: null }),
+      "DIAG_PAGE:1/7 headers=['ID'] rows=20",
+      line({ cycles_done: 10 }),
+      line({ cycles_done: 100, eta_s: 0, done: true }),
+      "",
+    ].join("\n");
+    expect(extractLatestProgress(stderr)).toMatchObject({ cycles_done: 100, done: true });
+  });
+
+  test("returns null when no progress was reported", () => {
+    expect(extractLatestProgress("")).toBeNull();
+    expect(extractLatestProgress("some output\n")).toBeNull();
+  });
+});
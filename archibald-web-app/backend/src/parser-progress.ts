@@ -0,0 +1,40 @@
+type ParserProgress = {
+  parser: string;
+  pages_done: number;
+  pages_total: number;
+  cycles_done: number;
+  cycles_total: number;
+  records: number;
+  expected_records: number | null;
+  elapsed_s: number;
+  eta_s: number | null;
+  done: boolean;
+};
+
+const PROGRESS_PREFIX = "PROGRESS:";
+
+function parseProgressLine(line: string): ParserProgress | null {
+  const trimmed = line.trim();
+  if (!trimmed.startsWith(PROGRESS_PREFIX)) return null;
+  try {
+    const parsed = JSON.parse(trimmed.slice(PROGRESS_PREFIX.length)) as ParserProgress;
+    if (parsed.parser && typeof parsed.cycles_done === "number" && typeof parsed.cycles_total === "number") {
+      return parsed;
+    }
+  } catch {
+    // Ignore malformed progress lines
+  }
+  return null;
+}
+
+function extractLatestProgress(stderr: string): ParserProgress | null {
+  let latest: ParserProgress | null = null;
+  for (const line of stderr.split("\n")) {
+    const progress = parseProgressLine(line);
+    if (progress) latest = progress;
+  }
+  return latest;
+}
+
+export type { ParserProgress };
+export { parseProgressLine, extractLatestProgress };
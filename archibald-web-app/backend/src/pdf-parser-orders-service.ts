@@ -28,6 +28,7 @@ export interface ParsedOrder {
   total_amount: string | null;
   is_gift_order: string | null;
   email: string | null;
+  fingerprint?: string; // scripts/record_fingerprint.py
 }
 
 export class PDFParserOrdersService {
@@ -1,6 +1,8 @@
 import { spawn } from "child_process";
 import path from "path";
 import { logger } from "./logger";
+import { runParserSelftest } from "./python-health-check";
+import type { ParserSelftest } from "./python-health-check";
 import { extractCycleSizeWarnings } from "./cycle-size-warning";
 import type { CycleSizeWarning } from "./cycle-size-warning";
 
@@ -163,54 +165,41 @@ export class PDFParserPricesService {
   }
 
   /**
-   * Health check: verify Python3 and PyPDF2 are available
-   * Matches Phase 18/19 pattern
+   * Health check: one spawn of the parser's --selftest, which checks Python
+   * and pdfplumber and parses an embedded PDF (scripts/selftest.py)
    */
   async healthCheck(): Promise<{
     healthy: boolean;
     pythonVersion?: string;
-    pyPDF2Available?: boolean;
+    pdfplumberAvailable?: boolean;
+    selftest?: ParserSelftest;
     error?: string;
   }> {
     try {
-      // Check Python version
-      const pythonVersion = await new Promise<string>((resolve, reject) => {
-        const python = spawn("python3", ["--version"]);
-        let output = "";
-
-        python.stdout.on("data", (data: Buffer) => (output += data.toString()));
-        python.stderr.on("data", (data: Buffer) => (output += data.toString()));
-
-        python.on("close", (code: number | null) => {
-          if (code === 0) {
-            resolve(output.trim());
-          } else {
-            reject(new Error(`Python check failed with code ${code}`));
-          }
+      const selftest = await runParserSelftest(this.parserPath);
+      const pythonVersion = selftest.python
+        ? `Python ${selftest.python}`
+        : undefined;
+      const pdfplumberAvailable = selftest.dependencies?.pdfplumber != null;
+
+      if (selftest.ok) {
+        logger.info("[PDFParserPricesService] Health check passed", {
+          pythonVersion,
+          pdfplumberAvailable,
+          totalMs: selftest.total_ms,
         });
-      });
-
-      // Check PyPDF2 library
-      const pyPDF2Check = await new Promise<boolean>((resolve) => {
-        const python = spawn("python3", ["-c", 'import PyPDF2; print("OK")']);
-        let output = "";
-
-        python.stdout.on("data", (data: Buffer) => (output += data.toString()));
-
-        python.on("close", (code: number | null) => {
-          resolve(code === 0 && output.includes("OK"));
+      } else {
+        logger.error("[PDFParserPricesService] Health check failed", {
+          error: selftest.error,
         });
-      });
-
-      logger.info("[PDFParserPricesService] Health check passed", {
-        pythonVersion,
-        pyPDF2Available: pyPDF2Check,
-      });
+      }
 
       return {
-        healthy: pyPDF2Check,
+        healthy: selftest.ok,
         pythonVersion,
-        pyPDF2Available: pyPDF2Check,
+        pdfplumberAvailable,
+        selftest,
+        error: selftest.error ?? undefined,
       };
     } catch (error) {
       logger.error("[PDFParserPricesService] Health check failed", { error });
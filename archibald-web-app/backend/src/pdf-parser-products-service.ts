@@ -1,5 +1,7 @@
 import { spawn } from "child_process";
 import { logger } from "./logger";
+import { runParserSelftest } from "./python-health-check";
+import type { ParserSelftest } from "./python-health-check";
 import path from "path";
 import { extractCycleSizeWarnings } from "./cycle-size-warning";
 import type { CycleSizeWarning } from "./cycle-size-warning";
@@ -173,49 +175,41 @@ export class PDFParserProductsService {
   }
 
   /**
-   * Health check: verify Python and pdfplumber are available
+   * Health check: one spawn of the parser's --selftest, which checks Python
+   * and pdfplumber and parses an embedded PDF (scripts/selftest.py)
    */
   async healthCheck(): Promise<{
     healthy: boolean;
     pythonVersion?: string;
     pdfplumberAvailable?: boolean;
+    selftest?: ParserSelftest;
     error?: string;
   }> {
     try {
-      // Check Python version
-      const pythonVersion = await new Promise<string>((resolve, reject) => {
-        const python = spawn("python3", ["--version"]);
-        let output = "";
-        python.stdout.on("data", (data) => (output += data.toString()));
-        python.stderr.on("data", (data) => (output += data.toString()));
-        python.on("close", (code) => {
-          if (code === 0) resolve(output.trim());
-          else reject(new Error(`Python check failed with code ${code}`));
+      const selftest = await runParserSelftest(this.parserPath);
+      const pythonVersion = selftest.python
+        ? `Python ${selftest.python}`
+        : undefined;
+      const pdfplumberAvailable = selftest.dependencies?.pdfplumber != null;
+
+      if (selftest.ok) {
+        logger.info("[PDFParserProductsService] Health check passed", {
+          pythonVersion,
+          pdfplumberAvailable,
+          totalMs: selftest.total_ms,
         });
-      });
-
-      // Check pdfplumber
-      const pdfplumberCheck = await new Promise<boolean>((resolve) => {
-        const python = spawn("python3", [
-          "-c",
-          "import pdfplumber; print('OK')",
-        ]);
-        let output = "";
-        python.stdout.on("data", (data) => (output += data.toString()));
-        python.on("close", (code) => {
-          resolve(code === 0 && output.includes("OK"));
+      } else {
+        logger.error("[PDFParserProductsService] Health check failed", {
+          error: selftest.error,
         });
-      });
-
-      logger.info("[PDFParserProductsService] Health check passed", {
-        pythonVersion,
-        pdfplumberAvailable: pdfplumberCheck,
-      });
+      }
 
       return {
-        healthy: pdfplumberCheck,
+        healthy: selftest.ok,
         pythonVersion,
-        pdfplumberAvailable: pdfplumberCheck,
+        pdfplumberAvailable,
+        selftest,
+        error: selftest.error ?? undefined,
       };
     } catch (error) {
       logger.error("[PDFParserProductsService] Health check failed", { error });
@@ -3,6 +3,7 @@ import { promisify } from "util";
 import { promises as fs } from "fs";
 import path from "path";
 import { logger } from "./logger";
+import { runParserSelftest } from "./python-health-check";
 import { extractCycleSizeWarnings } from "./cycle-size-warning";
 import type { CycleSizeWarning } from "./cycle-size-warning";
 
@@ -149,21 +150,17 @@ export class PDFParserService {
   }
 
   /**
-   * Health check: verify Python and PyPDF2 are available
+   * Health check: one spawn of the parser's --selftest, which checks Python
+   * and pdfplumber and parses an embedded PDF (scripts/selftest.py)
    * @returns true if ready, false otherwise
    */
   async healthCheck(): Promise<boolean> {
     try {
-      // Check Python3
-      const { stdout: pythonVersion } = await execAsync("python3 --version");
-      logger.info(`[PDFParser] Python version: ${pythonVersion.trim()}`);
-
-      // Check PyPDF2
-      const { stdout: pipList } = await execAsync("pip3 list | grep PyPDF2");
-      if (!pipList.includes("PyPDF2")) {
-        logger.error(
-          "[PDFParser] PyPDF2 not installed. Run: pip3 install PyPDF2",
-        );
+      const selftest = await runParserSelftest(this.parserPath);
+      logger.info(`[PDFParser] Python version: ${selftest.python}`);
+
+      if (!selftest.ok) {
+        logger.error(`[PDFParser] Selftest failed: ${selftest.error}`);
         return false;
       }
 
@@ -1,58 +1,98 @@
 import { spawn } from "child_process";
+import path from "path";
 import { logger } from "./logger";
 
+/**
+ * Report printed by `<parser> --selftest` (scripts/selftest.py)
+ */
+export interface ParserSelftest {
+  parser?: string;
+  ok: boolean;
+  python?: string;
+  dependencies?: Record<
+    string,
+    { version?: string | null; import_ms?: number; path?: string | null } | null
+  >;
+  backend?: string;
+  parse_ms?: number | null;
+  startup_ms?: number | null;
+  total_ms?: number | null;
+  error?: string | null;
+}
+
+const SELFTEST_TIMEOUT_MS = 30000;
+
+const DEFAULT_PARSER_PATH =
+  process.env.NODE_ENV === "production"
+    ? "/scripts/parse-products-pdf.py"
+    : path.resolve(__dirname, "../../../scripts/parse-products-pdf.py");
+
+/**
+ * Run `<parser> --selftest` in a single python3 spawn: Python version,
+ * dependency versions and import times, and a parse of an embedded PDF.
+ * Rejects only if python3 itself could not run the parser.
+ */
+export function runParserSelftest(
+  parserPath: string,
+  timeoutMs: number = SELFTEST_TIMEOUT_MS,
+): Promise<ParserSelftest> {
+  return new Promise((resolve, reject) => {
+    const python = spawn("python3", [parserPath, "--selftest"]);
+    let stdout = "";
+    let stderr = "";
+
+    const timer = setTimeout(() => {
+      python.kill("SIGKILL");
+      reject(new Error(`Selftest timed out after ${timeoutMs}ms`));
+    }, timeoutMs);
+
+    python.stdout.on("data", (data: Buffer) => (stdout += data.toString()));
+    python.stderr.on("data", (data: Buffer) => (stderr += data.toString()));
+
+    python.on("close", (code: number | null) => {
+      clearTimeout(timer);
+      const lastLine = stdout.trim().split("\n").pop() ?? "";
+      try {
+        // A parser that exits before its selftest (missing pdfplumber)
+        // still prints {"error": ...}
+        const report = JSON.parse(lastLine);
+        resolve({ ...report, ok: report.ok === true });
+      } catch {
+        reject(
+          new Error(`Selftest failed with code ${code}: ${stderr.trim()}`),
+        );
+      }
+    });
+
+    python.on("error", (error) => {
+      clearTimeout(timer);
+      reject(new Error(`python3 command failed: ${error.message}`));
+    });
+  });
+}
+
 /**
  * Health check for Python dependencies
- * Verifies python3 and pdfplumber are available
+ * Verifies python3 and pdfplumber are available and that a parser can
+ * parse a PDF, with one spawn of `<parser> --selftest`
  */
-export async function checkPythonDependencies(): Promise<{
+export async function checkPythonDependencies(
+  parserPath: string = DEFAULT_PARSER_PATH,
+): Promise<{
   pythonAvailable: boolean;
   pdfplumberAvailable: boolean;
   pythonVersion?: string;
+  selftest?: ParserSelftest;
   error?: string;
 }> {
   try {
-    // Check python3 is available and get version
-    const pythonVersion = await new Promise<string>((resolve, reject) => {
-      const python = spawn("python3", ["--version"]);
-      let output = "";
-
-      python.stdout.on("data", (data) => {
-        output += data.toString();
-      });
-
-      python.stderr.on("data", (data) => {
-        output += data.toString();
-      });
-
-      python.on("close", (code) => {
-        if (code === 0) {
-          resolve(output.trim());
-        } else {
-          reject(new Error("python3 not found"));
-        }
-      });
-
-      python.on("error", () => {
-        reject(new Error("python3 command failed"));
-      });
-    });
-
-    // Check pdfplumber is available
-    const pdfplumberAvailable = await new Promise<boolean>((resolve) => {
-      const python = spawn("python3", ["-c", "import pdfplumber"]);
-      python.on("close", (code) => {
-        resolve(code === 0);
-      });
-      python.on("error", () => {
-        resolve(false);
-      });
-    });
-
+    const selftest = await runParserSelftest(parserPath);
     return {
       pythonAvailable: true,
-      pdfplumberAvailable,
-      pythonVersion,
+      pdfplumberAvailable: selftest.dependencies?.pdfplumber != null,
+      pythonVersion: selftest.python ? `Python ${selftest.python}` : undefined,
+      selftest,
+      error: selftest.error ?? undefined,
     };
   } catch (error) {
     return {
@@ -94,5 +134,16 @@ export async function runStartupHealthCheck(): Promise<void> {
   }
 
   logger.info("[PythonHealthCheck] pdfplumber library available");
-  logger.info("[PythonHealthCheck] All Python dependencies OK");
+
+  if (!result.selftest?.ok) {
+    logger.error("[PythonHealthCheck] Parser selftest failed", {
+      error: result.error,
+    });
+    return;
+  }
+
+  logger.info("[PythonHealthCheck] All Python dependencies OK", {
+    startupMs: result.selftest.startup_ms,
+    totalMs: result.selftest.total_ms,
+  });
 }
@@ -437,7 +437,7 @@ describe('createApp', () => {
       expect(response.status).toBe(200);
       expect(response.body).toEqual({
         status: 'ok',
-        message: 'PDF parser ready (Python3 + PyPDF2 available)',
+        message: 'PDF parser ready (Python3 + pdfplumber available)',
       });
     });
 
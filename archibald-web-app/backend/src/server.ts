@@ -254,7 +254,7 @@ function createApp(deps: AppDeps): Express {
     try {
       const isHealthy = await pdfParserService.healthCheck();
       if (isHealthy) {
-        res.json({ status: 'ok', message: 'PDF parser ready (Python3 + PyPDF2 available)' });
+        res.json({ status: 'ok', message: 'PDF parser ready (Python3 + pdfplumber available)' });
       } else {
         res.status(503).json({ status: 'error', message: 'PDF parser not ready. Check logs for details.' });
       }
@@ -276,7 +276,7 @@ function createApp(deps: AppDeps): Express {
     try {
       const health = await PDFParserPricesService.getInstance().healthCheck();
       if (health.healthy) {
-        res.json({ status: 'ok', message: 'Prices PDF parser ready (Python3 + PyPDF2 available)', ...health });
+        res.json({ status: 'ok', message: 'Prices PDF parser ready (Python3 + pdfplumber available)', ...health });
       } else {
         res.status(503).json({ status: 'unavailable', message: 'Prices PDF parser not ready. Check logs for details.', ...health });
       }
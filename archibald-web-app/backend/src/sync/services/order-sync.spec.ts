@@ -35,6 +35,22 @@ describe('syncOrders', () => {
     expect(result.ordersProcessed).toBe(2);
   });
 
+  test('skips an order whose parser fingerprint matches the stored hash', async () => {
+    const pool = createMockPool();
+    (pool.query as ReturnType<typeof vi.fn>).mockReset()
+      .mockResolvedValueOnce({ rows: [{ hash: '1:5f0c6a2e9b3d7c41', order_number: 'SO-001' }], rowCount: 1 })
+      .mockResolvedValue({ rows: [], rowCount: 0 });
+    const deps = createMockDeps(pool);
+    (deps.fetchRows as ReturnType<typeof vi.fn>).mockResolvedValue([
+      { id: 'ORD-001', orderNumber: 'SO-001', customerName: 'Acme', date: '2026-01-01', fingerprint: '1:5f0c6a2e9b3d7c41' },
+    ]);
+
+    const result = await syncOrders(deps, 'user-1', vi.fn(), () => false);
+
+    expect(result.ordersSkipped).toBe(1);
+    expect(result.ordersUpdated).toBe(0);
+  });
+
   test('stops at checkpoint when shouldStop returns true', async () => {
     const deps = createMockDeps();
     const result = await syncOrders(deps, 'user-1', vi.fn(), () => true);
@@ -29,6 +29,7 @@ type ParsedOrder = {
   orderDescription?: string;
   customerReference?: string;
   email?: string;
+  fingerprint?: string;
 };
 
 type OrderSyncDeps = {
@@ -88,7 +89,8 @@ async function syncOrders(
     const nullTotalIds: string[] = [];
     for (const order of parsedOrders) {
       if (!order.total) { nullTotalCount++; nullTotalIds.push(order.id); }
-      const hash = createHash('md5').update(computeHash(order)).digest('hex');
+      // The parser's fingerprint when it has one: no rehash of every field
+      const hash = order.fingerprint ?? createHash('md5').update(computeHash(order)).digest('hex');
 
       const { rows: [existing] } = await pool.query<{ hash: string; order_number: string; transfer_status: string | null }>(
         'SELECT hash, order_number, transfer_status FROM agents.order_records WHERE id = $1 AND user_id = $2',
@@ -3,6 +3,11 @@
 PDF Data Analysis Script
 Extracts all fields from Ordini.pdf, DDT.pdf, and Fatture.pdf
 and compares with database schema to identify data leaks
+
+This is a full extra parse of every document. The parsers in scripts/ now
+report the same header sets, plus unknown/missing columns and per-field
+population, on every run as a SCHEMA: line (scripts/schema_report.py);
+use this script only for one-off sample-row dumps.
 """
 
 import pdfplumber
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark the extraction backends (extraction.py) on a real export.
+
+Runs the parser once per backend (and --repeat times each), measuring wall
+time and peak RSS of the parser process, and checks that every backend
+prints exactly the same records as the first one.
+
+Usage:
+    python3 benchmark-extraction.py <parser> <pdf_path> [options]
+
+Example:
+    python3 benchmark-extraction.py products Prodotti.pdf --backends pdfplumber,poppler
+    python3 benchmark-extraction.py orders Ordini.pdf --repeat 3
+
+Options:
+    --backends a,b,...   backends to compare (default: pdfplumber,pdfminer,poppler)
+    --repeat 1           runs per backend, the fastest is reported
+
+One line per backend on stdout:
+    BENCHMARK:{"parser": "orders", "backend": "poppler", "seconds": 41.2,
+               "peak_rss_mb": 88.1, "output_sha256": "...", "same_output": true}
+Exit code 1 if any backend failed or produced different records.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from extraction import BACKENDS
+from job_pool import PARSER_SCRIPTS
+from pdf_cycles import get_option
+
+DEFAULT_BACKENDS = "pdfplumber,pdfminer,poppler"
+
+
+def run_parser(parser: str, pdf_path: str, backend: str) -> dict:
+    """Run one parse; wall time, peak RSS of the child and a digest of stdout."""
+    script = Path(__file__).parent / PARSER_SCRIPTS[parser]
+    cmd = [sys.executable, str(script), pdf_path, "--backend", backend, "--no-progress"]
+    digest = hashlib.sha256()
+    started = time.monotonic()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    for chunk in iter(lambda: proc.stdout.read(1 << 16), b""):
+        digest.update(chunk)
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    result = {
+        "seconds": round(time.monotonic() - started, 2),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "output_sha256": digest.hexdigest(),
+    }
+    if proc.returncode != 0:
+        result["error"] = stderr.decode("utf-8", "replace").strip().splitlines()[-1:] or [f"exit {proc.returncode}"]
+    return result
+
+
+def main():
+    """Main entry point"""
+    if len(sys.argv) < 3 or sys.argv[1] not in PARSER_SCRIPTS:
+        print(f"Usage: benchmark-extraction.py <{'|'.join(PARSER_SCRIPTS)}> <pdf_path> [--backends a,b] [--repeat N]", file=sys.stderr)
+        sys.exit(1)
+
+    parser, pdf_path = sys.argv[1], sys.argv[2]
+    backends = (get_option(sys.argv, "--backends") or DEFAULT_BACKENDS).split(",")
+    repeat = int(get_option(sys.argv, "--repeat") or 1)
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        print(f"Error: unknown backend(s) {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    reference = None
+    ok = True
+    for backend in backends:
+        runs = [run_parser(parser, pdf_path, backend) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        if reference is None and "error" not in best:
+            reference = best["output_sha256"]
+        best["same_output"] = "error" not in best and best["output_sha256"] == reference
+        ok = ok and best["same_output"]
+        print(f"BENCHMARK:{json.dumps({'parser': parser, 'backend': backend, **best})}", flush=True)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
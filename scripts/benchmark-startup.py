@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cold start of the parser entry points and track it over time.
+
+For every parser (job_pool.PARSER_SCRIPTS) two spawns are measured:
+
+- the usage path (no arguments) under `python -X importtime`: wall time,
+  the summed import time and the slowest top-level imports. The PDF
+  libraries must not be among them (HEAVY_MODULES): they load lazily when
+  the first PDF is opened (extraction.py);
+- `--selftest` (selftest.py): wall time and whether the embedded parse
+  passes, i.e. the full cost of one health check.
+
+Usage:
+    python3 benchmark-startup.py [options]
+
+Options:
+    --parsers a,b,...    parsers to measure (default: all)
+    --repeat 3           spawns per measurement, the fastest is reported
+    --top 5              slowest top-level imports listed per parser
+    --history PATH       append the results to an NDJSON history and compare
+                         with the previous entry of each parser
+    --tolerance 0.25     allowed relative growth of import_ms before it is a
+                         regression (plus MIN_REGRESSION_MS)
+
+One line per parser on stdout:
+    STARTUP:{"parser": "orders", "import_ms": 9.8, "usage_ms": 31.0,
+             "selftest_ms": 142.5, "selftest_ok": true, "heavy_imports": [],
+             "top": [["page_headers", 2.1], ...], "previous_import_ms": 9.5,
+             "regression": false}
+Exit code 1 if a selftest failed, a PDF library is imported on the usage
+path or import_ms regressed.
+"""
+
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from job_pool import PARSER_SCRIPTS
+from pdf_cycles import get_option
+
+HEAVY_MODULES = ("pdfplumber", "pdfminer", "PIL")
+# Growth below this is noise on any machine, whatever the tolerance
+MIN_REGRESSION_MS = 3.0
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, float, float]]:
+    """-X importtime lines -> (module, depth, self_ms, cumulative_ms)."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the column header
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(parts[0]) / 1000, int(parts[1]) / 1000))
+    return imports
+
+
+def _spawn(cmd: List[str]) -> Tuple[float, subprocess.CompletedProcess]:
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    return round((time.perf_counter() - started) * 1000, 1), proc
+
+
+def measure_parser(parser: str, repeat: int = 3, top: int = 5) -> dict:
+    """Fastest of `repeat` usage-path and --selftest spawns of one parser."""
+    script = str(Path(__file__).parent / PARSER_SCRIPTS[parser])
+    best = None
+    for _ in range(repeat):
+        usage_ms, proc = _spawn([sys.executable, "-X", "importtime", script])
+        if best is None or usage_ms < best[0]:
+            best = (usage_ms, parse_importtime(proc.stderr))
+    usage_ms, imports = best
+    selftest_ms, selftest = min(
+        (_spawn([sys.executable, script, "--selftest"]) for _ in range(repeat)),
+        key=lambda run: run[0],
+    )
+    try:
+        selftest_ok = json.loads(selftest.stdout)["ok"] is True
+    except (ValueError, KeyError, TypeError):
+        selftest_ok = False
+
+    top_level = sorted((i for i in imports if i[1] == 0), key=lambda i: -i[3])
+    return {
+        "parser": parser,
+        "import_ms": round(sum(i[2] for i in imports), 1),
+        "usage_ms": usage_ms,
+        "selftest_ms": selftest_ms,
+        "selftest_ok": selftest_ok,
+        "heavy_imports": sorted({i[0] for i in imports if i[0].split(".")[0] in HEAVY_MODULES and "." not in i[0]}),
+        "top": [[name, round(cumulative, 1)] for name, _, _, cumulative in top_level[:top]],
+    }
+
+
+def load_history(path: str) -> Dict[str, dict]:
+    """Latest history entry per parser (empty if there is no history yet)."""
+    latest = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    latest[entry["parser"]] = entry
+    except FileNotFoundError:
+        pass
+    return latest
+
+
+def is_regression(result: dict, previous: Optional[dict], tolerance: float) -> bool:
+    if previous is None:
+        return False
+    before, now = previous["import_ms"], result["import_ms"]
+    return now > before * (1 + tolerance) and now - before > MIN_REGRESSION_MS
+
+
+def main():
+    """Main entry point"""
+    parsers = (get_option(sys.argv, "--parsers") or ",".join(PARSER_SCRIPTS)).split(",")
+    unknown = [p for p in parsers if p not in PARSER_SCRIPTS]
+    if unknown:
+        print(f"Usage: benchmark-startup.py [--parsers {','.join(PARSER_SCRIPTS)}] [--repeat N] [--top N] [--history PATH] [--tolerance 0.25]", file=sys.stderr)
+        sys.exit(1)
+    repeat = int(get_option(sys.argv, "--repeat") or 3)
+    top = int(get_option(sys.argv, "--top") or 5)
+    history_path = get_option(sys.argv, "--history")
+    tolerance = float(get_option(sys.argv, "--tolerance") or 0.25)
+
+    history = load_history(history_path) if history_path else {}
+    measured_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    ok = True
+    for parser in parsers:
+        result = measure_parser(parser, repeat=repeat, top=top)
+        previous = history.get(parser)
+        result["previous_import_ms"] = previous["import_ms"] if previous else None
+        result["regression"] = is_regression(result, previous, tolerance)
+        ok = ok and result["selftest_ok"] and not result["heavy_imports"] and not result["regression"]
+        print(f"STARTUP:{json.dumps(result)}", flush=True)
+        if history_path:
+            entry = {"measured_at": measured_at, "python": sys.version.split()[0], **result}
+            with open(history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Checkpoint/resume for long cycle parses (--out / --resume).
+
+A products or orders parse killed at 90% by a timeout or a container restart
+used to start again from page 0. With --out FILE the parser writes its records
+as JSON lines to FILE and, after every completed cycle, a small checkpoint
+next to it (FILE.checkpoint.json, or --checkpoint PATH):
+
+    {"parser": "orders", "pdf_sha256": "...", "cycle_size": 7,
+     "next_cycle": 42, "end_cycle": 100, "output_offset": 1843200,
+     "records": 840, "complete": false}
+
+--resume re-opens FILE, truncates it to output_offset (dropping the records of
+the cycle that was interrupted) and the parser starts again at next_cycle.
+A checkpoint is only honoured for the same PDF (sha256), cycle size and
+--shard/--pages range (end_cycle).
+
+SIGTERM flushes the output and rewrites the last checkpoint instead of dying
+mid-line; the process then exits with 143.
+"""
+
+import hashlib
+import json
+import os
+import signal
+import sys
+from typing import List, Optional
+
+from pdf_cycles import CycleObserver, get_option, has_flag
+
+EXIT_SIGTERM = 143
+
+
+def file_sha256(path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path: str, data: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CycleCheckpoint(CycleObserver):
+    """Writes records to an NDJSON file and checkpoints it after every cycle."""
+
+    def __init__(self, parser_name: str, pdf_path, out_path: str, checkpoint_path: Optional[str] = None, resume: bool = False):
+        self.parser_name = parser_name
+        self.pdf_path = pdf_path
+        self.out_path = out_path
+        self.checkpoint_path = checkpoint_path or f"{out_path}.checkpoint.json"
+        self.resume = resume
+        self.pdf_sha256: Optional[str] = None
+        self.cycle_size: Optional[int] = None
+        self.end_cycle: Optional[int] = None
+        self.records = 0
+        self.state: Optional[dict] = None
+        self._resumed_state: Optional[dict] = None
+        self._out = None
+
+    def open(self) -> int:
+        """Open the output (truncated or resumed) and return the first cycle to parse."""
+        self.pdf_sha256 = file_sha256(self.pdf_path)
+        saved = self._load() if self.resume else None
+
+        if saved and saved.get("pdf_sha256") == self.pdf_sha256 and os.path.exists(self.out_path):
+            self._out = open(self.out_path, "r+", encoding="utf-8")
+            self._out.truncate(saved["output_offset"])
+            self._out.seek(saved["output_offset"])
+            self._resumed_state = saved
+            self.state = saved
+            self.records = saved.get("records", 0)
+            print(f"CHECKPOINT_RESUME:{json.dumps({'parser': self.parser_name, 'next_cycle': saved['next_cycle'], 'records': self.records})}", file=sys.stderr)
+            return saved["next_cycle"]
+
+        if saved:
+            print(f"Warning: checkpoint {self.checkpoint_path} does not match {self.pdf_path}, starting from cycle 0", file=sys.stderr)
+        self._out = open(self.out_path, "w", encoding="utf-8")
+        return 0
+
+    def write_record(self, record: dict) -> None:
+        self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.records += 1
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        if self._resumed_state and self._resumed_state.get("cycle_size") != cycle_size:
+            raise RuntimeError(
+                f"Checkpoint cycle size {self._resumed_state.get('cycle_size')} != detected {cycle_size}; rerun without --resume"
+            )
+        end_cycle = cycles.stop if cycles is not None else total_pages // cycle_size
+        if self._resumed_state and self._resumed_state.get("end_cycle", end_cycle) != end_cycle:
+            raise RuntimeError("Checkpoint was written for a different --shard/--pages range; rerun without --resume")
+        self.cycle_size = cycle_size
+        self.end_cycle = end_cycle
+        signal.signal(signal.SIGTERM, self._on_sigterm)
+
+    def after_cycle(self, cycle_idx: int) -> None:
+        self._save(next_cycle=cycle_idx + 1, complete=False)
+
+    def on_finish(self) -> None:
+        next_cycle = self.state["next_cycle"] if self.state else 0
+        self._save(next_cycle=next_cycle, complete=True)
+        self._out.close()
+
+    def _save(self, next_cycle: int, complete: bool) -> None:
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        self.state = {
+            "parser": self.parser_name,
+            "pdf_sha256": self.pdf_sha256,
+            "cycle_size": self.cycle_size,
+            "next_cycle": next_cycle,
+            "end_cycle": self.end_cycle,
+            "output_offset": self._out.tell(),
+            "records": self.records,
+            "complete": complete,
+        }
+        write_json_atomic(self.checkpoint_path, self.state)
+
+    def _on_sigterm(self, signum, frame) -> None:
+        # Records of the current (partial) cycle sit past output_offset and are
+        # dropped on --resume, so flushing them is safe
+        self._out.flush()
+        if self.state:
+            write_json_atomic(self.checkpoint_path, dict(self.state, interrupted=True))
+            print(f"CHECKPOINT_SAVED:{json.dumps(self.state)}", file=sys.stderr, flush=True)
+        sys.exit(EXIT_SIGTERM)
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+def read_ndjson(path: str) -> List[dict]:
+    """All records of an NDJSON output file."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def checkpoint_from_argv(parser_name: str, pdf_path, argv: List[str]) -> Optional[CycleCheckpoint]:
+    """CycleCheckpoint from --out/--checkpoint/--resume, or None without --out."""
+    out_path = get_option(argv, "--out")
+    if out_path is None:
+        if has_flag(argv, "--resume"):
+            raise ValueError("--resume requires --out <file>")
+        return None
+    return CycleCheckpoint(
+        parser_name,
+        pdf_path,
+        out_path,
+        checkpoint_path=get_option(argv, "--checkpoint"),
+        resume=has_flag(argv, "--resume"),
+    )
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Customer lookup index written by the customer parser (--lookup-index PATH).
+
+Order entry and customer recognition look a customer up from a partly typed
+or noisy value: a VAT number with or without "IT", a fiscal code, a phone
+number as printed on a letterhead, a misspelled name. Each keystroke used to
+scan the whole customer table. With --lookup-index the parser also writes a
+JSON file, built while the records stream, that CustomerIndex below loads
+once and answers from in memory:
+
+    {"format": 1, "parser": "clienti", "source": "Clienti.pdf",
+     "built_at": "...", "key": "customer_profile",
+     "docs": ["1002000", ...],            key of each customer, in PDF order
+     "names": ["studio dentistico rossi 0", ...],
+     "codes": {"vat_number": [["00000000000", 0], ...],
+               "fiscal_code": [...], "sdi": [...], "pec": [...],
+               "phone": [["0815550000", 0], ["3331200000", 0], ...]},
+     "terms": ["0", "bianchi", "napoli", ...],
+     "postings": [[0, 5, 5, ...], ...],   customers of each term
+     "trigrams": {"  r": [...], " ro": [...], ...},
+     "trigram_counts": [24, ...]}
+
+codes are [normalized value, customer] pairs sorted by value, so a typed
+prefix is a binary search. Values are normalized by normalize_code() (VAT,
+fiscal code, SDI: letters and digits, uppercase, a VAT's IT prefix dropped),
+normalize_phone() (phone and mobile: digits, the +39 / 0039 prefix dropped)
+and fold() (PEC). terms are the accent- and case-folded words of the name
+and city, postings delta encoded like search_index.py. trigrams are taken
+from the name words padded as "  word " and give the fuzzy match: the Dice
+similarity between the trigrams of the query and of a name.
+
+CustomerIndex.lookup() scores each customer by its best match: 4 for a whole
+code or phone, 3 for a code or phone prefix (3 characters or more, phones 4
+digits), 2 when every query word is a name or city word or its prefix, and
+the trigram similarity (from FUZZY_THRESHOLD up to 1) otherwise. Ties keep
+PDF order.
+
+Only full runs write the index (no --shard/--pages, --key). It is written to
+<path>.tmp and renamed into place (pdf_cycles.FullRunArtifact). Summary:
+
+    LOOKUP_INDEX:{"path": "customers.lookup.json", "docs": 1530,
+                  "codes": 6120, "terms": 2214, "bytes": 512331}
+"""
+
+import json
+import os
+import re
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from pdf_cycles import FullRunArtifact
+from search_index import delta_decode, delta_encode, fold, words
+
+INDEX_FORMAT = 1
+CODE_FIELDS = ("vat_number", "fiscal_code", "sdi", "pec", "phone")
+SCORE_CODE, SCORE_CODE_PREFIX, SCORE_NAME = 4, 3, 2
+MIN_CODE_PREFIX = 3
+MIN_PHONE_DIGITS = 4
+FUZZY_THRESHOLD = 0.4
+
+
+def normalize_code(value: Optional[str]) -> str:
+    """'IT 012.345.678-90' -> '01234567890', 'rssmra80a01f000z' -> 'RSSMRA80A01F000Z'."""
+    code = re.sub(r"[^0-9A-Z]", "", fold(value).upper())
+    if code.startswith("IT") and code[2:].isdigit():
+        return code[2:]
+    return code
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    """Digits without the Italian prefix: '+39 081 555 0000' -> '0815550000'."""
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith("0039"):
+        return digits[4:]
+    if digits.startswith("39") and len(digits) >= 11 and digits[2] in "03":
+        return digits[2:]
+    return digits
+
+
+def name_trigrams(name: str) -> Set[str]:
+    """Trigrams of the folded words, padded as '  word ' so short words still count."""
+    grams: Set[str] = set()
+    for word in words(name):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def record_codes(record) -> List[Tuple[str, str]]:
+    """(field, normalized value) pairs of a customer; phone and mobile share 'phone'."""
+    codes = [
+        ("vat_number", normalize_code(getattr(record, "vat_number", None))),
+        ("fiscal_code", normalize_code(getattr(record, "fiscal_code", None))),
+        ("sdi", normalize_code(getattr(record, "sdi", None))),
+        ("pec", fold(getattr(record, "pec", None)).strip()),
+        ("phone", normalize_phone(getattr(record, "phone", None))),
+        ("phone", normalize_phone(getattr(record, "mobile", None))),
+    ]
+    return list(dict.fromkeys((field, value) for field, value in codes if value))
+
+
+class CustomerIndexWriter(FullRunArtifact):
+    """Collects the normalized keys of each customer as it is parsed and writes the index at the end."""
+
+    ARTIFACT = "lookup index"
+    SUMMARY_PREFIX = "LOOKUP_INDEX"
+    OPTION = "--lookup-index"
+
+    def __init__(self, parser_name: str, pdf_path, index_path: str, source: Optional[str] = None):
+        super().__init__(parser_name, pdf_path, index_path, source)
+        self.docs: List[str] = []
+        self.names: List[str] = []
+        self.codes: Dict[str, List[Tuple[str, int]]] = {field: [] for field in CODE_FIELDS}
+        self.terms: Dict[str, List[int]] = {}
+        self.trigrams: Dict[str, List[int]] = {}
+        self.trigram_counts: List[int] = []
+
+    def on_record(self, record) -> None:
+        key = getattr(record, "customer_profile", None)
+        if not key:
+            return
+        doc = len(self.docs)
+        self.docs.append(key)
+        name = " ".join(words(getattr(record, "name", None)))
+        self.names.append(name)
+        for field, value in record_codes(record):
+            self.codes[field].append((value, doc))
+        for term in set(words(name)) | set(words(getattr(record, "city", None))):
+            self.terms.setdefault(term, []).append(doc)
+        grams = name_trigrams(name)
+        for gram in grams:
+            self.trigrams.setdefault(gram, []).append(doc)
+        self.trigram_counts.append(len(grams))
+
+    def write(self) -> dict:
+        terms = sorted(self.terms)
+        index = {
+            "format": INDEX_FORMAT,
+            "parser": self.parser_name,
+            "source": self.source,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "key": "customer_profile",
+            "docs": self.docs,
+            "names": self.names,
+            "codes": {field: sorted(pairs) for field, pairs in self.codes.items()},
+            "terms": terms,
+            "postings": [delta_encode(self.terms[term]) for term in terms],
+            "trigrams": {g: delta_encode(docs) for g, docs in sorted(self.trigrams.items())},
+            "trigram_counts": self.trigram_counts,
+        }
+        self.write_json(index, compact=True)
+        return {
+            "docs": len(self.docs), "codes": sum(len(pairs) for pairs in self.codes.values()), "terms": len(terms),
+            "bytes": os.path.getsize(self.tmp_path),
+        }
+
+
+class CustomerIndex:
+    """A written index, postings decoded, answering lookup() in memory."""
+
+    def __init__(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{path}: unsupported lookup index format {index.get('format')}")
+        self.docs: List[str] = index["docs"]
+        self.names: List[str] = index["names"]
+        self.codes: Dict[str, List[List]] = index["codes"]
+        self.code_values = {field: [value for value, _ in pairs] for field, pairs in self.codes.items()}
+        self.terms: List[str] = index["terms"]
+        self.postings = [delta_decode(p) for p in index["postings"]]
+        self.trigrams = {g: delta_decode(docs) for g, docs in index["trigrams"].items()}
+        self.trigram_counts: List[int] = index["trigram_counts"]
+
+    def _codes(self, field: str, value: str, scores: Dict[int, float]) -> None:
+        values, pairs = self.code_values[field], self.codes[field]
+        pos = bisect_left(values, value)
+        while pos < len(values) and values[pos].startswith(value):
+            score = SCORE_CODE if values[pos] == value else SCORE_CODE_PREFIX
+            doc = pairs[pos][1]
+            scores[doc] = max(scores.get(doc, 0), score)
+            pos += 1
+
+    def _word_docs(self, word: str) -> Set[int]:
+        docs: Set[int] = set()
+        pos = bisect_left(self.terms, word)
+        while pos < len(self.terms) and self.terms[pos].startswith(word):
+            docs.update(self.postings[pos])
+            pos += 1
+        return docs
+
+    def _names(self, query: str, scores: Dict[int, float]) -> None:
+        query_words = words(query)
+        if not query_words:
+            return
+        matched: Optional[Set[int]] = None
+        for word in query_words:
+            docs = self._word_docs(word)
+            matched = docs if matched is None else matched & docs
+        for doc in matched or ():
+            scores[doc] = max(scores.get(doc, 0), SCORE_NAME)
+
+        grams = name_trigrams(query)
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self.trigrams.get(gram, ()))
+        for doc, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.trigram_counts[doc])
+            if similarity >= FUZZY_THRESHOLD:
+                scores[doc] = max(scores.get(doc, 0), round(similarity, 3))
+
+    def lookup(self, query: str, limit: int = 20) -> List[str]:
+        """Keys of the customers matching a typed or noisy value, best first."""
+        scores: Dict[int, float] = {}
+        code = normalize_code(query)
+        if len(code) >= MIN_CODE_PREFIX:
+            for field in ("vat_number", "fiscal_code", "sdi"):
+                self._codes(field, code, scores)
+        if "@" in query:
+            self._codes("pec", fold(query).strip(), scores)
+        if not re.search(r"[^\W\d_]", query):
+            phone = normalize_phone(query)
+            if len(phone) >= MIN_PHONE_DIGITS:
+                self._codes("phone", phone, scores)
+        self._names(query, scores)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self.docs[doc] for doc, _ in ranked[:limit]]
+
+
+def customer_index_from_argv(parser_name: str, pdf_path, argv: List[str]) -> Optional[CustomerIndexWriter]:
+    """CustomerIndexWriter for --lookup-index PATH, or None."""
+    return CustomerIndexWriter.from_argv(parser_name, pdf_path, argv)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Hash join of orders with their DDTs and invoices on order_number.
+
+ParsedDDT.order_number and ParsedInvoice.order_number ("MATCH KEY") point
+back to ParsedOrder.order_number. OrderDocumentJoin indexes the DDT and
+invoice records by that key (build side, they are the smaller exports) and
+then streams the orders through it (probe side), attaching:
+
+    ddts:     ddt_number, delivery_date, tracking_number, tracking_courier, tracking_url
+    invoices: invoice_number, invoice_date, invoice_amount, remaining_amount
+
+DDTs and invoices whose order_number matches no order (or is empty) are
+emitted afterwards as unmatched, with all their fields. Used by
+parse-documents-pdf.py.
+"""
+
+from dataclasses import asdict
+from typing import Dict, Generator, Iterable, List
+
+DDT_FIELDS = ["ddt_number", "delivery_date", "tracking_number", "tracking_courier", "tracking_url"]
+INVOICE_FIELDS = ["invoice_number", "invoice_date", "invoice_amount", "remaining_amount"]
+
+
+def join_key(value) -> str:
+    """Normalized order_number ("" if missing)."""
+    return (value or "").strip().upper()
+
+
+class OrderDocumentJoin:
+    """Index of DDTs and invoices by order_number, probed by the order stream."""
+
+    def __init__(self, ddts: Iterable = (), invoices: Iterable = ()):
+        self.ddts: Dict[str, List[dict]] = {}
+        self.invoices: Dict[str, List[dict]] = {}
+        self.unkeyed_ddts: List[dict] = []
+        self.unkeyed_invoices: List[dict] = []
+        self.orders = 0
+        self.orders_with_ddt = 0
+        self.orders_with_invoice = 0
+        self._matched_ddts: Dict[str, List[dict]] = {}
+        self._matched_invoices: Dict[str, List[dict]] = {}
+        self._index(ddts, self.ddts, self.unkeyed_ddts)
+        self._index(invoices, self.invoices, self.unkeyed_invoices)
+
+    @staticmethod
+    def _index(records: Iterable, index: Dict[str, List[dict]], unkeyed: List[dict]) -> None:
+        for record in records:
+            row = asdict(record)
+            key = join_key(row.get("order_number"))
+            if key:
+                index.setdefault(key, []).append(row)
+            else:
+                unkeyed.append(row)
+
+    def enrich(self, orders: Iterable) -> Generator[dict, None, None]:
+        """Yield each order as a dict with its "ddts" and "invoices" attached."""
+        for order in orders:
+            row = asdict(order)
+            key = join_key(row.get("order_number"))
+            ddts = self._take(key, self.ddts, self._matched_ddts)
+            invoices = self._take(key, self.invoices, self._matched_invoices)
+            self.orders += 1
+            self.orders_with_ddt += bool(ddts)
+            self.orders_with_invoice += bool(invoices)
+            row["ddts"] = [{f: ddt.get(f) for f in DDT_FIELDS} for ddt in ddts]
+            row["invoices"] = [{f: invoice.get(f) for f in INVOICE_FIELDS} for invoice in invoices]
+            yield row
+
+    @staticmethod
+    def _take(key: str, index: Dict[str, List[dict]], matched: Dict[str, List[dict]]) -> List[dict]:
+        # Matched entries move out of the index so that what is left at the
+        # end is exactly the unmatched records (an order_number repeated on
+        # several orders still gets its documents every time)
+        if not key:
+            return []
+        if key in index:
+            matched[key] = index.pop(key)
+        return matched.get(key, [])
+
+    def unmatched_ddts(self) -> List[dict]:
+        return self.unkeyed_ddts + [row for rows in self.ddts.values() for row in rows]
+
+    def unmatched_invoices(self) -> List[dict]:
+        return self.unkeyed_invoices + [row for rows in self.invoices.values() for row in rows]
+
+    def summary(self) -> dict:
+        return {
+            "orders": self.orders,
+            "orders_with_ddt": self.orders_with_ddt,
+            "orders_with_invoice": self.orders_with_invoice,
+            "unmatched_ddts": len(self.unmatched_ddts()),
+            "unmatched_invoices": len(self.unmatched_invoices()),
+        }
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Pluggable PDF extraction backends (--backend pdfplumber|pdfminer|poppler).
+
+Every parser opens its PDF through open_pdf() and only uses the subset of
+the pdfplumber API they always relied on: `with open_pdf(path) as pdf`,
+`pdf.pages[i]`, `page.extract_tables()`, `page.extract_table()` and
+`page.close()`. Three backends implement it:
+
+- pdfplumber (default): pdfplumber.open() itself.
+- pdfminer: pdfminer's interpreter with a lean glyph-and-rules device and
+  pdfplumber's table functions, returning the same tables
+  (pdfminer_backend.py).
+- poppler: pdftotext word boxes rebuilt into cells with per-layout column
+  geometry (pdftotext_backend.py).
+
+The backend is chosen per run with --backend or the ARCHIBALD_PDF_BACKEND
+environment variable. Pages with a /Rotate entry are not special-cased by
+the pdfminer backend beyond the MediaBox normalisation pdfplumber does.
+
+map_pdf() serves every later open of a path from one read-only memory map
+(--mmap, stdin and inherited-fd input, see pdf_input.py): the per-cycle
+reopens of the products/customers/prices parsers then read the mapped bytes
+instead of going through the filesystem, and forked workers share the
+mapping copy-on-write.
+
+Backends are imported when the first PDF is opened, not with this module:
+pdfplumber and pdfminer take most of a parser's startup, which a parser
+started for --help, a usage error or --selftest's dependency report
+should not pay for.
+"""
+
+import io
+import mmap
+import os
+from typing import Dict, List
+
+DEFAULT_BACKEND = "pdfplumber"
+BACKEND_ENV = "ARCHIBALD_PDF_BACKEND"
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable read-only file over a shared buffer, with its own position."""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._view[self._pos:self._pos + len(target)]
+        target[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+# path -> read-only mmap of the whole PDF (map_pdf)
+_buffers: Dict[str, mmap.mmap] = {}
+
+
+def map_pdf(path) -> None:
+    """Serve every later open of this path from one read-only memory map."""
+    path = str(path)
+    if path not in _buffers:
+        with open(path, "rb") as f:
+            _buffers[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def pdf_stream(path):
+    """Binary stream of the PDF: a view of its memory map if mapped, else the file."""
+    buffer = _buffers.get(str(path))
+    return BufferReader(buffer) if buffer is not None else open(path, "rb")
+
+
+def _open_poppler(path):
+    from pdftotext_backend import PopplerPDF
+
+    return PopplerPDF(path)
+
+
+def _open_pdfminer(path):
+    from pdfminer_backend import LeanPDF
+
+    return LeanPDF(path)
+
+
+def _open_pdfplumber(path):
+    import pdfplumber
+
+    # pdfplumber leaves external streams open, a buffer view needs no closing
+    return pdfplumber.open(pdf_stream(path) if str(path) in _buffers else path)
+
+
+BACKENDS = {
+    "pdfplumber": _open_pdfplumber,
+    "pdfminer": _open_pdfminer,
+    "poppler": _open_poppler,
+}
+
+_backend = os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+
+
+def set_backend(name: str) -> None:
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown extraction backend {name!r} (expected one of {', '.join(BACKENDS)})")
+    _backend = name
+
+
+def current_backend() -> str:
+    return _backend
+
+
+def open_pdf(pdf_path):
+    """Open a PDF with the selected backend (use as a context manager)."""
+    return BACKENDS[_backend](pdf_path)
+
+
+def backend_from_argv(argv: List[str]) -> str:
+    """Apply --backend NAME for this run and return the active backend name."""
+    from pdf_cycles import get_option  # pdf_cycles opens PDFs through this module
+
+    name = get_option(argv, "--backend")
+    set_backend(name or _backend)
+    return _backend
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Persistent per-page feature cache (header row, row count, table bbox, first row).
+
+The header scan of page_headers.py runs at the start of every parse
+(_detect_cycle_size, up to the second anchor) and over every page in
+inspect-pdf-structure.py; each run used to re-derive the same facts from
+the page content. The features of every scanned page are kept in
+a sidecar keyed by the PDF's content fingerprint (key_index.pdf_fingerprint)
+and the 0-based page index:
+
+    <cache dir>/<fingerprint>.json
+    {"version": 1, "pdf_fingerprint": "...", "page_count": 700,
+     "pages": {"0": {"header": ["ID", ...], "rows": 20,
+                     "table_bbox": [30.0, 42.0, 470.0, 462.0],
+                     "first_row": ["70.962", "ORD/26000887", ...]}, ...}}
+
+so a later run on the same export (even downloaded to another path) reads
+them instead of interpreting the pages again: investigating a failed sync
+with the inspector costs no layout pass for the pages the parse already saw.
+
+The cache directory is $ARCHIBALD_FEATURE_CACHE (default
+~/.cache/archibald/pdf-features, "off" disables it). The newest
+MAX_CACHED_PDFS documents are kept.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from key_index import pdf_fingerprint
+from pdf_cycles import get_option, has_flag
+
+CACHE_ENV = "ARCHIBALD_FEATURE_CACHE"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "archibald" / "pdf-features"
+# Bumped whenever the stored features change meaning
+FORMAT_VERSION = 1
+MAX_CACHED_PDFS = 64
+
+_cache_dir_override: Optional[str] = None
+
+
+def set_cache_dir(path: Optional[str]) -> None:
+    """Use this directory for the rest of the run ("off" disables the cache)."""
+    global _cache_dir_override
+    _cache_dir_override = path
+
+
+def cache_dir() -> Optional[Path]:
+    """Active cache directory, or None if the cache is disabled."""
+    value = _cache_dir_override if _cache_dir_override is not None else os.environ.get(CACHE_ENV)
+    if value is None:
+        return DEFAULT_CACHE_DIR
+    if value.strip().lower() in ("", "off", "0", "false"):
+        return None
+    return Path(value)
+
+
+def feature_cache_from_argv(argv: List[str]) -> Optional[Path]:
+    """Apply --feature-cache DIR / --no-feature-cache for this run and return the active directory."""
+    if has_flag(argv, "--no-feature-cache"):
+        set_cache_dir("off")
+    else:
+        path = get_option(argv, "--feature-cache")
+        if path is not None:
+            set_cache_dir(path)
+    return cache_dir()
+
+
+class FeatureCache:
+    """Cached page features of one PDF."""
+
+    def __init__(self, pdf_path, directory: Path):
+        self.fingerprint = pdf_fingerprint(pdf_path)
+        self.path = Path(directory) / f"{self.fingerprint[:32]}.json"
+        self.pages, self.page_count = self._read()
+        self._new: Dict[int, dict] = {}
+
+    @classmethod
+    def open(cls, pdf_path) -> Optional["FeatureCache"]:
+        """Cache of this PDF in the active directory, None if caching is disabled."""
+        directory = cache_dir()
+        return cls(pdf_path, directory) if directory is not None else None
+
+    def _read(self) -> Tuple[Dict[int, dict], Optional[int]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}, None
+        if data.get("version") != FORMAT_VERSION or data.get("pdf_fingerprint") != self.fingerprint:
+            return {}, None
+        return {int(idx): features for idx, features in data.get("pages", {}).items()}, data.get("page_count")
+
+    def get(self, page_idx: int) -> Optional[dict]:
+        return self.pages.get(page_idx)
+
+    def missing(self, page_indexes: Iterable[int]) -> List[int]:
+        return [idx for idx in page_indexes if idx not in self.pages]
+
+    def update(self, features: Dict[int, dict]) -> None:
+        self.pages.update(features)
+        self._new.update(features)
+
+    def save(self) -> None:
+        """Write the new pages (merged with what other runs stored meanwhile)."""
+        if not self._new:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            pages = {**self._read()[0], **self.pages}
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": FORMAT_VERSION, "pdf_fingerprint": self.fingerprint, "page_count": self.page_count,
+                     "pages": {str(idx): pages[idx] for idx in sorted(pages)}},
+                    f, ensure_ascii=False,
+                )
+            os.replace(tmp, self.path)
+            self._new = {}
+            self._prune()
+        except OSError as e:
+            print(f"Warning: page feature cache not written: {e}", file=sys.stderr)
+
+    def _prune(self) -> None:
+        entries = sorted(self.path.parent.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in entries[MAX_CACHED_PDFS:]:
+            stale.unlink(missing_ok=True)
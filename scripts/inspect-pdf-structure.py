@@ -1,50 +1,210 @@
 #!/usr/bin/env python3
 """
-Diagnostic: inspect PDF table structure.
-Shows headers, row counts, and sample data for each page.
-Usage: python3 inspect-pdf-structure.py <pdf_path>
+Diagnostic: cycle map of a whole export.
+
+Shows, for every page (or a stride sample of the cycles), the header
+fingerprint, the data row count and where each cycle starts, and checks
+that the cycle layout holds to the last page. Pages are read with the
+header scan of page_headers.py (no table finding), split across worker
+processes; pages already in the feature cache (feature_cache.py), e.g.
+the first pages scanned by _detect_cycle_size in a failed sync, are not
+read again.
+
+Usage:
+    python3 inspect-pdf-structure.py <pdf_path> [options]
+
+Options:
+    --json          print the cycle map as one JSON object
+    --jobs 4        worker processes (default: CPU count)
+    --stride 10     inspect every 10th cycle (plus the last one) instead of all pages
+    --rows          list every page in the text output, not only the irregular ones
+    --feature-cache DIR   page feature cache directory (default $ARCHIBALD_FEATURE_CACHE)
+    --no-feature-cache    neither read nor update the cache
+    --mmap          map the PDF once; forked workers share it (pdf_input.py)
+
+pdf_path may be - (stdin) or fd:N (inherited descriptor); the workers then
+read the in-memory copy instead of the filesystem.
+
+The cycle size is the distance from the first page to the next page with
+the same header fingerprint, found in the first PROBE_PAGES pages. JSON
+output:
+    {"pdf": "Ordini.pdf", "pages": 700, "inspected_pages": 700, "stride": 1,
+     "cycle_size": 7, "cycles": 100, "cached_pages": 700, "seconds": 3.1,
+     "fingerprints": {"3fa1c2d0": ["ID", "ID DI VENDITA", ...], ...},
+     "cycle_fingerprints": ["3fa1c2d0", ...],
+     "page_map": [{"page": 1, "cycle": 0, "cycle_page": 1, "fingerprint": "3fa1c2d0", "rows": 20,
+                   "table_bbox": [30.0, 42.0, 470.0, 462.0], "first_row": ["70.962", ...]}, ...],
+     "irregular": [{"cycle": 42, "page": 295, "reason": "header_mismatch"}, ...]}
+page numbers are 1-based. reason is "header_mismatch" (fingerprint differs
+from the same page of the first cycle), "row_mismatch" (the pages of a cycle
+do not have the same row count), "no_table" or "partial_cycle".
 """
-import pdfplumber
-import sys
+
 import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
 
+from feature_cache import FeatureCache, feature_cache_from_argv
+from page_headers import count_pages, scan_page_features
+from pdf_cycles import get_option, has_flag
+from pdf_input import pdf_input_from_argv
+from schema_report import header_fingerprint
 
-def inspect_pdf(pdf_path: str):
-    with pdfplumber.open(pdf_path) as pdf:
-        total = len(pdf.pages)
-        print(f"Total pages: {total}")
-        print("=" * 60)
+# Pages read up front to find the cycle size
+PROBE_PAGES = 32
+# Fewest pages worth a worker process (each worker opens the PDF once)
+MIN_WORKER_PAGES = 64
 
-        for i, page in enumerate(pdf.pages):
-            tables = page.extract_tables()
-            if not tables:
-                print(f"Page {i+1}: NO TABLES")
-                continue
 
-            for t_idx, table in enumerate(tables):
-                if not table:
-                    print(f"Page {i+1} Table {t_idx}: EMPTY")
-                    continue
+def find_cycle_size(fingerprints: List[str]) -> Optional[int]:
+    """Distance from the first page to the next one with the same fingerprint."""
+    for idx in range(1, len(fingerprints)):
+        if fingerprints[idx] == fingerprints[0]:
+            return idx
+    return None
 
-                headers = [(h or '').strip() for h in table[0]]
-                rows = len(table) - 1
-                print(f"\nPage {i+1} Table {t_idx}: {rows} data rows")
-                print(f"  Headers: {headers}")
 
-                if rows > 0 and len(table) > 1:
-                    sample = [(c or '')[:40] for c in table[1]]
-                    print(f"  Row 1:   {sample}")
-                if rows > 1 and len(table) > 2:
-                    sample2 = [(c or '')[:40] for c in table[2]]
-                    print(f"  Row 2:   {sample2}")
+def select_pages(total: int, cycle_size: Optional[int], stride: int) -> List[int]:
+    """0-based pages to inspect: all of them, or every stride-th cycle plus the last cycle and the tail."""
+    if stride <= 1:
+        return list(range(total))
+    if not cycle_size:
+        return sorted(set(range(0, total, stride)) | {total - 1})
+    cycles = total // cycle_size
+    picked = set(range(0, cycles, stride))
+    if cycles:
+        picked.add(cycles - 1)
+    pages = {cycle * cycle_size + offset for cycle in picked for offset in range(cycle_size)}
+    pages.update(range(cycles * cycle_size, total))
+    return sorted(pages)
 
-            if i >= 15:
-                print(f"\n... (showing first 16 of {total} pages)")
-                break
 
+def scan_parallel(pdf_path, pages: List[int], jobs: int) -> Dict[int, dict]:
+    """scan_page_features() over contiguous slices of pages, one worker process per slice."""
+    workers = max(1, min(jobs, len(pages) // MIN_WORKER_PAGES))
+    if workers == 1:
+        return scan_page_features(pdf_path, pages) if pages else {}
+    bounds = [len(pages) * i // workers for i in range(workers + 1)]
+    slices = [pages[start:end] for start, end in zip(bounds, bounds[1:])]
+    features = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(scan_page_features, [pdf_path] * workers, slices):
+            features.update(result)
+    return features
 
-if __name__ == "__main__":
+
+def build_map(pdf_path, jobs: int, stride: int) -> dict:
+    started = time.monotonic()
+    cache = FeatureCache.open(pdf_path)
+    total = cache.page_count if cache and cache.page_count is not None else count_pages(pdf_path)
+    scanned = dict(cache.pages) if cache else {}
+    cached = set(scanned)
+
+    probe = range(min(PROBE_PAGES, total))
+    scanned.update(scan_parallel(pdf_path, [idx for idx in probe if idx not in scanned], 1))
+    cycle_size = find_cycle_size([header_fingerprint(scanned[idx]["header"]) for idx in probe])
+
+    pages = select_pages(total, cycle_size, stride)
+    scanned.update(scan_parallel(pdf_path, [idx for idx in pages if idx not in scanned], jobs))
+    if cache:
+        cache.update({idx: features for idx, features in scanned.items() if idx not in cached})
+        cache.page_count = total
+        cache.save()
+
+    fingerprints = {}
+    page_map = []
+    for idx in pages:
+        features = scanned[idx]
+        fp = header_fingerprint(features["header"]) if features["header"] else None
+        if fp:
+            fingerprints.setdefault(fp, features["header"])
+        entry = {"page": idx + 1}
+        if cycle_size:
+            entry.update(cycle=idx // cycle_size, cycle_page=idx % cycle_size + 1)
+        entry.update(fingerprint=fp, rows=features["rows"], table_bbox=features["table_bbox"],
+                     first_row=features["first_row"])
+        page_map.append(entry)
+
+    reference = []
+    irregular = []
+    if cycle_size:
+        reference = [page_map[i]["fingerprint"] for i in range(cycle_size)]
+        full = total // cycle_size * cycle_size
+        by_cycle = {}
+        for entry in page_map:
+            if entry["page"] > full:
+                continue
+            by_cycle.setdefault(entry["cycle"], []).append(entry)
+            if entry["fingerprint"] is None:
+                irregular.append({"cycle": entry["cycle"], "page": entry["page"], "reason": "no_table"})
+            elif entry["fingerprint"] != reference[entry["cycle_page"] - 1]:
+                irregular.append({"cycle": entry["cycle"], "page": entry["page"], "reason": "header_mismatch"})
+        for cycle, entries in by_cycle.items():
+            counts = sorted({entry["rows"] for entry in entries})
+            if len(counts) > 1:
+                irregular.append({"cycle": cycle, "page": entries[0]["page"], "reason": "row_mismatch", "rows": counts})
+        if full < total:
+            irregular.append({"cycle": total // cycle_size, "page": full + 1, "reason": "partial_cycle",
+                              "pages": total - full})
+        irregular.sort(key=lambda item: item["page"])
+
+    return {
+        "pdf": str(pdf_path),
+        "pages": total,
+        "inspected_pages": len(page_map),
+        "stride": stride,
+        "cycle_size": cycle_size,
+        "cycles": total // cycle_size if cycle_size else None,
+        "cached_pages": len(cached.intersection(pages)),
+        "seconds": round(time.monotonic() - started, 2),
+        "fingerprints": fingerprints,
+        "cycle_fingerprints": reference,
+        "page_map": page_map,
+        "irregular": irregular,
+    }
+
+
+def print_map(cycle_map: dict, all_rows: bool) -> None:
+    print(f"Total pages: {cycle_map['pages']} (inspected {cycle_map['inspected_pages']}, "
+          f"{cycle_map['cached_pages']} from cache, stride {cycle_map['stride']}, {cycle_map['seconds']}s)")
+    print(f"Cycle size: {cycle_map['cycle_size'] or 'not detected'}"
+          + (f", {cycle_map['cycles']} full cycles" if cycle_map["cycle_size"] else ""))
+    print("=" * 60)
+    for offset, fp in enumerate(cycle_map["cycle_fingerprints"], 1):
+        print(f"Cycle page {offset}: {fp}  {cycle_map['fingerprints'].get(fp, [])}")
+    if all_rows:
+        print("=" * 60)
+        for entry in cycle_map["page_map"]:
+            where = f"cycle {entry['cycle']} page {entry['cycle_page']}" if "cycle" in entry else ""
+            sample = [cell[:20] for cell in entry["first_row"]]
+            print(f"Page {entry['page']:>5}  {where:<22} {entry['fingerprint'] or 'NO TABLE':<8}  {entry['rows']:>3} rows  {sample}")
+    print("=" * 60)
+    if not cycle_map["cycle_size"]:
+        print(f"No cycle: the first page header does not repeat in the first {PROBE_PAGES} pages")
+    elif not cycle_map["irregular"]:
+        print("Layout holds on every inspected cycle")
+    for item in cycle_map["irregular"]:
+        detail = {k: v for k, v in item.items() if k not in ("cycle", "page", "reason")}
+        print(f"IRREGULAR cycle {item['cycle']} page {item['page']}: {item['reason']} {json.dumps(detail) if detail else ''}")
+
+
+def main():
     if len(sys.argv) < 2:
-        print("Usage: inspect-pdf-structure.py <pdf_path>", file=sys.stderr)
+        print("Usage: inspect-pdf-structure.py <pdf_path> [--json] [--jobs N] [--stride N] [--rows] [--no-feature-cache] [--mmap]", file=sys.stderr)
         sys.exit(1)
-    inspect_pdf(sys.argv[1])
+
+    feature_cache_from_argv(sys.argv)
+    jobs = int(get_option(sys.argv, "--jobs") or os.cpu_count() or 1)
+    stride = int(get_option(sys.argv, "--stride") or 1)
+    cycle_map = build_map(pdf_input_from_argv(sys.argv), jobs, stride)
+    if has_flag(sys.argv, "--json"):
+        print(json.dumps(cycle_map, ensure_ascii=False))
+    else:
+        print_map(cycle_map, has_flag(sys.argv, "--rows"))
+
+
+if __name__ == "__main__":
+    main()
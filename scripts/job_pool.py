@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Concurrent multi-document parse runs (run-manifest.py).
+
+The nightly sync used to spawn the parsers one after the other, so the small
+exports waited behind the products parse. A manifest lists the documents:
+
+    {"documents": [
+        {"type": "products", "path": "/tmp/Prodotti.pdf", "out": "products.json"},
+        {"type": "orders", "path": "/tmp/Ordini.pdf", "timeout_s": 300,
+         "memory": "400MB", "args": ["--since", "2026-01-20"]},
+        ...]}
+
+type is a parser (PARSER_SCRIPTS); name (default: type) labels the job;
+out defaults to <out_dir>/<name>.out, and the parser's stderr goes to
+<out>.log; tenant (the agent) and priority are only used by
+scheduler.FairScheduler. JobPool runs every document as its own parser
+process with:
+
+- a concurrency cap (--jobs, default the CPU count);
+- a memory cap (--memory-cap): each job reserves its memory (manifest
+  "memory", else DEFAULT_JOB_MEMORY for its type), a job only starts while
+  the running reservations plus its own fit under the cap, and the parser
+  gets --memory-budget <reservation> so its governor keeps to it;
+- longest-first scheduling (largest PDF first), so wall time approaches
+  the longest single job instead of the sum;
+- per-job timeouts: SIGTERM (checkpointing parsers save their state), then
+  SIGKILL after TERM_GRACE_S.
+
+run() drains a fixed job list; watch-exports.py instead submit()s jobs as
+downloads complete and drives the pool with step(). Both CLIs build their
+pool from the same options with pool_from_argv().
+
+Events on stderr:
+    JOB:{"job": "orders", "status": "started", "memory_mb": 400}
+    JOB:{"job": "orders", "status": "done", "exit_code": 0, "seconds": 41.2,
+         "peak_rss_mb": 212.4, "out": "orders.out"}
+    MANIFEST:{"jobs": 6, "failed": 0, "wall_s": 2710.3, "sum_job_s": 3522.9}
+status is "done", "failed" (non-zero exit) or "timeout".
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from memory_budget import parse_memory_budget
+from pdf_cycles import get_option, has_flag
+
+PARSER_SCRIPTS = {
+    "orders": "parse-orders-pdf.py",
+    "ddt": "parse-ddt-pdf.py",
+    "invoices": "parse-invoices-pdf.py",
+    "products": "parse-products-pdf.py",
+    "clienti": "parse-clienti-pdf.py",
+    "prices": "parse-prices-pdf.py",
+    "saleslines": "parse-saleslines-pdf.py",
+}
+
+# Reservation per job when the manifest gives none (the budgets the backend uses)
+DEFAULT_JOB_MEMORY = {
+    "orders": "400MB",
+    "products": "500MB",
+}
+DEFAULT_MEMORY = "300MB"
+
+# Seconds between SIGTERM and SIGKILL for a job past its timeout
+TERM_GRACE_S = 10
+POLL_INTERVAL_S = 0.2
+
+
+@dataclass
+class Job:
+    """One document of the manifest."""
+    name: str
+    type: str
+    path: str
+    out: str
+    args: List[str] = field(default_factory=list)
+    timeout_s: Optional[float] = None
+    memory: int = 0
+    # Agent the job runs for and its priority class (scheduler.py)
+    tenant: Optional[str] = None
+    priority: Optional[str] = None
+    # Runtime state
+    proc: Optional[subprocess.Popen] = None
+    runs: int = 0
+    preempted_by: Optional[str] = None
+    started: float = 0.0
+    terminated_at: Optional[float] = None
+    status: Optional[str] = None
+    exit_code: Optional[int] = None
+    seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+
+def load_manifest(manifest_path, out_dir=None) -> List[Job]:
+    """Jobs from a manifest file (see module docstring)."""
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = Path(out_dir) if out_dir else Path(manifest_path).parent
+    jobs = []
+    names = set()
+    for entry in manifest.get("documents", []):
+        doc_type = entry.get("type")
+        if doc_type not in PARSER_SCRIPTS:
+            raise ValueError(f"Unknown document type {doc_type!r} (expected one of {', '.join(PARSER_SCRIPTS)})")
+        if not entry.get("path"):
+            raise ValueError(f"Document {doc_type!r} has no path")
+        name = entry.get("name", doc_type)
+        if name in names:
+            raise ValueError(f"Duplicate job name {name!r}: set a distinct \"name\"")
+        names.add(name)
+        jobs.append(Job(
+            name=name,
+            type=doc_type,
+            path=entry["path"],
+            out=entry.get("out") or str(base / f"{name}.out"),
+            args=list(entry.get("args", [])),
+            timeout_s=entry.get("timeout_s"),
+            memory=job_memory(doc_type, entry.get("memory")),
+            tenant=entry.get("tenant"),
+            priority=entry.get("priority"),
+        ))
+    return jobs
+
+
+def job_memory(doc_type: str, memory: Optional[str] = None) -> int:
+    """Reservation in bytes: the given budget, else the default for the parser."""
+    return parse_memory_budget(memory or DEFAULT_JOB_MEMORY.get(doc_type, DEFAULT_MEMORY))
+
+
+def _mb(value: int) -> float:
+    return round(value / 1024 ** 2, 1)
+
+
+class JobPool:
+    """Runs parser processes under a concurrency cap and a memory cap."""
+
+    def __init__(self, jobs: List[Job], max_jobs: Optional[int] = None, memory_cap: Optional[int] = None,
+                 extra_args: Optional[List[str]] = None):
+        self.pending: List[Job] = []
+        self.jobs: List[Job] = []
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.memory_cap = memory_cap
+        self.extra_args = extra_args or []
+        self.running: Dict[int, Job] = {}
+        for job in jobs:
+            self.submit(job)
+
+    def submit(self, job: Job) -> None:
+        """Queue a job; it starts on a later step() once it fits."""
+        self.jobs.append(job)
+        self.pending.append(job)
+        self.pending.sort(key=lambda queued: queued.size(), reverse=True)
+
+    def _reserved(self) -> int:
+        return sum(job.memory for job in self.running.values())
+
+    def _fits(self, job: Job) -> bool:
+        if len(self.running) >= self.max_jobs:
+            return False
+        # A job bigger than the whole cap still runs, alone
+        return self.memory_cap is None or not self.running or self._reserved() + job.memory <= self.memory_cap
+
+    def _command(self, job: Job) -> List[str]:
+        script = Path(__file__).parent / PARSER_SCRIPTS[job.type]
+        args = [sys.executable, str(script), job.path, *self.extra_args, *job.args]
+        if "--memory-budget" not in args:
+            args += ["--memory-budget", f"{job.memory // 1024 ** 2}MB"]
+        return args
+
+    def _stdout_path(self, job: Job) -> str:
+        return job.out
+
+    def _start(self, job: Job) -> None:
+        Path(job.out).parent.mkdir(parents=True, exist_ok=True)
+        # A restarted job keeps the log of its earlier runs
+        log_mode = "ab" if job.runs else "wb"
+        with open(self._stdout_path(job), "wb") as stdout, open(f"{job.out}.log", log_mode) as stderr:
+            job.proc = subprocess.Popen(self._command(job), stdout=stdout, stderr=stderr)
+        job.runs += 1
+        job.started = time.monotonic()
+        self.running[job.proc.pid] = job
+        self._event(job, "started", memory_mb=_mb(job.memory))
+
+    def _reap(self) -> List[Job]:
+        finished = []
+        while self.running:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            job = self.running.pop(pid, None)
+            if job is None:
+                continue
+            job.proc.returncode = job.exit_code = os.waitstatus_to_exitcode(status)
+            job.seconds = round(job.seconds + time.monotonic() - job.started, 2)
+            job.peak_rss_mb = max(job.peak_rss_mb or 0.0, round(usage.ru_maxrss / 1024, 1))
+            if self._exited(job):
+                finished.append(job)
+        return finished
+
+    def _exited(self, job: Job) -> bool:
+        """Settle the status of a job whose process ended; False if it is to run again."""
+        if job.terminated_at is not None:
+            job.status = "timeout"
+        else:
+            job.status = "done" if job.exit_code == 0 else "failed"
+        self._event(job, job.status, exit_code=job.exit_code, seconds=job.seconds,
+                    peak_rss_mb=job.peak_rss_mb, out=job.out)
+        return True
+
+    def _enforce_timeouts(self) -> None:
+        now = time.monotonic()
+        for job in self.running.values():
+            if job.timeout_s is None:
+                continue
+            if job.terminated_at is None and now - job.started > job.timeout_s:
+                job.terminated_at = now
+                job.proc.send_signal(signal.SIGTERM)
+            elif job.terminated_at is not None and now - job.terminated_at > TERM_GRACE_S:
+                job.proc.kill()
+
+    def _event(self, job: Job, status: str, **fields) -> None:
+        print(f"JOB:{json.dumps({'job': job.name, 'status': status, **fields})}", file=sys.stderr, flush=True)
+
+    def _admit(self) -> None:
+        """Start the pending jobs that fit, largest first."""
+        for job in list(self.pending):
+            if not self._fits(job):
+                continue
+            self.pending.remove(job)
+            self._start(job)
+
+    def step(self) -> List[Job]:
+        """Start the pending jobs that fit, reap and time out; the jobs that finished."""
+        self._admit()
+        finished = self._reap()
+        self._enforce_timeouts()
+        return finished
+
+    def idle(self) -> bool:
+        return not self.pending and not self.running
+
+    def run(self) -> bool:
+        """Run every job; True if all of them exited 0."""
+        started = time.monotonic()
+        while not self.idle():
+            self.step()
+            if self.running:
+                time.sleep(POLL_INTERVAL_S)
+
+        failed = [job for job in self.jobs if job.status != "done"]
+        summary = {
+            "jobs": len(self.jobs),
+            "failed": len(failed),
+            "wall_s": round(time.monotonic() - started, 2),
+            "sum_job_s": round(sum(job.seconds for job in self.jobs), 2),
+        }
+        print(f"MANIFEST:{json.dumps(summary)}", file=sys.stderr, flush=True)
+        return not failed
+
+
+def pool_from_argv(argv: List[str], jobs: List[Job]) -> JobPool:
+    """The pool set up by --jobs, --memory-cap and --fair, passing --backend and --no-progress to the parsers."""
+    # scheduler builds on this module
+    from scheduler import FairScheduler
+
+    max_jobs = get_option(argv, "--jobs")
+    memory_cap = get_option(argv, "--memory-cap")
+    extra_args = []
+    backend = get_option(argv, "--backend")
+    if backend:
+        extra_args += ["--backend", backend]
+    if has_flag(argv, "--no-progress"):
+        extra_args.append("--no-progress")
+    pool_class = FairScheduler if has_flag(argv, "--fair") else JobPool
+    return pool_class(
+        jobs,
+        max_jobs=int(max_jobs) if max_jobs else None,
+        memory_cap=parse_memory_budget(memory_cap) if memory_cap else None,
+        extra_args=extra_args,
+    )
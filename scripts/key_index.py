@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Sidecar key index for single-record extraction (--write-index / --key).
+
+Refreshing one order, customer or invoice used to mean re-parsing the whole
+export. A full parse with --write-index also writes a sidecar (--index PATH,
+default <pdf>.keys.json) mapping every record key to the cycle that holds it
+and the record's position within that cycle:
+
+    {"parser": "orders", "pdf_fingerprint": "...", "cycle_size": 7,
+     "total_pages": 700, "key_fields": ["id", "order_number"],
+     "keys": {"id": {"70.962": [12, 4]}, "order_number": {"ORD/26000887": [12, 4]}}}
+
+Only full runs write it (no --shard/--pages/--resume); it is written to
+<path>.tmp and renamed into place (pdf_cycles.FullRunArtifact).
+
+--key order_number=ORD/26000887 (or just --key ORD/26000887 for the parser's
+first key field) then parses only that cycle and emits the matching record
+in the parser's normal output format. Without a usable index (missing, or
+written for another PDF) the lookup falls back to scanning the document and
+stops at the first match. A key that is not found exits with code 1.
+
+Key fields per parser: orders id/order_number, DDT ddt_number, invoices
+invoice_number, products id_articolo, customers customer_profile.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Generator, Iterable, List, Optional, Tuple
+
+from pdf_cycles import CycleSelection, FullRunArtifact, get_option, has_flag
+from pdf_input import fd_of
+
+KEY_FIELDS = {
+    "orders": ["id", "order_number"],
+    "ddt": ["ddt_number"],
+    "invoices": ["invoice_number"],
+    "products": ["id_articolo"],
+    "clienti": ["customer_profile"],
+}
+
+# Bytes hashed from each end of the PDF for the index fingerprint
+FINGERPRINT_CHUNK = 1024 * 1024
+
+
+def pdf_fingerprint(path) -> str:
+    """Cheap identity of a PDF: size plus the first and last FINGERPRINT_CHUNK bytes."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_CHUNK))
+        if size > FINGERPRINT_CHUNK:
+            f.seek(max(FINGERPRINT_CHUNK, size - FINGERPRINT_CHUNK))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def default_index_path(pdf_path) -> str:
+    if fd_of(pdf_path) is not None:
+        raise ValueError("PDF read from stdin or a descriptor: give the key index location with --index PATH")
+    return f"{pdf_path}.keys.json"
+
+
+class KeyIndexWriter(FullRunArtifact):
+    """Collects key -> [cycle, position] while a full parse runs and writes the index."""
+
+    ARTIFACT = "key index"
+    SUMMARY_PREFIX = "KEY_INDEX"
+
+    def __init__(self, parser_name: str, pdf_path, index_path: str):
+        super().__init__(parser_name, pdf_path, index_path)
+        self.key_fields = KEY_FIELDS[parser_name]
+        self.keys: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.key_fields}
+        self.duplicates = 0
+        self.cycle_size = 0
+        self.total_pages = 0
+        self._cycle = 0
+        self._position = 0
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        super().on_start(pdf_path, total_pages, cycle_size, cycles)
+        self.total_pages = total_pages
+        self.cycle_size = cycle_size
+        self._cycle = cycles.start if cycles is not None else 0
+
+    def after_cycle(self, cycle_idx: int) -> None:
+        self._cycle = cycle_idx + 1
+        self._position = 0
+
+    def on_record(self, record) -> None:
+        for field in self.key_fields:
+            value = getattr(record, field, None)
+            if not value:
+                continue
+            if value in self.keys[field]:
+                self.duplicates += 1
+                continue
+            self.keys[field][value] = [self._cycle, self._position]
+        self._position += 1
+
+    def write(self) -> dict:
+        index = {
+            "parser": self.parser_name,
+            "pdf_fingerprint": pdf_fingerprint(self.pdf_path),
+            "cycle_size": self.cycle_size,
+            "total_pages": self.total_pages,
+            "key_fields": self.key_fields,
+            "keys": self.keys,
+        }
+        self.write_json(index)
+        return {"keys": {field: len(values) for field, values in self.keys.items()}, "duplicates": self.duplicates}
+
+
+class KeyLookup:
+    """Single-record extraction: the cycle to parse and the record filter."""
+
+    def __init__(self, parser_name: str, pdf_path, field: str, value: str, index_path: str):
+        self.parser_name = parser_name
+        self.pdf_path = pdf_path
+        self.field = field
+        self.value = value
+        self.location: Optional[Tuple[int, int]] = None
+        self.found = False
+        index = self._load(index_path)
+        if index is None:
+            print(f"Warning: no usable key index at {index_path}, scanning the whole document", file=sys.stderr)
+            self.selection = None
+            return
+        location = index["keys"].get(field, {}).get(value)
+        if location is None:
+            raise KeyError(f"{field}={value} not in key index {index_path}")
+        self.location = (location[0], location[1])
+        cycle_size = index["cycle_size"]
+        self.selection = CycleSelection(pages=(location[0] * cycle_size, (location[0] + 1) * cycle_size))
+
+    def _load(self, index_path: str) -> Optional[dict]:
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("parser") != self.parser_name or index.get("pdf_fingerprint") != pdf_fingerprint(self.pdf_path):
+            return None
+        return index
+
+    def apply(self, records: Iterable) -> Generator:
+        """Yield the first record whose key matches, then stop parsing."""
+        try:
+            for record in records:
+                if getattr(record, self.field, None) == self.value:
+                    self.found = True
+                    yield record
+                    break
+        finally:
+            if hasattr(records, "close"):
+                records.close()
+
+
+def parse_key_option(parser_name: str, spec: str) -> Tuple[str, str]:
+    """'field=value' or a bare value (first key field of the parser)."""
+    fields = KEY_FIELDS.get(parser_name)
+    if not fields:
+        raise ValueError(f"--key is not supported by the {parser_name} parser")
+    field, sep, value = spec.partition("=")
+    if sep and field in fields:
+        return field, value
+    return fields[0], spec
+
+
+def key_index_from_argv(parser_name: str, pdf_path, argv: List[str]) -> Optional[KeyIndexWriter]:
+    """KeyIndexWriter for --write-index (path from --index), or None."""
+    # A lookup or a --since run does not see every record
+    if not has_flag(argv, "--write-index") or get_option(argv, "--key") or get_option(argv, "--since"):
+        return None
+    return KeyIndexWriter(parser_name, pdf_path, get_option(argv, "--index") or default_index_path(pdf_path))
+
+
+def key_lookup_from_argv(parser_name: str, pdf_path, argv: List[str]) -> Optional[KeyLookup]:
+    """KeyLookup for --key (index from --index), or None."""
+    spec = get_option(argv, "--key")
+    if spec is None:
+        return None
+    field, value = parse_key_option(parser_name, spec)
+    return KeyLookup(parser_name, pdf_path, field, value, get_option(argv, "--index") or default_index_path(pdf_path))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Memory budget governor for the cycle parsers (--memory-budget).
+
+The backend container shares RAM with Chromium/Puppeteer, and an OOM kill of
+the parser loses the whole sync. With a budget set, the governor samples RSS
+(and optionally the tracemalloc Python heap) after every cycle and, once usage
+crosses SOFT_LIMIT_RATIO of the budget, steps the parser down one level:
+
+1. release_caches   - close each page after extraction + gc.collect()
+2. shrink_batch     - cap/halve the cycles read per open PDF (orders/DDT/
+                      invoices keep one instance for the whole document by
+                      default), once per over-budget sample...
+3. reopen_per_cycle - ...until it is one fresh instance per cycle (pdfplumber#193)
+
+Past that point a single budget_exceeded event is reported and parsing goes on:
+slowing down is the only lever, aborting would lose the sync anyway.
+
+Every adjustment is reported on stderr as:
+    MEMORY_BUDGET:{"parser": "orders", "action": "shrink_batch", "cycle": 12, ...}
+
+Usage (any cycle parser):
+    python3 parse-orders-pdf.py Ordini.pdf --memory-budget 400MB [--memory-trace]
+"""
+
+import gc
+import json
+import os
+import re
+import sys
+import tracemalloc
+from typing import Callable, List, Optional
+
+from pdf_cycles import get_option, has_flag
+
+SOFT_LIMIT_RATIO = 0.8
+
+# Cycles per open used as the first shrink_batch step when the parser had no cap
+INITIAL_BATCH_CAP = 16
+
+_UNITS = {"": 1024 ** 2, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_memory_budget(value: str) -> int:
+    """Parse '512MB', '512M', '1.5G', '800000K' or '512' (MB) into bytes."""
+    match = re.match(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:I?B)?\s*$", value or "", re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid memory budget: {value!r} (expected e.g. 512MB or 1G)")
+    number, unit = match.groups()
+    budget = int(float(number) * _UNITS[unit.upper()])
+    if budget <= 0:
+        raise ValueError(f"Memory budget must be positive: {value!r}")
+    return budget
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Current resident set size, or the peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / 1024 ** 2, 1) if value is not None else None
+
+
+class MemoryBudgetGovernor:
+    """Adapts cycle batching to an RSS budget, one step per over-budget sample."""
+
+    LEVELS = ["release_caches", "shrink_batch"]
+
+    def __init__(
+        self,
+        parser_name: str,
+        budget_bytes: int,
+        trace_python: bool = False,
+        rss_sampler: Callable[[], Optional[int]] = current_rss_bytes,
+    ):
+        self.parser_name = parser_name
+        self.budget_bytes = budget_bytes
+        self.trace_python = trace_python
+        self.rss_sampler = rss_sampler
+        self.release_caches = False
+        self.max_cycles_per_open: Optional[int] = None
+        self.level = 0
+        self.peak_rss: Optional[int] = None
+        self.adjustments: List[dict] = []
+        self._exhausted_reported = False
+        self._requested: Optional[int] = None
+        if trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def effective_cycles_per_open(self, requested: Optional[int]) -> Optional[int]:
+        """Cycles per open after the governor's cap (None = unbounded)."""
+        self._requested = requested
+        if self.max_cycles_per_open is None:
+            return requested
+        if requested is None:
+            return self.max_cycles_per_open
+        return min(requested, self.max_cycles_per_open)
+
+    def after_cycle(self, cycle_idx: int) -> None:
+        """Sample memory after a completed cycle and step down if near budget."""
+        rss = self.rss_sampler()
+        if rss is None:
+            return
+        if self.peak_rss is None or rss > self.peak_rss:
+            self.peak_rss = rss
+        if rss < self.budget_bytes * SOFT_LIMIT_RATIO:
+            return
+
+        # Shrinking is a no-op once the parser already re-opens per cycle
+        if self.level > 0 and self.effective_cycles_per_open(self._requested) == 1:
+            self.level = len(self.LEVELS)
+
+        if self.level >= len(self.LEVELS):
+            if rss >= self.budget_bytes and not self._exhausted_reported:
+                self._exhausted_reported = True
+                self._report("budget_exceeded", cycle_idx, rss)
+            return
+
+        action = self.LEVELS[self.level]
+        if action == "release_caches":
+            self.release_caches = True
+            self.level += 1
+        else:
+            current = self.effective_cycles_per_open(self._requested)
+            self.max_cycles_per_open = INITIAL_BATCH_CAP if current is None else max(1, current // 2)
+            if self.max_cycles_per_open == 1:
+                action = "reopen_per_cycle"
+                self.level = len(self.LEVELS)
+
+        gc.collect()
+        self._report(action, cycle_idx, rss)
+
+    def _report(self, action: str, cycle_idx: int, rss: int) -> None:
+        event = {
+            "parser": self.parser_name,
+            "action": action,
+            "cycle": cycle_idx,
+            "rss_mb": _mb(rss),
+            "budget_mb": _mb(self.budget_bytes),
+            "cycles_per_open": self.effective_cycles_per_open(self._requested),
+        }
+        if self.trace_python:
+            current, peak = tracemalloc.get_traced_memory()
+            event["py_heap_mb"] = _mb(current)
+            event["py_heap_peak_mb"] = _mb(peak)
+        self.adjustments.append(event)
+        print(f"MEMORY_BUDGET:{json.dumps(event)}", file=sys.stderr)
+
+
+def governor_from_argv(parser_name: str, argv: List[str]) -> Optional[MemoryBudgetGovernor]:
+    """Build a governor from --memory-budget/--memory-trace, or None if unset."""
+    budget = get_option(argv, "--memory-budget")
+    if budget is None:
+        return None
+    return MemoryBudgetGovernor(
+        parser_name,
+        parse_memory_budget(budget),
+        trace_python=has_flag(argv, "--memory-trace"),
+    )
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Merge the outputs of --shard / --pages runs back into document order.
+
+Each output needs the descriptor its run wrote (--shard-info PATH, default
+<out>.shard.json when the parser ran with --out); by default it is looked up
+as <output>.shard.json.
+
+Usage:
+    python3 merge-shards.py <output> [<output> ...] [options] > merged
+
+Example:
+    for i in 1 2 3 4; do
+        python3 parse-ddt-pdf.py DDT.pdf --shard $i/4 --shard-info ddt.$i.ndjson.shard.json > ddt.$i.ndjson &
+    done; wait
+    python3 merge-shards.py ddt.*.ndjson > ddt.ndjson
+
+Options:
+    --allow-gaps    merge even if cycles are missing (re-parse of one region);
+                    gaps are still reported
+    --out PATH      write the merged output to PATH instead of stdout
+
+Every gap, overlap or mismatch is reported on stderr as MERGE_PROBLEM:{json};
+exit code 1 if nothing was merged.
+"""
+
+import json
+import sys
+
+from pdf_cycles import get_option, has_flag
+from shards import merge_shards
+
+
+def main():
+    """Main entry point"""
+    out_path = get_option(sys.argv, "--out")
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("--") and arg != out_path]
+    if not paths:
+        print("Usage: merge-shards.py <output> [<output> ...] [--allow-gaps] [--out PATH]", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        outputs = []
+        for path in paths:
+            with open(f"{path}.shard.json", encoding="utf-8") as f:
+                outputs.append((path, json.load(f)))
+
+        merged, problems = merge_shards(outputs, allow_gaps=has_flag(sys.argv, "--allow-gaps"))
+        for problem in problems:
+            print(f"MERGE_PROBLEM:{json.dumps(problem)}", file=sys.stderr)
+        if merged is None:
+            sys.exit(1)
+
+        if out_path:
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(merged)
+        else:
+            sys.stdout.write(merged)
+
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Per-customer, per-month order rollups written by the orders parser
+(--rollups PATH).
+
+The dashboards (dashboard-service.ts, temporal-comparisons.ts,
+widget-calculations.ts) recomputed order counts and totals per customer and
+per month from the orders table after every sync, parsing the amount
+strings again each time. With --rollups the parser also keeps running
+aggregates while the orders stream and writes them at the end, from the
+same single pass over the PDF:
+
+    {"parser": "orders", "source": "Ordini.pdf", "built_at": "...",
+     "orders": 9812, "skipped": 3,
+     "customers": [{"customer_profile_id": "1002241", "month": "2026-01",
+                    "orders": 4, "gross_cents": 42240, "total_cents": 33164, "unpriced": 0,
+                    "sales_status": {"Consegnato": 3, "Ordine aperto": 1},
+                    "document_status": {"Documento di trasporto": 3, "Nessuno": 1}},
+                   ...],
+     "months": [{"month": "2026-01", "orders": 812, ...}, ...]}
+
+customers holds one row per (customer_profile_id, month of creation_date),
+sorted by both; pending orders have a null customer_profile_id. months holds
+the same aggregates over every customer. Amounts are integer cents parsed
+by amount_cents() with the rules of the backend's parseItalianCurrency
+(credit notes stay negative); an amount that does not parse adds nothing
+and is counted in unpriced. Orders without a creation_date are skipped.
+
+Only full runs write the rollups (no --shard/--pages/--resume, --since or
+--key). The file is written to <path>.tmp and renamed into place
+(pdf_cycles.FullRunArtifact). Summary:
+
+    ROLLUPS:{"path": "orders.rollups.json", "orders": 9812,
+             "customers": 1204, "months": 26, "skipped": 3}
+"""
+
+from collections import Counter
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from pdf_cycles import FullRunArtifact
+
+
+def amount_cents(value: Optional[str]) -> Optional[int]:
+    """'1.791,01 €' -> 179101, '-12,50 €' -> -1250, '409.85' -> 40985; None if empty or not a number."""
+    if not value:
+        return None
+    cleaned = value.replace("€", "").strip()
+    # Italian format: dots are thousands separators, the comma is the decimal mark
+    if "," in cleaned:
+        cleaned = cleaned.replace(".", "").replace(",", ".", 1)
+    try:
+        return int((Decimal(cleaned) * 100).to_integral_value(ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+class Rollup:
+    """Running aggregates of one group of orders."""
+
+    __slots__ = ("orders", "gross_cents", "total_cents", "unpriced", "sales_status", "document_status")
+
+    def __init__(self):
+        self.orders = 0
+        self.gross_cents = 0
+        self.total_cents = 0
+        self.unpriced = 0
+        self.sales_status: Counter = Counter()
+        self.document_status: Counter = Counter()
+
+    def add(self, order, gross: Optional[int], total: Optional[int]) -> None:
+        self.orders += 1
+        self.gross_cents += gross or 0
+        self.total_cents += total or 0
+        self.unpriced += total is None
+        self.sales_status[order.sales_status or ""] += 1
+        self.document_status[order.document_status or ""] += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "orders": self.orders,
+            "gross_cents": self.gross_cents,
+            "total_cents": self.total_cents,
+            "unpriced": self.unpriced,
+            "sales_status": dict(sorted(self.sales_status.items())),
+            "document_status": dict(sorted(self.document_status.items())),
+        }
+
+
+class OrderRollups(FullRunArtifact):
+    """Adds each parsed order to its customer's and its month's rollup and writes them at the end."""
+
+    ARTIFACT = "rollups file"
+    SUMMARY_PREFIX = "ROLLUPS"
+    OPTION = "--rollups"
+
+    def __init__(self, parser_name: str, pdf_path, rollups_path: str, source: Optional[str] = None):
+        super().__init__(parser_name, pdf_path, rollups_path, source)
+        self.customers: Dict[Tuple[str, str], Rollup] = {}
+        self.months: Dict[str, Rollup] = {}
+        self.orders = 0
+        self.skipped = 0
+
+    def on_record(self, order) -> None:
+        month = (order.creation_date or "")[:7]
+        if len(month) != 7:
+            self.skipped += 1
+            return
+        self.orders += 1
+        gross, total = amount_cents(order.gross_amount), amount_cents(order.total_amount)
+        key = (order.customer_profile_id or "", month)
+        if key not in self.customers:
+            self.customers[key] = Rollup()
+        self.customers[key].add(order, gross, total)
+        if month not in self.months:
+            self.months[month] = Rollup()
+        self.months[month].add(order, gross, total)
+
+    def write(self) -> dict:
+        output = {
+            "parser": self.parser_name,
+            "source": self.source,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "orders": self.orders,
+            "skipped": self.skipped,
+            "customers": [
+                {"customer_profile_id": customer or None, "month": month, **rollup.to_dict()}
+                for (customer, month), rollup in sorted(self.customers.items())
+            ],
+            "months": [{"month": month, **rollup.to_dict()} for month, rollup in sorted(self.months.items())],
+        }
+        self.write_json(output)
+        return {
+            "orders": self.orders, "customers": len({customer for customer, _ in self.customers}),
+            "months": len(self.months), "skipped": self.skipped,
+        }
+
+
+def rollups_from_argv(parser_name: str, pdf_path, argv: List[str]) -> Optional[OrderRollups]:
+    """OrderRollups for --rollups PATH, or None."""
+    return OrderRollups.from_argv(parser_name, pdf_path, argv)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Cheap page classification by table header (cycle detection).
+
+_detect_cycle_size only needs the header row of each page, but it used to
+run full table extraction page by page until two anchors were found. The
+header row is read here from the lean pdfminer pass of extraction.py (glyph
+boxes and ruling lines, no table finding): it is the band between the first
+two horizontal rules crossed by at least two vertical rules, cut into cells
+at those vertical rules, which is the first row pdfplumber's table finder
+would return. Scanning the raw content streams for the header strings was
+not an option: the exports use CID fonts, whose strings are glyph ids.
+detect_cycle_size() stops at the second anchor, as before, and the pages it
+scans go to the feature cache (feature_cache.py).
+
+Irregular cycles are found from the header rows the parse extracts anyway:
+the SCHEMA: report (schema_report.py) compares every cycle with the first
+one read and flags a trailing partial cycle. inspect-pdf-structure.py scans
+every page header up front instead (scan_page_features()), without a parse.
+"""
+
+from contextlib import closing
+from typing import Callable, Dict, Generator, List, Optional, Sequence, Tuple
+
+from feature_cache import FeatureCache
+
+# Rules closer than this are the same line (pdfplumber snap_tolerance)
+SNAP_TOLERANCE = 3.0
+
+HeaderCells = Tuple[str, ...]
+
+
+def _snap(values: List[float]) -> List[float]:
+    clusters: List[List[float]] = []
+    for value in sorted(values):
+        if clusters and value - clusters[-1][0] <= SNAP_TOLERANCE:
+            clusters[-1].append(value)
+        else:
+            clusters.append([value])
+    return [sum(c) / len(c) for c in clusters]
+
+
+def _ruled_bands(edges: List[dict]) -> List[Tuple[float, float, List[float]]]:
+    """(top, bottom, vertical rule xs) of every band between horizontal rules crossed by two or more verticals."""
+    rows = _snap([e["top"] for e in edges if e["orientation"] == "h"])
+    verticals = [e for e in edges if e["orientation"] == "v"]
+    bands = []
+    for top, bottom in zip(rows, rows[1:]):
+        xs = _snap([e["x0"] for e in verticals if e["top"] <= top + SNAP_TOLERANCE and e["bottom"] >= bottom - SNAP_TOLERANCE])
+        if len(xs) >= 2:
+            bands.append((top, bottom, xs))
+    return bands
+
+
+def _band_cells(chars: List[dict], top: float, bottom: float, xs: List[float]) -> HeaderCells:
+    cells: List[List[dict]] = [[] for _ in xs[1:]]
+    for char in chars:
+        mid_y = (char["top"] + char["bottom"]) / 2
+        mid_x = (char["x0"] + char["x1"]) / 2
+        if not top <= mid_y < bottom:
+            continue
+        for idx, (left, right) in enumerate(zip(xs, xs[1:])):
+            if left <= mid_x < right:
+                cells[idx].append(char)
+                break
+    from pdfplumber import utils
+
+    return tuple(utils.extract_text(cell) if cell else "" for cell in cells)
+
+
+def page_features(chars: List[dict], edges: List[dict]) -> dict:
+    """
+    Features of the first ruled table of the page (feature_cache.py format).
+
+    header: header cells ([] if the page has no ruled table); rows: the
+    ruled bands directly below the header, as in pdfplumber's table minus
+    its header row, without the ERP totals row ("Count=1980", "Sum=...")
+    that ends the last page of some exports; table_bbox: [x0, top, x1,
+    bottom] of those bands; first_row: cells of the first data row.
+    """
+    bands = _ruled_bands(edges)
+    if not bands:
+        return {"header": [], "rows": 0, "table_bbox": None, "first_row": []}
+    table = [bands[0]]
+    for band in bands[1:]:
+        if abs(band[0] - table[-1][1]) > SNAP_TOLERANCE:
+            break
+        table.append(band)
+    rows = len(table) - 1
+    if rows:
+        last = " ".join(_band_cells(chars, *table[-1])).lower()
+        if "count=" in last or "sum=" in last:
+            rows -= 1
+    xs = table[0][2]
+    return {
+        "header": list(_band_cells(chars, *table[0])),
+        "rows": rows,
+        "table_bbox": [round(v, 1) for v in (xs[0], table[0][0], xs[-1], table[-1][1])],
+        "first_row": list(_band_cells(chars, *table[1])) if rows else [],
+    }
+
+
+def scan_page_features(pdf_path, page_indexes: Sequence[int]) -> Dict[int, dict]:
+    """page_features() of the given 0-based pages, in one lean pass (no cache)."""
+    from pdfminer_backend import LeanPDF
+
+    results = {}
+    with LeanPDF(pdf_path) as pdf:
+        for idx in page_indexes:
+            page = pdf.pages[idx]
+            results[idx] = page_features(page.chars, page.edges)
+            page.close()
+    return results
+
+
+def cached_page_features(pdf_path, page_indexes: Optional[Sequence[int]] = None) -> Dict[int, dict]:
+    """
+    Features of the given pages (default: every page), read from the
+    feature cache where present; the pages scanned here are added to it.
+    """
+    cache = FeatureCache.open(pdf_path)
+    if page_indexes is None:
+        total = cache.page_count if cache and cache.page_count is not None else count_pages(pdf_path)
+        page_indexes = range(total)
+    if cache is None:
+        return scan_page_features(pdf_path, page_indexes)
+    missing = cache.missing(page_indexes)
+    if missing:
+        cache.update(scan_page_features(pdf_path, missing))
+        cache.page_count = cache.page_count or count_pages(pdf_path)
+        cache.save()
+    return {idx: cache.get(idx) for idx in page_indexes}
+
+
+def count_pages(pdf_path) -> int:
+    from pdfminer_backend import LeanPDF
+
+    with LeanPDF(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def scan_page_headers(pdf_path) -> List[HeaderCells]:
+    """Header cells of every page, in one lean pass over the document (or from the feature cache)."""
+    features = cached_page_features(pdf_path)
+    return [tuple(features[idx]["header"]) for idx in sorted(features)]
+
+
+def iter_page_headers(pdf_path) -> Generator[HeaderCells, None, None]:
+    """
+    Header cells of each page in order, read lazily: from the feature cache
+    where present, else by the lean pass. The pages scanned here are added to
+    the cache when the generator is closed.
+    """
+    from pdfminer_backend import LeanPDF
+
+    cache = FeatureCache.open(pdf_path)
+    scanned: Dict[int, dict] = {}
+    total = None
+    try:
+        with LeanPDF(pdf_path) as pdf:
+            total = len(pdf.pages)
+            for idx in range(total):
+                features = cache.get(idx) if cache else None
+                if features is None:
+                    page = pdf.pages[idx]
+                    features = scanned[idx] = page_features(page.chars, page.edges)
+                    page.close()
+                yield tuple(features["header"])
+    finally:
+        if cache is not None and scanned:
+            cache.update(scanned)
+            cache.page_count = cache.page_count or total
+            cache.save()
+
+
+def detect_cycle_size(pdf_path, is_anchor: Callable[[List[str]], bool]) -> Optional[int]:
+    """
+    Distance between the first two anchor pages, or None if there are fewer.
+
+    is_anchor gets the stripped, upper-cased header cells of a page (the
+    parsers' existing anchor rules). The scan stops at the second anchor.
+    """
+    anchors: List[int] = []
+    with closing(iter_page_headers(pdf_path)) as headers:
+        for idx, cells in enumerate(headers):
+            if cells and is_anchor([c.strip().upper() for c in cells]):
+                anchors.append(idx)
+                if len(anchors) == 2:
+                    return anchors[1] - anchors[0]
+    return None
+
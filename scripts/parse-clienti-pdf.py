@@ -6,25 +6,66 @@ Parses Archibald "Clienti.pdf" export and extracts structured customer data.
 Uses pdfplumber to preserve column positions and table structure.
 
 Usage:
-    python3 parse-clienti-pdf.py <path-to-pdf> [--output json|csv]
+    python3 parse-clienti-pdf.py <path-to-pdf> [--output json|csv] [options]
 
 Example:
     python3 parse-clienti-pdf.py Clienti.pdf --output json > customers.json
+
+With --output json each customer carries its "fingerprint" (record_fingerprint.py).
+
+Options:
+    --memory-budget 300MB   adapt to an RSS budget (memory_budget.py)
+    --memory-trace          also report the tracemalloc Python heap
+    --progress-interval 2   seconds between PROGRESS: lines (0 = every cycle)
+    --no-progress           disable PROGRESS: lines
+    --schema-baseline PATH  compare the page headers with a saved set (schema_report.py)
+    --no-schema             disable the SCHEMA: report
+    --max-null-rate 0.5     abort when a required field is empty in more of the first cycles'
+                            records (fail-fast checks, sanity_checks.py)
+    --sanity-cycles 3       cycles watched for required-field nulls and header changes
+    --max-row-drop 0.9      abort when a cycle yields under 10% of the recent median rows
+    --expect-headers PATH   abort unless the headers match this --schema-baseline file
+    --no-sanity             disable the fail-fast checks
+    --backend pdfminer      PDF extraction backend: pdfplumber (default), pdfminer or poppler (extraction.py)
+    --mmap                  serve the PDF from one read-only memory map (pdf_input.py)
+    - / fd:3 as pdf_path    read the PDF from stdin / inherited descriptor 3
+    --selftest              check the dependencies on an embedded PDF, print JSON, exit (selftest.py)
+    --shard 2/4             parse only the 2nd of 4 equal cycle ranges (merge-shards.py)
+    --pages 140:280         parse only pages [140, 280), widened to whole cycles
+    --shard-info PATH       write the shard descriptor merge-shards.py needs
+    --write-index           also write the record key index (key_index.py)
+    --index PATH            key index location (default: <pdf>.keys.json)
+    --key FIELD=VALUE       parse only the cycle holding this record (customer_profile)
+    --lookup-index PATH     also write the customer lookup index (customer_index.py)
 """
 
+import importlib.util
 import sys
 import json
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Generator, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
-try:
-    import pdfplumber
-except ImportError:
+# Checked without importing it: pdfplumber loads when the first PDF is opened
+if importlib.util.find_spec("pdfplumber") is None:
     print("Error: pdfplumber not installed. Run: pip3 install pdfplumber", file=sys.stderr)
     sys.exit(1)
 
+from customer_index import customer_index_from_argv
+from extraction import backend_from_argv
+from key_index import key_index_from_argv, key_lookup_from_argv
+from memory_budget import governor_from_argv
+from page_headers import detect_cycle_size
+from parse_progress import progress_from_argv
+from pdf_cycles import iter_cycle_tables, observe_records, selection_from_argv
+from pdf_input import pdf_input_from_argv
+from record_fingerprint import with_fingerprint
+from sanity_checks import sanity_from_argv
+from schema_report import schema_from_argv
+from selftest import selftest_from_argv
+from shards import shard_info_from_argv
+
 
 @dataclass
 class ParsedCustomer:
@@ -69,30 +110,21 @@ class ParsedCustomer:
 class CustomerPDFParser:
     """Parser for Archibald Customer PDF exports using pdfplumber"""
 
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, governor=None, observers=(), selection=None):
         self.pdf_path = Path(pdf_path)
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        self.governor = governor  # Optional MemoryBudgetGovernor (--memory-budget)
+        self.observers = observers  # CycleObserver hooks (e.g. ProgressReporter)
+        self.selection = selection  # Optional CycleSelection (--shard/--pages)
 
     EXPECTED_CYCLE_SIZE = 9
 
     def _detect_cycle_size(self) -> int:
-        """Auto-detect cycle size by scanning for repeated 'ID' header in first column."""
-        with pdfplumber.open(self.pdf_path) as pdf:
-            id_header_pages = []
-            for page_idx, page in enumerate(pdf.pages):
-                tables = page.extract_tables()
-                if tables and len(tables[0]) > 0:
-                    header_row = tables[0][0]
-                    if header_row and len(header_row) > 0:
-                        first_col = (header_row[0] or '').strip().upper()
-                        if first_col == 'ID':
-                            id_header_pages.append(page_idx)
-                if len(id_header_pages) >= 2:
-                    break
-
-        if len(id_header_pages) >= 2:
-            detected = id_header_pages[1] - id_header_pages[0]
+        """Auto-detect cycle size from the 'ID' header in the first column of the first pages (page_headers.py)."""
+        detected = detect_cycle_size(self.pdf_path, lambda headers: headers[0] == 'ID')
+
+        if detected:
             status = "OK" if detected == self.EXPECTED_CYCLE_SIZE else "CHANGED"
             self._emit_cycle_warning(detected, status)
             return detected
@@ -105,55 +137,44 @@ class CustomerPDFParser:
         print(f"CYCLE_SIZE_WARNING:{json.dumps(warning)}", file=sys.stderr)
 
     def parse(self) -> List[ParsedCustomer]:
+        """Parse PDF and return list of structured customers (see parse_streaming)"""
+        return list(self.parse_streaming())
+
+    def parse_streaming(self) -> Generator[ParsedCustomer, None, None]:
         """
-        Parse PDF and return list of structured customers
+        Parse PDF and yield structured customers cycle by cycle
 
         Memory optimization: Re-opens PDF for each cycle to force garbage collection.
         Reduces memory from ~GB to <100MB following pdfplumber best practices.
         """
-        customers = []
-
         cycle_size = self._detect_cycle_size()
         print(f"Detected cycle size: {cycle_size} pages", file=sys.stderr)
 
-        # First pass: get total pages
-        with pdfplumber.open(self.pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            cycles = total_pages // cycle_size
-
         # Process each cycle with fresh PDF instance (critical for memory!)
-        for cycle in range(cycles):
-            base_idx = cycle * cycle_size
-
-            # Re-open PDF for this cycle only - forces garbage collection
-            with pdfplumber.open(self.pdf_path) as pdf:
-                # Extract tables for this cycle only (not all pages!)
-                cycle_tables = []
-                for offset in range(cycle_size):
-                    page_idx = base_idx + offset
-                    if page_idx < total_pages:
-                        page = pdf.pages[page_idx]
-                        tables = page.extract_tables()
-                        if tables:
-                            # Diagnostic: dump headers for first cycle
-                            if cycle == 0 and tables[0] and len(tables[0]) > 0:
-                                headers = [(h or '').strip() for h in tables[0][0]]
-                                rows_count = len(tables[0]) - 1
-                                print(f"DIAG_PAGE:{offset+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
-                            # Get first table, skip header row
-                            table_data = tables[0][1:] if len(tables[0]) > 1 else []
-                            cycle_tables.append(table_data)
-                        else:
-                            cycle_tables.append([])
-                    else:
-                        cycle_tables.append([])
-
-            # Parse this cycle and add customers
-            # (PDF context closed here, memory freed before next cycle)
-            cycle_customers = self._parse_single_cycle(cycle_tables, cycle_size)
-            customers.extend(cycle_customers)
-
-        return customers
+        cycles = iter_cycle_tables(
+            self.pdf_path,
+            cycle_size,
+            cycles_per_open=1,
+            governor=self.governor,
+            observers=self.observers,
+            selection=self.selection,
+        )
+        for cycle, tables in cycles:
+            cycle_tables = []
+            for offset, table in enumerate(tables):
+                if table:
+                    # Diagnostic: dump headers for first cycle
+                    if cycle == 0:
+                        headers = [(h or '').strip() for h in table[0]]
+                        rows_count = len(table) - 1
+                        print(f"DIAG_PAGE:{offset+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
+                    # Get first table, skip header row
+                    cycle_tables.append(table[1:])
+                else:
+                    cycle_tables.append([])
+
+            # Parse this cycle and yield its customers
+            yield from self._parse_single_cycle(cycle_tables, cycle_size)
 
     def _parse_single_cycle(self, cycle_tables: List[List[List[str]]], cycle_size: int) -> List[ParsedCustomer]:
         """Parse a single N-page cycle and return customers"""
@@ -454,11 +475,11 @@ class CustomerPDFParser:
 
 def main():
     """Main CLI entry point"""
+    selftest_from_argv("clienti", sys.argv)
     if len(sys.argv) < 2:
-        print("Usage: python3 parse-clienti-pdf.py <path-to-pdf> [--output json|csv]")
+        print("Usage: python3 parse-clienti-pdf.py <path-to-pdf> [--output json|csv] [options]")
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
     output_format = 'json'
 
     if '--output' in sys.argv:
@@ -467,13 +488,36 @@ def main():
             output_format = sys.argv[idx + 1]
 
     try:
-        parser = CustomerPDFParser(pdf_path)
-        customers = parser.parse()
+        backend_from_argv(sys.argv)
+        pdf_path = pdf_input_from_argv(sys.argv)
+        progress = progress_from_argv("clienti", sys.argv)
+        selection = selection_from_argv(sys.argv)
+        lookup = key_lookup_from_argv("clienti", pdf_path, sys.argv)
+        if lookup and lookup.selection:
+            selection = lookup.selection
+        observers = [
+            sanity_from_argv("clienti", sys.argv),
+            progress,
+            shard_info_from_argv("clienti", pdf_path, sys.argv, selection),
+            key_index_from_argv("clienti", pdf_path, sys.argv),
+            schema_from_argv("clienti", sys.argv),
+            customer_index_from_argv("clienti", pdf_path, sys.argv),
+        ]
+        parser = CustomerPDFParser(
+            pdf_path, governor=governor_from_argv("clienti", sys.argv), observers=observers, selection=selection
+        )
+        records = parser.parse_streaming()
+        if lookup:
+            records = lookup.apply(records)
+        customers = list(observe_records(records, observers))
+        if lookup and not lookup.found:
+            print(f"Error: {lookup.field}={lookup.value} not found", file=sys.stderr)
+            sys.exit(1)
 
         if output_format == 'json':
             output = {
                 'total_customers': len(customers),
-                'customers': [c.to_dict() for c in customers]
+                'customers': [with_fingerprint('clienti', c.to_dict()) for c in customers]
             }
             print(json.dumps(output, indent=2, ensure_ascii=False))
 
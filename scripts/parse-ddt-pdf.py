@@ -2,15 +2,52 @@
 """
 Parse Documenti di trasporto.pdf - 6-page cycle structure
 Outputs JSON to stdout (one DDT per line)
+Each record carries its "fingerprint" (record_fingerprint.py)
+
+Options:
+    --memory-budget 400MB   adapt cycle batching to an RSS budget (memory_budget.py)
+    --memory-trace          also report the tracemalloc Python heap
+    --progress-interval 2   seconds between PROGRESS: lines (0 = every cycle)
+    --no-progress           disable PROGRESS: lines
+    --schema-baseline PATH  compare the page headers with a saved set (schema_report.py)
+    --no-schema             disable the SCHEMA: report
+    --max-null-rate 0.5     abort when a required field is empty in more of the first cycles'
+                            records (fail-fast checks, sanity_checks.py)
+    --sanity-cycles 3       cycles watched for required-field nulls and header changes
+    --max-row-drop 0.9      abort when a cycle yields under 10% of the recent median rows
+    --expect-headers PATH   abort unless the headers match this --schema-baseline file
+    --no-sanity             disable the fail-fast checks
+    --backend pdfminer      PDF extraction backend: pdfplumber (default), pdfminer or poppler (extraction.py)
+    --mmap                  serve the PDF from one read-only memory map (pdf_input.py)
+    - / fd:3 as pdf_path    read the PDF from stdin / inherited descriptor 3
+    --selftest              check the dependencies on an embedded PDF, print JSON, exit (selftest.py)
+    --shard 2/4             parse only the 2nd of 4 equal cycle ranges (merge-shards.py)
+    --pages 140:280         parse only pages [140, 280), widened to whole cycles
+    --shard-info PATH       write the shard descriptor merge-shards.py needs
+    --write-index           also write the record key index (key_index.py)
+    --index PATH            key index location (default: <pdf>.keys.json)
+    --key FIELD=VALUE       parse only the cycle holding this record (ddt_number)
 """
 
-import pdfplumber
 import json
 import sys
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import Optional
 
+from extraction import backend_from_argv
+from key_index import key_index_from_argv, key_lookup_from_argv
+from memory_budget import governor_from_argv
+from page_headers import detect_cycle_size
+from parse_progress import progress_from_argv
+from pdf_cycles import iter_cycle_tables, observe_records, selection_from_argv
+from pdf_input import pdf_input_from_argv
+from record_fingerprint import with_fingerprint
+from sanity_checks import sanity_from_argv
+from schema_report import schema_from_argv
+from selftest import selftest_from_argv
+from shards import shard_info_from_argv
+
 
 @dataclass
 class ParsedDDT:
@@ -135,21 +172,10 @@ EXPECTED_CYCLE_SIZE = 7
 
 
 def _detect_cycle_size(pdf_path: str) -> int:
-    """Auto-detect cycle size by scanning for repeated DDT anchor headers."""
-    with pdfplumber.open(pdf_path) as pdf:
-        anchor_pages = []
-        for page_idx, page in enumerate(pdf.pages):
-            tables = page.extract_tables()
-            if tables and tables[0] and len(tables[0]) > 0:
-                header_row = tables[0][0]
-                headers_upper = [(h or '').strip().upper() for h in header_row]
-                if any('DDT' in h for h in headers_upper):
-                    anchor_pages.append(page_idx)
-            if len(anchor_pages) >= 2:
-                break
-
-    if len(anchor_pages) >= 2:
-        detected = anchor_pages[1] - anchor_pages[0]
+    """Auto-detect cycle size from the DDT anchor headers of the first pages (page_headers.py)."""
+    detected = detect_cycle_size(pdf_path, lambda headers: any('DDT' in h for h in headers))
+
+    if detected:
         status = "OK" if detected == EXPECTED_CYCLE_SIZE else "CHANGED"
         _emit_cycle_warning(detected, status)
         return detected
@@ -163,149 +189,153 @@ def _emit_cycle_warning(detected: int, status: str) -> None:
     print(f"CYCLE_SIZE_WARNING:{json.dumps(warning)}", file=sys.stderr)
 
 
-def parse_ddt_pdf(pdf_path: str):
+def parse_ddt_pdf(pdf_path: str, governor=None, observers=(), selection=None):
     """
     Parse Documenti di trasporto.pdf with 6-page cycle structure.
     Yields one ParsedDDT per DDT entry.
+
+    governor: optional MemoryBudgetGovernor (--memory-budget).
+    observers: CycleObserver hooks (e.g. ProgressReporter) notified per cycle.
+    selection: optional CycleSelection (--shard/--pages).
     """
     cycle_size = _detect_cycle_size(pdf_path)
     print(f"Detected cycle size: {cycle_size} pages", file=sys.stderr)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-
-        # Process in cycle_size-page cycles
-        for cycle_start in range(0, total_pages, cycle_size):
-            # Extract all pages for this cycle as tables
-            tables = []
-            for i in range(cycle_size):
-                page_idx = cycle_start + i
-                if page_idx >= total_pages:
-                    break
-
-                page = pdf.pages[page_idx]
-                page_tables = page.extract_tables()
-
-                if not page_tables or not page_tables[0]:
-                    tables.append([])
+    # Process in cycle_size-page cycles (single PDF instance unless the governor caps it)
+    for cycle_idx, tables in iter_cycle_tables(
+        pdf_path, cycle_size, governor=governor, observers=observers, selection=selection
+    ):
+        cycle_start = cycle_idx * cycle_size
+
+        # Skip if first table empty
+        if not tables[0] or len(tables[0]) <= 1:
+            continue
+
+        # Diagnostic: dump headers for first cycle
+        if cycle_start == 0:
+            for page_i, tbl in enumerate(tables):
+                if tbl and len(tbl) > 0:
+                    headers = [(h or '').strip() for h in tbl[0]]
+                    rows_count = len(tbl) - 1
+                    print(f"DIAG_PAGE:{page_i+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
+                    if len(tbl) > 1:
+                        sample = [(c or '')[:30] for c in tbl[1]]
+                        print(f"DIAG_SAMPLE:{page_i+1}/{cycle_size} row1={sample}", file=sys.stderr)
                 else:
-                    tables.append(page_tables[0])
-
-                page = None
+                    print(f"DIAG_PAGE:{page_i+1}/{cycle_size} EMPTY_TABLE", file=sys.stderr)
+
+        num_rows = len(tables[0])
+
+        for row_idx in range(1, num_rows):  # Skip header
+            try:
+                # Page 1/6: DDT ID (5 columns)
+                # Columns: [PDF_DDT, ID, DDT_NUMBER, DELIVERY_DATE, ORDER_NUMBER]
+                row1 = tables[0][row_idx] if row_idx < len(tables[0]) else [None] * 5
+                ddt_id = row1[1] if len(row1) > 1 else None
+                ddt_number = row1[2] if len(row1) > 2 else None
+                delivery_date = parse_italian_date(row1[3]) if len(row1) > 3 else None
+                order_number = row1[4] if len(row1) > 4 else None
+
+                # Skip if no DDT number or order number
+                if not ddt_number or not order_number:
+                    continue
 
-            # Need all pages for complete cycle
-            if len(tables) < cycle_size:
-                break
+                # Skip garbage rows
+                if ddt_id == "0" or ddt_number == "0":
+                    continue
 
-            # Skip if first table empty
-            if not tables[0] or len(tables[0]) <= 1:
+                # Page 2/6: Customer (2 columns)
+                row2 = tables[1][row_idx] if row_idx < len(tables[1]) else [None] * 2
+                customer_account = row2[0] if len(row2) > 0 else None
+                sales_name = row2[1] if len(row2) > 1 else None
+
+                # Page 3/6: Delivery Name + Address (2 columns)
+                row3 = tables[2][row_idx] if row_idx < len(tables[2]) else [None] * 2
+                delivery_name = row3[0] if len(row3) > 0 else None
+                delivery_address = row3[1] if len(row3) > 1 else None
+
+                # Page 4/6: Totals (3 columns)
+                row4 = tables[3][row_idx] if row_idx < len(tables[3]) else [None] * 3
+                ddt_total = row4[0] if len(row4) > 0 else None
+                customer_reference = row4[1] if len(row4) > 1 else None
+                ddt_description = row4[2] if len(row4) > 2 else None
+
+                # Page 5/6: TRACKING (2 columns) ⭐ KEY PAGE
+                # Columns: [NUMERO DI TRACCIABILITÀ, TERMINI DI CONSEGNA]
+                row5 = tables[4][row_idx] if row_idx < len(tables[4]) else [None] * 2
+                tracking_raw = row5[0] if len(row5) > 0 and row5[0] else None
+                tracking_number, tracking_courier, tracking_url = extract_tracking_info(tracking_raw) if tracking_raw else (None, None, None)
+                delivery_terms = row5[1] if len(row5) > 1 else None
+
+                # Page 6/6: Delivery Method & Location (3 columns)
+                # Columns: [MODALITÀ DI CONSEGNA, ALL'ATTENZIONE DI, CITTÀ DI CONSEGNA]
+                row6 = tables[5][row_idx] if row_idx < len(tables[5]) else [None] * 3
+                delivery_method = row6[0] if len(row6) > 0 else None
+                attention_to = row6[1] if len(row6) > 1 else None
+                delivery_city = row6[2] if len(row6) > 2 else None
+
+                # Create ParsedDDT
+                ddt = ParsedDDT(
+                    id=ddt_id,
+                    ddt_number=ddt_number,
+                    delivery_date=delivery_date,
+                    order_number=order_number,
+                    customer_account=customer_account,
+                    sales_name=sales_name,
+                    delivery_name=delivery_name,
+                    delivery_address=delivery_address,
+                    ddt_total=ddt_total,
+                    customer_reference=customer_reference,
+                    description=ddt_description,
+                    tracking_number=tracking_number,
+                    tracking_url=tracking_url,
+                    tracking_courier=tracking_courier,
+                    delivery_terms=delivery_terms,
+                    delivery_method=delivery_method,
+                    attention_to=attention_to,
+                    delivery_city=delivery_city
+                )
+
+                yield ddt
+
+            except Exception as e:
+                print(f"Warning: Error parsing row {row_idx} in cycle {cycle_start}: {e}", file=sys.stderr)
                 continue
 
-            # Diagnostic: dump headers for first cycle
-            if cycle_start == 0:
-                for page_i, tbl in enumerate(tables):
-                    if tbl and len(tbl) > 0:
-                        headers = [(h or '').strip() for h in tbl[0]]
-                        rows_count = len(tbl) - 1
-                        print(f"DIAG_PAGE:{page_i+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
-                        if len(tbl) > 1:
-                            sample = [(c or '')[:30] for c in tbl[1]]
-                            print(f"DIAG_SAMPLE:{page_i+1}/{cycle_size} row1={sample}", file=sys.stderr)
-                    else:
-                        print(f"DIAG_PAGE:{page_i+1}/{cycle_size} EMPTY_TABLE", file=sys.stderr)
-
-            num_rows = len(tables[0])
-
-            for row_idx in range(1, num_rows):  # Skip header
-                try:
-                    # Page 1/6: DDT ID (5 columns)
-                    # Columns: [PDF_DDT, ID, DDT_NUMBER, DELIVERY_DATE, ORDER_NUMBER]
-                    row1 = tables[0][row_idx] if row_idx < len(tables[0]) else [None] * 5
-                    ddt_id = row1[1] if len(row1) > 1 else None
-                    ddt_number = row1[2] if len(row1) > 2 else None
-                    delivery_date = parse_italian_date(row1[3]) if len(row1) > 3 else None
-                    order_number = row1[4] if len(row1) > 4 else None
-
-                    # Skip if no DDT number or order number
-                    if not ddt_number or not order_number:
-                        continue
-
-                    # Skip garbage rows
-                    if ddt_id == "0" or ddt_number == "0":
-                        continue
-
-                    # Page 2/6: Customer (2 columns)
-                    row2 = tables[1][row_idx] if row_idx < len(tables[1]) else [None] * 2
-                    customer_account = row2[0] if len(row2) > 0 else None
-                    sales_name = row2[1] if len(row2) > 1 else None
-
-                    # Page 3/6: Delivery Name + Address (2 columns)
-                    row3 = tables[2][row_idx] if row_idx < len(tables[2]) else [None] * 2
-                    delivery_name = row3[0] if len(row3) > 0 else None
-                    delivery_address = row3[1] if len(row3) > 1 else None
-
-                    # Page 4/6: Totals (3 columns)
-                    row4 = tables[3][row_idx] if row_idx < len(tables[3]) else [None] * 3
-                    ddt_total = row4[0] if len(row4) > 0 else None
-                    customer_reference = row4[1] if len(row4) > 1 else None
-                    ddt_description = row4[2] if len(row4) > 2 else None
-
-                    # Page 5/6: TRACKING (2 columns) ⭐ KEY PAGE
-                    # Columns: [NUMERO DI TRACCIABILITÀ, TERMINI DI CONSEGNA]
-                    row5 = tables[4][row_idx] if row_idx < len(tables[4]) else [None] * 2
-                    tracking_raw = row5[0] if len(row5) > 0 and row5[0] else None
-                    tracking_number, tracking_courier, tracking_url = extract_tracking_info(tracking_raw) if tracking_raw else (None, None, None)
-                    delivery_terms = row5[1] if len(row5) > 1 else None
-
-                    # Page 6/6: Delivery Method & Location (3 columns)
-                    # Columns: [MODALITÀ DI CONSEGNA, ALL'ATTENZIONE DI, CITTÀ DI CONSEGNA]
-                    row6 = tables[5][row_idx] if row_idx < len(tables[5]) else [None] * 3
-                    delivery_method = row6[0] if len(row6) > 0 else None
-                    attention_to = row6[1] if len(row6) > 1 else None
-                    delivery_city = row6[2] if len(row6) > 2 else None
-
-                    # Create ParsedDDT
-                    ddt = ParsedDDT(
-                        id=ddt_id,
-                        ddt_number=ddt_number,
-                        delivery_date=delivery_date,
-                        order_number=order_number,
-                        customer_account=customer_account,
-                        sales_name=sales_name,
-                        delivery_name=delivery_name,
-                        delivery_address=delivery_address,
-                        ddt_total=ddt_total,
-                        customer_reference=customer_reference,
-                        description=ddt_description,
-                        tracking_number=tracking_number,
-                        tracking_url=tracking_url,
-                        tracking_courier=tracking_courier,
-                        delivery_terms=delivery_terms,
-                        delivery_method=delivery_method,
-                        attention_to=attention_to,
-                        delivery_city=delivery_city
-                    )
-
-                    yield ddt
-
-                except Exception as e:
-                    print(f"Warning: Error parsing row {row_idx} in cycle {cycle_start}: {e}", file=sys.stderr)
-                    continue
-
-            tables = None
+        tables = None
 
 
 def main():
     """Main entry point"""
+    selftest_from_argv("ddt", sys.argv)
     if len(sys.argv) < 2:
-        print("Usage: parse-ddt-pdf.py <pdf_path>", file=sys.stderr)
+        print("Usage: parse-ddt-pdf.py <pdf_path> [options]", file=sys.stderr)
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-
     try:
-        for ddt in parse_ddt_pdf(pdf_path):
-            print(json.dumps(asdict(ddt), ensure_ascii=False))
+        backend_from_argv(sys.argv)
+        pdf_path = pdf_input_from_argv(sys.argv)
+        governor = governor_from_argv("ddt", sys.argv)
+        progress = progress_from_argv("ddt", sys.argv)
+        selection = selection_from_argv(sys.argv)
+        lookup = key_lookup_from_argv("ddt", pdf_path, sys.argv)
+        if lookup and lookup.selection:
+            selection = lookup.selection
+        observers = [
+            sanity_from_argv("ddt", sys.argv),
+            progress,
+            shard_info_from_argv("ddt", pdf_path, sys.argv, selection),
+            key_index_from_argv("ddt", pdf_path, sys.argv),
+            schema_from_argv("ddt", sys.argv),
+        ]
+        records = parse_ddt_pdf(pdf_path, governor=governor, observers=observers, selection=selection)
+        if lookup:
+            records = lookup.apply(records)
+        for ddt in observe_records(records, observers):
+            print(json.dumps(with_fingerprint("ddt", asdict(ddt)), ensure_ascii=False))
+        if lookup and not lookup.found:
+            print(f"Error: {lookup.field}={lookup.value} not found", file=sys.stderr)
+            sys.exit(1)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Parse Ordini.pdf, DDT and Fatture in one run, joined on order_number.
+
+Replaces three separate parses (and the backend-side match of
+ParsedDDT/ParsedInvoice.order_number to ParsedOrder.order_number) with one
+invocation: the DDT and invoice exports are parsed first into a hash index,
+then the orders stream through it (document_join.py).
+
+Usage:
+    python3 parse-documents-pdf.py <Ordini.pdf> --ddt <DDT.pdf> --invoices <Fatture.pdf> [options]
+
+Outputs NDJSON on stdout, one object per line with a "record_type":
+    "order"              ParsedOrder fields plus "ddts" (ddt_number, delivery_date,
+                         tracking_number, tracking_courier, tracking_url) and
+                         "invoices" (invoice_number, invoice_date, invoice_amount,
+                         remaining_amount)
+    "unmatched_ddt"      ParsedDDT fields, no order with that order_number
+    "unmatched_invoice"  ParsedInvoice fields, no order with that order_number
+and a summary on stderr:
+    JOIN:{"orders": 1980, "orders_with_ddt": 1702, "orders_with_invoice": 1650,
+          "unmatched_ddts": 3, "unmatched_invoices": 12}
+
+Every stdout record also carries its "fingerprint" (record_fingerprint.py),
+computed over the ParsedOrder/ParsedDDT/ParsedInvoice fields only.
+
+Options:
+    --ddt PATH              DDT export to join (optional)
+    --invoices PATH         invoices export to join (optional)
+    --memory-budget 400MB   adapt cycle batching to an RSS budget (memory_budget.py)
+    --memory-trace          also report the tracemalloc Python heap
+    --progress-interval 2   seconds between PROGRESS: lines (0 = every cycle)
+    --no-progress           disable PROGRESS: lines
+    --no-schema             disable the per-export SCHEMA: reports (schema_report.py)
+    --no-sanity             disable the per-export fail-fast checks (sanity_checks.py)
+    --backend pdfminer      PDF extraction backend: pdfplumber (default), pdfminer or poppler (extraction.py)
+    --mmap                  serve each PDF from one read-only memory map (pdf_input.py)
+    --selftest              check the dependencies on an embedded PDF, print JSON, exit (selftest.py)
+
+Any of the three PDFs may be given as - (stdin) or fd:N (inherited descriptor).
+"""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+from document_join import OrderDocumentJoin
+from extraction import backend_from_argv
+from memory_budget import governor_from_argv
+from parse_progress import progress_from_argv
+from pdf_cycles import get_option, has_flag, observe_records
+from pdf_input import open_pdf_input
+from record_fingerprint import with_fingerprint
+from sanity_checks import REQUIRED_FIELDS, SanityGuard
+from schema_report import SchemaMonitor
+from selftest import selftest_from_argv
+
+
+def load_parser(filename: str):
+    """Import a parse-*-pdf.py script of this directory as a module."""
+    path = Path(__file__).parent / filename
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_records(name: str, module, parse_fn, pdf_path, argv):
+    """Records of one export, with that parser's governor, sanity checks, progress and schema lines."""
+    observers = [progress_from_argv(name, argv)]
+    if not has_flag(argv, "--no-sanity"):
+        observers.insert(0, SanityGuard(name, REQUIRED_FIELDS[name]))
+    if not has_flag(argv, "--no-schema"):
+        observers.append(SchemaMonitor(name, getattr(module, "KNOWN_COLUMNS", None)))
+    records = parse_fn(pdf_path, governor=governor_from_argv(name, argv), observers=observers)
+    return observe_records(records, observers)
+
+
+def main():
+    """Main entry point - outputs NDJSON to stdout"""
+    selftest_from_argv("documents", sys.argv)
+    if len(sys.argv) < 2:
+        print("Usage: parse-documents-pdf.py <Ordini.pdf> [--ddt DDT.pdf] [--invoices Fatture.pdf] [options]", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        backend_from_argv(sys.argv)
+        use_mmap = has_flag(sys.argv, "--mmap")
+        orders_path = open_pdf_input(sys.argv[1], use_mmap)
+        ddt_path = get_option(sys.argv, "--ddt")
+        if ddt_path:
+            ddt_path = open_pdf_input(ddt_path, use_mmap)
+        invoices_path = get_option(sys.argv, "--invoices")
+        if invoices_path:
+            invoices_path = open_pdf_input(invoices_path, use_mmap)
+        ddts = invoices = ()
+        if ddt_path:
+            ddt_parser = load_parser("parse-ddt-pdf.py")
+            ddts = parse_records("ddt", ddt_parser, ddt_parser.parse_ddt_pdf, ddt_path, sys.argv)
+        if invoices_path:
+            invoices_parser = load_parser("parse-invoices-pdf.py")
+            invoices = parse_records(
+                "invoices", invoices_parser, invoices_parser.parse_invoices_pdf, invoices_path, sys.argv
+            )
+        join = OrderDocumentJoin(ddts, invoices)
+
+        orders_parser = load_parser("parse-orders-pdf.py")
+        orders = parse_records("orders", orders_parser, orders_parser.parse_orders_pdf, orders_path, sys.argv)
+        for order in join.enrich(orders):
+            print(json.dumps({"record_type": "order", **with_fingerprint("orders", order)}, ensure_ascii=False))
+        for ddt in join.unmatched_ddts():
+            print(json.dumps({"record_type": "unmatched_ddt", **with_fingerprint("ddt", ddt)}, ensure_ascii=False))
+        for invoice in join.unmatched_invoices():
+            print(json.dumps({"record_type": "unmatched_invoice", **with_fingerprint("invoices", invoice)}, ensure_ascii=False))
+
+        print(f"JOIN:{json.dumps(join.summary())}", file=sys.stderr)
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,52 @@
 """
 Parse Fatture.pdf - 7-page cycle structure
 Outputs JSON to stdout (one invoice per line)
+Each record carries its "fingerprint" (record_fingerprint.py)
+
+Options:
+    --memory-budget 400MB   adapt cycle batching to an RSS budget (memory_budget.py)
+    --memory-trace          also report the tracemalloc Python heap
+    --progress-interval 2   seconds between PROGRESS: lines (0 = every cycle)
+    --no-progress           disable PROGRESS: lines
+    --schema-baseline PATH  compare the page headers with a saved set (schema_report.py)
+    --no-schema             disable the SCHEMA: report
+    --max-null-rate 0.5     abort when a required field is empty in more of the first cycles'
+                            records (fail-fast checks, sanity_checks.py)
+    --sanity-cycles 3       cycles watched for required-field nulls and header changes
+    --max-row-drop 0.9      abort when a cycle yields under 10% of the recent median rows
+    --expect-headers PATH   abort unless the headers match this --schema-baseline file
+    --no-sanity             disable the fail-fast checks
+    --backend pdfminer      PDF extraction backend: pdfplumber (default), pdfminer or poppler (extraction.py)
+    --mmap                  serve the PDF from one read-only memory map (pdf_input.py)
+    - / fd:3 as pdf_path    read the PDF from stdin / inherited descriptor 3
+    --selftest              check the dependencies on an embedded PDF, print JSON, exit (selftest.py)
+    --shard 2/4             parse only the 2nd of 4 equal cycle ranges (merge-shards.py)
+    --pages 140:280         parse only pages [140, 280), widened to whole cycles
+    --shard-info PATH       write the shard descriptor merge-shards.py needs
+    --write-index           also write the record key index (key_index.py)
+    --index PATH            key index location (default: <pdf>.keys.json)
+    --key FIELD=VALUE       parse only the cycle holding this record (invoice_number)
 """
 
-import pdfplumber
 import json
 import sys
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import Optional
 
+from extraction import backend_from_argv
+from key_index import key_index_from_argv, key_lookup_from_argv
+from memory_budget import governor_from_argv
+from page_headers import detect_cycle_size
+from parse_progress import progress_from_argv
+from pdf_cycles import iter_cycle_tables, observe_records, selection_from_argv
+from pdf_input import pdf_input_from_argv
+from record_fingerprint import with_fingerprint
+from sanity_checks import sanity_from_argv
+from schema_report import schema_from_argv
+from selftest import selftest_from_argv
+from shards import shard_info_from_argv
+
 
 @dataclass
 class ParsedInvoice:
@@ -93,23 +130,24 @@ def get_column_value(table: list, row_idx: int, header_text: str) -> Optional[st
 
 EXPECTED_CYCLE_SIZE = 7
 
+# Header names read per cycle page (get_column_value), for the SCHEMA: report.
+# FATTURA PDF is known but not parsed.
+KNOWN_COLUMNS = [
+    ["FATTURA PDF", "ID FATTURA", "DATA FATTURA", "CONTO FATTURE"],
+    ["NOME DI FATTURAZIONE", "QUANTITÀ", "SALDO VENDITE MST"],
+    ["SOMMA LINEA SCONTO", "SCONTO TOTALE", "SOMMA FISCALE MST", "IMPORTO FATTURA MST"],
+    ["ORDINE DI ACQUISTO", "RIFERIMENTO CLIENTE", "SCADENZA"],
+    ["ID TERMINE DI PAGAMENTO", "OLTRE I GIORNI DI SCADENZA"],
+    ["LIQUIDA IMPORTO", "IDENTIFICATIVO ULTIMO PAGAMENTO", "DATA DI ULTIMA LIQUIDAZIONE"],
+    ["CHIUSO", "IMPORTO RIMANENTE MST", "ID VENDITE"],
+]
+
 
 def _detect_cycle_size(pdf_path: str) -> int:
-    """Auto-detect cycle size by scanning for repeated 'ID FATTURA' anchor headers."""
-    with pdfplumber.open(pdf_path) as pdf:
-        anchor_pages = []
-        for page_idx, page in enumerate(pdf.pages):
-            tables = page.extract_tables()
-            if tables and tables[0] and len(tables[0]) > 0:
-                header_row = tables[0][0]
-                headers_upper = [(h or '').strip().upper() for h in header_row]
-                if any('ID FATTURA' in h for h in headers_upper):
-                    anchor_pages.append(page_idx)
-            if len(anchor_pages) >= 2:
-                break
-
-    if len(anchor_pages) >= 2:
-        detected = anchor_pages[1] - anchor_pages[0]
+    """Auto-detect cycle size from the 'ID FATTURA' anchor headers of the first pages (page_headers.py)."""
+    detected = detect_cycle_size(pdf_path, lambda headers: any('ID FATTURA' in h for h in headers))
+
+    if detected:
         status = "OK" if detected == EXPECTED_CYCLE_SIZE else "CHANGED"
         _emit_cycle_warning(detected, status)
         return detected
@@ -123,161 +161,162 @@ def _emit_cycle_warning(detected: int, status: str) -> None:
     print(f"CYCLE_SIZE_WARNING:{json.dumps(warning)}", file=sys.stderr)
 
 
-def parse_invoices_pdf(pdf_path: str):
+def parse_invoices_pdf(pdf_path: str, governor=None, observers=(), selection=None):
     """
     Parse Fatture.pdf with 7-page cycle structure.
     Yields one ParsedInvoice per invoice.
+
+    governor: optional MemoryBudgetGovernor (--memory-budget).
+    observers: CycleObserver hooks (e.g. ProgressReporter) notified per cycle.
+    selection: optional CycleSelection (--shard/--pages).
     """
     cycle_size = _detect_cycle_size(pdf_path)
     print(f"Detected cycle size: {cycle_size} pages", file=sys.stderr)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-
-        # Process in cycle_size-page cycles
-        for cycle_start in range(0, total_pages, cycle_size):
-            # Extract all pages for this cycle as tables
-            tables = []
-            for i in range(cycle_size):
-                page_idx = cycle_start + i
-                if page_idx >= total_pages:
-                    break
+    # Process in cycle_size-page cycles (single PDF instance unless the governor caps it)
+    for cycle_idx, tables in iter_cycle_tables(
+        pdf_path, cycle_size, governor=governor, observers=observers, selection=selection
+    ):
+        cycle_start = cycle_idx * cycle_size
+
+        # Skip if first table empty
+        if not tables[0] or len(tables[0]) <= 1:
+            continue
+
+        # Diagnostic: dump headers for first cycle
+        if cycle_start == 0:
+            for page_i, tbl in enumerate(tables):
+                if tbl and len(tbl) > 0:
+                    headers = [(h or '').strip() for h in tbl[0]]
+                    rows_count = len(tbl) - 1
+                    print(f"DIAG_PAGE:{page_i+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
+                    if len(tbl) > 1:
+                        sample = [(c or '')[:30] for c in tbl[1]]
+                        print(f"DIAG_SAMPLE:{page_i+1}/{cycle_size} row1={sample}", file=sys.stderr)
+                else:
+                    print(f"DIAG_PAGE:{page_i+1}/{cycle_size} EMPTY_TABLE", file=sys.stderr)
 
-                page = pdf.pages[page_idx]
-                page_tables = page.extract_tables()
+        num_rows = len(tables[0])
 
-                if not page_tables or not page_tables[0]:
-                    tables.append([])
-                else:
-                    tables.append(page_tables[0])
+        for row_idx in range(1, num_rows):  # Skip header
+            try:
+                # Page 1/7: FATTURA PDF, ID FATTURA, DATA FATTURA, CONTO FATTURE (4 columns)
+                # Note: ID FATTURA contains the actual invoice number (e.g., "CF1/26000113")
+                invoice_id = get_column_value(tables[0], row_idx, "ID FATTURA")
+                invoice_number = invoice_id  # Use ID FATTURA as invoice_number
 
-                page = None
+                invoice_date_raw = get_column_value(tables[0], row_idx, "DATA FATTURA")
+                invoice_date = parse_italian_date(invoice_date_raw)
 
-            # Need all pages for complete cycle
-            if len(tables) < cycle_size:
-                break
+                customer_account = get_column_value(tables[0], row_idx, "CONTO FATTURE")
 
-            # Skip if first table empty
-            if not tables[0] or len(tables[0]) <= 1:
-                continue
+                # Skip if no invoice ID or customer account
+                if not invoice_id or not customer_account:
+                    continue
 
-            # Diagnostic: dump headers for first cycle
-            if cycle_start == 0:
-                for page_i, tbl in enumerate(tables):
-                    if tbl and len(tbl) > 0:
-                        headers = [(h or '').strip() for h in tbl[0]]
-                        rows_count = len(tbl) - 1
-                        print(f"DIAG_PAGE:{page_i+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
-                        if len(tbl) > 1:
-                            sample = [(c or '')[:30] for c in tbl[1]]
-                            print(f"DIAG_SAMPLE:{page_i+1}/{cycle_size} row1={sample}", file=sys.stderr)
-                    else:
-                        print(f"DIAG_PAGE:{page_i+1}/{cycle_size} EMPTY_TABLE", file=sys.stderr)
-
-            num_rows = len(tables[0])
-
-            for row_idx in range(1, num_rows):  # Skip header
-                try:
-                    # Page 1/7: FATTURA PDF, ID FATTURA, DATA FATTURA, CONTO FATTURE (4 columns)
-                    # Note: ID FATTURA contains the actual invoice number (e.g., "CF1/26000113")
-                    invoice_id = get_column_value(tables[0], row_idx, "ID FATTURA")
-                    invoice_number = invoice_id  # Use ID FATTURA as invoice_number
-
-                    invoice_date_raw = get_column_value(tables[0], row_idx, "DATA FATTURA")
-                    invoice_date = parse_italian_date(invoice_date_raw)
-
-                    customer_account = get_column_value(tables[0], row_idx, "CONTO FATTURE")
-
-                    # Skip if no invoice ID or customer account
-                    if not invoice_id or not customer_account:
-                        continue
-
-                    # Skip garbage rows
-                    if invoice_id == "0" or invoice_number == "0":
-                        continue
-
-                    # Page 2/7: NOME DI FATTURAZIONE, QUANTITÀ, SALDO VENDITE MST (3 columns)
-                    billing_name = get_column_value(tables[1], row_idx, "NOME DI FATTURAZIONE")
-                    quantity = get_column_value(tables[1], row_idx, "QUANTITÀ")
-                    sales_balance = get_column_value(tables[1], row_idx, "SALDO VENDITE MST")
-
-                    # Page 3/7: SOMMA LINEA SCONTO MST, SCONTO TOTALE:, SOMMA FISCALE MST, IMPORTO FATTURA MST (4 columns)
-                    line_sum = get_column_value(tables[2], row_idx, "SOMMA LINEA SCONTO")
-                    discount_amount = get_column_value(tables[2], row_idx, "SCONTO TOTALE")
-                    tax_sum = get_column_value(tables[2], row_idx, "SOMMA FISCALE MST")
-                    invoice_amount = get_column_value(tables[2], row_idx, "IMPORTO FATTURA MST")
-
-                    # Page 4/7: ORDINE DI ACQUISTO, RIFERIMENTO CLIENTE, SCADENZA (3 columns)
-                    purchase_order = get_column_value(tables[3], row_idx, "ORDINE DI ACQUISTO")
-                    customer_reference = get_column_value(tables[3], row_idx, "RIFERIMENTO CLIENTE")
-
-                    due_date_raw = get_column_value(tables[3], row_idx, "SCADENZA")
-                    due_date = parse_italian_date(due_date_raw)
-
-                    # Page 5/7: ID TERMINE DI PAGAMENTO, OLTRE I GIORNI DI SCADENZA (2 columns)
-                    payment_term_id = get_column_value(tables[4], row_idx, "ID TERMINE DI PAGAMENTO")
-                    days_past_due = get_column_value(tables[4], row_idx, "OLTRE I GIORNI DI SCADENZA")
-
-                    # Page 6/7: LIQUIDA IMPORTO MST, IDENTIFICATIVO ULTIMO PAGAMENTO:, DATA DI ULTIMA LIQUIDAZIONE (3 columns)
-                    settled = get_column_value(tables[5], row_idx, "LIQUIDA IMPORTO")
-                    amount = settled  # Same column as settled in current PDF format
-                    last_payment_id = get_column_value(tables[5], row_idx, "IDENTIFICATIVO ULTIMO PAGAMENTO")
-                    last_settlement_date_raw = get_column_value(tables[5], row_idx, "DATA DI ULTIMA LIQUIDAZIONE")
-                    last_settlement_date = parse_italian_date(last_settlement_date_raw)
-
-                    # Page 7/7: CHIUSO, IMPORTO RIMANENTE MST, ID VENDITE (3 columns)
-                    closed = get_column_value(tables[6], row_idx, "CHIUSO")
-                    remaining_amount = get_column_value(tables[6], row_idx, "IMPORTO RIMANENTE MST")
-                    order_number = get_column_value(tables[6], row_idx, "ID VENDITE")  # ⭐ MATCH KEY!
-
-                    # Create ParsedInvoice
-                    invoice = ParsedInvoice(
-                        id=invoice_id,
-                        invoice_number=invoice_number,
-                        invoice_date=invoice_date,
-                        customer_account=customer_account,
-                        billing_name=billing_name,
-                        quantity=quantity,
-                        sales_balance=sales_balance,
-                        line_sum=line_sum,
-                        discount_amount=discount_amount,
-                        tax_sum=tax_sum,
-                        invoice_amount=invoice_amount,
-                        purchase_order=purchase_order,
-                        customer_reference=customer_reference,
-                        due_date=due_date,
-                        payment_term_id=payment_term_id,
-                        days_past_due=days_past_due,
-                        settled=settled,
-                        amount=amount,
-                        last_payment_id=last_payment_id,
-                        last_settlement_date=last_settlement_date,
-                        closed=closed,
-                        remaining_amount=remaining_amount,
-                        order_number=order_number
-                    )
-
-                    yield invoice
-
-                except Exception as e:
-                    print(f"Warning: Error parsing row {row_idx} in cycle {cycle_start}: {e}", file=sys.stderr)
+                # Skip garbage rows
+                if invoice_id == "0" or invoice_number == "0":
                     continue
 
-            tables = None
+                # Page 2/7: NOME DI FATTURAZIONE, QUANTITÀ, SALDO VENDITE MST (3 columns)
+                billing_name = get_column_value(tables[1], row_idx, "NOME DI FATTURAZIONE")
+                quantity = get_column_value(tables[1], row_idx, "QUANTITÀ")
+                sales_balance = get_column_value(tables[1], row_idx, "SALDO VENDITE MST")
+
+                # Page 3/7: SOMMA LINEA SCONTO MST, SCONTO TOTALE:, SOMMA FISCALE MST, IMPORTO FATTURA MST (4 columns)
+                line_sum = get_column_value(tables[2], row_idx, "SOMMA LINEA SCONTO")
+                discount_amount = get_column_value(tables[2], row_idx, "SCONTO TOTALE")
+                tax_sum = get_column_value(tables[2], row_idx, "SOMMA FISCALE MST")
+                invoice_amount = get_column_value(tables[2], row_idx, "IMPORTO FATTURA MST")
+
+                # Page 4/7: ORDINE DI ACQUISTO, RIFERIMENTO CLIENTE, SCADENZA (3 columns)
+                purchase_order = get_column_value(tables[3], row_idx, "ORDINE DI ACQUISTO")
+                customer_reference = get_column_value(tables[3], row_idx, "RIFERIMENTO CLIENTE")
+
+                due_date_raw = get_column_value(tables[3], row_idx, "SCADENZA")
+                due_date = parse_italian_date(due_date_raw)
+
+                # Page 5/7: ID TERMINE DI PAGAMENTO, OLTRE I GIORNI DI SCADENZA (2 columns)
+                payment_term_id = get_column_value(tables[4], row_idx, "ID TERMINE DI PAGAMENTO")
+                days_past_due = get_column_value(tables[4], row_idx, "OLTRE I GIORNI DI SCADENZA")
+
+                # Page 6/7: LIQUIDA IMPORTO MST, IDENTIFICATIVO ULTIMO PAGAMENTO:, DATA DI ULTIMA LIQUIDAZIONE (3 columns)
+                settled = get_column_value(tables[5], row_idx, "LIQUIDA IMPORTO")
+                amount = settled  # Same column as settled in current PDF format
+                last_payment_id = get_column_value(tables[5], row_idx, "IDENTIFICATIVO ULTIMO PAGAMENTO")
+                last_settlement_date_raw = get_column_value(tables[5], row_idx, "DATA DI ULTIMA LIQUIDAZIONE")
+                last_settlement_date = parse_italian_date(last_settlement_date_raw)
+
+                # Page 7/7: CHIUSO, IMPORTO RIMANENTE MST, ID VENDITE (3 columns)
+                closed = get_column_value(tables[6], row_idx, "CHIUSO")
+                remaining_amount = get_column_value(tables[6], row_idx, "IMPORTO RIMANENTE MST")
+                order_number = get_column_value(tables[6], row_idx, "ID VENDITE")  # ⭐ MATCH KEY!
+
+                # Create ParsedInvoice
+                invoice = ParsedInvoice(
+                    id=invoice_id,
+                    invoice_number=invoice_number,
+                    invoice_date=invoice_date,
+                    customer_account=customer_account,
+                    billing_name=billing_name,
+                    quantity=quantity,
+                    sales_balance=sales_balance,
+                    line_sum=line_sum,
+                    discount_amount=discount_amount,
+                    tax_sum=tax_sum,
+                    invoice_amount=invoice_amount,
+                    purchase_order=purchase_order,
+                    customer_reference=customer_reference,
+                    due_date=due_date,
+                    payment_term_id=payment_term_id,
+                    days_past_due=days_past_due,
+                    settled=settled,
+                    amount=amount,
+                    last_payment_id=last_payment_id,
+                    last_settlement_date=last_settlement_date,
+                    closed=closed,
+                    remaining_amount=remaining_amount,
+                    order_number=order_number
+                )
+
+                yield invoice
+
+            except Exception as e:
+                print(f"Warning: Error parsing row {row_idx} in cycle {cycle_start}: {e}", file=sys.stderr)
+                continue
+
+        tables = None
 
 
 def main():
     """Main entry point"""
+    selftest_from_argv("invoices", sys.argv)
     if len(sys.argv) < 2:
-        print("Usage: parse-invoices-pdf.py <pdf_path>", file=sys.stderr)
+        print("Usage: parse-invoices-pdf.py <pdf_path> [options]", file=sys.stderr)
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-
     try:
+        backend_from_argv(sys.argv)
+        pdf_path = pdf_input_from_argv(sys.argv)
+        governor = governor_from_argv("invoices", sys.argv)
         count = 0
-        for invoice in parse_invoices_pdf(pdf_path):
-            d = asdict(invoice)
+        progress = progress_from_argv("invoices", sys.argv)
+        selection = selection_from_argv(sys.argv)
+        lookup = key_lookup_from_argv("invoices", pdf_path, sys.argv)
+        if lookup and lookup.selection:
+            selection = lookup.selection
+        observers = [
+            sanity_from_argv("invoices", sys.argv),
+            progress,
+            shard_info_from_argv("invoices", pdf_path, sys.argv, selection),
+            key_index_from_argv("invoices", pdf_path, sys.argv),
+            schema_from_argv("invoices", sys.argv, KNOWN_COLUMNS),
+        ]
+        records = parse_invoices_pdf(pdf_path, governor=governor, observers=observers, selection=selection)
+        if lookup:
+            records = lookup.apply(records)
+        for invoice in observe_records(records, observers):
+            d = with_fingerprint("invoices", asdict(invoice))
             print(json.dumps(d, ensure_ascii=False))
             count += 1
             if count <= 3:
@@ -285,6 +324,9 @@ def main():
                 pop_fields = [k for k, v in d.items() if v is not None]
                 print(f"DIAG_RECORD:{count} populated={pop_fields} null={null_fields}", file=sys.stderr)
         print(f"DIAG_TOTAL: {count} invoices parsed", file=sys.stderr)
+        if lookup and not lookup.found:
+            print(f"Error: {lookup.field}={lookup.value} not found", file=sys.stderr)
+            sys.exit(1)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -2,9 +2,40 @@
 """
 Parse Ordini.pdf - 7-page cycle structure
 Outputs JSON to stdout (one order per line)
+Each record carries its "fingerprint" (record_fingerprint.py)
+
+Options:
+    --memory-budget 400MB   adapt cycle batching to an RSS budget (memory_budget.py)
+    --memory-trace          also report the tracemalloc Python heap
+    --progress-interval 2   seconds between PROGRESS: lines (0 = every cycle)
+    --no-progress           disable PROGRESS: lines
+    --schema-baseline PATH  compare the page headers with a saved set (schema_report.py)
+    --no-schema             disable the SCHEMA: report
+    --max-null-rate 0.5     abort when a required field is empty in more of the first cycles'
+                            records (fail-fast checks, sanity_checks.py)
+    --sanity-cycles 3       cycles watched for required-field nulls and header changes
+    --max-row-drop 0.9      abort when a cycle yields under 10% of the recent median rows
+    --expect-headers PATH   abort unless the headers match this --schema-baseline file
+    --no-sanity             disable the fail-fast checks
+    --backend pdfminer      PDF extraction backend: pdfplumber (default), pdfminer or poppler (extraction.py)
+    --mmap                  serve the PDF from one read-only memory map (pdf_input.py)
+    - / fd:3 as pdf_path    read the PDF from stdin / inherited descriptor 3
+    --selftest              check the dependencies on an embedded PDF, print JSON, exit (selftest.py)
+    --out orders.ndjson     write records to a file, checkpointed per cycle (checkpoint.py)
+    --checkpoint PATH       checkpoint location (default: <out>.checkpoint.json)
+    --resume                continue an interrupted --out run from its checkpoint
+    --shard 2/4             parse only the 2nd of 4 equal cycle ranges (merge-shards.py)
+    --pages 140:280         parse only pages [140, 280), widened to whole cycles
+    --shard-info PATH       write the shard descriptor merge-shards.py needs
+    --write-index           also write the record key index (key_index.py)
+    --index PATH            key index location (default: <pdf>.keys.json)
+    --rollups PATH          also write per-customer, per-month order aggregates (order_rollups.py)
+    --key FIELD=VALUE       parse only the cycle holding this record (id, order_number)
+    --since 2026-01-20      emit only records with creation_date >= watermark,
+                            stopping early on a newest-first export (watermark.py)
+    --no-early-stop         with --since, always read to the end
 """
 
-import pdfplumber
 import json
 import sys
 import re
@@ -12,6 +43,22 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import Optional
 
+from checkpoint import checkpoint_from_argv
+from extraction import backend_from_argv
+from key_index import key_index_from_argv, key_lookup_from_argv
+from memory_budget import governor_from_argv
+from order_rollups import rollups_from_argv
+from page_headers import detect_cycle_size
+from parse_progress import progress_from_argv
+from pdf_cycles import iter_cycle_tables, observe_records, selection_from_argv
+from pdf_input import pdf_input_from_argv
+from record_fingerprint import with_fingerprint
+from sanity_checks import sanity_from_argv
+from schema_report import schema_from_argv
+from selftest import selftest_from_argv
+from shards import shard_info_from_argv
+from watermark import watermark_from_argv
+
 
 @dataclass
 class ParsedOrder:
@@ -133,25 +180,25 @@ def get_column_value(table: list, row_idx: int, header_text: str) -> Optional[st
 
 EXPECTED_CYCLE_SIZE = 7
 
+# Header names read per cycle page (get_column_value), for the SCHEMA: report
+KNOWN_COLUMNS = [
+    ["ID", "ID DI VENDITA", "PROFILO CLIENTE", "NOME VENDITE"],
+    ["NOME DI CONSEGNA", "INDIRIZZO DI CONSEGNA"],
+    ["DATA DI CREAZIONE", "DATA DI CONSEGNA", "RIMANI VENDITE FINANZIARIE"],
+    ["RIFERIMENTO CLIENTE", "STATO DELLE VENDITE", "TIPO DI ORDINE", "STATO DEL DOCUMENTO"],
+    ["ORIGINE VENDITE", "STATO DEL TRASFERIMENTO", "DATA DI TRASFERIMENTO"],
+    ["DATA DI COMPLETAMENTO", "PREVENTIVO", "APPLICA SCONTO", "IMPORTO LORDO"],
+    ["IMPORTO TOTALE", "ORDINE OMAGGIO", "E-MAIL"],
+]
+
 
 def _detect_cycle_size(pdf_path: str) -> int:
-    """Auto-detect cycle size by scanning for repeated order anchor headers."""
-    with pdfplumber.open(pdf_path) as pdf:
-        anchor_pages = []
-        for page_idx, page in enumerate(pdf.pages):
-            tables = page.extract_tables()
-            if tables and tables[0] and len(tables[0]) > 0:
-                header_row = tables[0][0]
-                headers_upper = [(h or '').strip().upper() for h in header_row]
-                has_id = 'ID' in headers_upper
-                has_id_vendita = any('ID DI VENDITA' in h for h in headers_upper)
-                if has_id and has_id_vendita:
-                    anchor_pages.append(page_idx)
-            if len(anchor_pages) >= 2:
-                break
-
-    if len(anchor_pages) >= 2:
-        detected = anchor_pages[1] - anchor_pages[0]
+    """Auto-detect cycle size from the order anchor headers of the first pages (page_headers.py)."""
+    detected = detect_cycle_size(
+        pdf_path, lambda headers: 'ID' in headers and any('ID DI VENDITA' in h for h in headers)
+    )
+
+    if detected:
         status = "OK" if detected == EXPECTED_CYCLE_SIZE else "CHANGED"
         _emit_cycle_warning(detected, status)
         return detected
@@ -165,235 +212,247 @@ def _emit_cycle_warning(detected: int, status: str) -> None:
     print(f"CYCLE_SIZE_WARNING:{json.dumps(warning)}", file=sys.stderr)
 
 
-def parse_orders_pdf(pdf_path: str):
+def parse_orders_pdf(pdf_path: str, governor=None, observers=(), selection=None, start_cycle: int = 0):
     """
     Parse Ordini.pdf with 7-page cycle structure.
     Yields one ParsedOrder per order.
+
+    governor: optional MemoryBudgetGovernor (--memory-budget).
+    observers: CycleObserver hooks (e.g. ProgressReporter) notified per cycle.
+    selection: optional CycleSelection (--shard/--pages).
+    start_cycle: first cycle to parse (--resume).
     """
     cycle_size = _detect_cycle_size(pdf_path)
     print(f"Detected cycle size: {cycle_size} pages", file=sys.stderr)
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-
-        # Process in cycle_size-page cycles
-        for cycle_start in range(0, total_pages, cycle_size):
-            # Extract all pages for this cycle as tables
-            tables = []
-            for i in range(cycle_size):
-                page_idx = cycle_start + i
-                if page_idx >= total_pages:
-                    break
-
-                page = pdf.pages[page_idx]
-                page_tables = page.extract_tables()
-
-                if not page_tables or not page_tables[0]:
-                    # Skip if no table found
-                    tables.append([])
+    # Process in cycle_size-page cycles (single PDF instance unless the governor caps it)
+    for cycle_idx, tables in iter_cycle_tables(
+        pdf_path, cycle_size, governor=governor, observers=observers, selection=selection, start_cycle=start_cycle
+    ):
+        cycle_start = cycle_idx * cycle_size
+
+        # Skip if tables are empty
+        if not tables[0] or len(tables[0]) <= 1:  # Header only
+            continue
+
+        # Combine rows (row N = same order across all 7 pages)
+        num_rows = len(tables[0])
+
+        # Diagnostic: dump headers for first cycle
+        if cycle_start == 0:
+            for page_i, tbl in enumerate(tables):
+                if tbl and len(tbl) > 0:
+                    headers = [(h or '').strip() for h in tbl[0]]
+                    rows_count = len(tbl) - 1
+                    print(f"DIAG_PAGE:{page_i+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
+                    if len(tbl) > 1:
+                        sample = [(c or '')[:30] for c in tbl[1]]
+                        print(f"DIAG_SAMPLE:{page_i+1}/{cycle_size} row1={sample}", file=sys.stderr)
                 else:
-                    tables.append(page_tables[0])
-
-                # Free memory
-                page = None
-
-            # Need all pages for complete cycle
-            if len(tables) < cycle_size:
-                break
-
-            # Skip if tables are empty
-            if not tables[0] or len(tables[0]) <= 1:  # Header only
-                continue
-
-            # Combine rows (row N = same order across all 7 pages)
-            num_rows = len(tables[0])
-
-            # Diagnostic: dump headers for first cycle
-            if cycle_start == 0:
-                for page_i, tbl in enumerate(tables):
-                    if tbl and len(tbl) > 0:
-                        headers = [(h or '').strip() for h in tbl[0]]
-                        rows_count = len(tbl) - 1
-                        print(f"DIAG_PAGE:{page_i+1}/{cycle_size} headers={headers} rows={rows_count}", file=sys.stderr)
-                        if len(tbl) > 1:
-                            sample = [(c or '')[:30] for c in tbl[1]]
-                            print(f"DIAG_SAMPLE:{page_i+1}/{cycle_size} row1={sample}", file=sys.stderr)
-                    else:
-                        print(f"DIAG_PAGE:{page_i+1}/{cycle_size} EMPTY_TABLE", file=sys.stderr)
-
-            for row_idx in range(1, num_rows):  # Skip header (row 0)
-                # Extract fields from each page using header matching
-                try:
-                    # Page 1/7: ID, ID DI VENDITA, PROFILO CLIENTE, NOME VENDITE (4 columns)
-                    order_id = get_column_value(tables[0], row_idx, "ID")
-                    order_number = get_column_value(tables[0], row_idx, "ID DI VENDITA")
-                    customer_profile_id = get_column_value(
-                        tables[0], row_idx, "PROFILO CLIENTE"
-                    )
-                    customer_name = get_column_value(tables[0], row_idx, "NOME VENDITE")
-
-                    # Skip if no internal ID (always required)
-                    if not order_id:
-                        continue
-
-                    # Skip garbage rows (ID = "0" pattern from other PDFs)
-                    if order_id == "0":
-                        continue
+                    print(f"DIAG_PAGE:{page_i+1}/{cycle_size} EMPTY_TABLE", file=sys.stderr)
+
+        for row_idx in range(1, num_rows):  # Skip header (row 0)
+            # Extract fields from each page using header matching
+            try:
+                # Page 1/7: ID, ID DI VENDITA, PROFILO CLIENTE, NOME VENDITE (4 columns)
+                order_id = get_column_value(tables[0], row_idx, "ID")
+                order_number = get_column_value(tables[0], row_idx, "ID DI VENDITA")
+                customer_profile_id = get_column_value(
+                    tables[0], row_idx, "PROFILO CLIENTE"
+                )
+                customer_name = get_column_value(tables[0], row_idx, "NOME VENDITE")
+
+                # Skip if no internal ID (always required)
+                if not order_id:
+                    continue
 
-                    # Skip non-numeric IDs with additional validation to avoid false positives
-                    # Valid IDs are numeric with optional dots (e.g. "71.285", "71.094")
-                    # We also check that customer_name exists - every real order must have a customer
-                    if not order_id.replace(".", "").isdigit():
-                        # Double-check: if it's not numeric AND has no customer name, definitely skip
-                        if not customer_name or customer_name.strip() == "":
-                            print(f"DEBUG: Skipping non-numeric order_id '{order_id}' with empty customer_name at row {row_idx}, cycle {cycle_start}", file=sys.stderr)
-                            continue
-                        # If customer_name exists but ID is non-numeric, log warning but still skip
-                        # (this should never happen for valid data from Archibald)
-                        print(f"WARNING: Skipping suspicious order with non-numeric ID '{order_id}' but valid customer '{customer_name}' at row {row_idx}, cycle {cycle_start}", file=sys.stderr)
-                        continue
+                # Skip garbage rows (ID = "0" pattern from other PDFs)
+                if order_id == "0":
+                    continue
 
-                    # Normalize order_id: strip thousands separator from numeric IDs
-                    # (e.g. "51.847" → "51847", "ORD/123" left unchanged)
-                    stripped = order_id.replace(".", "")
-                    if stripped.isdigit():
-                        order_id = stripped
-
-                    # Allow orders without order_number (ID DI VENDITA) - these are pending orders
-                    # waiting for Milano processing or intervention
-
-                    # Page 2/7: NOME DI CONSEGNA, INDIRIZZO DI CONSEGNA (2 columns)
-                    delivery_name = get_column_value(
-                        tables[1], row_idx, "NOME DI CONSEGNA"
-                    )
-                    delivery_address_raw = get_column_value(
-                        tables[1], row_idx, "INDIRIZZO DI CONSEGNA"
-                    )
-                    delivery_address = normalize_multiline(delivery_address_raw)
-
-                    # Page 3/7: DATA DI CREAZIONE, DATA DI CONSEGNA, RIMANI VENDITE FINANZIARIE (3 columns)
-                    creation_date_raw = get_column_value(
-                        tables[2], row_idx, "DATA DI CREAZIONE"
-                    )
-                    creation_date = parse_italian_datetime(creation_date_raw)
-
-                    # Validate creation_date - skip if missing (should not happen for valid orders)
-                    if not creation_date:
-                        print(f"WARNING: Skipping order {order_id} - missing creation_date (raw: '{creation_date_raw}')", file=sys.stderr)
+                # Skip non-numeric IDs with additional validation to avoid false positives
+                # Valid IDs are numeric with optional dots (e.g. "71.285", "71.094")
+                # We also check that customer_name exists - every real order must have a customer
+                if not order_id.replace(".", "").isdigit():
+                    # Double-check: if it's not numeric AND has no customer name, definitely skip
+                    if not customer_name or customer_name.strip() == "":
+                        print(f"DEBUG: Skipping non-numeric order_id '{order_id}' with empty customer_name at row {row_idx}, cycle {cycle_start}", file=sys.stderr)
                         continue
+                    # If customer_name exists but ID is non-numeric, log warning but still skip
+                    # (this should never happen for valid data from Archibald)
+                    print(f"WARNING: Skipping suspicious order with non-numeric ID '{order_id}' but valid customer '{customer_name}' at row {row_idx}, cycle {cycle_start}", file=sys.stderr)
+                    continue
 
-                    delivery_date_raw = get_column_value(
-                        tables[2], row_idx, "DATA DI CONSEGNA"
-                    )
-                    delivery_date = parse_italian_date(delivery_date_raw)
-
-                    order_description = get_column_value(
-                        tables[2], row_idx, "RIMANI VENDITE FINANZIARIE"
-                    )
-
-                    # Page 4/7: RIFERIMENTO CLIENTE, STATO DELLE VENDITE, TIPO DI ORDINE, STATO DEL DOCUMENTO (4 columns)
-                    customer_reference = get_column_value(
-                        tables[3], row_idx, "RIFERIMENTO CLIENTE"
-                    )
-                    sales_status = get_column_value(
-                        tables[3], row_idx, "STATO DELLE VENDITE"
-                    )
-                    order_type = get_column_value(tables[3], row_idx, "TIPO DI ORDINE")
-                    document_status = get_column_value(
-                        tables[3], row_idx, "STATO DEL DOCUMENTO"
-                    )
-
-                    # Page 5/7: ORIGINE VENDITE, STATO DEL TRASFERIMENTO, DATA DI TRASFERIMENTO (3 columns)
-                    sales_origin = get_column_value(
-                        tables[4], row_idx, "ORIGINE VENDITE"
-                    )
-                    transfer_status = get_column_value(
-                        tables[4], row_idx, "STATO DEL TRASFERIMENTO"
-                    )
-
-                    transfer_date_raw = get_column_value(
-                        tables[4], row_idx, "DATA DI TRASFERIMENTO"
-                    )
-                    transfer_date = parse_italian_date(transfer_date_raw)
-
-                    # Page 6/7: DATA DI COMPLETAMENTO, PREVENTIVO, APPLICA SCONTO %, IMPORTO LORDO (4 columns)
-                    completion_date_raw = get_column_value(
-                        tables[5], row_idx, "DATA DI COMPLETAMENTO"
-                    )
-                    completion_date = parse_italian_date(completion_date_raw)
-
-                    is_quote = get_column_value(
-                        tables[5], row_idx, "PREVENTIVO"
-                    )
-                    discount_percent = get_column_value(
-                        tables[5], row_idx, "APPLICA SCONTO"
-                    )
-                    gross_amount = normalize_currency(get_column_value(tables[5], row_idx, "IMPORTO LORDO"))
-
-                    # Page 7/7: IMPORTO TOTALE, ORDINE OMAGGIO, E-MAIL (2-3 columns)
-                    total_amount = normalize_currency(get_column_value(
-                        tables[6], row_idx, "IMPORTO TOTALE"
-                    ))
-                    is_gift_order = get_column_value(
-                        tables[6], row_idx, "ORDINE OMAGGIO"
-                    )
-                    email = get_column_value(
-                        tables[6], row_idx, "E-MAIL"
-                    )
-
-                    # Create ParsedOrder
-                    order = ParsedOrder(
-                        id=order_id,
-                        order_number=order_number,
-                        customer_profile_id=customer_profile_id,
-                        customer_name=customer_name,
-                        delivery_name=delivery_name,
-                        delivery_address=delivery_address,
-                        creation_date=creation_date,
-                        delivery_date=delivery_date,
-                        order_description=order_description,
-                        customer_reference=customer_reference,
-                        sales_status=sales_status,
-                        order_type=order_type,
-                        document_status=document_status,
-                        sales_origin=sales_origin,
-                        transfer_status=transfer_status,
-                        transfer_date=transfer_date,
-                        completion_date=completion_date,
-                        is_quote=is_quote,
-                        discount_percent=discount_percent,
-                        gross_amount=gross_amount,
-                        total_amount=total_amount,
-                        is_gift_order=is_gift_order,
-                        email=email,
-                    )
-
-                    yield order
-
-                except Exception as e:
-                    # Skip malformed rows
-                    print(
-                        f"Warning: Error parsing row {row_idx} in cycle {cycle_start}: {e}",
-                        file=sys.stderr,
-                    )
+                # Normalize order_id: strip thousands separator from numeric IDs
+                # (e.g. "51.847" → "51847", "ORD/123" left unchanged)
+                stripped = order_id.replace(".", "")
+                if stripped.isdigit():
+                    order_id = stripped
+
+                # Allow orders without order_number (ID DI VENDITA) - these are pending orders
+                # waiting for Milano processing or intervention
+
+                # Page 2/7: NOME DI CONSEGNA, INDIRIZZO DI CONSEGNA (2 columns)
+                delivery_name = get_column_value(
+                    tables[1], row_idx, "NOME DI CONSEGNA"
+                )
+                delivery_address_raw = get_column_value(
+                    tables[1], row_idx, "INDIRIZZO DI CONSEGNA"
+                )
+                delivery_address = normalize_multiline(delivery_address_raw)
+
+                # Page 3/7: DATA DI CREAZIONE, DATA DI CONSEGNA, RIMANI VENDITE FINANZIARIE (3 columns)
+                creation_date_raw = get_column_value(
+                    tables[2], row_idx, "DATA DI CREAZIONE"
+                )
+                creation_date = parse_italian_datetime(creation_date_raw)
+
+                # Validate creation_date - skip if missing (should not happen for valid orders)
+                if not creation_date:
+                    print(f"WARNING: Skipping order {order_id} - missing creation_date (raw: '{creation_date_raw}')", file=sys.stderr)
                     continue
 
-            # Free tables memory
-            tables = None
+                delivery_date_raw = get_column_value(
+                    tables[2], row_idx, "DATA DI CONSEGNA"
+                )
+                delivery_date = parse_italian_date(delivery_date_raw)
+
+                order_description = get_column_value(
+                    tables[2], row_idx, "RIMANI VENDITE FINANZIARIE"
+                )
+
+                # Page 4/7: RIFERIMENTO CLIENTE, STATO DELLE VENDITE, TIPO DI ORDINE, STATO DEL DOCUMENTO (4 columns)
+                customer_reference = get_column_value(
+                    tables[3], row_idx, "RIFERIMENTO CLIENTE"
+                )
+                sales_status = get_column_value(
+                    tables[3], row_idx, "STATO DELLE VENDITE"
+                )
+                order_type = get_column_value(tables[3], row_idx, "TIPO DI ORDINE")
+                document_status = get_column_value(
+                    tables[3], row_idx, "STATO DEL DOCUMENTO"
+                )
+
+                # Page 5/7: ORIGINE VENDITE, STATO DEL TRASFERIMENTO, DATA DI TRASFERIMENTO (3 columns)
+                sales_origin = get_column_value(
+                    tables[4], row_idx, "ORIGINE VENDITE"
+                )
+                transfer_status = get_column_value(
+                    tables[4], row_idx, "STATO DEL TRASFERIMENTO"
+                )
+
+                transfer_date_raw = get_column_value(
+                    tables[4], row_idx, "DATA DI TRASFERIMENTO"
+                )
+                transfer_date = parse_italian_date(transfer_date_raw)
+
+                # Page 6/7: DATA DI COMPLETAMENTO, PREVENTIVO, APPLICA SCONTO %, IMPORTO LORDO (4 columns)
+                completion_date_raw = get_column_value(
+                    tables[5], row_idx, "DATA DI COMPLETAMENTO"
+                )
+                completion_date = parse_italian_date(completion_date_raw)
+
+                is_quote = get_column_value(
+                    tables[5], row_idx, "PREVENTIVO"
+                )
+                discount_percent = get_column_value(
+                    tables[5], row_idx, "APPLICA SCONTO"
+                )
+                gross_amount = normalize_currency(get_column_value(tables[5], row_idx, "IMPORTO LORDO"))
+
+                # Page 7/7: IMPORTO TOTALE, ORDINE OMAGGIO, E-MAIL (2-3 columns)
+                total_amount = normalize_currency(get_column_value(
+                    tables[6], row_idx, "IMPORTO TOTALE"
+                ))
+                is_gift_order = get_column_value(
+                    tables[6], row_idx, "ORDINE OMAGGIO"
+                )
+                email = get_column_value(
+                    tables[6], row_idx, "E-MAIL"
+                )
+
+                # Create ParsedOrder
+                order = ParsedOrder(
+                    id=order_id,
+                    order_number=order_number,
+                    customer_profile_id=customer_profile_id,
+                    customer_name=customer_name,
+                    delivery_name=delivery_name,
+                    delivery_address=delivery_address,
+                    creation_date=creation_date,
+                    delivery_date=delivery_date,
+                    order_description=order_description,
+                    customer_reference=customer_reference,
+                    sales_status=sales_status,
+                    order_type=order_type,
+                    document_status=document_status,
+                    sales_origin=sales_origin,
+                    transfer_status=transfer_status,
+                    transfer_date=transfer_date,
+                    completion_date=completion_date,
+                    is_quote=is_quote,
+                    discount_percent=discount_percent,
+                    gross_amount=gross_amount,
+                    total_amount=total_amount,
+                    is_gift_order=is_gift_order,
+                    email=email,
+                )
+
+                yield order
+
+            except Exception as e:
+                # Skip malformed rows
+                print(
+                    f"Warning: Error parsing row {row_idx} in cycle {cycle_start}: {e}",
+                    file=sys.stderr,
+                )
+                continue
+
+        # Free tables memory
+        tables = None
 
 
 def main():
     """Main entry point - outputs JSON to stdout"""
+    selftest_from_argv("orders", sys.argv)
     if len(sys.argv) < 2:
-        print("Usage: parse-orders-pdf.py <pdf_path>", file=sys.stderr)
+        print("Usage: parse-orders-pdf.py <pdf_path> [options]", file=sys.stderr)
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-
     try:
-        for order in parse_orders_pdf(pdf_path):
-            # Output one JSON object per line
-            print(json.dumps(asdict(order), ensure_ascii=False))
+        backend_from_argv(sys.argv)
+        pdf_path = pdf_input_from_argv(sys.argv)
+        governor = governor_from_argv("orders", sys.argv)
+        progress = progress_from_argv("orders", sys.argv)
+        selection = selection_from_argv(sys.argv)
+        lookup = key_lookup_from_argv("orders", pdf_path, sys.argv)
+        if lookup and lookup.selection:
+            selection = lookup.selection
+        checkpoint = checkpoint_from_argv("orders", pdf_path, sys.argv)
+        start_cycle = checkpoint.open() if checkpoint else 0
+        shard_info = shard_info_from_argv("orders", pdf_path, sys.argv, selection, checkpoint)
+        observers = [
+            sanity_from_argv("orders", sys.argv),
+            progress, checkpoint, shard_info, key_index_from_argv("orders", pdf_path, sys.argv),
+            schema_from_argv("orders", sys.argv, KNOWN_COLUMNS), rollups_from_argv("orders", pdf_path, sys.argv),
+        ]
+        records = parse_orders_pdf(
+            pdf_path, governor=governor, observers=observers, selection=selection, start_cycle=start_cycle
+        )
+        watermark = watermark_from_argv("orders", "creation_date", sys.argv)
+        if watermark:
+            records = watermark.apply(records)
+        if lookup:
+            records = lookup.apply(records)
+        for order in observe_records(records, observers):
+            if checkpoint:
+                checkpoint.write_record(with_fingerprint("orders", asdict(order)))
+            else:
+                # Output one JSON object per line
+                print(json.dumps(with_fingerprint("orders", asdict(order)), ensure_ascii=False))
+        if lookup and not lookup.found:
+            print(f"Error: {lookup.field}={lookup.value} not found", file=sys.stderr)
+            sys.exit(1)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -4,19 +4,59 @@ Archibald Prices PDF Parser with 3-Page Cycle Support using pdfplumber
 
 Parses price data from Archibald PDF export with Italian locale handling.
 Verified structure: 3 pages per cycle with table-based extraction.
+
+Usage:
+    python3 parse-prices-pdf.py <path-to-pdf> [options] > prices.json
+
+Each price carries its "fingerprint" (record_fingerprint.py).
+
+Options:
+    --memory-budget 300MB   adapt to an RSS budget (memory_budget.py)
+    --memory-trace          also report the tracemalloc Python heap
+    --progress-interval 2   seconds between PROGRESS: lines (0 = every cycle)
+    --no-progress           disable PROGRESS: lines
+    --schema-baseline PATH  compare the page headers with a saved set (schema_report.py)
+    --no-schema             disable the SCHEMA: report
+    --max-null-rate 0.5     abort when a required field is empty in more of the first cycles'
+                            records (fail-fast checks, sanity_checks.py)
+    --sanity-cycles 3       cycles watched for required-field nulls and header changes
+    --max-row-drop 0.9      abort when a cycle yields under 10% of the recent median rows
+    --expect-headers PATH   abort unless the headers match this --schema-baseline file
+    --no-sanity             disable the fail-fast checks
+    --backend pdfminer      PDF extraction backend: pdfplumber (default), pdfminer or poppler (extraction.py)
+    --mmap                  serve the PDF from one read-only memory map (pdf_input.py)
+    - / fd:3 as pdf_path    read the PDF from stdin / inherited descriptor 3
+    --selftest              check the dependencies on an embedded PDF, print JSON, exit (selftest.py)
+    --shard 2/4             parse only the 2nd of 4 equal cycle ranges (merge-shards.py)
+    --pages 140:280         parse only pages [140, 280), widened to whole cycles
+    --shard-info PATH       write the shard descriptor merge-shards.py needs
+    --price-matrix PATH     also write the (account, item) price lookup table (price_matrix.py)
 """
 
+import importlib.util
 import sys
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Generator, Optional
 from dataclasses import dataclass, asdict
 
-try:
-    import pdfplumber
-except ImportError:
+# Checked without importing it: pdfplumber loads when the first PDF is opened
+if importlib.util.find_spec("pdfplumber") is None:
     print(json.dumps({"error": "pdfplumber not installed. Run: pip3 install pdfplumber"}), file=sys.stderr)
     sys.exit(1)
 
+from extraction import backend_from_argv
+from memory_budget import governor_from_argv
+from page_headers import detect_cycle_size
+from parse_progress import progress_from_argv
+from pdf_cycles import iter_cycle_tables, observe_records, selection_from_argv
+from pdf_input import pdf_input_from_argv
+from price_matrix import price_matrix_from_argv
+from record_fingerprint import with_fingerprint
+from sanity_checks import sanity_from_argv
+from schema_report import schema_from_argv
+from selftest import selftest_from_argv
+from shards import shard_info_from_argv
+
 @dataclass
 class ParsedPrice:
     """Parsed price record from PDF (3-page cycle)"""
@@ -46,27 +86,18 @@ class PricesPDFParser:
 
     PAGES_PER_CYCLE = 3
 
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, governor=None, observers=(), selection=None):
         self.pdf_path = pdf_path
+        self.governor = governor  # Optional MemoryBudgetGovernor (--memory-budget)
+        self.observers = observers  # CycleObserver hooks (e.g. ProgressReporter)
+        self.selection = selection  # Optional CycleSelection (--shard/--pages)
 
     def _detect_cycle_size(self) -> int:
-        """Auto-detect cycle size by scanning for repeated 'ID' header in first column."""
+        """Auto-detect cycle size from the 'ID' header in the first column of the first pages (page_headers.py)."""
         expected = self.__class__.PAGES_PER_CYCLE
-        with pdfplumber.open(self.pdf_path) as pdf:
-            anchor_pages = []
-            for page_idx, page in enumerate(pdf.pages):
-                table = page.extract_table()
-                if table and len(table) > 0:
-                    header_row = table[0]
-                    if header_row and len(header_row) > 0:
-                        first_col = (header_row[0] or '').strip().upper()
-                        if first_col == 'ID':
-                            anchor_pages.append(page_idx)
-                if len(anchor_pages) >= 2:
-                    break
-
-        if len(anchor_pages) >= 2:
-            detected = anchor_pages[1] - anchor_pages[0]
+        detected = detect_cycle_size(self.pdf_path, lambda headers: headers[0] == 'ID')
+
+        if detected:
             status = "OK" if detected == expected else "CHANGED"
             self._emit_cycle_warning(detected, expected, status)
             return detected
@@ -79,115 +110,109 @@ class PricesPDFParser:
         print(f"CYCLE_SIZE_WARNING:{json.dumps(warning)}", file=sys.stderr)
 
     def parse(self) -> List[ParsedPrice]:
+        """Parse all prices from PDF using table extraction (see parse_streaming)"""
+        return list(self.parse_streaming())
+
+    def parse_streaming(self) -> Generator[ParsedPrice, None, None]:
         """
-        Parse all prices from PDF using table extraction
+        Parse prices from PDF using table extraction, yielding them cycle by cycle
 
         Memory optimization: Re-opens PDF for each cycle to force garbage collection.
         Reduces memory from ~GB to <100MB following pdfplumber best practices.
         """
-        prices = []
         self.PAGES_PER_CYCLE = self._detect_cycle_size()
         print(f"Detected cycle size: {self.PAGES_PER_CYCLE} pages", file=sys.stderr)
 
-        try:
-            # First pass: get total pages
-            with pdfplumber.open(self.pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-                num_cycles = total_pages // self.PAGES_PER_CYCLE
+        def report_cycle_error(cycle_idx: int, e: Exception) -> None:
+            print(f"Warning: Failed to extract tables for cycle {cycle_idx}: {e}", file=sys.stderr)
 
+        try:
             # Process each cycle with fresh PDF instance (critical for memory!)
-            for cycle_idx in range(num_cycles):
-                # Re-open PDF for this cycle only - forces garbage collection
-                with pdfplumber.open(self.pdf_path) as pdf:
-                    # Calculate page indices for this cycle
-                    page_1_idx = cycle_idx * self.PAGES_PER_CYCLE + 0
-                    page_2_idx = cycle_idx * self.PAGES_PER_CYCLE + 1
-                    page_3_idx = cycle_idx * self.PAGES_PER_CYCLE + 2
-
-                    # Extract tables from each page
+            cycles = iter_cycle_tables(
+                self.pdf_path,
+                self.PAGES_PER_CYCLE,
+                cycles_per_open=1,
+                governor=self.governor,
+                table_fn=lambda page: page.extract_table() or [],
+                on_cycle_error=report_cycle_error,
+                observers=self.observers,
+                selection=self.selection,
+            )
+            for cycle_idx, tables in cycles:
+                # ID/ITEM SELECTION, dates, IMPORTO UNITARIO (price)
+                table1, table2, table3 = (tables + [[], [], []])[:3]
+
+                if not table1 or not table2 or not table3:
+                    print(f"Warning: Missing tables for cycle {cycle_idx}", file=sys.stderr)
+                    continue
+
+                # Diagnostic: dump headers for first cycle
+                if cycle_idx == 0:
+                    for t_idx, tbl in enumerate([table1, table2, table3], 1):
+                        if tbl and len(tbl) > 0:
+                            headers = [(h or '').strip() for h in tbl[0]]
+                            rows_count = len(tbl) - 1
+                            print(f"DIAG_PAGE:{t_idx}/{self.PAGES_PER_CYCLE} headers={headers} rows={rows_count}", file=sys.stderr)
+
+                # Process each row (skip header at index 0)
+                for row_idx in range(1, min(len(table1), len(table2), len(table3))):
                     try:
-                        table1 = pdf.pages[page_1_idx].extract_table()  # ID, ITEM SELECTION, etc.
-                        table2 = pdf.pages[page_2_idx].extract_table()  # ITEM DESCRIPTION, dates
-                        table3 = pdf.pages[page_3_idx].extract_table()  # IMPORTO UNITARIO (price)
-                    except Exception as e:
-                        print(f"Warning: Failed to extract tables for cycle {cycle_idx}: {e}", file=sys.stderr)
-                        continue
-
-                    if not table1 or not table2 or not table3:
-                        print(f"Warning: Missing tables for cycle {cycle_idx}", file=sys.stderr)
-                        continue
-
-                    # Diagnostic: dump headers for first cycle
-                    if cycle_idx == 0:
-                        for t_idx, tbl in enumerate([table1, table2, table3], 1):
-                            if tbl and len(tbl) > 0:
-                                headers = [(h or '').strip() for h in tbl[0]]
-                                rows_count = len(tbl) - 1
-                                print(f"DIAG_PAGE:{t_idx}/{self.PAGES_PER_CYCLE} headers={headers} rows={rows_count}", file=sys.stderr)
-
-                    # Process each row (skip header at index 0)
-                    for row_idx in range(1, min(len(table1), len(table2), len(table3))):
-                        try:
-                            row1 = table1[row_idx] if row_idx < len(table1) else []
-                            row2 = table2[row_idx] if row_idx < len(table2) else []
-                            row3 = table3[row_idx] if row_idx < len(table3) else []
-
-                            # Page 1 columns: ID, CODICE CONTO, ACCOUNT:, DESCRIZIONE ACCOUNT:, ITEM SELECTION:
-                            id_val = self._get_cell(row1, 0)
-                            codice_conto = self._get_cell(row1, 1)
-                            account = self._get_cell(row1, 2)
-                            descrizione_account = self._get_cell(row1, 3)
-                            item_selection = self._get_cell(row1, 4)
-
-                            # Page 2 columns: ITEM DESCRIPTION:, DA DATA, DATA, QUANTITÀIMPORTODA (4 columns)
-                            item_description = self._get_cell(row2, 0)
-                            da_data = self._get_cell(row2, 1)
-                            data = self._get_cell(row2, 2)
-                            quantita_p2 = self._get_cell(row2, 3)
-
-                            # Page 3 columns: QUANTITÀIMPORTO, UNITÀ DI PREZZO, IMPORTO UNITARIO:, VALUTA, PREZZO NETTO BRASSELER (5 columns)
-                            quantita_p3 = self._get_cell(row3, 0)
-                            unita_di_prezzo = self._get_cell(row3, 1)
-                            importo_unitario = self._get_cell(row3, 2)  # KEY FIELD - the actual price!
-                            valuta = self._get_cell(row3, 3)
-                            prezzo_netto_brasseler = self._get_cell(row3, 4)
-
-                            # Filter garbage: ID="0" or empty
-                            if not id_val or id_val.strip() in ["0", ""]:
-                                continue
-
-                            # Create ParsedPrice object
-                            price = ParsedPrice(
-                                id=id_val,
-                                codice_conto=codice_conto,
-                                account=account,
-                                descrizione_account=descrizione_account,
-                                item_selection=item_selection,
-                                item_description=item_description,
-                                da_data=da_data,
-                                data=data,
-                                quantita_p2=quantita_p2,
-                                quantita_p3=quantita_p3,
-                                unita_di_prezzo=unita_di_prezzo,
-                                importo_unitario=importo_unitario,  # Italian format preserved
-                                valuta=valuta,
-                                prezzo_netto_brasseler=prezzo_netto_brasseler,
-                            )
-
-                            prices.append(price)
-
-                        except Exception as e:
-                            print(f"Warning: Failed to parse row {row_idx} in cycle {cycle_idx}: {e}", file=sys.stderr)
+                        row1 = table1[row_idx] if row_idx < len(table1) else []
+                        row2 = table2[row_idx] if row_idx < len(table2) else []
+                        row3 = table3[row_idx] if row_idx < len(table3) else []
+
+                        # Page 1 columns: ID, CODICE CONTO, ACCOUNT:, DESCRIZIONE ACCOUNT:, ITEM SELECTION:
+                        id_val = self._get_cell(row1, 0)
+                        codice_conto = self._get_cell(row1, 1)
+                        account = self._get_cell(row1, 2)
+                        descrizione_account = self._get_cell(row1, 3)
+                        item_selection = self._get_cell(row1, 4)
+
+                        # Page 2 columns: ITEM DESCRIPTION:, DA DATA, DATA, QUANTITÀIMPORTODA (4 columns)
+                        item_description = self._get_cell(row2, 0)
+                        da_data = self._get_cell(row2, 1)
+                        data = self._get_cell(row2, 2)
+                        quantita_p2 = self._get_cell(row2, 3)
+
+                        # Page 3 columns: QUANTITÀIMPORTO, UNITÀ DI PREZZO, IMPORTO UNITARIO:, VALUTA, PREZZO NETTO BRASSELER (5 columns)
+                        quantita_p3 = self._get_cell(row3, 0)
+                        unita_di_prezzo = self._get_cell(row3, 1)
+                        importo_unitario = self._get_cell(row3, 2)  # KEY FIELD - the actual price!
+                        valuta = self._get_cell(row3, 3)
+                        prezzo_netto_brasseler = self._get_cell(row3, 4)
+
+                        # Filter garbage: ID="0" or empty
+                        if not id_val or id_val.strip() in ["0", ""]:
                             continue
 
-                # PDF context closed here, memory freed before next cycle
+                        # Create ParsedPrice object
+                        price = ParsedPrice(
+                            id=id_val,
+                            codice_conto=codice_conto,
+                            account=account,
+                            descrizione_account=descrizione_account,
+                            item_selection=item_selection,
+                            item_description=item_description,
+                            da_data=da_data,
+                            data=data,
+                            quantita_p2=quantita_p2,
+                            quantita_p3=quantita_p3,
+                            unita_di_prezzo=unita_di_prezzo,
+                            importo_unitario=importo_unitario,  # Italian format preserved
+                            valuta=valuta,
+                            prezzo_netto_brasseler=prezzo_netto_brasseler,
+                        )
+
+                        yield price
+
+                    except Exception as e:
+                        print(f"Warning: Failed to parse row {row_idx} in cycle {cycle_idx}: {e}", file=sys.stderr)
+                        continue
 
         except Exception as e:
             print(json.dumps({"error": str(e)}), file=sys.stderr)
             raise
 
-        return prices
-
     def _get_cell(self, row: List[Any], index: int) -> Optional[str]:
         """Safely get cell value from row, handling None and out-of-bounds"""
         if not row or index >= len(row):
@@ -199,22 +224,34 @@ class PricesPDFParser:
 
 def main():
     """Main entry point - outputs JSON to stdout"""
+    selftest_from_argv("prices", sys.argv)
     if len(sys.argv) < 2:
         print(json.dumps({"error": "Missing PDF path argument"}), file=sys.stderr)
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-
     try:
-        parser = PricesPDFParser(pdf_path)
-        prices = parser.parse()
+        backend_from_argv(sys.argv)
+        pdf_path = pdf_input_from_argv(sys.argv)
+        progress = progress_from_argv("prices", sys.argv)
+        selection = selection_from_argv(sys.argv)
+        observers = [
+            sanity_from_argv("prices", sys.argv),
+            progress,
+            shard_info_from_argv("prices", pdf_path, sys.argv, selection),
+            schema_from_argv("prices", sys.argv),
+            price_matrix_from_argv("prices", pdf_path, sys.argv),
+        ]
+        parser = PricesPDFParser(
+            pdf_path, governor=governor_from_argv("prices", sys.argv), observers=observers, selection=selection
+        )
+        prices = list(observe_records(parser.parse_streaming(), observers))
 
         # Output as JSON array (compact for performance)
-        output = [asdict(p) for p in prices]
+        output = [with_fingerprint("prices", asdict(p)) for p in prices]
         print(json.dumps(output, ensure_ascii=False))
 
     except FileNotFoundError:
-        print(json.dumps({"error": f"PDF file not found: {pdf_path}"}), file=sys.stderr)
+        print(json.dumps({"error": f"PDF file not found: {sys.argv[1]}"}), file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(json.dumps({"error": str(e)}), file=sys.stderr)
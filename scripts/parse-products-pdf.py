@@ -13,8 +13,42 @@ Usage:
 
 Example:
     python3 parse-products-pdf-optimized.py Prodotti.pdf > products.json
+
+Each product carries its "fingerprint" (record_fingerprint.py).
+
+Options:
+    --memory-budget 500MB   adapt to an RSS budget (memory_budget.py)
+    --memory-trace          also report the tracemalloc Python heap
+    --progress-interval 2   seconds between PROGRESS: lines (0 = every cycle)
+    --no-progress           disable PROGRESS: lines
+    --schema-baseline PATH  compare the page headers with a saved set (schema_report.py)
+    --no-schema             disable the SCHEMA: report
+    --max-null-rate 0.5     abort when a required field is empty in more of the first cycles'
+                            records (fail-fast checks, sanity_checks.py)
+    --sanity-cycles 3       cycles watched for required-field nulls and header changes
+    --max-row-drop 0.9      abort when a cycle yields under 10% of the recent median rows
+    --expect-headers PATH   abort unless the headers match this --schema-baseline file
+    --no-sanity             disable the fail-fast checks
+    --backend pdfminer      PDF extraction backend: pdfplumber (default), pdfminer or poppler (extraction.py)
+    --mmap                  serve the PDF from one read-only memory map (pdf_input.py)
+    - / fd:3 as pdf_path    read the PDF from stdin / inherited descriptor 3
+    --selftest              check the dependencies on an embedded PDF, print JSON, exit (selftest.py)
+    --out products.ndjson   also spool records to a file, checkpointed per cycle (checkpoint.py)
+    --checkpoint PATH       checkpoint location (default: <out>.checkpoint.json)
+    --resume                continue an interrupted --out run from its checkpoint
+    --shard 2/4             parse only the 2nd of 4 equal cycle ranges (merge-shards.py)
+    --pages 140:280         parse only pages [140, 280), widened to whole cycles
+    --shard-info PATH       write the shard descriptor merge-shards.py needs
+    --write-index           also write the record key index (key_index.py)
+    --index PATH            key index location (default: <pdf>.keys.json)
+    --search-index PATH     also write the type-ahead search index (search_index.py)
+    --key FIELD=VALUE       parse only the cycle holding this record (id_articolo)
+    --since 2026-01-20      emit only records with datetime_modificato >= watermark,
+                            stopping early on a newest-first export (watermark.py)
+    --no-early-stop         with --since, always read to the end
 """
 
+import importlib.util
 import sys
 import json
 import re
@@ -22,12 +56,27 @@ from typing import List, Dict, Any, Optional, Generator
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
-try:
-    import pdfplumber
-except ImportError:
+# Checked without importing it: pdfplumber loads when the first PDF is opened
+if importlib.util.find_spec("pdfplumber") is None:
     print(json.dumps({"error": "pdfplumber not installed. Run: pip3 install pdfplumber"}))
     sys.exit(1)
 
+from checkpoint import checkpoint_from_argv, read_ndjson
+from extraction import backend_from_argv
+from key_index import key_index_from_argv, key_lookup_from_argv
+from memory_budget import governor_from_argv
+from page_headers import detect_cycle_size
+from parse_progress import progress_from_argv
+from pdf_cycles import iter_cycle_tables, observe_records, selection_from_argv
+from pdf_input import pdf_input_from_argv
+from record_fingerprint import with_fingerprint
+from sanity_checks import sanity_from_argv
+from schema_report import schema_from_argv
+from search_index import search_index_from_argv
+from selftest import selftest_from_argv
+from shards import shard_info_from_argv
+from watermark import watermark_from_argv
+
 
 @dataclass
 class ParsedProduct:
@@ -90,29 +139,20 @@ class ProductsPDFParserOptimized:
 
     PAGES_PER_CYCLE = 9
 
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, governor=None, observers=(), selection=None):
         self.pdf_path = Path(pdf_path)
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        self.governor = governor  # Optional MemoryBudgetGovernor (--memory-budget)
+        self.observers = observers  # CycleObserver hooks (e.g. ProgressReporter)
+        self.selection = selection  # Optional CycleSelection (--shard/--pages)
 
     def _detect_cycle_size(self) -> int:
-        """Auto-detect cycle size by scanning for repeated 'ID ARTICOLO' header in first column."""
+        """Auto-detect cycle size from the 'ID ARTICOLO' header in the first column of the first pages (page_headers.py)."""
         expected = self.__class__.PAGES_PER_CYCLE
-        with pdfplumber.open(self.pdf_path) as pdf:
-            anchor_pages = []
-            for page_idx, page in enumerate(pdf.pages):
-                tables = page.extract_tables()
-                if tables and len(tables[0]) > 0:
-                    header_row = tables[0][0]
-                    if header_row and len(header_row) > 0:
-                        first_col = (header_row[0] or '').strip().upper()
-                        if first_col == 'ID ARTICOLO':
-                            anchor_pages.append(page_idx)
-                if len(anchor_pages) >= 2:
-                    break
-
-        if len(anchor_pages) >= 2:
-            detected = anchor_pages[1] - anchor_pages[0]
+        detected = detect_cycle_size(self.pdf_path, lambda headers: headers[0] == 'ID ARTICOLO')
+
+        if detected:
             status = "OK" if detected == expected else "CHANGED"
             self._emit_cycle_warning(detected, expected, status)
             return detected
@@ -124,10 +164,11 @@ class ProductsPDFParserOptimized:
         warning = {"parser": "products", "detected": detected, "expected": expected, "status": status}
         print(f"CYCLE_SIZE_WARNING:{json.dumps(warning)}", file=sys.stderr)
 
-    def parse_streaming(self) -> Generator[ParsedProduct, None, None]:
+    def parse_streaming(self, start_cycle: int = 0) -> Generator[ParsedProduct, None, None]:
         """
         Memory-efficient streaming parser that yields products one by one.
         Processes N-page cycles incrementally to minimize memory usage.
+        start_cycle skips the cycles an interrupted run already parsed (--resume).
 
         KEY OPTIMIZATION: Re-opens PDF for each cycle to force garbage collection.
         This reduces memory from ~9GB to ~450-500MB per the pdfplumber workaround:
@@ -136,46 +177,42 @@ class ProductsPDFParserOptimized:
         self.PAGES_PER_CYCLE = self._detect_cycle_size()
         print(f"Detected cycle size: {self.PAGES_PER_CYCLE} pages", file=sys.stderr)
 
-        # First pass: get total pages
-        with pdfplumber.open(self.pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            cycles = total_pages // self.PAGES_PER_CYCLE
+        def report_cycle_error(cycle: int, e: Exception) -> None:
+            base_idx = cycle * self.PAGES_PER_CYCLE
+            print(f"CYCLE_PARSE_ERROR:cycle={cycle} base_idx={base_idx} error={str(e)}", file=sys.stderr)
 
         # Process each cycle with fresh PDF instance (critical for memory!)
-        for cycle in range(cycles):
-            base_idx = cycle * self.PAGES_PER_CYCLE
-            cycle_tables = None
+        cycles = iter_cycle_tables(
+            self.pdf_path,
+            self.PAGES_PER_CYCLE,
+            cycles_per_open=1,
+            governor=self.governor,
+            on_cycle_error=report_cycle_error,
+            observers=self.observers,
+            selection=self.selection,
+            start_cycle=start_cycle,
+        )
+        for cycle, tables in cycles:
+            cycle_tables = []
             try:
-                # Re-open PDF for this cycle only - forces garbage collection
-                with pdfplumber.open(self.pdf_path) as pdf:
-                    # Extract tables for this cycle only (not all pages!)
-                    cycle_tables = []
-                    for offset in range(self.PAGES_PER_CYCLE):
-                        page_idx = base_idx + offset
-                        if page_idx < total_pages:
-                            page = pdf.pages[page_idx]
-                            tables = page.extract_tables()
-                            if tables:
-                                # Diagnostic: dump headers for first cycle
-                                if cycle == 0 and tables[0] and len(tables[0]) > 0:
-                                    headers = [(h or '').strip() for h in tables[0][0]]
-                                    rows_count = len(tables[0]) - 1
-                                    print(f"DIAG_PAGE:{offset+1}/{self.PAGES_PER_CYCLE} headers={headers} rows={rows_count}", file=sys.stderr)
-                                # Skip header row, get data rows only
-                                table_data = tables[0][1:] if len(tables[0]) > 1 else []
-                                cycle_tables.append(table_data)
-                            else:
-                                cycle_tables.append([])
-                        else:
-                            cycle_tables.append([])
+                for offset, table in enumerate(tables):
+                    if table:
+                        # Diagnostic: dump headers for first cycle
+                        if cycle == 0:
+                            headers = [(h or '').strip() for h in table[0]]
+                            rows_count = len(table) - 1
+                            print(f"DIAG_PAGE:{offset+1}/{self.PAGES_PER_CYCLE} headers={headers} rows={rows_count}", file=sys.stderr)
+                        # Skip header row, get data rows only
+                        cycle_tables.append(table[1:])
+                    else:
+                        cycle_tables.append([])
 
                 # Parse this cycle and yield products
-                # (PDF context closed here, memory freed before next cycle)
                 products = self._parse_single_cycle(cycle_tables)
                 for product in products:
                     yield product
             except Exception as e:
-                print(f"CYCLE_PARSE_ERROR:cycle={cycle} base_idx={base_idx} error={str(e)}", file=sys.stderr)
+                report_cycle_error(cycle, e)
             finally:
                 del cycle_tables
 
@@ -384,23 +421,62 @@ class ProductsPDFParserOptimized:
 
 
 def main():
-    if len(sys.argv) != 2:
+    selftest_from_argv("products", sys.argv)
+    if len(sys.argv) < 2:
         print(json.dumps({
-            "error": "Usage: python3 parse-products-pdf-optimized.py <path-to-pdf>"
+            "error": "Usage: python3 parse-products-pdf-optimized.py <path-to-pdf> [options]"
         }))
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-
     try:
-        parser = ProductsPDFParserOptimized(pdf_path)
+        backend_from_argv(sys.argv)
+        pdf_path = pdf_input_from_argv(sys.argv)
+        progress = progress_from_argv("products", sys.argv)
+        selection = selection_from_argv(sys.argv)
+        lookup = key_lookup_from_argv("products", pdf_path, sys.argv)
+        if lookup and lookup.selection:
+            selection = lookup.selection
+        checkpoint = checkpoint_from_argv("products", pdf_path, sys.argv)
+        shard_info = shard_info_from_argv("products", pdf_path, sys.argv, selection, checkpoint)
+        observers = [
+            sanity_from_argv("products", sys.argv),
+            progress, checkpoint, shard_info, key_index_from_argv("products", pdf_path, sys.argv),
+            schema_from_argv("products", sys.argv),
+            search_index_from_argv("products", pdf_path, sys.argv),
+        ]
+        parser = ProductsPDFParserOptimized(
+            pdf_path,
+            governor=governor_from_argv("products", sys.argv),
+            observers=observers,
+            selection=selection,
+        )
+        start_cycle = checkpoint.open() if checkpoint else 0
+
+        records = parser.parse_streaming(start_cycle)
+        watermark = watermark_from_argv("products", "datetime_modificato", sys.argv)
+        if watermark:
+            records = watermark.apply(records)
+        if lookup:
+            records = lookup.apply(records)
 
         # Use streaming to minimize memory
         products_list = []
-        for product in parser.parse_streaming():
-            products_list.append(asdict(product))
+        for product in observe_records(records, observers):
+            if checkpoint:
+                checkpoint.write_record(with_fingerprint("products", asdict(product)))
+            else:
+                products_list.append(with_fingerprint("products", asdict(product)))
+
+        if lookup and not lookup.found:
+            print(f"Error: {lookup.field}={lookup.value} not found", file=sys.stderr)
+            sys.exit(1)
+
+        if checkpoint:
+            # Spool holds the records of the resumed cycles too
+            products_list = read_ndjson(checkpoint.out_path)
 
-        if len(products_list) == 0:
+        # An incremental (--since) run legitimately finds nothing new
+        if len(products_list) == 0 and not watermark:
             print(json.dumps({"error": "Parse produced 0 products — aborting to prevent catalog wipe"}))
             sys.exit(1)
 
@@ -408,7 +484,7 @@ def main():
         output = {
             "products": products_list,
             "count": len(products_list),
-            "source": pdf_path,
+            "source": sys.argv[1],
         }
 
         print(json.dumps(output, indent=2, ensure_ascii=False))
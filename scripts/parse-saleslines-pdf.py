@@ -2,6 +2,7 @@
 """
 Parse Saleslines PDF (single order) - 2-table structure per page pair
 Outputs JSON to stdout (one article per line)
+Each record carries its "fingerprint" (record_fingerprint.py)
 
 Best practices:
 - Memory optimization: yield pattern, page = None after use
@@ -9,15 +10,24 @@ Best practices:
 - JSON streaming: ensure_ascii=False for Italian chars
 - Robust error handling with continue on row errors
 - Multi-page support: processes page pairs (0,1), (2,3), (4,5)...
+- pdf_path may be - (stdin) or fd:N (inherited descriptor), --mmap maps a path (pdf_input.py)
+- --selftest checks the dependencies on an embedded PDF and exits (selftest.py)
 """
 
-import pdfplumber
 import json
 import sys
 import re
 from dataclasses import dataclass, asdict
 from typing import Optional
 
+from extraction import backend_from_argv, open_pdf
+from parse_progress import progress_from_argv
+from pdf_cycles import observe_records
+from pdf_input import pdf_input_from_argv
+from record_fingerprint import with_fingerprint
+from schema_report import schema_from_argv
+from selftest import selftest_from_argv
+
 
 @dataclass
 class ParsedArticle:
@@ -51,11 +61,12 @@ def is_totals_row(row) -> bool:
     return 'count=' in raw or 'sum=' in raw
 
 
-def parse_page_pair(page_left, page_right, pair_idx: int):
+def parse_page_pair(page_left, page_right, pair_idx: int, observers=()):
     """
     Parse a pair of pages from the Saleslines PDF.
     Left page: LINEA, NOME ARTICOLO, QTÀ ORDINATA, UNITÀ DI PREZZO, SCONTO %
     Right page: IMPORTO DELLA LINEA, PREZZO NETTO, NOME (description)
+    observers get both tables through on_tables().
     """
     tables_left = page_left.extract_tables()
     tables_right = page_right.extract_tables()
@@ -66,6 +77,8 @@ def parse_page_pair(page_left, page_right, pair_idx: int):
 
     table1 = tables_left[0]
     table2 = tables_right[0]
+    for observer in observers:
+        observer.on_tables(pair_idx, [table1, table2])
 
     if len(table1) <= 1 or len(table2) <= 1:
         return
@@ -149,7 +162,7 @@ def parse_page_pair(page_left, page_right, pair_idx: int):
             continue
 
 
-def parse_saleslines_pdf(pdf_path: str):
+def parse_saleslines_pdf(pdf_path: str, observers=()):
     """
     Parse Saleslines PDF with 2-table structure per page pair.
     Yields one ParsedArticle per line.
@@ -161,8 +174,11 @@ def parse_saleslines_pdf(pdf_path: str):
 
     Left page: LINEA, NOME ARTICOLO, QTÀ ORDINATA, UNITÀ DI PREZZO, SCONTO %
     Right page: IMPORTO DELLA LINEA, NOME (description)
+
+    observers: CycleObserver hooks (e.g. ProgressReporter), one "cycle" per page pair.
     """
-    with pdfplumber.open(pdf_path) as pdf:
+    observers = [o for o in observers if o is not None]
+    with open_pdf(pdf_path) as pdf:
         num_pages = len(pdf.pages)
 
         if num_pages < 2:
@@ -174,6 +190,8 @@ def parse_saleslines_pdf(pdf_path: str):
 
         num_pairs = num_pages // 2
         print(f"Processing {num_pairs} page pair(s) from {num_pages} pages", file=sys.stderr)
+        for observer in observers:
+            observer.on_start(pdf_path, num_pages, 2)
 
         for pair_idx in range(num_pairs):
             left_idx = pair_idx * 2
@@ -182,25 +200,31 @@ def parse_saleslines_pdf(pdf_path: str):
             page_left = pdf.pages[left_idx]
             page_right = pdf.pages[right_idx]
 
-            yield from parse_page_pair(page_left, page_right, pair_idx)
+            yield from parse_page_pair(page_left, page_right, pair_idx, observers)
 
             # Free memory
             page_left = None
             page_right = None
 
+            for observer in observers:
+                observer.after_cycle(pair_idx)
+
 
 def main():
     """Main entry point - outputs JSON to stdout"""
+    selftest_from_argv("saleslines", sys.argv)
     if len(sys.argv) < 2:
-        print("Usage: parse-saleslines-pdf.py <pdf_path>", file=sys.stderr)
+        print("Usage: parse-saleslines-pdf.py <pdf_path> [--progress-interval 2] [--no-progress] [--backend pdfminer|poppler] [--schema-baseline PATH] [--no-schema] [--mmap]", file=sys.stderr)
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
-
     try:
-        for article in parse_saleslines_pdf(pdf_path):
+        backend_from_argv(sys.argv)
+        pdf_path = pdf_input_from_argv(sys.argv)
+        observers = [progress_from_argv("saleslines", sys.argv), schema_from_argv("saleslines", sys.argv)]
+        articles = parse_saleslines_pdf(pdf_path, observers=observers)
+        for article in observe_records(articles, observers):
             # Output one JSON object per line
-            print(json.dumps(asdict(article), ensure_ascii=False))
+            print(json.dumps(with_fingerprint("saleslines", asdict(article)), ensure_ascii=False))
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
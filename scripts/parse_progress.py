@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Streaming progress for long parses (PROGRESS: lines on stderr).
+
+The backend kills parsers on fixed timeouts (300s orders, 180s DDT, 120s
+invoices/customers) without knowing how far they got. Every cycle parser now
+reports, at most every --progress-interval seconds (default 2, 0 = every cycle):
+
+    PROGRESS:{"parser": "orders", "pages_done": 70, "pages_total": 700,
+              "cycles_done": 10, "cycles_total": 100, "records": 200,
+              "expected_records": 1980, "elapsed_s": 12.3, "eta_s": 110.7,
+              "done": false}
+
+expected_records comes from the ERP footer row ("Count=1980") read from the
+first page of the last cycle before parsing starts, so it is known up front.
+eta_s is an exponential moving average of seconds per cycle times the cycles
+left. --no-progress disables the lines.
+"""
+
+import json
+import re
+import sys
+import time
+from typing import Callable, List, Optional
+
+from extraction import open_pdf
+from pdf_cycles import CycleObserver, first_table, get_option, has_flag
+
+PROGRESS_INTERVAL_S = 2.0
+
+# Weight of the latest cycle in the seconds-per-cycle moving average
+ETA_SMOOTHING = 0.3
+
+COUNT_FOOTER_RE = re.compile(r"count\s*=\s*([\d.]+)", re.IGNORECASE)
+
+
+def parse_footer_count(row) -> Optional[int]:
+    """'Count=1.515' in any cell of a footer row → 1515, else None."""
+    for cell in row or []:
+        match = COUNT_FOOTER_RE.search(cell or "")
+        if match:
+            digits = match.group(1).replace(".", "")
+            if digits.isdigit():
+                return int(digits)
+    return None
+
+
+def read_expected_count(pdf_path, cycle_size: int, total_pages: int) -> Optional[int]:
+    """Record count from the 'Count=' footer on the first page of the last cycle."""
+    cycles = total_pages // cycle_size
+    if cycles == 0:
+        return None
+    with open_pdf(pdf_path) as pdf:
+        table = first_table(pdf.pages[(cycles - 1) * cycle_size])
+    for row in reversed(table[-3:]):
+        count = parse_footer_count(row)
+        if count is not None:
+            return count
+    return None
+
+
+class ProgressReporter(CycleObserver):
+    """Cycle observer that prints throttled PROGRESS: lines with a smoothed ETA."""
+
+    def __init__(
+        self,
+        parser_name: str,
+        interval_s: float = PROGRESS_INTERVAL_S,
+        read_footer: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.parser_name = parser_name
+        self.interval_s = interval_s
+        self.read_footer = read_footer
+        self.clock = clock
+        self.pages_total = 0
+        self.cycle_size = 0
+        self.cycles_total = 0
+        self.cycles_done = 0
+        self.records = 0
+        self.expected_records: Optional[int] = None
+        self.seconds_per_cycle: Optional[float] = None
+        self._started_at = 0.0
+        self._last_cycle_at = 0.0
+        self._last_emit_at: Optional[float] = None
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        all_cycles = range(total_pages // cycle_size if cycle_size else 0)
+        # A shard or resumed run only counts the cycles it reads; the footer
+        # count is for the whole document, so it is only reported for full runs
+        partial = cycles is not None and cycles != all_cycles
+        cycles = all_cycles if cycles is None else cycles
+        self.pages_total = len(cycles) * cycle_size if partial else total_pages
+        self.cycle_size = cycle_size
+        self.cycles_total = len(cycles)
+        if self.read_footer and not partial:
+            try:
+                self.expected_records = read_expected_count(pdf_path, cycle_size, total_pages)
+            except Exception as e:
+                print(f"Warning: could not read Count= footer: {e}", file=sys.stderr)
+        self._started_at = self._last_cycle_at = self.clock()
+        self._emit()
+
+    def on_record(self, record) -> None:
+        self.records += 1
+
+    def after_cycle(self, cycle_idx: int) -> None:
+        now = self.clock()
+        elapsed = now - self._last_cycle_at
+        self._last_cycle_at = now
+        if self.seconds_per_cycle is None:
+            self.seconds_per_cycle = elapsed
+        else:
+            self.seconds_per_cycle = ETA_SMOOTHING * elapsed + (1 - ETA_SMOOTHING) * self.seconds_per_cycle
+        self.cycles_done += 1
+        if self._last_emit_at is None or now - self._last_emit_at >= self.interval_s:
+            self._emit()
+
+    def on_finish(self) -> None:
+        self._emit(done=True)
+
+    def snapshot(self, done: bool = False) -> dict:
+        now = self.clock()
+        eta = None
+        if done:
+            eta = 0.0
+        elif self.seconds_per_cycle is not None:
+            eta = round(self.seconds_per_cycle * max(0, self.cycles_total - self.cycles_done), 1)
+        return {
+            "parser": self.parser_name,
+            "pages_done": min(self.cycles_done * self.cycle_size, self.pages_total),
+            "pages_total": self.pages_total,
+            "cycles_done": self.cycles_done,
+            "cycles_total": self.cycles_total,
+            "records": self.records,
+            "expected_records": self.expected_records,
+            "elapsed_s": round(now - self._started_at, 1),
+            "eta_s": eta,
+            "done": done,
+        }
+
+    def _emit(self, done: bool = False) -> None:
+        self._last_emit_at = self.clock()
+        print(f"PROGRESS:{json.dumps(self.snapshot(done))}", file=sys.stderr, flush=True)
+
+
+def progress_from_argv(parser_name: str, argv: List[str]) -> Optional[ProgressReporter]:
+    """ProgressReporter from --progress-interval/--no-progress, or None if disabled."""
+    if has_flag(argv, "--no-progress"):
+        return None
+    interval = get_option(argv, "--progress-interval")
+    return ProgressReporter(parser_name, float(interval) if interval is not None else PROGRESS_INTERVAL_S)
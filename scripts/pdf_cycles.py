@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Shared cycle iteration for the Archibald cycle parsers.
+
+Archibald exports split one wide table across an N-page cycle (orders/DDT/
+invoices: 7, products/customers: 9, prices: 3). Row K of every page in a cycle
+belongs to the same record, so every parser walks the PDF cycle by cycle and
+joins the first table of each page.
+
+This module owns that walk so the parsers only deal with their own columns:
+- iter_cycle_tables(): yields (cycle_idx, [table per page]) for every full cycle
+- CycleSelection: --shard i/n / --pages start:end, snapped to cycle boundaries
+- CycleObserver / observe_records(): hooks for cross-cutting reporting
+  (progress, checkpoints, ...) that must not be copy-pasted into every parser
+- FullRunArtifact: base of the observers that write one file from a whole
+  parse (key index, search/lookup indexes, price matrix, rollups)
+- get_option() / has_flag(): tiny argv helpers shared by the parser CLIs
+
+Not a standalone script: imported by parse-*-pdf.py (same directory).
+"""
+
+import json
+import os
+import sys
+from typing import Any, Callable, Generator, Iterable, List, Optional, Tuple
+
+from extraction import open_pdf
+
+
+class CycleObserver:
+    """
+    No-op base for per-parse observers.
+
+    iter_cycle_tables() calls on_start() once the page count is known,
+    on_tables() with the extracted tables of each cycle (header rows
+    included) before the parser sees them, and after_cycle() once the
+    consumer has finished with a cycle (for generator parsers: after all of
+    its records were yielded). observe_records() calls
+    on_record() for every emitted record and on_finish() at the end, or
+    on_abort() instead when the parse raised before that observer finished.
+
+    on_start() receives the range of cycle indices this run will read (a
+    shard, or the remainder of a resumed run); None means every full cycle.
+    """
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        pass
+
+    def on_tables(self, cycle_idx: int, tables) -> None:
+        pass
+
+    def after_cycle(self, cycle_idx: int) -> None:
+        pass
+
+    def on_record(self, record) -> None:
+        pass
+
+    def on_finish(self) -> None:
+        pass
+
+    def on_abort(self) -> None:
+        pass
+
+
+class FullRunArtifact(CycleObserver):
+    """
+    Base for observers that build one file from every record of a parse.
+
+    A shard, page range or resumed run sees only part of the records: it is
+    detected in on_start() and on_finish() then only warns (and calls
+    discard()). Otherwise write() builds the file at tmp_path and returns the
+    summary fields; the file is renamed into place, so readers never see a
+    half-written one, and reported on stderr:
+
+        <SUMMARY_PREFIX>:{"path": "...", <summary fields>}
+    """
+
+    # Name in the partial-run warning, stderr summary prefix, --option PATH of from_argv()
+    ARTIFACT = "artifact"
+    SUMMARY_PREFIX = "ARTIFACT"
+    OPTION: Optional[str] = None
+
+    def __init__(self, parser_name: str, pdf_path, path: str, source: Optional[str] = None):
+        self.parser_name = parser_name
+        self.pdf_path = pdf_path
+        # The PDF argument as given: pdf_path is /proc/self/fd/N for - and fd:N input
+        self.source = source if source is not None else str(pdf_path)
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.partial = False
+
+    @classmethod
+    def from_argv(cls, parser_name: str, pdf_path, argv: List[str]) -> Optional["FullRunArtifact"]:
+        """Writer for OPTION PATH, or None."""
+        path = get_option(argv, cls.OPTION)
+        # A lookup or a --since run does not see every record
+        if not path or get_option(argv, "--key") or get_option(argv, "--since"):
+            return None
+        return cls(parser_name, pdf_path, path, source=argv[1])
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        self.partial = cycles is not None and cycles != range(total_pages // cycle_size)
+
+    def write(self) -> dict:
+        """Write the file to tmp_path; returns the summary fields."""
+        raise NotImplementedError
+
+    def discard(self) -> None:
+        """Release what a partial or failed run built."""
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def write_json(self, data, compact: bool = False) -> None:
+        with open(self.tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":") if compact else None)
+
+    def on_finish(self) -> None:
+        if self.partial:
+            self.discard()
+            print(f"Warning: {self.ARTIFACT} not written, it needs a full run (no --shard/--pages/--resume)", file=sys.stderr)
+            return
+        summary = {"path": self.path, **self.write()}
+        os.replace(self.tmp_path, self.path)
+        print(f"{self.SUMMARY_PREFIX}:{json.dumps(summary)}", file=sys.stderr)
+
+    def on_abort(self) -> None:
+        self.discard()
+
+
+def observe_records(records: Iterable, observers: Iterable[CycleObserver]) -> Generator:
+    """Pass records through, notifying observers of each one and of the end."""
+    observers = [o for o in observers if o is not None]
+    finished = 0
+    try:
+        for record in records:
+            for observer in observers:
+                observer.on_record(record)
+            yield record
+        for observer in observers:
+            observer.on_finish()
+            finished += 1
+    except BaseException:
+        for observer in observers[finished:]:
+            observer.on_abort()
+        raise
+
+
+class CycleSelection:
+    """
+    Subset of cycles to parse: --shard i/n (1-based) or --pages start:end.
+
+    Pages are 0-based and end-exclusive like a Python slice ("140:280",
+    "140:", ":70"); a range that does not fall on cycle boundaries is widened
+    to whole cycles, so a record is never split across two runs. Shards split
+    the full cycles as evenly as possible and together cover each one once.
+    """
+
+    def __init__(self, shard: Optional[Tuple[int, int]] = None, pages: Optional[Tuple[Optional[int], Optional[int]]] = None):
+        if shard is not None and pages is not None:
+            raise ValueError("--shard and --pages are mutually exclusive")
+        self.shard = shard
+        self.pages = pages
+
+    @classmethod
+    def parse(cls, shard: Optional[str] = None, pages: Optional[str] = None) -> "CycleSelection":
+        shard_spec = None
+        if shard is not None:
+            try:
+                index, count = (int(part) for part in shard.split("/"))
+            except ValueError:
+                raise ValueError(f"Invalid --shard: {shard!r} (expected i/n, e.g. 2/4)")
+            if count < 1 or not 1 <= index <= count:
+                raise ValueError(f"Invalid --shard: {shard!r} (need 1 <= i <= n)")
+            shard_spec = (index, count)
+
+        pages_spec = None
+        if pages is not None:
+            start, sep, end = pages.partition(":")
+            try:
+                pages_spec = (int(start) if start else None, int(end) if end else None)
+            except ValueError:
+                sep = ""
+            if not sep or any(p is not None and p < 0 for p in pages_spec):
+                raise ValueError(f"Invalid --pages: {pages!r} (expected start:end, e.g. 140:280)")
+        return cls(shard=shard_spec, pages=pages_spec)
+
+    def resolve(self, cycle_size: int, total_pages: int, warn: bool = True) -> range:
+        """Cycle indices selected for a document with this layout."""
+        cycles = total_pages // cycle_size
+        if self.shard is not None:
+            index, count = self.shard
+            return range((index - 1) * cycles // count, index * cycles // count)
+        if self.pages is not None:
+            start, end = self.pages
+            start = 0 if start is None else start
+            end = total_pages if end is None else end
+            first = min(start // cycle_size, cycles)
+            last = min(-(-end // cycle_size), cycles)
+            if warn and (start % cycle_size or end % cycle_size):
+                print(
+                    f"Warning: --pages {start}:{end} widened to cycle boundaries "
+                    f"{first * cycle_size}:{last * cycle_size} (cycle size {cycle_size})",
+                    file=sys.stderr,
+                )
+            return range(first, max(first, last))
+        return range(cycles)
+
+
+def selection_from_argv(argv: List[str]) -> Optional[CycleSelection]:
+    """CycleSelection from --shard/--pages, or None to parse the whole document."""
+    shard = get_option(argv, "--shard")
+    pages = get_option(argv, "--pages")
+    if shard is None and pages is None:
+        return None
+    return CycleSelection.parse(shard=shard, pages=pages)
+
+
+def first_table(page) -> List[List[Optional[str]]]:
+    """First table on the page (header row included), or [] if none."""
+    tables = page.extract_tables()
+    if not tables or not tables[0]:
+        return []
+    return tables[0]
+
+
+def count_pages(pdf_path) -> int:
+    """Total number of pages in the PDF."""
+    with open_pdf(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def iter_cycle_tables(
+    pdf_path,
+    cycle_size: int,
+    total_pages: Optional[int] = None,
+    cycles_per_open: Optional[int] = None,
+    governor: Any = None,
+    table_fn: Callable[[Any], List[List[Optional[str]]]] = first_table,
+    on_cycle_error: Optional[Callable[[int, Exception], None]] = None,
+    observers: Iterable[CycleObserver] = (),
+    selection: Optional[CycleSelection] = None,
+    start_cycle: int = 0,
+) -> Generator[Tuple[int, List[List[List[Optional[str]]]]], None, None]:
+    """
+    Yield (cycle_idx, tables) for every full cycle of the PDF.
+
+    tables[i] is table_fn(page) for page i of the cycle (header row included).
+    Only full cycles are yielded (total_pages // cycle_size), a trailing partial
+    cycle is dropped exactly like the per-parser loops always did.
+
+    cycles_per_open: how many cycles to read before re-opening the PDF.
+        None keeps the document open for the whole run (orders/DDT/
+        invoices), 1 re-opens per cycle (products/customers/prices, see
+        https://github.com/jsvine/pdfplumber/issues/193).
+    governor: optional MemoryBudgetGovernor, sampled after each cycle. It can
+        lower cycles_per_open and ask for page caches to be released.
+    on_cycle_error: if given, extraction errors are reported through it and the
+        cycle is skipped; otherwise they propagate.
+    observers: CycleObserver instances (None entries are ignored).
+    selection: optional CycleSelection (--shard/--pages) limiting the cycles read.
+    start_cycle: first cycle to read (--resume skips the cycles already done).
+    """
+    observers = [o for o in observers if o is not None]
+    if total_pages is None:
+        total_pages = count_pages(pdf_path)
+    selected = selection.resolve(cycle_size, total_pages) if selection else range(total_pages // cycle_size)
+    cycles = range(max(selected.start, start_cycle), selected.stop)
+    for observer in observers:
+        observer.on_start(pdf_path, total_pages, cycle_size, cycles)
+
+    cycle = cycles.start
+    while cycle < cycles.stop:
+        with open_pdf(pdf_path) as pdf:
+            opened_at = cycle
+            while cycle < cycles.stop:
+                batch = governor.effective_cycles_per_open(cycles_per_open) if governor else cycles_per_open
+                if batch is not None and cycle - opened_at >= batch:
+                    break
+
+                base_idx = cycle * cycle_size
+                tables = None
+                try:
+                    tables = []
+                    for offset in range(cycle_size):
+                        page = pdf.pages[base_idx + offset]
+                        tables.append(table_fn(page))
+                        if governor and governor.release_caches:
+                            page.close()
+                except Exception as e:
+                    if on_cycle_error is None:
+                        raise
+                    on_cycle_error(cycle, e)
+                    tables = None
+
+                if tables is not None:
+                    for observer in observers:
+                        observer.on_tables(cycle, tables)
+                    yield cycle, tables
+                del tables
+
+                cycle += 1
+                if governor:
+                    governor.after_cycle(cycle - 1)
+                for observer in observers:
+                    observer.after_cycle(cycle - 1)
+
+
+def get_option(argv: List[str], name: str) -> Optional[str]:
+    """Value of '--name value' or '--name=value' in argv, or None."""
+    for idx, arg in enumerate(argv):
+        if arg == name:
+            return argv[idx + 1] if idx + 1 < len(argv) else None
+        if arg.startswith(name + "="):
+            return arg[len(name) + 1:]
+    return None
+
+
+def has_flag(argv: List[str], name: str) -> bool:
+    """True if the bare flag '--name' is present in argv."""
+    return name in argv
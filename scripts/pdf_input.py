@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+PDF input without a file on disk: stdin, an inherited descriptor, or a memory map.
+
+The backend used to write every downloaded export to a temp file just so
+the parser could read it back. The first argument of every parser may now
+be:
+
+    -                 read the PDF from stdin
+    fd:3              read it from descriptor 3 inherited from the caller
+                      (e.g. spawn(..., {stdio: ["pipe", "pipe", "pipe", pdfFd]}))
+    <path>            a regular file, as before
+
+A piped PDF is copied once into an anonymous in-memory file (memfd_create;
+a temp file where that is missing), a seekable descriptor is used as is.
+Either way the parsers get a /proc/self/fd/N path and the document is
+served from one read-only memory map (extraction.map_pdf), which --mmap
+also enables for a plain path. Worker processes forked after that (the
+inspector's ProcessPoolExecutor) share the mapped pages copy-on-write
+instead of each reading the file, and every reopen of the products and
+customers parsers reads the mapping rather than the filesystem.
+"""
+
+import io
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from typing import List, Optional
+
+from extraction import map_pdf
+from pdf_cycles import has_flag
+
+STDIN_ARG = "-"
+FD_PREFIX = "fd:"
+FD_DIRS = ("/proc/self/fd/", "/dev/fd/")
+COPY_CHUNK = 1 << 20
+
+
+def _fd_path(fd: int) -> str:
+    return f"{FD_DIRS[0]}{fd}" if os.path.isdir(FD_DIRS[0]) else f"{FD_DIRS[1]}{fd}"
+
+
+def fd_of(path) -> Optional[int]:
+    """Descriptor number behind a /proc/self/fd/N or /dev/fd/N path, else None."""
+    path = str(path)
+    for prefix in FD_DIRS:
+        if path.startswith(prefix) and path[len(prefix):].isdigit():
+            return int(path[len(prefix):])
+    return None
+
+
+def _memory_file() -> int:
+    """Descriptor of an anonymous in-memory file (a deleted temp file without memfd)."""
+    if hasattr(os, "memfd_create"):
+        return os.memfd_create("archibald-pdf")
+    fd, name = tempfile.mkstemp(suffix=".pdf")
+    os.unlink(name)
+    return fd
+
+
+def _copy_to_memory(source) -> int:
+    fd = _memory_file()
+    with os.fdopen(os.dup(fd), "wb") as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK)
+    return fd
+
+
+def resolve_pdf_arg(arg: str) -> str:
+    """Path the parsers can open (and reopen) for a '-', 'fd:N' or path argument."""
+    if arg == STDIN_ARG:
+        fd = _copy_to_memory(sys.stdin.buffer)
+    elif arg.startswith(FD_PREFIX):
+        fd = int(arg[len(FD_PREFIX):])
+        mode = os.fstat(fd).st_mode
+        if not stat.S_ISREG(mode):
+            # Pipe or socket: not seekable, read it once into memory
+            with os.fdopen(fd, "rb") as source:
+                fd = _copy_to_memory(source)
+    else:
+        return arg
+    if os.fstat(fd).st_size == 0:
+        raise ValueError(f"empty PDF input from {arg}")
+    return _fd_path(fd)
+
+
+def memory_pdf(data: bytes) -> str:
+    """Path of an in-memory PDF holding data, mapped like stdin input."""
+    pdf_path = _fd_path(_copy_to_memory(io.BytesIO(data)))
+    map_pdf(pdf_path)
+    return pdf_path
+
+
+def open_pdf_input(arg: str, use_mmap: bool = False) -> str:
+    """Resolve a PDF argument, mapping it in memory for use_mmap and descriptor input."""
+    pdf_path = resolve_pdf_arg(arg)
+    if use_mmap or fd_of(pdf_path) is not None:
+        map_pdf(pdf_path)
+    return pdf_path
+
+
+def pdf_input_from_argv(argv: List[str]) -> str:
+    """open_pdf_input() for argv[1] with --mmap."""
+    return open_pdf_input(argv[1], has_flag(argv, "--mmap"))
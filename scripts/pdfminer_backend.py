@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+pdfminer extraction backend (--backend pdfminer, extraction.py).
+
+Drives pdfminer's PDFPageInterpreter with a lean device that keeps only
+glyph text/positions and the ruling lines/rects, with no LAParams layout
+analysis and no per-object attribute dicts (colours, matrices, fonts,
+images are dropped). The table geometry (snapping, intersections, cells)
+and cell text assembly reuse pdfplumber's own table functions, so it
+returns the same tables as the pdfplumber backend; the equivalence suite
+in test_extraction.py checks it on generated exports.
+
+Imported on first use by extraction.open_pdf(), like pdftotext_backend.py,
+so a parser started for --help, a usage error or --selftest does not pay
+for pdfminer at startup unless it opens a PDF.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.layout import LTContainer, LTCurve, LTLine, LTRect
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.utils import apply_matrix_pt
+from pdfplumber import utils
+from pdfplumber.table import TableFinder, TableSettings
+
+from extraction import pdf_stream
+
+
+class GlyphAndRuleDevice(PDFLayoutAnalyzer):
+    """pdfminer device that records glyph boxes as tuples and keeps only path objects."""
+
+    def __init__(self, rsrcmgr: PDFResourceManager):
+        PDFLayoutAnalyzer.__init__(self, rsrcmgr, laparams=None)
+        self.glyphs: List[tuple] = []
+        self.ltpage = None
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate) -> float:
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            text = self.handle_undefined_char(font, cid)
+        adv = font.char_width(cid) * fontsize * scaling
+        # Same box as pdfminer's LTChar
+        if font.is_vertical():
+            vx, vy = font.char_disp(cid)
+            vx = fontsize * 0.5 if vx is None else vx * fontsize * 0.001
+            vy = (1000 - vy) * fontsize * 0.001
+            lower_left = (-vx, vy + rise + adv)
+            upper_right = (-vx + fontsize, vy + rise)
+        else:
+            descent = font.get_descent() * fontsize
+            lower_left = (0, descent + rise)
+            upper_right = (adv, descent + rise + fontsize)
+        a, b, c, d, e, f = matrix
+        upright = 0 < a * d * scaling and b * c <= 0
+        x0, y0 = apply_matrix_pt(matrix, lower_left)
+        x1, y1 = apply_matrix_pt(matrix, upper_right)
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        size = (x1 - x0) if font.is_vertical() else (y1 - y0)
+        self.glyphs.append((text, x0, y0, x1, y1, upright, size))
+        return adv
+
+    def render_image(self, name, stream) -> None:
+        pass
+
+    def receive_layout(self, ltpage) -> None:
+        self.ltpage = ltpage
+
+
+def _normalize_box(box, rotation: int):
+    x0, x1 = sorted((box[0], box[2]))
+    y0, y1 = sorted((box[1], box[3]))
+    if rotation in (90, 270):
+        return (y0, x0, y1, x1)
+    return (x0, y0, x1, y1)
+
+
+def _resolve(value):
+    while hasattr(value, "resolve"):
+        value = value.resolve()
+    return value
+
+
+class LeanPage:
+    """Page of the pdfminer backend: chars and edges only, pdfplumber's table finder."""
+
+    def __init__(self, document: "LeanPDF", page_obj: PDFPage, page_number: int):
+        self.document = document
+        self.page_obj = page_obj
+        self.page_number = page_number
+        rotation = (_resolve(page_obj.attrs.get("Rotate")) or 0) % 360
+        x0, y0, x1, y1 = _normalize_box([_resolve(v) for v in _resolve(page_obj.attrs.get("MediaBox"))], rotation)
+        self.height = y1 - y0
+        self.width = x1 - x0
+        # Top-left origin like pdfplumber's Page.mediabox
+        self.bbox = (x0, self.height - y1, x1, self.height - y0)
+        self._chars: Optional[List[Dict[str, Any]]] = None
+        self._edges: Optional[List[Dict[str, Any]]] = None
+
+    def _interpret(self) -> None:
+        device = GlyphAndRuleDevice(self.document.rsrcmgr)
+        self.document.interpreter_class(self.document.rsrcmgr, device).process_page(self.page_obj)
+        mb_x0, mb_top = self.bbox[0], self.bbox[1]
+
+        def top_of(y1):
+            return (self.height - y1) + mb_top
+
+        self._chars = [
+            {
+                "text": text,
+                "x0": x0 + mb_x0,
+                "x1": x1 + mb_x0,
+                "top": top_of(y1),
+                "bottom": top_of(y0),
+                "doctop": top_of(y1),
+                "upright": upright,
+                "size": size,
+            }
+            for text, x0, y0, x1, y1, upright, size in device.glyphs
+        ]
+
+        lines, rects, curves = [], [], []
+        for obj in self._iter_paths(device.ltpage):
+            geometry = {
+                "x0": obj.x0 + mb_x0,
+                "x1": obj.x1 + mb_x0,
+                "y0": obj.y0,
+                "y1": obj.y1,
+                "top": top_of(obj.y1),
+                "bottom": top_of(obj.y0),
+                "doctop": top_of(obj.y1),
+                "width": obj.width,
+                "height": obj.height,
+            }
+            if isinstance(obj, LTRect):
+                rects.append(dict(geometry, object_type="rect"))
+            elif isinstance(obj, LTLine):
+                lines.append(dict(geometry, object_type="line"))
+            else:
+                pts = [(mb_x0 + x, self.bbox[1] + self.height - y) for x, y in obj.pts]
+                curves.append(dict(geometry, object_type="curve", pts=pts))
+
+        # Same order as pdfplumber's Container.edges
+        self._edges = (
+            [utils.line_to_edge(line) for line in lines]
+            + [edge for rect in rects for edge in utils.rect_to_edges(rect)]
+            + [edge for curve in curves for edge in utils.curve_to_edges(curve)]
+        )
+
+    def _iter_paths(self, container):
+        for obj in container:
+            if isinstance(obj, LTCurve):
+                yield obj
+            elif isinstance(obj, LTContainer):
+                yield from self._iter_paths(obj)
+
+    @property
+    def chars(self) -> List[Dict[str, Any]]:
+        if self._chars is None:
+            self._interpret()
+        return self._chars
+
+    @property
+    def edges(self) -> List[Dict[str, Any]]:
+        if self._edges is None:
+            self._interpret()
+        return self._edges
+
+    def extract_words(self, **kwargs) -> List[Dict[str, Any]]:
+        return utils.extract_words(self.chars, **kwargs)
+
+    def find_tables(self, table_settings=None):
+        return TableFinder(self, TableSettings.resolve(table_settings)).tables
+
+    def extract_tables(self, table_settings=None) -> List[List[List[Optional[str]]]]:
+        settings = TableSettings.resolve(table_settings)
+        return [table.extract(**(settings.text_settings or {})) for table in self.find_tables(settings)]
+
+    def extract_table(self, table_settings=None) -> Optional[List[List[Optional[str]]]]:
+        settings = TableSettings.resolve(table_settings)
+        tables = self.find_tables(settings)
+        if not tables:
+            return None
+        # Largest table by cell count, like pdfplumber's Page.find_table()
+        largest = sorted(tables, key=lambda t: (-len(t.cells), t.bbox[1], t.bbox[0]))[0]
+        return largest.extract(**(settings.text_settings or {}))
+
+    def close(self) -> None:
+        self._chars = None
+        self._edges = None
+
+
+class LeanPDF:
+    """Document of the pdfminer backend (context manager with .pages)."""
+
+    interpreter_class = PDFPageInterpreter
+
+    def __init__(self, path):
+        self._stream = pdf_stream(path)
+        try:
+            self.doc = PDFDocument(PDFParser(self._stream))
+            self.rsrcmgr = PDFResourceManager(caching=True)
+            self.pages = [LeanPage(self, page, number) for number, page in enumerate(PDFPage.create_pages(self.doc), 1)]
+        except Exception:
+            self._stream.close()
+            raise
+
+    def close(self) -> None:
+        self.pages = []
+        self._stream.close()
+
+    def __enter__(self) -> "LeanPDF":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Poppler extraction backend (--backend poppler), see extraction.py.
+
+pdftotext (poppler-utils, installed in the backend image) runs once per
+PAGE_CHUNK pages in a native subprocess and its -tsv output gives every
+word with its box. The table cells are rebuilt from those word boxes:
+
+- Columns: a TableTemplate (column x-ranges, header texts) is learned with
+  pdfplumber's TableFinder on the first page showing a given table header.
+  Every cycle page of an export keeps its layout, so a 7-page orders export
+  needs 7 templates whatever its length.
+- Rows: the horizontal ruling lines of each page, read by a pdfminer pass
+  that skips every text-showing operator (no fonts, no glyphs), snapped
+  like pdfplumber's snap_tolerance.
+- A page uses the template whose header texts match the words of its first
+  row; words go to the cell holding their centre, clustered into lines
+  (LINE_TOLERANCE).
+
+Cell texts follow pdfplumber's rules (words joined by spaces, lines by
+newlines, "" for an empty cell), so parsers see the same tables. Limits: one
+table per page (the largest), default table settings only, and a word
+overflowing into the next column stays whole (pdfplumber splits it per
+glyph); benchmark-extraction.py compares the records of every backend on a
+real export before switching.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+from pdfminer.pdfinterp import PDFPageInterpreter
+
+from pdf_input import fd_of
+from pdfminer_backend import LeanPDF
+
+PDFTOTEXT = "pdftotext"
+
+# Pages per pdftotext run (multiple of the 7- and 9-page cycles)
+PAGE_CHUNK = 63
+# Words whose tops differ by at most this belong to the same text line
+LINE_TOLERANCE = 3.0
+# Horizontal rules closer than this are one row boundary (pdfplumber default)
+SNAP_TOLERANCE = 3.0
+
+
+@dataclass
+class Word:
+    """Word box in top-left page coordinates (points)."""
+    text: str
+    x0: float
+    top: float
+    x1: float
+    bottom: float
+
+
+@dataclass
+class TableTemplate:
+    """Column geometry of one cycle page layout."""
+    columns: List[Tuple[float, float]]
+    header: List[str]
+    header_top: float
+
+
+class RulesOnlyInterpreter(PDFPageInterpreter):
+    """Content stream interpreter that ignores text-showing operators."""
+
+    def do_TJ(self, seq) -> None:
+        pass
+
+    def do_Tj(self, s) -> None:
+        pass
+
+    def do__q(self, s) -> None:
+        pass
+
+    def do__w(self, aw, ac, s) -> None:
+        pass
+
+    def do_Tf(self, fontid, fontsize) -> None:
+        pass
+
+
+class RulesPDF(LeanPDF):
+    """pdfminer backend document whose pages only have edges (chars stay empty)."""
+
+    interpreter_class = RulesOnlyInterpreter
+
+
+def iter_tsv_words(pdf_path, first_page: int, last_page: int) -> Generator[Tuple[int, Word], None, None]:
+    """(page_idx, Word) for pages first_page..last_page (1-based, inclusive) via pdftotext -tsv."""
+    cmd = [PDFTOTEXT, "-tsv", "-f", str(first_page), "-l", str(last_page), str(pdf_path), "-"]
+    # stdin / fd:N input is a /proc/self/fd path: the child needs the same descriptor
+    fd = fd_of(pdf_path)
+    # stderr goes to a file: a damaged export can print more syntax errors than
+    # a pipe holds, and pdftotext would block on them while we wait on stdout
+    errors = tempfile.TemporaryFile()
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=errors, encoding="utf-8", pass_fds=() if fd is None else (fd,)
+    )
+    page_idx = first_page - 2
+    try:
+        next(proc.stdout, None)  # column header
+        for line in proc.stdout:
+            # level page_num par_num block_num line_num word_num left top width height conf text
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 12:
+                continue
+            if fields[0] == "1":
+                page_idx += 1
+            elif fields[0] == "5":
+                left, top, width, height = (float(v) for v in fields[6:10])
+                yield page_idx, Word(fields[11], left, top, left + width, top + height)
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+        errors.seek(0)
+        stderr = errors.read().decode("utf-8", "replace")
+        errors.close()
+        if returncode != 0:
+            raise RuntimeError(f"pdftotext failed on pages {first_page}-{last_page}: {stderr.strip()}")
+
+
+def row_bounds(edges: List[dict], columns: List[Tuple[float, float]], top: float) -> List[float]:
+    """Snapped y of the horizontal rules crossing the columns, from `top` down."""
+    x0, x1 = columns[0][0], columns[-1][1]
+    ys = sorted(
+        e["top"] for e in edges
+        if e["orientation"] == "h" and e["x1"] > x0 and e["x0"] < x1 and e["top"] >= top - SNAP_TOLERANCE
+    )
+    clusters: List[List[float]] = []
+    for y in ys:
+        if clusters and y - clusters[-1][0] <= SNAP_TOLERANCE:
+            clusters[-1].append(y)
+        else:
+            clusters.append([y])
+    return [sum(c) / len(c) for c in clusters]
+
+
+def cells_from_words(words: List[Word], columns: List[Tuple[float, float]], ys: List[float]) -> List[List[str]]:
+    """Rows of cell texts: each word goes to the cell holding its centre."""
+    grid: List[List[List[Word]]] = [[[] for _ in columns] for _ in ys[1:]]
+    for word in words:
+        cx, cy = (word.x0 + word.x1) / 2, (word.top + word.bottom) / 2
+        row = next((r for r in range(len(ys) - 1) if ys[r] <= cy < ys[r + 1]), None)
+        col = next((c for c, (left, right) in enumerate(columns) if left <= cx < right), None)
+        if row is not None and col is not None:
+            grid[row][col].append(word)
+    return [[_cell_text(cell) for cell in row] for row in grid]
+
+
+def _cell_text(words: List[Word]) -> str:
+    lines: List[List[Word]] = []
+    for word in sorted(words, key=lambda w: (w.top, w.x0)):
+        if lines and word.top - lines[-1][0].top <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return "\n".join(" ".join(w.text for w in sorted(line, key=lambda w: w.x0)) for line in lines)
+
+
+def learn_template(table, words: List[Word]) -> TableTemplate:
+    """TableTemplate from a pdfplumber Table found on the rules."""
+    xs = sorted({cell[0] for cell in table.cells} | {cell[2] for cell in table.cells})
+    columns = list(zip(xs, xs[1:]))
+    header_row = table.rows[0].bbox
+    header = cells_from_words(words, columns, [header_row[1], header_row[3]])[0]
+    return TableTemplate(columns, header, header_row[1])
+
+
+def rebuild_table(words: List[Word], edges: List[dict], template: TableTemplate) -> Optional[List[List[str]]]:
+    """Table rows (header first) from word boxes and rules, or None if the header does not match."""
+    ys = row_bounds(edges, template.columns, template.header_top)
+    if len(ys) < 2:
+        return None
+    rows = cells_from_words(words, template.columns, ys)
+    if rows[0] != template.header:
+        return None
+    return rows
+
+
+class PopplerPage:
+    """Page of the poppler backend (extract_tables/extract_table/close)."""
+
+    def __init__(self, document: "PopplerPDF", page_idx: int):
+        self.document = document
+        self.page_idx = page_idx
+        self.page_number = page_idx + 1
+
+    def extract_tables(self, table_settings=None) -> List[List[List[str]]]:
+        rows = self.extract_table(table_settings)
+        return [rows] if rows else []
+
+    def extract_table(self, table_settings=None) -> Optional[List[List[str]]]:
+        if table_settings:
+            raise ValueError("The poppler backend only supports the default table settings")
+        return self.document.table_rows(self.page_idx)
+
+    def close(self) -> None:
+        pass
+
+
+class _DocumentState:
+    """Templates and the current word chunk of one PDF, kept across re-opens."""
+
+    def __init__(self):
+        self.templates: List[TableTemplate] = []
+        self.words: Dict[int, List[Word]] = {}
+
+
+# Parsers re-open the PDF every cycle (cycles_per_open=1): keep the state of
+# the last document so templates are learned once and each pdftotext chunk
+# is read once
+_last_state: Dict[tuple, _DocumentState] = {}
+
+
+def _document_state(path, word_source: Callable) -> _DocumentState:
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, word_source)
+    if key not in _last_state:
+        _last_state.clear()
+        _last_state[key] = _DocumentState()
+    return _last_state[key]
+
+
+class PopplerPDF:
+    """Document of the poppler backend (context manager with .pages)."""
+
+    def __init__(self, path, word_source: Callable = iter_tsv_words):
+        if word_source is iter_tsv_words and shutil.which(PDFTOTEXT) is None:
+            raise RuntimeError("pdftotext not found: install poppler-utils or use --backend pdfplumber")
+        self.path = path
+        self.word_source = word_source
+        self.rules = RulesPDF(path)
+        self.pages = [PopplerPage(self, idx) for idx in range(len(self.rules.pages))]
+        self.state = _document_state(path, word_source)
+
+    def words(self, page_idx: int) -> List[Word]:
+        if page_idx not in self.state.words:
+            last = min(page_idx + PAGE_CHUNK, len(self.pages))
+            chunk: Dict[int, List[Word]] = {idx: [] for idx in range(page_idx, last)}
+            for idx, word in self.word_source(self.path, page_idx + 1, last):
+                if idx in chunk:
+                    chunk[idx].append(word)
+            self.state.words = chunk
+        return self.state.words[page_idx]
+
+    def table_rows(self, page_idx: int) -> Optional[List[List[str]]]:
+        words = self.words(page_idx)
+        page = self.rules.pages[page_idx]
+        try:
+            for template in self.state.templates:
+                rows = rebuild_table(words, page.edges, template)
+                if rows is not None:
+                    return rows
+
+            # New layout: find the table on the rules of this page
+            tables = page.find_tables()
+            if not tables:
+                return None
+            table = sorted(tables, key=lambda t: (-len(t.cells), t.bbox[1], t.bbox[0]))[0]
+            template = learn_template(table, words)
+            # A blank header would match any page: use it for this page only
+            if any(template.header):
+                self.state.templates.append(template)
+            return rebuild_table(words, page.edges, template)
+        finally:
+            page.close()
+
+    def close(self) -> None:
+        self.rules.close()
+        self.pages = []
+
+    def __enter__(self) -> "PopplerPDF":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
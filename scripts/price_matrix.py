@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Price lookup table keyed by (account, item), written by the prices parser
+(--price-matrix PATH).
+
+The prices export is a flat list of rows, and finding the price of one item
+for one account meant scanning all of them. With --price-matrix the parser
+also writes an SQLite file, read with PriceMatrix below, whose rows are
+sorted by the lookup key:
+
+    prices(account, item, qty_from, qty_to, valid_from, valid_to,
+           unit_price, net_price, price_unit, currency, account_type,
+           account_description, item_description, record_id)
+    index prices_lookup (account, item, qty_from, valid_from)
+    price_validity(account, item, seg_start, seg_end, qty_from, price_rowid)
+    index price_validity_asof (account, item, seg_start, qty_from)
+    meta(key, value): parser, source, rows, skipped, segments, built_at
+
+account is CODICE CONTO, item is ITEM SELECTION. Amounts are pre-parsed
+numbers (parse_italian_amount(), the same rules as the backend's
+parseItalianPrice), quantities are numbers and dates ISO 8601. A quantity
+tier is the row with the highest qty_from <= quantity; it applies while
+quantity <= qty_to (NULL = open ended). Among rows of the same tier the one
+with the latest valid_from wins. PriceMatrix.lookup() resolves both with
+one index seek.
+
+Rows also carry validity windows (DA DATA .. DATA, both inclusive, open
+ended when empty), and verifying an old order needs the price valid on its
+date. price_validity is an interval index per (account, item): the dates
+are cut into disjoint segments, within which the same rows are valid, and
+each segment lists the winning row of every quantity tier (latest
+valid_from among the rows valid there). lookup(..., as_of=date) finds the
+segment holding the date and the tier inside it with two index seeks,
+however long the price history is; dates no row covers find nothing.
+
+The file is built under <path>.tmp and renamed into place, so readers never
+see half a table (pdf_cycles.FullRunArtifact). Only full runs write it (no
+--shard/--pages). Summary on stderr:
+
+    PRICE_MATRIX:{"path": "prices.sqlite", "rows": 13040, "accounts": 3,
+                  "items": 4512, "segments": 9321, "skipped": 2}
+"""
+
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pdf_cycles import FullRunArtifact
+
+SCHEMA = """
+CREATE TABLE prices (
+    account TEXT NOT NULL,
+    item TEXT NOT NULL,
+    qty_from REAL NOT NULL,
+    qty_to REAL,
+    valid_from TEXT,
+    valid_to TEXT,
+    unit_price REAL,
+    net_price REAL,
+    price_unit TEXT,
+    currency TEXT,
+    account_type TEXT,
+    account_description TEXT,
+    item_description TEXT,
+    record_id TEXT
+);
+CREATE TABLE price_validity (
+    account TEXT NOT NULL,
+    item TEXT NOT NULL,
+    seg_start TEXT NOT NULL,
+    seg_end TEXT NOT NULL,
+    qty_from REAL NOT NULL,
+    price_rowid INTEGER NOT NULL
+);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+# Built after the rows are loaded: one sort instead of per-row index updates
+INDEXES = [
+    "CREATE INDEX prices_lookup ON prices (account, item, qty_from, valid_from)",
+    "CREATE INDEX price_validity_asof ON price_validity (account, item, seg_start, qty_from)",
+]
+# Bounds of validity windows with an empty DA DATA / DATA
+OPEN_START = "0001-01-01"
+OPEN_END = "9999-12-31"
+
+COLUMNS = (
+    "account", "item", "qty_from", "qty_to", "valid_from", "valid_to", "unit_price", "net_price",
+    "price_unit", "currency", "account_type", "account_description", "item_description", "record_id",
+)
+
+
+def parse_italian_amount(value: Optional[str]) -> Optional[float]:
+    """'1.234,56 €' -> 1234.56, '10.000' -> 10000.0, '16.25' -> 16.25; None if not a non-negative number."""
+    if value is None:
+        return None
+    stripped = re.sub(r"[€\s]", "", value)
+    if not stripped or re.search(r"[^0-9.,]", stripped):
+        return None
+    if "," in stripped:
+        normalized = stripped.replace(".", "").replace(",", ".", 1)
+    elif re.search(r"\.\d{3}$", stripped):
+        normalized = stripped.replace(".", "")  # Italian thousands separator
+    else:
+        normalized = stripped
+    try:
+        return float(normalized)
+    except ValueError:
+        return None
+
+
+def parse_iso_date(value: Optional[str]) -> Optional[str]:
+    """DD/MM/YYYY -> YYYY-MM-DD, None if empty or malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%d/%m/%Y").date().isoformat()
+    except ValueError:
+        return None
+
+
+def matrix_row(price) -> Optional[tuple]:
+    """COLUMNS values of one ParsedPrice, or None without an account and item."""
+    account = (price.codice_conto or "").strip()
+    item = (price.item_selection or "").strip()
+    if not account or not item:
+        return None
+    return (
+        account,
+        item,
+        parse_italian_amount(price.quantita_p2) or 0.0,
+        parse_italian_amount(price.quantita_p3),
+        parse_iso_date(price.da_data),
+        parse_iso_date(price.data),
+        parse_italian_amount(price.importo_unitario),
+        parse_italian_amount(price.prezzo_netto_brasseler),
+        price.unita_di_prezzo,
+        price.valuta,
+        price.account,
+        price.descrizione_account,
+        price.item_description,
+        price.id,
+    )
+
+
+def _day_after(day: str) -> Optional[str]:
+    return None if day == OPEN_END else (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def validity_segments(rows: Sequence[Tuple[int, float, Optional[str], Optional[str]]]) -> List[tuple]:
+    """
+    Interval index of one (account, item): (rowid, qty_from, valid_from, valid_to) rows ->
+    (seg_start, seg_end, qty_from, rowid) entries, segments disjoint and merged when unchanged.
+    """
+    windows = []
+    for rowid, qty_from, valid_from, valid_to in rows:
+        start, end = valid_from or OPEN_START, valid_to or OPEN_END
+        if start <= end:
+            windows.append((start, end, qty_from, rowid))
+    cuts = sorted({start for start, *_ in windows} | {_day_after(end) for _, end, *_ in windows} - {None})
+
+    segments: List[list] = []  # [seg_start, seg_end, {qty_from: (valid_from, rowid)}]
+    for idx, seg_start in enumerate(cuts):
+        seg_end = (date.fromisoformat(cuts[idx + 1]) - timedelta(days=1)).isoformat() if idx + 1 < len(cuts) else OPEN_END
+        winners: Dict[float, Tuple[str, int]] = {}
+        for start, end, qty_from, rowid in windows:
+            if start <= seg_start and seg_end <= end:
+                winners[qty_from] = max(winners.get(qty_from, (start, rowid)), (start, rowid))
+        if not winners:
+            continue
+        previous = segments[-1] if segments else None
+        if previous and previous[2] == winners and _day_after(previous[1]) == seg_start:
+            previous[1] = seg_end
+        else:
+            segments.append([seg_start, seg_end, winners])
+    return [
+        (seg_start, seg_end, qty_from, rowid)
+        for seg_start, seg_end, winners in segments
+        for qty_from, (_, rowid) in sorted(winners.items())
+    ]
+
+
+class PriceMatrixWriter(FullRunArtifact):
+    """Loads every parsed price into the SQLite table and publishes it at the end."""
+
+    ARTIFACT = "price matrix"
+    SUMMARY_PREFIX = "PRICE_MATRIX"
+    OPTION = "--price-matrix"
+
+    def __init__(self, parser_name: str, pdf_path, matrix_path: str, source: Optional[str] = None):
+        super().__init__(parser_name, pdf_path, matrix_path, source)
+        self.rows = 0
+        self.skipped = 0
+        self.segments = 0
+        self._batch: List[tuple] = []
+        self.db: Optional[sqlite3.Connection] = None
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        super().on_start(pdf_path, total_pages, cycle_size, cycles)
+        # Opened once the parse runs, so a failed setup leaves no file behind
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.db = sqlite3.connect(self.tmp_path)
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.executescript(SCHEMA)
+
+    def on_record(self, record) -> None:
+        row = matrix_row(record)
+        if row is None:
+            self.skipped += 1
+        else:
+            self._batch.append(row)
+
+    def after_cycle(self, cycle_idx: int) -> None:
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._batch:
+            self.db.executemany(f"INSERT INTO prices VALUES ({', '.join('?' * len(COLUMNS))})", self._batch)
+            self.rows += len(self._batch)
+            self._batch = []
+
+    def discard(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        super().discard()
+
+    def write(self) -> dict:
+        self._flush()
+        self._build_validity()
+        for index in INDEXES:
+            self.db.execute(index)
+        meta = {
+            "parser": self.parser_name,
+            "source": self.source,
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "segments": self.segments,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        self.db.executemany("INSERT INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+        accounts, items = self.db.execute("SELECT COUNT(DISTINCT account), COUNT(DISTINCT item) FROM prices").fetchone()
+        self.db.commit()
+        self.db.execute("ANALYZE")
+        self.db.close()
+        self.db = None
+        return {"rows": self.rows, "accounts": accounts, "items": items, "segments": self.segments, "skipped": self.skipped}
+
+    def _build_validity(self) -> None:
+        rows = self.db.execute(
+            "SELECT account, item, rowid, qty_from, valid_from, valid_to FROM prices ORDER BY account, item"
+        )
+        key, group = None, []
+        for account, item, *row in rows.fetchall() + [(None, None, None)]:
+            if (account, item) != key:
+                if group:
+                    entries = [(*key, *entry) for entry in validity_segments(group)]
+                    self.db.executemany("INSERT INTO price_validity VALUES (?, ?, ?, ?, ?, ?)", entries)
+                    self.segments += len(entries)
+                key, group = (account, item), []
+            group.append(row)
+
+
+class PriceMatrix:
+    """Read-only lookups in a --price-matrix file."""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.db.row_factory = sqlite3.Row
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "PriceMatrix":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def lookup(self, account: str, item: str, quantity: float = 1, as_of: Optional[str] = None) -> Optional[dict]:
+        """
+        Price row of the quantity tier holding quantity, or None (no tier, or past its qty_to).
+
+        as_of (YYYY-MM-DD): only rows valid on that date count; otherwise the
+        tier's latest valid_from wins whatever its window.
+        """
+        if as_of is None:
+            row = self.db.execute(
+                "SELECT * FROM prices WHERE account = ? AND item = ? AND qty_from <= ?"
+                " ORDER BY qty_from DESC, valid_from DESC LIMIT 1",
+                (account, item, quantity),
+            ).fetchone()
+        else:
+            row = self.db.execute(
+                "SELECT p.*, v.seg_end FROM price_validity v JOIN prices p ON p.rowid = v.price_rowid"
+                " WHERE v.account = ? AND v.item = ? AND v.qty_from <= ? AND v.seg_start = ("
+                "   SELECT MAX(seg_start) FROM price_validity WHERE account = ? AND item = ? AND seg_start <= ?)"
+                " ORDER BY v.qty_from DESC LIMIT 1",
+                (account, item, quantity, account, item, as_of),
+            ).fetchone()
+            if row is not None and row["seg_end"] < as_of:
+                return None
+        if row is None or (row["qty_to"] is not None and quantity > row["qty_to"]):
+            return None
+        found = dict(row)
+        found.pop("seg_end", None)
+        return found
+
+    def tiers(self, account: str, item: str) -> List[dict]:
+        """Every row of (account, item), by qty_from then valid_from."""
+        rows = self.db.execute(
+            "SELECT * FROM prices WHERE account = ? AND item = ? ORDER BY qty_from, valid_from",
+            (account, item),
+        )
+        return [dict(row) for row in rows]
+
+    def meta(self) -> dict:
+        return dict(self.db.execute("SELECT key, value FROM meta").fetchall())
+
+
+def price_matrix_from_argv(parser_name: str, pdf_path, argv: List[str]) -> Optional[PriceMatrixWriter]:
+    """PriceMatrixWriter for --price-matrix PATH, or None."""
+    return PriceMatrixWriter.from_argv(parser_name, pdf_path, argv)
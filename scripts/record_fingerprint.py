@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Stable per-record fingerprint emitted by every parser ("fingerprint" field).
+
+The sync services decided whether a record changed by hashing its fields
+again in Node (order-sync.ts keeps an md5 in order_records.hash) or by
+comparing them one by one. Every parser now adds a fingerprint to each
+record it outputs, so change detection is one string comparison per row:
+
+    {"id": "70.962", ..., "fingerprint": "1:5f0c6a2e9b3d7c41"}
+
+The fingerprint is "<FINGERPRINT_VERSION>:<16 hex digits>", the 64-bit
+BLAKE2b digest of the record's canonical form: the values of
+FINGERPRINT_FIELDS[parser], in that order, joined by the unit separator
+\\x1f. Values are normalized first (canonical_value()): surrounding
+whitespace is stripped and inner runs of whitespace collapse to one space,
+so the PDF extraction backend does not show up as a change; None and ""
+are the same empty value; numbers use their shortest round-trip text.
+Fields outside the list (the "ddts"/"invoices" added by
+parse-documents-pdf.py, the fingerprint itself) do not count.
+
+FINGERPRINT_FIELDS fixes the field order independently of the dataclasses:
+adding a field to a parser's records does not change any fingerprint until
+it is added here. Changing a list, or canonical_value(), means bumping
+FINGERPRINT_VERSION, so every stored fingerprint differs once and each
+record is rewritten once.
+"""
+
+import hashlib
+from typing import Dict, Iterable, Tuple
+
+FINGERPRINT_VERSION = 1
+FINGERPRINT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "orders": (
+        "id", "order_number", "customer_profile_id", "customer_name", "delivery_name", "delivery_address",
+        "creation_date", "delivery_date", "order_description", "customer_reference", "sales_status",
+        "order_type", "document_status", "sales_origin", "transfer_status", "transfer_date",
+        "completion_date", "is_quote", "discount_percent", "gross_amount", "total_amount", "is_gift_order",
+        "email",
+    ),
+    "ddt": (
+        "id", "ddt_number", "delivery_date", "order_number", "customer_account", "sales_name",
+        "delivery_name", "delivery_address", "ddt_total", "customer_reference", "description",
+        "tracking_number", "tracking_url", "tracking_courier", "delivery_terms", "delivery_method",
+        "attention_to", "delivery_city",
+    ),
+    "invoices": (
+        "id", "invoice_number", "invoice_date", "customer_account", "billing_name", "quantity",
+        "sales_balance", "line_sum", "discount_amount", "tax_sum", "invoice_amount", "purchase_order",
+        "customer_reference", "due_date", "payment_term_id", "days_past_due", "settled", "amount",
+        "last_payment_id", "last_settlement_date", "closed", "remaining_amount", "order_number",
+    ),
+    "products": (
+        "id_articolo", "nome_articolo", "descrizione", "gruppo_articolo", "contenuto_imballaggio",
+        "nome_ricerca", "unita_prezzo", "id_gruppo_prodotti", "descrizione_gruppo_articolo", "qta_minima",
+        "qta_multipli", "qta_massima", "figura", "dataareaid", "id_prodotto", "datetime_modificato",
+        "fermato", "id_blocco_articolo", "pacco_gamba", "grandezza", "id_configurazione", "creato_da",
+        "data_creata", "qta_predefinita", "visualizza_numero_prodotto", "sconto_assoluto_totale",
+        "sconto_linea", "modificato_da", "articolo_ordinabile", "purch_price",
+        "pcs_id_configurazione_standard", "qta_standard", "id_elemento_ivaid", "id_unita",
+    ),
+    "clienti": (
+        "customer_profile", "name", "internal_id", "vat_number", "pec", "sdi", "fiscal_code",
+        "delivery_terms", "street", "logistics_address", "postal_code", "city", "phone", "mobile", "url",
+        "attention_to", "last_order_date", "actual_order_count", "customer_type", "previous_order_count_1",
+        "previous_sales_1", "previous_order_count_2", "previous_sales_2", "description", "type",
+        "external_account_number", "our_account_number",
+    ),
+    "prices": (
+        "id", "codice_conto", "account", "descrizione_account", "item_selection", "item_description",
+        "da_data", "data", "quantita_p2", "quantita_p3", "unita_di_prezzo", "importo_unitario", "valuta",
+        "prezzo_netto_brasseler",
+    ),
+    "saleslines": (
+        "line_number", "article_code", "quantity", "unit_price", "discount_percent", "line_amount",
+        "description",
+    ),
+}
+SEPARATOR = "\x1f"
+
+
+def canonical_value(value) -> str:
+    """Normalized text of one field value."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return " ".join(str(value).split())
+
+
+def canonical_form(fields: Iterable[str], record: dict) -> bytes:
+    return SEPARATOR.join(canonical_value(record.get(field)) for field in fields).encode("utf-8")
+
+
+def record_fingerprint(parser_name: str, record: dict) -> str:
+    """'<version>:<hex>' fingerprint of a record given as a dict (asdict() / to_dict())."""
+    digest = hashlib.blake2b(canonical_form(FINGERPRINT_FIELDS[parser_name], record), digest_size=8)
+    return f"{FINGERPRINT_VERSION}:{digest.hexdigest()}"
+
+
+def with_fingerprint(parser_name: str, record: dict) -> dict:
+    """The record dict with its "fingerprint" added, as the parsers output it."""
+    record["fingerprint"] = record_fingerprint(parser_name, record)
+    return record
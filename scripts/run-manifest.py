@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Parse several exports concurrently from a manifest (job_pool.py).
+
+Usage:
+    python3 run-manifest.py <manifest.json> [options]
+
+Example manifest:
+    {"documents": [
+        {"type": "clienti", "path": "/tmp/Clienti.pdf", "timeout_s": 120},
+        {"type": "products", "path": "/tmp/Prodotti.pdf", "out": "/data/products.json"},
+        {"type": "prices", "path": "/tmp/Prezzi.pdf"},
+        {"type": "orders", "path": "/tmp/Ordini.pdf", "timeout_s": 300},
+        {"type": "ddt", "path": "/tmp/DDT.pdf", "timeout_s": 180},
+        {"type": "invoices", "path": "/tmp/Fatture.pdf", "timeout_s": 120},
+        {"type": "saleslines", "path": "/tmp/ord-4711.pdf", "name": "verify-4711", "tenant": "agent-17"}]}
+
+Options:
+    --jobs 4                parsers running at once (default: CPU count)
+    --memory-cap 2GB        total memory reserved by running parsers
+    --out-dir DIR           default output directory (default: the manifest's)
+    --fair                  admit by priority class and agent ("tenant") instead of
+                            largest first, preempting checkpointed bulk parses (scheduler.py)
+    --backend pdfminer      passed to every parser (extraction.py)
+    --no-progress           passed to every parser
+
+Every document's stdout goes to its "out" file and its stderr to <out>.log;
+JOB: and MANIFEST: lines on stderr report the run. Exit code 1 if any
+document failed or timed out.
+"""
+
+import sys
+
+from job_pool import load_manifest, pool_from_argv
+from pdf_cycles import get_option
+
+
+def main():
+    """Main entry point"""
+    if len(sys.argv) < 2:
+        print("Usage: run-manifest.py <manifest.json> [--jobs N] [--memory-cap 2GB] [--out-dir DIR] [--fair]", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        jobs = load_manifest(sys.argv[1], get_option(sys.argv, "--out-dir"))
+        pool = pool_from_argv(sys.argv, jobs)
+        ok = pool.run()
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
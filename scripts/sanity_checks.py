@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Fail-fast sanity checks evaluated while a parse streams (SANITY: on abort).
+
+A corrupt or re-laid-out export used to be noticed only at the end: the
+products parser refused its 0 products after reading the whole catalog,
+the other parsers skipped malformed rows one by one. SanityGuard watches
+the cycles as iter_cycle_tables() hands them out and aborts the parse as
+soon as one of these rules fails:
+
+    empty_first_cycle  the first cycle read yields no record
+    header_change      a page header differs from the first cycle's within
+                       the first --sanity-cycles cycles (pages out of step)
+    header_mismatch    with --expect-headers PATH (a --schema-baseline file,
+                       schema_report.py), the first cycle's headers differ
+                       from the saved ones
+    null_rate          after the first --sanity-cycles cycles, a required
+                       field (REQUIRED_FIELDS) is empty in more than
+                       --max-null-rate of their records
+    row_drop           a cycle other than the last yields fewer records than
+                       (1 - --max-row-drop) x the median of the ROW_WINDOW
+                       cycles before it
+
+The abort raises SanityError out of the parse (the parser exits 1 with its
+usual error output) after one line on stderr:
+
+    SANITY:{"parser": "orders", "status": "aborted", "rule": "null_rate",
+            "cycle": 2, "seconds": 1.4, "detail": {"creation_date": 0.95}}
+
+With --since or --key the parse emits a filtered subset of the rows, so the
+row count rules (empty_first_cycle, row_drop) are off. --no-sanity disables
+every check.
+"""
+
+import json
+import statistics
+import sys
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pdf_cycles import CycleObserver, get_option, has_flag
+from schema_report import header_fingerprint, table_headers
+
+# Fields every record of a parser must carry
+REQUIRED_FIELDS = {
+    "orders": ("id", "creation_date"),
+    "ddt": ("id", "ddt_number", "order_number"),
+    "invoices": ("id", "invoice_number", "customer_account"),
+    "products": ("id_articolo", "nome_articolo"),
+    "clienti": ("customer_profile", "name"),
+    "prices": ("id", "item_selection"),
+}
+SANITY_CYCLES = 3
+MAX_NULL_RATE = 0.5
+MAX_ROW_DROP = 0.9
+# Cycles whose record counts form the row_drop median
+ROW_WINDOW = 20
+
+
+class SanityError(RuntimeError):
+    """A fail-fast rule rejected the export."""
+
+
+class SanityGuard(CycleObserver):
+    """Checks each cycle as it completes and raises SanityError on the first failed rule."""
+
+    def __init__(
+        self,
+        parser_name: str,
+        required_fields: Sequence[str] = (),
+        sanity_cycles: int = SANITY_CYCLES,
+        max_null_rate: float = MAX_NULL_RATE,
+        max_row_drop: float = MAX_ROW_DROP,
+        expected_headers: Optional[List[List[str]]] = None,
+        count_rows: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.parser_name = parser_name
+        self.required_fields = tuple(required_fields)
+        self.sanity_cycles = sanity_cycles
+        self.max_null_rate = max_null_rate
+        self.max_row_drop = max_row_drop
+        self.expected_headers = expected_headers
+        self.count_rows = count_rows
+        self.clock = clock
+        self.started = clock()
+        self.last_cycle: Optional[int] = None
+        self.reference = None
+        self.cycles = 0
+        self.cycle_rows = 0
+        self.recent_rows: deque = deque(maxlen=ROW_WINDOW)
+        # Records and empty required fields over the first sanity_cycles cycles
+        self.window_records = 0
+        self.window_nulls: Counter = Counter()
+        self.null_rate_checked = False
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        cycles = cycles if cycles is not None else range(total_pages // cycle_size)
+        self.last_cycle = cycles.stop - 1
+        self.started = self.clock()
+
+    def on_tables(self, cycle_idx: int, tables) -> None:
+        headers = [table_headers(table) for table in tables]
+        self.cycle_rows = 0
+        if self.reference is None:
+            self.reference = headers
+            if self.expected_headers is not None and [list(h) for h in headers] != self.expected_headers:
+                self._abort("header_mismatch", cycle_idx, {
+                    "expected": [header_fingerprint(h) for h in self.expected_headers],
+                    "found": [header_fingerprint(h) for h in headers],
+                    "pages": [page + 1 for page, h in enumerate(headers)
+                              if page >= len(self.expected_headers) or list(h) != self.expected_headers[page]],
+                })
+        elif self.cycles < self.sanity_cycles:
+            changed = [page + 1 for page, (seen, first) in enumerate(zip(headers, self.reference)) if seen != first]
+            if changed:
+                self._abort("header_change", cycle_idx, {"pages": changed})
+
+    def on_record(self, record) -> None:
+        self.cycle_rows += 1
+        if self.cycles < self.sanity_cycles:
+            fields = record if isinstance(record, dict) else vars(record)
+            self.window_records += 1
+            for name in self.required_fields:
+                value = fields.get(name)
+                self.window_nulls[name] += value is None or value == ""
+
+    def after_cycle(self, cycle_idx: int) -> None:
+        if self.reference is None:
+            return  # extraction failed before any table was seen
+        rows, self.cycle_rows = self.cycle_rows, 0
+        self.cycles += 1
+        if self.count_rows:
+            if self.cycles == 1 and rows == 0:
+                self._abort("empty_first_cycle", cycle_idx, {"rows": 0})
+            if self.recent_rows and cycle_idx != self.last_cycle:
+                median = statistics.median(self.recent_rows)
+                if rows < median * (1 - self.max_row_drop):
+                    self._abort("row_drop", cycle_idx, {"rows": rows, "median": median})
+            self.recent_rows.append(rows)
+        if self.cycles == self.sanity_cycles:
+            self._check_null_rate(cycle_idx)
+
+    def on_finish(self) -> None:
+        # Runs shorter than the window are checked on what they read
+        if self.reference is not None:
+            self._check_null_rate(self.last_cycle)
+
+    def _check_null_rate(self, cycle_idx: Optional[int]) -> None:
+        if self.null_rate_checked or not self.window_records:
+            return
+        self.null_rate_checked = True
+        rates = {name: round(self.window_nulls[name] / self.window_records, 3) for name in self.required_fields}
+        failing = {name: rate for name, rate in rates.items() if rate > self.max_null_rate}
+        if failing:
+            self._abort("null_rate", cycle_idx, failing)
+
+    def _abort(self, rule: str, cycle_idx: Optional[int], detail: Dict) -> None:
+        event = {
+            "parser": self.parser_name,
+            "status": "aborted",
+            "rule": rule,
+            "cycle": cycle_idx,
+            "seconds": round(self.clock() - self.started, 2),
+            "detail": detail,
+        }
+        print(f"SANITY:{json.dumps(event, ensure_ascii=False)}", file=sys.stderr, flush=True)
+        raise SanityError(f"Sanity check {rule} failed at cycle {cycle_idx}: {json.dumps(detail, ensure_ascii=False)}")
+
+
+def load_expected_headers(path: str) -> List[List[str]]:
+    """Page headers saved in a --schema-baseline file."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["pages"]
+
+
+def sanity_from_argv(parser_name: str, argv: List[str]) -> Optional[SanityGuard]:
+    """SanityGuard from --sanity-cycles/--max-null-rate/--max-row-drop/--expect-headers, or None with --no-sanity."""
+    if has_flag(argv, "--no-sanity"):
+        return None
+    expected = get_option(argv, "--expect-headers")
+    return SanityGuard(
+        parser_name,
+        REQUIRED_FIELDS.get(parser_name, ()),
+        sanity_cycles=int(get_option(argv, "--sanity-cycles") or SANITY_CYCLES),
+        max_null_rate=float(get_option(argv, "--max-null-rate") or MAX_NULL_RATE),
+        max_row_drop=float(get_option(argv, "--max-row-drop") or MAX_ROW_DROP),
+        expected_headers=load_expected_headers(expected) if expected else None,
+        count_rows=get_option(argv, "--since") is None and get_option(argv, "--key") is None,
+    )
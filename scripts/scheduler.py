@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Priority classes, per-agent fair shares and checkpoint preemption for
+parse jobs (run-manifest.py / watch-exports.py --fair).
+
+JobPool starts the largest PDF first, which is right for one nightly batch
+but not when many agents trigger order and saleslines parses while the
+catalog parses hold every core for minutes. FairScheduler admits jobs by:
+
+1. priority class (Job.priority, else CLASS_BY_TYPE for the parser):
+       interactive  saleslines verification of a single order
+       agent        per-agent order, DDT and invoice syncs
+       bulk         products, customers and prices catalog parses
+2. fair share within a class: the agent (Job.tenant) with the fewest
+   running jobs goes first, then the one that has used the least parse
+   time so far, then arrival order;
+3. bulk jobs never take the last free slot (BULK_SLOTS_FREE), so an
+   interactive job always finds one when there is more than one slot.
+
+A higher-class job that still does not fit preempts one lower-class job
+of a parser that checkpoints (CHECKPOINTED): SIGTERM makes the parser
+save the checkpoint of its last completed cycle and exit 143, and the job
+goes back to the queue to continue with --resume from that cycle boundary
+once it fits again. Those jobs always run with --out, so their work
+survives the preemption:
+
+    orders    --out <out>            (the NDJSON records are the output)
+    products  --out <out>.spool      (stdout still gets the JSON document)
+
+Events on stderr, besides the JOB: lines of the pool:
+    JOB:{"job": "products", "status": "preempted", "for": "verify-4711", "seconds": 93.1}
+"""
+
+import os
+import signal
+from typing import Dict, List, Optional, Tuple
+
+from checkpoint import EXIT_SIGTERM
+from job_pool import Job, JobPool
+
+PRIORITY_CLASSES = ["interactive", "agent", "bulk"]
+CLASS_BY_TYPE = {
+    "saleslines": "interactive",
+    "orders": "agent",
+    "ddt": "agent",
+    "invoices": "agent",
+    "products": "bulk",
+    "clienti": "bulk",
+    "prices": "bulk",
+}
+# Slots bulk jobs leave free when the pool has more than one
+BULK_SLOTS_FREE = 1
+
+# Parsers with checkpoint/resume -> True if the --out file is their whole output
+CHECKPOINTED = {
+    "orders": True,
+    "products": False,
+}
+
+
+def job_class(job: Job) -> int:
+    """Rank of the job's priority class, 0 = most urgent."""
+    name = job.priority or CLASS_BY_TYPE.get(job.type, "bulk")
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority {name!r} (expected one of {', '.join(PRIORITY_CLASSES)})")
+    return PRIORITY_CLASSES.index(name)
+
+
+class FairScheduler(JobPool):
+    """JobPool admitting by priority class and per-tenant fair share, with preemption."""
+
+    def __init__(self, jobs: List[Job], **kwargs):
+        self._arrival: Dict[int, int] = {}
+        # Parse seconds used per tenant, and how much of each job is counted in it
+        self.served: Dict[Optional[str], float] = {}
+        self._charged: Dict[int, float] = {}
+        super().__init__(jobs, **kwargs)
+
+    def submit(self, job: Job) -> None:
+        job_class(job)
+        self._arrival[id(job)] = len(self._arrival)
+        super().submit(job)
+
+    def _rank(self, job: Job) -> Tuple:
+        running = sum(1 for other in self.running.values() if other.tenant == job.tenant)
+        return job_class(job), running, self.served.get(job.tenant, 0.0), self._arrival[id(job)]
+
+    def _fits(self, job: Job) -> bool:
+        if not super()._fits(job):
+            return False
+        if job_class(job) < len(PRIORITY_CLASSES) - 1 or self.max_jobs <= BULK_SLOTS_FREE:
+            return True
+        bulk = sum(1 for other in self.running.values() if job_class(other) == len(PRIORITY_CLASSES) - 1)
+        return bulk < self.max_jobs - BULK_SLOTS_FREE
+
+    def _admit(self) -> None:
+        while self.pending:
+            job = min(self.pending, key=self._rank)
+            if not self._fits(job):
+                # Lower classes wait too, so the slot freed next goes to this job
+                self._preempt_for(job)
+                return
+            self.pending.remove(job)
+            self._start(job)
+
+    def _preempt_for(self, job: Job) -> None:
+        if any(other.preempted_by for other in self.running.values()):
+            return  # one preemption at a time
+        victims = [
+            other for other in self.running.values()
+            if other.type in CHECKPOINTED and job_class(other) > job_class(job) and other.terminated_at is None
+        ]
+        for victim in sorted(victims, key=lambda other: (-job_class(other), -other.started)):
+            if self._fits_without(job, victim):
+                victim.preempted_by = job.name
+                victim.proc.send_signal(signal.SIGTERM)
+                return
+
+    def _fits_without(self, job: Job, victim: Job) -> bool:
+        pid = victim.proc.pid
+        del self.running[pid]
+        try:
+            return self._fits(job)
+        finally:
+            self.running[pid] = victim
+
+    def _command(self, job: Job) -> List[str]:
+        args = super()._command(job)
+        if job.type in CHECKPOINTED and "--out" not in args:
+            args += ["--out", job.out if CHECKPOINTED[job.type] else f"{job.out}.spool"]
+            if job.runs:
+                args.append("--resume")
+        return args
+
+    def _stdout_path(self, job: Job) -> str:
+        return os.devnull if CHECKPOINTED.get(job.type) else job.out
+
+    def _exited(self, job: Job) -> bool:
+        charged = self._charged.get(id(job), 0.0)
+        self.served[job.tenant] = self.served.get(job.tenant, 0.0) + job.seconds - charged
+        self._charged[id(job)] = job.seconds
+        preempted_by, job.preempted_by = job.preempted_by, None
+        if preempted_by and job.exit_code in (EXIT_SIGTERM, -signal.SIGTERM):
+            self._event(job, "preempted", seconds=job.seconds, **{"for": preempted_by})
+            self.pending.append(job)
+            return False
+        self._arrival.pop(id(job), None)
+        self._charged.pop(id(job), None)
+        return super()._exited(job)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Schema drift and field coverage of a parse (SCHEMA: line on stderr).
+
+pdf-data-analysis.py re-read whole exports with extract_tables() just to list
+their headers. The parsers already hold every header row: iter_cycle_tables()
+hands each cycle's tables to CycleObserver.on_tables(), and SchemaMonitor
+keeps the header set of every cycle page and the population of every record
+field as it goes. At the end of the parse it reports:
+
+    SCHEMA:{"parser": "orders", "cycles": 100, "cycle_size": 7, "partial_cycle": null,
+            "pages": [{"page": 1, "fingerprint": "3fa1c2d0",
+                       "headers": ["ID", "ID DI VENDITA", ...]}, ...],
+            "unknown_columns": {"4": ["CANALE"]}, "missing_columns": {},
+            "header_changes": [{"cycle": 42, "page": 3, "headers": [...]}],
+            "header_changes_total": 1,
+            "baseline": {"path": "orders.schema.json", "status": "compared",
+                         "added": {"4": ["CANALE"]}, "removed": {}},
+            "records": 1980, "population": {"id": 1.0, "order_number": 0.93, ...},
+            "empty_fields": ["email"], "drift": true}
+
+partial_cycle: {"first_page": 701, "pages": 3} when the document ends with
+    pages that do not fill a cycle (pages are 1-based), else null.
+pages: headers of each cycle page in the first cycle read, with their
+    header_fingerprint() (the short hash inspect-pdf-structure.py shows).
+unknown_columns / missing_columns (page number -> columns): only for parsers
+    that read columns by header name (KNOWN_COLUMNS); a known column claims
+    the first header containing it, as get_column_value() does.
+header_changes: cycles whose header row differs from the first cycle's
+    (at most MAX_REPORTED_CHANGES, the total is always reported); a missing
+    or extra page shows up here from that cycle on.
+baseline: with --schema-baseline PATH the page headers are compared with the
+    ones saved there (added/removed columns per page); the file is created by
+    the first run and left alone afterwards, so drift keeps being reported
+    until the baseline is refreshed.
+population: share of records with a non-empty value, per field.
+
+--no-schema disables the report.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pdf_cycles import CycleObserver, get_option, has_flag
+
+# Header changes listed in SCHEMA (the total is always reported)
+MAX_REPORTED_CHANGES = 20
+
+Headers = Tuple[str, ...]
+
+
+def table_headers(table) -> Headers:
+    """Header row of an extracted table, whitespace collapsed; () for no table."""
+    if not table:
+        return ()
+    return tuple(" ".join((cell or "").split()) for cell in table[0])
+
+
+def header_fingerprint(headers: Sequence[str]) -> str:
+    """Short stable hash of a page's header cells, whitespace collapsed as in table_headers()."""
+    cells = (" ".join(cell.split()) for cell in headers)
+    return hashlib.sha1("\x1f".join(cells).encode("utf-8")).hexdigest()[:8]
+
+
+def match_columns(headers: Sequence[str], known: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """(unknown headers, missing known columns) of one page."""
+    claimed = set()
+    missing = []
+    for name in known:
+        idx = next((i for i, h in enumerate(headers) if h and name.upper() in h.upper()), None)
+        if idx is None:
+            missing.append(name)
+        else:
+            claimed.add(idx)
+    unknown = [h for i, h in enumerate(headers) if h and i not in claimed]
+    return unknown, missing
+
+
+def _by_page(columns: Dict[int, List[str]]) -> Dict[str, List[str]]:
+    return {str(page + 1): cols for page, cols in sorted(columns.items()) if cols}
+
+
+class SchemaMonitor(CycleObserver):
+    """Collects header sets and field population, prints SCHEMA: at the end."""
+
+    def __init__(self, parser_name: str, known_columns: Optional[Sequence[Sequence[str]]] = None,
+                 baseline_path: Optional[str] = None):
+        self.parser_name = parser_name
+        self.known_columns = known_columns
+        self.baseline_path = baseline_path
+        self.cycles = 0
+        self.total_pages: Optional[int] = None
+        self.cycle_size: Optional[int] = None
+        self.reference: Optional[List[Headers]] = None
+        self.changes: List[dict] = []
+        self.changes_total = 0
+        self.records = 0
+        self.populated: Counter = Counter()
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        self.total_pages = total_pages
+        self.cycle_size = cycle_size
+
+    def on_tables(self, cycle_idx: int, tables) -> None:
+        headers = [table_headers(table) for table in tables]
+        self.cycles += 1
+        if self.reference is None:
+            self.reference = headers
+            return
+        for page, (seen, expected) in enumerate(zip(headers, self.reference)):
+            if seen != expected:
+                self.changes_total += 1
+                if len(self.changes) < MAX_REPORTED_CHANGES:
+                    self.changes.append({"cycle": cycle_idx, "page": page + 1, "headers": list(seen)})
+
+    def on_record(self, record) -> None:
+        self.records += 1
+        fields = record if isinstance(record, dict) else vars(record)
+        for name, value in fields.items():
+            # Count every field, so never-populated ones show up with 0.0
+            self.populated[name] += value is not None and value != ""
+
+    def on_finish(self) -> None:
+        print(f"SCHEMA:{json.dumps(self.report(), ensure_ascii=False)}", file=sys.stderr, flush=True)
+
+    def _compare_known(self) -> Tuple[Dict[int, List[str]], Dict[int, List[str]]]:
+        unknown: Dict[int, List[str]] = {}
+        missing: Dict[int, List[str]] = {}
+        for page, known in enumerate(self.known_columns or ()):
+            headers = self.reference[page] if page < len(self.reference) else ()
+            unknown[page], missing[page] = match_columns(headers, known)
+        return unknown, missing
+
+    def _compare_baseline(self) -> dict:
+        current = [list(headers) for headers in self.reference]
+        if not os.path.exists(self.baseline_path):
+            with open(self.baseline_path, "w", encoding="utf-8") as f:
+                json.dump({"parser": self.parser_name, "pages": current}, f, ensure_ascii=False, indent=2)
+            return {"path": self.baseline_path, "status": "created", "added": {}, "removed": {}}
+
+        with open(self.baseline_path, encoding="utf-8") as f:
+            saved = json.load(f)["pages"]
+        added: Dict[int, List[str]] = {}
+        removed: Dict[int, List[str]] = {}
+        for page in range(max(len(current), len(saved))):
+            now = current[page] if page < len(current) else []
+            before = saved[page] if page < len(saved) else []
+            added[page] = [h for h in now if h not in before]
+            removed[page] = [h for h in before if h not in now]
+        return {"path": self.baseline_path, "status": "compared", "added": _by_page(added), "removed": _by_page(removed)}
+
+    def report(self) -> dict:
+        report = {"parser": self.parser_name, "cycles": self.cycles}
+        if self.cycle_size:
+            report["cycle_size"] = self.cycle_size
+            trailing = self.total_pages % self.cycle_size
+            report["partial_cycle"] = (
+                {"first_page": self.total_pages - trailing + 1, "pages": trailing} if trailing else None
+            )
+        if self.reference is not None:
+            report["pages"] = [
+                {"page": page + 1, "fingerprint": header_fingerprint(h), "headers": list(h)}
+                for page, h in enumerate(self.reference)
+            ]
+            if self.known_columns is not None:
+                unknown, missing = self._compare_known()
+                report["unknown_columns"] = _by_page(unknown)
+                report["missing_columns"] = _by_page(missing)
+            report["header_changes"] = self.changes
+            report["header_changes_total"] = self.changes_total
+            if self.baseline_path:
+                try:
+                    report["baseline"] = self._compare_baseline()
+                except (OSError, ValueError, KeyError) as e:
+                    report["baseline"] = {"path": self.baseline_path, "status": "error", "error": str(e)}
+
+        report["records"] = self.records
+        report["population"] = {
+            name: round(count / self.records, 3) if self.records else 0.0 for name, count in self.populated.items()
+        }
+        report["empty_fields"] = [name for name, count in self.populated.items() if count == 0]
+        baseline = report.get("baseline", {})
+        report["drift"] = bool(
+            report.get("unknown_columns") or report.get("missing_columns") or self.changes_total
+            or baseline.get("added") or baseline.get("removed")
+        )
+        return report
+
+
+def schema_from_argv(parser_name: str, argv: List[str],
+                     known_columns: Optional[Sequence[Sequence[str]]] = None) -> Optional[SchemaMonitor]:
+    """SchemaMonitor from --schema-baseline/--no-schema, or None if disabled."""
+    if has_flag(argv, "--no-schema"):
+        return None
+    return SchemaMonitor(parser_name, known_columns, get_option(argv, "--schema-baseline"))
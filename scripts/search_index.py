@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Type-ahead search index written by the products parser (--search-index PATH).
+
+Product search matched the query against id_articolo, nome_articolo,
+nome_ricerca and descrizione with LIKE over every row, after each sync. With
+--search-index the parser also writes a compact JSON file, built while the
+records stream, that SearchIndex below loads once and answers from in
+memory:
+
+    {"format": 1, "parser": "products", "source": "Prodotti.pdf",
+     "built_at": "...", "key": "id_articolo",
+     "fields": ["id_articolo", "nome_articolo", "nome_ricerca", "descrizione"],
+     "docs": ["000314.016", ...],          key of each document, in PDF order
+     "text": ["000314016 h0314016 ...", ...],
+     "terms": ["0", "016", "carburo", ...],
+     "postings": [[0, 1, 1, ...], ...],    documents of each term
+     "prefixes": {"f": [...], "fr": [...], "fre": [...]},
+     "trigrams": {"fre": [...], ...}}
+
+Normalization (fold()) lowercases and strips accents. A document's terms are
+the words of every field plus, for article codes (CODE_FIELDS), each dot or
+dash separated fragment and the compact code without separators
+("H1.314.016" -> "h1", "314", "016", "h1314016"). text holds each field in
+the compact form the backend search already used (no dots, spaces or
+dashes) and the trigrams are taken from it, so any substring of three
+characters or more is found without scanning. Postings list document
+numbers in increasing order and are delta encoded ([3, 4, 9] -> [3, 1, 5]).
+
+Every word of a query must match a document: as a whole term (score 3), as
+the prefix of a term (2; prefixes up to MAX_PREFIX characters are stored,
+longer ones are a range of the sorted terms) or as a substring of a field
+(1, trigram candidates checked against text). Results are ordered by score,
+then PDF order; SearchIndex.search() is the reference implementation.
+
+Only full runs write the index (no --shard/--pages/--resume, --since or
+--key). It is written to <path>.tmp and renamed into place
+(pdf_cycles.FullRunArtifact). Summary:
+
+    SEARCH_INDEX:{"path": "products.search.json", "docs": 4540,
+                  "terms": 10211, "trigrams": 6123, "bytes": 2411203}
+"""
+
+import json
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Set
+
+from pdf_cycles import FullRunArtifact
+
+INDEX_FORMAT = 1
+# Fields indexed per parser: the document key first
+SEARCH_FIELDS = {
+    "products": ("id_articolo", "nome_articolo", "nome_ricerca", "descrizione"),
+}
+CODE_FIELDS = {
+    "products": ("id_articolo", "nome_articolo"),
+}
+# Term prefixes with their own postings; longer prefixes scan a terms range
+MAX_PREFIX = 3
+SCORE_TERM, SCORE_PREFIX, SCORE_SUBSTRING = 3, 2, 1
+
+
+def fold(text: Optional[str]) -> str:
+    """Lowercase without accents: 'Però' -> 'pero'."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def compact(text: Optional[str]) -> str:
+    """fold() without dots, whitespace and dashes, like the backend's product search."""
+    return re.sub(r"[.\s-]", "", fold(text))
+
+
+def words(text: Optional[str]) -> List[str]:
+    return re.findall(r"[^\W_]+", fold(text))
+
+
+def code_terms(code: Optional[str]) -> List[str]:
+    """Fragments and compact form of an article code: 'H1.314.016' -> ['h1', '314', '016', 'h1314016']."""
+    fragments = [f for f in re.split(r"[.\s-]+", fold(code)) if f]
+    whole = "".join(fragments)
+    return fragments + [whole] if len(fragments) > 1 else fragments
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def delta_encode(postings: Sequence[int]) -> List[int]:
+    return [doc - prev for prev, doc in zip([0] + list(postings), postings)]
+
+
+def delta_decode(deltas: Sequence[int]) -> List[int]:
+    return list(accumulate(deltas))
+
+
+class SearchIndexWriter(FullRunArtifact):
+    """Adds each record to the postings as it is parsed and writes the index at the end."""
+
+    ARTIFACT = "search index"
+    SUMMARY_PREFIX = "SEARCH_INDEX"
+    OPTION = "--search-index"
+
+    def __init__(self, parser_name: str, pdf_path, index_path: str, source: Optional[str] = None):
+        super().__init__(parser_name, pdf_path, index_path, source)
+        self.fields = SEARCH_FIELDS[parser_name]
+        self.code_fields = CODE_FIELDS.get(parser_name, ())
+        self.docs: List[str] = []
+        self.text: List[str] = []
+        self.terms: Dict[str, List[int]] = {}
+        self.prefixes: Dict[str, List[int]] = {}
+        self.trigrams: Dict[str, List[int]] = {}
+
+    def on_record(self, record) -> None:
+        values = [getattr(record, field, None) for field in self.fields]
+        if not values[0]:
+            return
+        doc = len(self.docs)
+        self.docs.append(values[0])
+        compacts = [compact(value) for value in values]
+        self.text.append(" ".join(compacts))
+
+        terms: Set[str] = set()
+        for field, value in zip(self.fields, values):
+            terms.update(words(value))
+            if field in self.code_fields:
+                terms.update(code_terms(value))
+        for term in terms:
+            self.terms.setdefault(term, []).append(doc)
+        for prefix in {term[:n] for term in terms for n in range(1, MAX_PREFIX + 1)}:
+            self.prefixes.setdefault(prefix, []).append(doc)
+        for trigram in set().union(*(trigrams(c) for c in compacts)):
+            self.trigrams.setdefault(trigram, []).append(doc)
+
+    def write(self) -> dict:
+        terms = sorted(self.terms)
+        index = {
+            "format": INDEX_FORMAT,
+            "parser": self.parser_name,
+            "source": self.source,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "key": self.fields[0],
+            "fields": list(self.fields),
+            "docs": self.docs,
+            "text": self.text,
+            "terms": terms,
+            "postings": [delta_encode(self.terms[term]) for term in terms],
+            "prefixes": {p: delta_encode(docs) for p, docs in sorted(self.prefixes.items())},
+            "trigrams": {t: delta_encode(docs) for t, docs in sorted(self.trigrams.items())},
+        }
+        self.write_json(index, compact=True)
+        return {
+            "docs": len(self.docs), "terms": len(terms), "trigrams": len(self.trigrams),
+            "bytes": os.path.getsize(self.tmp_path),
+        }
+
+
+class SearchIndex:
+    """A written index, postings decoded, answering search() in memory."""
+
+    def __init__(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{path}: unsupported search index format {index.get('format')}")
+        self.key = index["key"]
+        self.docs: List[str] = index["docs"]
+        self.text: List[str] = index["text"]
+        self.terms: List[str] = index["terms"]
+        self.postings = [delta_decode(p) for p in index["postings"]]
+        self.prefixes = {p: delta_decode(docs) for p, docs in index["prefixes"].items()}
+        self.trigrams = {t: delta_decode(docs) for t, docs in index["trigrams"].items()}
+
+    def _term_docs(self, term: str) -> List[int]:
+        pos = bisect_left(self.terms, term)
+        return self.postings[pos] if pos < len(self.terms) and self.terms[pos] == term else []
+
+    def _prefix_docs(self, prefix: str) -> Set[int]:
+        if len(prefix) <= MAX_PREFIX:
+            return set(self.prefixes.get(prefix, ()))
+        docs: Set[int] = set()
+        pos = bisect_left(self.terms, prefix)
+        while pos < len(self.terms) and self.terms[pos].startswith(prefix):
+            docs.update(self.postings[pos])
+            pos += 1
+        return docs
+
+    def _substring_docs(self, word: str) -> Set[int]:
+        grams = sorted(trigrams(word), key=lambda g: len(self.trigrams.get(g, ())))
+        if not grams:
+            return set()
+        candidates = set(self.trigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(self.trigrams.get(gram, ()))
+        return {doc for doc in candidates if word in self.text[doc]}
+
+    def search(self, query: str, limit: int = 20) -> List[str]:
+        """Keys of the documents matching every word of the query, best first."""
+        scores: Optional[Dict[int, int]] = None
+        for word in dict.fromkeys(words(query)):
+            matched: Dict[int, int] = {doc: SCORE_SUBSTRING for doc in self._substring_docs(word)}
+            matched.update((doc, SCORE_PREFIX) for doc in self._prefix_docs(word))
+            matched.update((doc, SCORE_TERM) for doc in self._term_docs(word))
+            if scores is None:
+                scores = matched
+            else:
+                scores = {doc: score + matched[doc] for doc, score in scores.items() if doc in matched}
+            if not scores:
+                return []
+        ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+        return [self.docs[doc] for doc, _ in ranked[:limit]]
+
+
+def search_index_from_argv(parser_name: str, pdf_path, argv: List[str]) -> Optional[SearchIndexWriter]:
+    """SearchIndexWriter for --search-index PATH, or None."""
+    return SearchIndexWriter.from_argv(parser_name, pdf_path, argv)
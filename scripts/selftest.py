@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Single-spawn dependency check for the parser entry points (--selftest).
+
+The backend health checks used to spawn python three times (python3
+--version, import pdfplumber, ...) and still never proved a parse works.
+Every parser now answers `--selftest` with one JSON object on stdout:
+
+    {"parser": "orders", "ok": true, "python": "3.11.7",
+     "dependencies": {"pdfplumber": {"version": "0.11.4", "import_ms": 61.2},
+                      "pdfminer": {"version": "20231228", "import_ms": 0.1},
+                      "pdftotext": {"path": null}},
+     "backend": "pdfplumber", "parse_ms": 14.8,
+     "startup_ms": 38.5, "total_ms": 112.4, "error": null}
+
+- dependencies: version and import time of each Python dependency, in
+  import order (pdfminer is loaded by pdfplumber, hence ~0 ms), null if
+  missing; pdftotext (poppler backend) is optional and only located.
+- parse: the tiny ruled table of SELFTEST_ROWS, built in memory, is parsed
+  through open_pdf() with the active --backend and compared cell by cell.
+- startup_ms: interpreter start to the selftest (the parser's own module
+  imports, which are kept free of the PDF libraries); total_ms: start to
+  the end of the selftest, in clock ticks (10 ms); Linux only, null elsewhere.
+
+Exit code 0 if ok, 1 otherwise.
+"""
+
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from typing import List, Optional
+
+from extraction import backend_from_argv, current_backend, open_pdf
+from pdf_cycles import has_flag
+from pdf_input import memory_pdf
+
+REQUIRED_MODULES = ["pdfplumber", "pdfminer"]
+SELFTEST_ROWS = [["ID", "NOME ARTICOLO"], ["1", "Selftest àè"]]
+
+
+def _selftest_pdf(rows: List[List[str]]) -> bytes:
+    """One-page PDF with rows drawn as a ruled table (Helvetica, WinAnsi)."""
+    width, height, colw, rowh = 300, 20 + 20 * len(rows), 130, 20
+    ncols = len(rows[0])
+    top, left = height - 10, 10
+    ops = ["0.5 w"]
+    for r in range(len(rows) + 1):
+        ops.append(f"{left} {top - r * rowh} m {left + ncols * colw} {top - r * rowh} l S")
+    for c in range(ncols + 1):
+        ops.append(f"{left + c * colw} {top} m {left + c * colw} {top - len(rows) * rowh} l S")
+    for r, row in enumerate(rows):
+        for c, text in enumerate(row):
+            ops.append(f"BT /F1 7 Tf {left + c * colw + 3} {top - (r + 1) * rowh + 6} Td ({text}) Tj ET")
+    stream = "\n".join(ops).encode("cp1252")
+    objs = [
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Page /Parent 4 0 R /MediaBox [0 0 %d %d] /Contents 2 0 R"
+        b" /Resources << /Font << /F1 1 0 R >> >> >>" % (width, height),
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Catalog /Pages 4 0 R >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, len(objs), xref)
+    return bytes(out)
+
+
+def _ms_since_start() -> Optional[float]:
+    """Milliseconds since this process started (Linux /proc), else None."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round((uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000, 1)
+
+
+def _import_report(name: str) -> Optional[dict]:
+    started = time.perf_counter()
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    import_ms = round((time.perf_counter() - started) * 1000, 1)
+    return {"version": getattr(module, "__version__", None), "import_ms": import_ms}
+
+
+def run_selftest(parser_name: str) -> dict:
+    """Dependency, import-time and embedded-parse report (see module docstring)."""
+    startup_ms = _ms_since_start()
+    dependencies = {name: _import_report(name) for name in REQUIRED_MODULES}
+    dependencies["pdftotext"] = {"path": shutil.which("pdftotext")}
+    report = {
+        "parser": parser_name,
+        "ok": False,
+        "python": platform.python_version(),
+        "dependencies": dependencies,
+        "backend": current_backend(),
+        "parse_ms": None,
+        "startup_ms": startup_ms,
+        "total_ms": None,
+        "error": None,
+    }
+    missing = [name for name in REQUIRED_MODULES if dependencies[name] is None]
+    if missing:
+        report["error"] = f"missing dependencies: {', '.join(missing)}"
+    else:
+        started = time.perf_counter()
+        try:
+            with open_pdf(memory_pdf(_selftest_pdf(SELFTEST_ROWS))) as pdf:
+                tables = pdf.pages[0].extract_tables()
+            report["parse_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            if tables and tables[0] == SELFTEST_ROWS:
+                report["ok"] = True
+            else:
+                report["error"] = f"unexpected tables: {tables!r}"
+        except Exception as e:
+            report["error"] = f"parse failed: {e}"
+    report["total_ms"] = _ms_since_start()
+    return report
+
+
+def selftest_from_argv(parser_name: str, argv: List[str]) -> None:
+    """With --selftest, print the report and exit (0 if ok) before any other option is read."""
+    if not has_flag(argv, "--selftest"):
+        return
+    try:
+        backend_from_argv(argv)
+        report = run_selftest(parser_name)
+    except Exception as e:
+        report = {"parser": parser_name, "ok": False, "error": str(e)}
+    print(json.dumps(report, ensure_ascii=False))
+    sys.exit(0 if report["ok"] else 1)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Shard descriptors and deterministic merge for --shard / --pages runs.
+
+A sharded parse (see CycleSelection in pdf_cycles.py) writes a small
+descriptor once it has finished, to --shard-info PATH (default
+<out>.shard.json when --out is used), and echoes it on stderr:
+
+    SHARD:{"parser": "orders", "pdf_sha256": "...", "total_pages": 700,
+           "cycle_size": 7, "cycles_total": 100, "first_cycle": 25,
+           "end_cycle": 50, "pages": [175, 350], "records": 500}
+
+merge-shards.py reads each output next to its descriptor, checks that all
+shards come from the same PDF/parser/cycle size, orders them by first_cycle
+and reports gaps and overlaps before writing the records back in document
+order, in the same format the parser uses (NDJSON, a JSON array for prices,
+or the products/customers JSON document).
+"""
+
+import json
+import sys
+from typing import List, Optional, Tuple
+
+from checkpoint import file_sha256
+from pdf_cycles import CycleObserver, CycleSelection, get_option
+
+# JSON document outputs: list key -> count key
+DOCUMENT_KEYS = {"products": "count", "customers": "total_customers"}
+
+
+class ShardInfoWriter(CycleObserver):
+    """Writes the shard descriptor of a finished run."""
+
+    def __init__(self, parser_name: str, pdf_path, info_path: str, selection: Optional[CycleSelection] = None, checkpoint=None):
+        self.parser_name = parser_name
+        self.pdf_path = pdf_path
+        self.info_path = info_path
+        self.selection = selection or CycleSelection()
+        self.checkpoint = checkpoint  # a resumed run also owns the records already in --out
+        self.records = 0
+        self.info: Optional[dict] = None
+
+    def on_start(self, pdf_path, total_pages: int, cycle_size: int, cycles: Optional[range] = None) -> None:
+        selected = self.selection.resolve(cycle_size, total_pages, warn=False)
+        self.info = {
+            "parser": self.parser_name,
+            "pdf_sha256": None,
+            "total_pages": total_pages,
+            "cycle_size": cycle_size,
+            "cycles_total": total_pages // cycle_size,
+            "first_cycle": selected.start,
+            "end_cycle": selected.stop,
+            "pages": [selected.start * cycle_size, selected.stop * cycle_size],
+        }
+
+    def on_record(self, record) -> None:
+        self.records += 1
+
+    def on_finish(self) -> None:
+        if self.info is None:
+            return
+        self.info["pdf_sha256"] = self.checkpoint.pdf_sha256 if self.checkpoint else file_sha256(self.pdf_path)
+        self.info["records"] = self.checkpoint.records if self.checkpoint else self.records
+        with open(self.info_path, "w", encoding="utf-8") as f:
+            json.dump(self.info, f)
+        print(f"SHARD:{json.dumps(self.info)}", file=sys.stderr)
+
+
+def shard_info_from_argv(parser_name: str, pdf_path, argv: List[str], selection=None, checkpoint=None) -> Optional[ShardInfoWriter]:
+    """ShardInfoWriter for --shard-info PATH (default <out>.shard.json), or None."""
+    info_path = get_option(argv, "--shard-info")
+    if info_path is None and checkpoint is not None:
+        info_path = f"{checkpoint.out_path}.shard.json"
+    if info_path is None:
+        return None
+    return ShardInfoWriter(parser_name, pdf_path, info_path, selection=selection, checkpoint=checkpoint)
+
+
+def read_shard_output(path: str) -> Tuple[str, List, Optional[dict]]:
+    """(format, records, document) of a parser output file."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.strip()
+    if stripped.startswith("["):
+        return "array", json.loads(stripped), None
+    if stripped.startswith("{"):
+        try:
+            document = json.loads(stripped)
+        except ValueError:
+            document = None
+        for list_key in DOCUMENT_KEYS:
+            if isinstance(document, dict) and isinstance(document.get(list_key), list):
+                return list_key, document[list_key], document
+    return "ndjson", [json.loads(line) for line in text.splitlines() if line.strip()], None
+
+
+def check_shards(infos: List[dict]) -> List[dict]:
+    """Problems ({"kind": ..., ...}) in shard descriptors sorted by first_cycle."""
+    problems = []
+    if not infos:
+        return [{"kind": "no_shards"}]
+
+    reference = infos[0]
+    for info in infos[1:]:
+        for key in ("parser", "pdf_sha256", "cycle_size", "total_pages"):
+            if info.get(key) != reference.get(key):
+                problems.append({"kind": "mismatch", "field": key, "values": [reference.get(key), info.get(key)]})
+
+    position = 0
+    for info in infos:
+        if info["first_cycle"] > position:
+            problems.append({"kind": "gap", "cycles": [position, info["first_cycle"]]})
+        elif info["first_cycle"] < position:
+            problems.append({"kind": "overlap", "cycles": [info["first_cycle"], min(position, info["end_cycle"])]})
+        position = max(position, info["end_cycle"])
+    if position < reference["cycles_total"]:
+        problems.append({"kind": "gap", "cycles": [position, reference["cycles_total"]]})
+    return problems
+
+
+def format_merged(fmt: str, records: List, document: Optional[dict]) -> str:
+    """Merged output in the parser's own format."""
+    if fmt == "ndjson":
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    if fmt == "array":
+        return json.dumps(records, ensure_ascii=False) + "\n"
+    merged = dict(document)
+    merged[fmt] = records
+    merged[DOCUMENT_KEYS[fmt]] = len(records)
+    return json.dumps(merged, indent=2, ensure_ascii=False) + "\n"
+
+
+def merge_shards(outputs: List[Tuple[str, dict]], allow_gaps: bool = False) -> Tuple[Optional[str], List[dict]]:
+    """
+    Merge (output_path, descriptor) pairs into one output.
+
+    Returns (merged_text, problems). merged_text is None if any problem is
+    fatal: overlaps, mismatched shards or record counts, and gaps unless
+    allow_gaps (merging a partial re-parse of one region).
+    """
+    outputs = sorted(outputs, key=lambda pair: (pair[1]["first_cycle"], pair[1]["end_cycle"]))
+    problems = check_shards([info for _, info in outputs])
+
+    formats = set()
+    records: List = []
+    document = None
+    for path, info in outputs:
+        fmt, shard_records, shard_document = read_shard_output(path)
+        formats.add(fmt)
+        if len(shard_records) != info.get("records"):
+            problems.append({"kind": "record_count", "path": path, "expected": info.get("records"), "found": len(shard_records)})
+        records.extend(shard_records)
+        document = document or shard_document
+    if len(formats) > 1:
+        problems.append({"kind": "mismatch", "field": "format", "values": sorted(formats)})
+
+    if any(p["kind"] != "gap" or not allow_gaps for p in problems):
+        return None, problems
+    return format_merged(formats.pop(), records, document), problems
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Watch-folder ingestion (watch-exports.py).
+
+The sync service used to spawn a parser only after its own bookkeeping for
+a download had finished, and then wait for it. SpoolIngest watches the
+directory the bot downloads the ERP exports into and starts the matching
+parser as soon as a PDF is complete:
+
+- complete means the size and mtime held still for settle_s and the file
+  is a whole PDF (pdf_complete: "%PDF-" header, startxref and "%%EOF" in
+  the last TRAILER_BYTES), so a download still being written, or a
+  browser's .crdownload renamed too early, is never parsed;
+- the parser is picked from the header row of the first page
+  (detect_document_type, DOCUMENT_SIGNATURES), read with the page feature
+  cache so the parser's own header scan does not read page 1 again;
+- the parsers run through job_pool.JobPool (concurrency and memory caps,
+  timeouts), stdout to <out_dir>/<pdf stem>.out and stderr to <out>.log;
+- when a parser exits, <out_dir>/<pdf stem>.done is written atomically:
+      {"pdf": "/spool/Ordini.pdf", "type": "orders", "status": "done",
+       "exit_code": 0, "seconds": 41.2, "out": "/out/Ordini.out",
+       "log": "/out/Ordini.out.log", "pdf_size": 3481923,
+       "pdf_mtime_ns": 1768000000000000000, "finished_at": "2026-01-20T03:12:09"}
+  status is "done", "failed", "timeout", "unknown_type" (no parser for
+  that first-page header) or "error" (the PDF could not be opened, the
+  message is in "error"); out and log are null for the last two. The .out
+  file is only complete once its .done marker exists.
+
+A PDF whose marker matches its size and mtime is not parsed again (after a
+restart, say); a new download under the same name is. Wakeups come from
+inotify (Linux, through libc) with a fallback to polling every settle_s.
+
+Events on stderr, besides the JOB: lines of the pool:
+    WATCH:{"pdf": "/spool/Ordini.pdf", "status": "queued", "type": "orders"}
+status is "queued", "incomplete" (stable but not a whole PDF),
+"unknown_type", "error" or the final status of the marker.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from job_pool import Job, JobPool, job_memory
+from page_headers import cached_page_features
+
+# Seconds a file's size and mtime must hold still before it is parsed
+SETTLE_S = 1.0
+# The end-of-file marker must be in the last TRAILER_BYTES (as readers require)
+TRAILER_BYTES = 1024
+
+# (type, header cells that must all be present) in match order: the DDT
+# export also has "ID DI VENDITA", so it is tried before orders
+DOCUMENT_SIGNATURES = [
+    ("ddt", ["PDF DDT"]),
+    ("invoices", ["ID FATTURA"]),
+    ("products", ["ID ARTICOLO"]),
+    ("saleslines", ["LINEA", "QTÀ ORDINATA"]),
+    ("prices", ["CODICE CONTO"]),
+    ("orders", ["ID DI VENDITA", "PROFILO CLIENTE"]),
+    ("clienti", ["PROFILO CLIENTE", "PARTITA IVA"]),
+]
+
+# inotify(7) events: a file written and closed, moved in, created or grown
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+
+Key = Tuple[int, int]
+
+
+def pdf_complete(path) -> bool:
+    """True if the file starts like a PDF and ends with its trailer."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                return False
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - TRAILER_BYTES))
+            tail = f.read()
+    except OSError:
+        return False
+    return b"%%EOF" in tail and b"startxref" in tail
+
+
+def detect_document_type(pdf_path) -> Optional[str]:
+    """Parser type for the export, from the header row of its first page."""
+    features = cached_page_features(pdf_path, [0]).get(0)
+    headers = [cell.strip().upper() for cell in (features or {}).get("header", [])]
+    for doc_type, required in DOCUMENT_SIGNATURES:
+        if all(any(name in header for header in headers) for name in required):
+            return doc_type
+    return None
+
+
+class PollWakeup:
+    """Waits the full timeout (no change notification)."""
+
+    def wait(self, timeout: float) -> None:
+        time.sleep(timeout)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWakeup:
+    """Returns early when a file in the directory is created, written or moved in."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed on {directory}")
+
+    def wait(self, timeout: float) -> None:
+        if select.select([self.fd], [], [], timeout)[0]:
+            # Only the wakeup matters: the directory is scanned again
+            try:
+                while os.read(self.fd, 64 * 1024):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def open_wakeup(directory, polling: bool = False):
+    """inotify wakeups where available, else polling."""
+    if not polling:
+        try:
+            return InotifyWakeup(directory)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollWakeup()
+
+
+class SpoolWatcher:
+    """Tracks the PDFs of a directory until they are complete."""
+
+    def __init__(self, spool_dir, settle_s: float = SETTLE_S, clock=time.monotonic):
+        self.spool_dir = Path(spool_dir)
+        self.settle_s = settle_s
+        self.clock = clock
+        # path -> (size, mtime_ns) last seen, and since when it held
+        self._seen: Dict[Path, Tuple[Key, float]] = {}
+        # path -> (size, mtime_ns) already handed out or reported incomplete
+        self._handled: Dict[Path, Key] = {}
+        self.incomplete: List[Path] = []
+
+    def _scan(self) -> Dict[Path, Key]:
+        files = {}
+        with os.scandir(self.spool_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.name.lower().endswith(".pdf"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.is_file():
+                    files[Path(entry.path)] = (st.st_size, st.st_mtime_ns)
+        return files
+
+    def ready(self) -> List[Tuple[Path, Key]]:
+        """(path, (size, mtime_ns)) of the PDFs that became complete since the last call."""
+        now = self.clock()
+        files = self._scan()
+        for path in set(self._seen) - set(files):
+            del self._seen[path]
+        ready = []
+        self.incomplete = []
+        for path, key in sorted(files.items()):
+            if self._handled.get(path) == key:
+                continue
+            seen = self._seen.get(path)
+            if seen is None or seen[0] != key:
+                self._seen[path] = (key, now)
+                continue
+            if now - seen[1] < self.settle_s:
+                continue
+            del self._seen[path]
+            self._handled[path] = key
+            if pdf_complete(path):
+                ready.append((path, key))
+            else:
+                self.incomplete.append(path)
+        return ready
+
+    def retry(self, path: Path) -> None:
+        """Hand the current version of the file out again once it is stable."""
+        self._handled.pop(path, None)
+
+    def settling(self) -> bool:
+        """True while some file has not held still for settle_s yet."""
+        return bool(self._seen)
+
+
+def _event(pdf: Path, status: str, **fields) -> None:
+    print(f"WATCH:{json.dumps({'pdf': str(pdf), 'status': status, **fields})}", file=sys.stderr, flush=True)
+
+
+class SpoolIngest:
+    """Starts a parser for every complete PDF of the spool and writes its marker."""
+
+    def __init__(self, spool_dir, out_dir, pool: JobPool, settle_s: float = SETTLE_S, polling: bool = False):
+        self.out_dir = Path(out_dir)
+        self.pool = pool
+        self.watcher = SpoolWatcher(spool_dir, settle_s)
+        self.wakeup = open_wakeup(spool_dir, polling)
+        # Job name -> (pdf path, (size, mtime_ns))
+        self._sources: Dict[str, Tuple[Path, Key]] = {}
+
+    def marker_path(self, pdf: Path) -> Path:
+        return self.out_dir / f"{pdf.stem}.done"
+
+    def _already_done(self, pdf: Path, key: Key) -> bool:
+        try:
+            with open(self.marker_path(pdf), encoding="utf-8") as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return (marker.get("pdf_size"), marker.get("pdf_mtime_ns")) == key
+
+    def _write_marker(self, pdf: Path, key: Key, doc_type: Optional[str], status: str, job: Optional[Job] = None,
+                      error: Optional[str] = None) -> None:
+        marker = {
+            "pdf": str(pdf),
+            "type": doc_type,
+            "status": status,
+            "exit_code": job.exit_code if job else None,
+            "seconds": job.seconds if job else None,
+            "out": job.out if job else None,
+            "log": f"{job.out}.log" if job else None,
+            "pdf_size": key[0],
+            "pdf_mtime_ns": key[1],
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        if error is not None:
+            marker["error"] = error
+        path = self.marker_path(pdf)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(marker, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _queue(self, pdf: Path, key: Key) -> None:
+        name = pdf.stem
+        if name in self._sources:
+            # Same export downloaded again while its parse runs: pick it up afterwards
+            self.watcher.retry(pdf)
+            return
+        if self._already_done(pdf, key):
+            return
+        doc_type = None
+        try:
+            doc_type = detect_document_type(pdf)
+            if doc_type is None:
+                self._write_marker(pdf, key, None, "unknown_type")
+                _event(pdf, "unknown_type")
+                return
+            self.pool.submit(Job(
+                name=name, type=doc_type, path=str(pdf), out=str(self.out_dir / f"{name}.out"),
+                memory=job_memory(doc_type),
+            ))
+        except Exception as e:
+            # A PDF that looks whole but does not open must not stop the other parses
+            self._write_marker(pdf, key, doc_type, "error", error=str(e))
+            _event(pdf, "error", type=doc_type, error=str(e))
+            return
+        self._sources[name] = (pdf, key)
+        _event(pdf, "queued", type=doc_type)
+
+    def poll(self) -> None:
+        """One round: queue the PDFs that became complete, advance the parsers, write markers."""
+        for pdf, key in self.watcher.ready():
+            self._queue(pdf, key)
+        for pdf in self.watcher.incomplete:
+            _event(pdf, "incomplete")
+        for job in self.pool.step():
+            self.pool.jobs.remove(job)
+            pdf, key = self._sources.pop(job.name)
+            self._write_marker(pdf, key, job.type, job.status, job)
+            _event(pdf, job.status, type=job.type, out=job.out)
+
+    def run(self, once: bool = False) -> None:
+        """Watch until interrupted; with once, stop when the current files are parsed."""
+        try:
+            while True:
+                self.poll()
+                if once and self.pool.idle() and not self.watcher.settling():
+                    return
+                if self.pool.running or self.pool.pending:
+                    self.wakeup.wait(min(self.watcher.settle_s, 0.2))
+                else:
+                    self.wakeup.wait(self.watcher.settle_s)
+        finally:
+            self.wakeup.close()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for checkpoint.py
+Tests per-cycle checkpoints, --resume truncation and the SIGTERM handler
+"""
+
+import json
+import os
+import signal
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Import checkpoint
+sys.path.insert(0, str(Path(__file__).parent))
+from checkpoint import CycleCheckpoint, EXIT_SIGTERM, read_ndjson
+
+
+class TestCycleCheckpoint(unittest.TestCase):
+    """Checkpoint written per cycle, honoured on --resume"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "Ordini.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 fake")
+        self.out_path = os.path.join(self.tmp.name, "orders.ndjson")
+        self.previous_handler = signal.getsignal(signal.SIGTERM)
+
+    def tearDown(self):
+        signal.signal(signal.SIGTERM, self.previous_handler)
+        self.tmp.cleanup()
+
+    def run_cycles(self, checkpoint, cycles, per_cycle=2):
+        checkpoint.on_start(self.pdf_path, total_pages=7 * 5, cycle_size=7)
+        for cycle in cycles:
+            for row in range(per_cycle):
+                checkpoint.write_record({"cycle": cycle, "row": row})
+            checkpoint.after_cycle(cycle)
+
+    def load_checkpoint(self, checkpoint):
+        with open(checkpoint.checkpoint_path) as f:
+            return json.load(f)
+
+    def test_checkpoint_after_each_cycle(self):
+        checkpoint = CycleCheckpoint("orders", self.pdf_path, self.out_path)
+        self.assertEqual(checkpoint.open(), 0)
+        self.run_cycles(checkpoint, range(2))
+
+        state = self.load_checkpoint(checkpoint)
+        self.assertEqual(state["next_cycle"], 2)
+        self.assertEqual(state["records"], 4)
+        self.assertEqual(state["output_offset"], os.path.getsize(self.out_path))
+        self.assertFalse(state["complete"])
+
+    def test_resume_drops_partial_cycle(self):
+        first = CycleCheckpoint("orders", self.pdf_path, self.out_path)
+        first.open()
+        self.run_cycles(first, range(2))
+        first.write_record({"cycle": 2, "row": 0})  # interrupted mid-cycle
+        first._out.close()
+
+        resumed = CycleCheckpoint("orders", self.pdf_path, self.out_path, resume=True)
+        self.assertEqual(resumed.open(), 2)
+        self.run_cycles(resumed, range(2, 5))
+        resumed.on_finish()
+
+        records = read_ndjson(self.out_path)
+        self.assertEqual([(r["cycle"], r["row"]) for r in records], [(c, r) for c in range(5) for r in range(2)])
+        self.assertTrue(self.load_checkpoint(resumed)["complete"])
+
+    def test_resume_other_pdf_starts_over(self):
+        first = CycleCheckpoint("orders", self.pdf_path, self.out_path)
+        first.open()
+        self.run_cycles(first, range(2))
+        first._out.close()
+        with open(self.pdf_path, "ab") as f:
+            f.write(b" changed")
+
+        resumed = CycleCheckpoint("orders", self.pdf_path, self.out_path, resume=True)
+        self.assertEqual(resumed.open(), 0)
+        self.assertEqual(os.path.getsize(self.out_path), 0)
+        resumed._out.close()
+
+    def test_resume_cycle_size_mismatch(self):
+        first = CycleCheckpoint("orders", self.pdf_path, self.out_path)
+        first.open()
+        self.run_cycles(first, range(1))
+        first._out.close()
+
+        resumed = CycleCheckpoint("orders", self.pdf_path, self.out_path, resume=True)
+        resumed.open()
+        with self.assertRaises(RuntimeError):
+            resumed.on_start(self.pdf_path, total_pages=45, cycle_size=9)
+        resumed._out.close()
+
+    def test_sigterm_keeps_last_complete_cycle(self):
+        checkpoint = CycleCheckpoint("orders", self.pdf_path, self.out_path)
+        checkpoint.open()
+        self.run_cycles(checkpoint, range(3))
+        checkpoint.write_record({"cycle": 3, "row": 0})
+
+        with self.assertRaises(SystemExit) as ctx:
+            checkpoint._on_sigterm(signal.SIGTERM, None)
+        self.assertEqual(ctx.exception.code, EXIT_SIGTERM)
+        checkpoint._out.close()
+
+        state = self.load_checkpoint(checkpoint)
+        self.assertTrue(state["interrupted"])
+        self.assertEqual(state["next_cycle"], 3)
+        self.assertLess(state["output_offset"], os.path.getsize(self.out_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for customer_index.py
+Tests VAT/fiscal code/phone normalization, the written index and lookup ranking
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Import customer index
+sys.path.insert(0, str(Path(__file__).parent))
+from customer_index import CustomerIndex, CustomerIndexWriter, name_trigrams, normalize_code, normalize_phone
+from test_pdf_cycles import ArtifactTestCase
+
+
+def customer(profile, name, vat, fiscal_code, pec, sdi, phone, mobile, city):
+    return SimpleNamespace(
+        customer_profile=profile, name=name, vat_number=vat, fiscal_code=fiscal_code, pec=pec, sdi=sdi,
+        phone=phone, mobile=mobile, city=city,
+    )
+
+
+CUSTOMERS = [
+    customer("1002000", "Studio Dentistico Rossì", "IT01234567890", "RSSMRA80A01F205Z", "Studio@PEC.it", "ABC1234",
+             "+39 081 555 0000", "333 1200000", "Napoli"),
+    customer("1002001", "Carrazza Giovanni", "IT09876543210", "CRRGNN70B02H501X", "giovanni@pec.it", "M5UXCR1",
+             "0039 06 1234567", None, "Roma"),
+    customer("1002002", "Clinica Sorriso", "01234567999", "01234567999", None, "ABC1234",
+             "081 555 9999", None, "Napoli"),
+]
+
+
+class TestNormalization(unittest.TestCase):
+    def test_codes(self):
+        self.assertEqual(normalize_code("IT 012.345.678-90"), "01234567890")
+        self.assertEqual(normalize_code("rssmra80a01f205z"), "RSSMRA80A01F205Z")
+        self.assertEqual(normalize_code("IT"), "IT")
+        self.assertEqual(normalize_code(None), "")
+
+    def test_phones(self):
+        self.assertEqual(normalize_phone("+39 081 555 0000"), "0815550000")
+        self.assertEqual(normalize_phone("0039 333 1200000"), "3331200000")
+        # A mobile number starting with 39 keeps its digits
+        self.assertEqual(normalize_phone("393 1200000"), "3931200000")
+
+    def test_name_trigrams(self):
+        self.assertEqual(name_trigrams("Rò"), {"  r", " ro", "ro "})
+
+
+class TestCustomerIndex(ArtifactTestCase):
+    FILENAME = "customers.lookup.json"
+
+    def build_index(self):
+        return self.build(CustomerIndexWriter("clienti", "Clienti.pdf", self.path), CUSTOMERS)
+
+    def test_written_index(self):
+        summary = self.summary(self.build_index(), "LOOKUP_INDEX")
+        self.assertEqual((summary["docs"], summary["codes"]), (3, 15))
+        with open(self.path, encoding="utf-8") as f:
+            index = json.load(f)
+        self.assertEqual(index["names"][0], "studio dentistico rossi")
+        self.assertEqual(index["codes"]["phone"][0], ["061234567", 1])
+        self.assertEqual(index["codes"]["pec"][1], ["studio@pec.it", 0])
+        self.assertIn("napoli", index["terms"])
+
+    def test_codes_and_phones(self):
+        self.build_index()
+        index = CustomerIndex(self.path)
+        self.assertEqual(index.lookup("IT 01234567890"), ["1002000"])
+        self.assertEqual(index.lookup("0123456"), ["1002000", "1002002"])
+        self.assertEqual(index.lookup("rssmra80a01f205z"), ["1002000"])
+        self.assertEqual(index.lookup("abc1234"), ["1002000", "1002002"])
+        self.assertEqual(index.lookup("studio@pec"), ["1002000"])
+        self.assertEqual(index.lookup("+39 06 1234567"), ["1002001"])
+        self.assertEqual(index.lookup("081 555"), ["1002000", "1002002"])
+        self.assertEqual(index.lookup("08"), [])
+
+    def test_names(self):
+        self.build_index()
+        index = CustomerIndex(self.path)
+        self.assertEqual(index.lookup("Rossì"), ["1002000"])
+        self.assertEqual(index.lookup("Napoli sorriso"), ["1002002"])
+        # Typos fall back to the trigram similarity
+        self.assertEqual(index.lookup("carraza giovani"), ["1002001"])
+        self.assertEqual(index.lookup("clinca"), ["1002002"])
+        self.assertEqual(index.lookup("zzz"), [])
+        self.assertEqual(index.lookup("napoli", limit=1), ["1002000"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for document_join.py
+Tests attaching DDTs/invoices to orders and the unmatched lists
+"""
+
+import sys
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Import document join
+sys.path.insert(0, str(Path(__file__).parent))
+from document_join import OrderDocumentJoin
+
+
+@dataclass
+class Order:
+    id: str
+    order_number: Optional[str]
+
+
+@dataclass
+class DDT:
+    ddt_number: str
+    order_number: str
+    tracking_number: Optional[str] = None
+    tracking_courier: Optional[str] = None
+    tracking_url: Optional[str] = None
+    delivery_date: Optional[str] = None
+    delivery_city: Optional[str] = None
+
+
+@dataclass
+class Invoice:
+    invoice_number: str
+    order_number: Optional[str]
+    invoice_date: Optional[str] = None
+    invoice_amount: Optional[str] = None
+    remaining_amount: Optional[str] = None
+
+
+class TestOrderDocumentJoin(unittest.TestCase):
+    """Orders get their documents, leftovers are reported as unmatched"""
+
+    def setUp(self):
+        self.join = OrderDocumentJoin(
+            ddts=[
+                DDT("DDT/1", "ORD/1", tracking_number="4452", tracking_courier="FEDEX", delivery_city="Roma"),
+                DDT("DDT/2", " ord/1 "),
+                DDT("DDT/9", "ORD/9"),
+                DDT("DDT/0", ""),
+            ],
+            invoices=[
+                Invoice("FT/1", "ORD/2", invoice_amount="105,60 €", remaining_amount="0,00 €"),
+                Invoice("FT/8", None),
+            ],
+        )
+        self.orders = list(self.join.enrich([Order("1", "ORD/1"), Order("2", "ORD/2"), Order("3", None)]))
+
+    def test_attached_documents(self):
+        first, second, third = self.orders
+        self.assertEqual([d["ddt_number"] for d in first["ddts"]], ["DDT/1", "DDT/2"])
+        self.assertEqual(first["ddts"][0]["tracking_courier"], "FEDEX")
+        self.assertNotIn("delivery_city", first["ddts"][0])
+        self.assertEqual(first["invoices"], [])
+        self.assertEqual(second["invoices"][0]["invoice_amount"], "105,60 €")
+        self.assertEqual((third["ddts"], third["invoices"]), ([], []))
+
+    def test_unmatched(self):
+        self.assertEqual(sorted(d["ddt_number"] for d in self.join.unmatched_ddts()), ["DDT/0", "DDT/9"])
+        self.assertEqual([i["invoice_number"] for i in self.join.unmatched_invoices()], ["FT/8"])
+        # Unmatched records keep every field
+        self.assertIn("delivery_city", self.join.unmatched_ddts()[0])
+
+    def test_repeated_order_number(self):
+        again = list(self.join.enrich([Order("4", "ORD/1")]))
+        self.assertEqual(len(again[0]["ddts"]), 2)
+
+    def test_summary(self):
+        self.assertEqual(
+            self.join.summary(),
+            {"orders": 3, "orders_with_ddt": 1, "orders_with_invoice": 1, "unmatched_ddts": 2, "unmatched_invoices": 1},
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit tests for extraction.py
+Equivalence of the pdfplumber and lean pdfminer backends on generated exports
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Import extraction backends
+sys.path.insert(0, str(Path(__file__).parent))
+import extraction
+from extraction import BACKENDS, backend_from_argv, open_pdf, set_backend
+
+
+def table_stream(rows, rects=False, colw=110, rowh=20, top=800, left=30):
+    """Content stream drawing a ruled table (stroked lines or thin rects) with Helvetica text."""
+    ncols = max(len(r) for r in rows)
+    width, height = colw * ncols, rowh * len(rows)
+    ops = ["0.5 w"]
+    for i in range(len(rows) + 1):
+        y = top - i * rowh
+        ops.append(f"{left} {y} {width} 0.5 re f" if rects else f"{left} {y} m {left + width} {y} l S")
+    for j in range(ncols + 1):
+        x = left + j * colw
+        ops.append(f"{x} {top - height} 0.5 {height} re f" if rects else f"{x} {top} m {x} {top - height} l S")
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            if cell:
+                text = cell.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+                ops.append(f"BT /F1 7 Tf {left + j * colw + 3} {top - (i + 1) * rowh + 6} Td ({text}) Tj ET")
+    return "\n".join(ops).encode("cp1252")
+
+
+def write_pdf(path, streams, mediabox="0 0 842 842"):
+    """Minimal PDF with one page per content stream."""
+    objs = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    pages_id = 1 + 2 * len(streams) + 1
+    kids = []
+    for stream in streams:
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objs.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [%s] /Contents %d 0 R /Resources << /Font << /F1 1 0 R >> >> >>"
+            % (pages_id, mediabox.encode(), len(objs))
+        )
+        kids.append(len(objs))
+    objs.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+    objs.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    buf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objs, 1):
+        offsets.append(len(buf))
+        buf += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(buf)
+    buf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for offset in offsets:
+        buf += b"%010d 00000 n \n" % offset
+    buf += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, len(objs), xref)
+    with open(path, "wb") as f:
+        f.write(bytes(buf))
+
+
+ORDERS_PAGE = [
+    ["ID", "ID DI VENDITA", "PROFILO CLIENTE", "NOME VENDITE"],
+    ["70.962", "ORD/26000887", "1002040", "Cliente (Roma) S.r.l."],
+    ["70.961", "ORD/26000886", "", "Caffè Società"],
+    ["70.960", "ORD/26000885", "1002041", "Ditta 3"],
+]
+TOTALS_PAGE = [
+    ["IMPORTO TOTALE", "ORDINE OMAGGIO", "E-MAIL"],
+    ["1.234,56 €", "Unchecked", "a@b.it"],
+    ["", "Checked", ""],
+]
+
+
+class TestBackendEquivalence(unittest.TestCase):
+    """Both backends must return identical tables for the same PDF"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.previous = extraction.current_backend()
+
+    def tearDown(self):
+        set_backend(self.previous)
+        self.tmp.cleanup()
+
+    def extract_with(self, backend, path):
+        set_backend(backend)
+        with open_pdf(path) as pdf:
+            return [(page.extract_tables(), page.extract_table()) for page in pdf.pages]
+
+    def assert_equivalent(self, streams, mediabox="0 0 842 842"):
+        path = os.path.join(self.tmp.name, "export.pdf")
+        write_pdf(path, streams, mediabox)
+        expected = self.extract_with("pdfplumber", path)
+        self.assertEqual(self.extract_with("pdfminer", path), expected)
+        return expected
+
+    def test_stroked_rules(self):
+        pages = self.assert_equivalent([table_stream(ORDERS_PAGE), table_stream(TOTALS_PAGE)])
+        self.assertEqual(pages[0][1][2][3], "Caffè Società")
+        self.assertEqual(pages[1][1][1][0], "1.234,56 €")
+
+    def test_rect_rules(self):
+        self.assert_equivalent([table_stream(ORDERS_PAGE, rects=True)])
+
+    def test_offset_mediabox(self):
+        self.assert_equivalent([table_stream(ORDERS_PAGE)], mediabox="10 20 852 862")
+
+    def test_page_without_table(self):
+        pages = self.assert_equivalent([b"BT /F1 7 Tf 30 800 Td (Count=3) Tj ET"])
+        self.assertEqual(pages, [([], None)])
+
+
+class TestBackendSelection(unittest.TestCase):
+    """--backend selects the implementation for the run"""
+
+    def setUp(self):
+        self.previous = extraction.current_backend()
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+    def test_backend_from_argv(self):
+        self.assertEqual(backend_from_argv(["x.pdf", "--backend", "pdfminer"]), "pdfminer")
+        self.assertEqual(backend_from_argv(["x.pdf"]), "pdfminer")
+        self.assertEqual(backend_from_argv(["x.pdf", "--backend=pdfplumber"]), "pdfplumber")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            set_backend("ghostscript")
+        self.assertIn(extraction.current_backend(), BACKENDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests for feature_cache.py
+Tests storing, reusing and invalidating cached page features
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Import feature cache
+sys.path.insert(0, str(Path(__file__).parent))
+import feature_cache
+from feature_cache import FeatureCache, cache_dir, feature_cache_from_argv, set_cache_dir
+from page_headers import cached_page_features, scan_page_headers
+from test_extraction import ORDERS_PAGE, TOTALS_PAGE, table_stream, write_pdf
+
+
+class TestFeatureCache(unittest.TestCase):
+    """Features are written once and read back by the next scan"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        set_cache_dir(self.cache_dir)
+        self.pdf = os.path.join(self.tmp.name, "export.pdf")
+        write_pdf(self.pdf, [table_stream(ORDERS_PAGE), table_stream(TOTALS_PAGE)])
+
+    def tearDown(self):
+        set_cache_dir(None)
+        self.tmp.cleanup()
+
+    def cache_file(self):
+        return FeatureCache(self.pdf, self.cache_dir).path
+
+    def test_features(self):
+        features = cached_page_features(self.pdf)
+        self.assertEqual(features[0]["header"], ORDERS_PAGE[0])
+        self.assertEqual(features[0]["rows"], 3)
+        self.assertEqual(features[0]["first_row"], ORDERS_PAGE[1])
+        self.assertEqual(len(features[1]["table_bbox"]), 4)
+        self.assertTrue(self.cache_file().exists())
+
+    def test_reused(self):
+        scan_page_headers(self.pdf)
+        path = self.cache_file()
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["page_count"], 2)
+        # A cached value wins over the page content: the page is not read again
+        data["pages"]["1"]["header"] = ["FROM CACHE"]
+        with open(path, "w") as f:
+            json.dump(data, f)
+        self.assertEqual(scan_page_headers(self.pdf)[1], ("FROM CACHE",))
+
+    def test_other_pdf_ignored(self):
+        scan_page_headers(self.pdf)
+        write_pdf(self.pdf, [table_stream(TOTALS_PAGE)])
+        self.assertEqual(scan_page_headers(self.pdf), [tuple(TOTALS_PAGE[0])])
+
+    def test_partial_then_full(self):
+        cached_page_features(self.pdf, [1])
+        self.assertEqual(sorted(FeatureCache(self.pdf, self.cache_dir).pages), [1])
+        cached_page_features(self.pdf)
+        self.assertEqual(sorted(FeatureCache(self.pdf, self.cache_dir).pages), [0, 1])
+
+    def test_disabled(self):
+        set_cache_dir("off")
+        self.assertIsNone(cache_dir())
+        self.assertEqual(scan_page_headers(self.pdf)[0], tuple(ORDERS_PAGE[0]))
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_prune(self):
+        original = feature_cache.MAX_CACHED_PDFS
+        feature_cache.MAX_CACHED_PDFS = 1
+        try:
+            other = os.path.join(self.tmp.name, "other.pdf")
+            write_pdf(other, [table_stream(TOTALS_PAGE)])
+            scan_page_headers(self.pdf)
+            os.utime(self.cache_file(), (1, 1))
+            scan_page_headers(other)
+            self.assertFalse(self.cache_file().exists())
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        finally:
+            feature_cache.MAX_CACHED_PDFS = original
+
+    def test_from_argv(self):
+        self.assertEqual(feature_cache_from_argv(["x.pdf", "--feature-cache", "/tmp/fc"]), Path("/tmp/fc"))
+        self.assertIsNone(feature_cache_from_argv(["x.pdf", "--no-feature-cache"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for job_pool.py
+Tests manifest loading, admission under the caps and timeouts
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Import job pool
+sys.path.insert(0, str(Path(__file__).parent))
+from job_pool import Job, JobPool, load_manifest, pool_from_argv
+
+MB = 1024 ** 2
+
+
+class SleepPool(JobPool):
+    """JobPool whose jobs sleep instead of parsing."""
+
+    def _command(self, job):
+        return [sys.executable, "-c", f"import time; time.sleep({job.args[0]})"]
+
+
+class TestManifest(unittest.TestCase):
+    """Manifest entries become jobs with defaults filled in"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.tmp.name, "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, documents):
+        with open(self.manifest, "w") as f:
+            json.dump({"documents": documents}, f)
+
+    def test_defaults(self):
+        self.write([
+            {"type": "orders", "path": "Ordini.pdf"},
+            {"type": "clienti", "path": "Clienti.pdf", "name": "customers", "out": "/x/c.json", "memory": "1G"},
+        ])
+        orders, customers = load_manifest(self.manifest)
+        self.assertEqual(orders.out, os.path.join(self.tmp.name, "orders.out"))
+        self.assertEqual(orders.memory, 400 * MB)
+        self.assertEqual((customers.name, customers.out, customers.memory), ("customers", "/x/c.json", 1024 * MB))
+
+    def test_invalid_entries(self):
+        for documents in (
+            [{"type": "quotes", "path": "x.pdf"}],
+            [{"type": "orders"}],
+            [{"type": "orders", "path": "a.pdf"}, {"type": "orders", "path": "b.pdf"}],
+        ):
+            self.write(documents)
+            with self.assertRaises(ValueError):
+                load_manifest(self.manifest)
+
+
+class TestJobPool(unittest.TestCase):
+    """Caps, scheduling order and timeouts"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def job(self, name, seconds=0, memory=100, size=0, timeout_s=None):
+        path = os.path.join(self.tmp.name, f"{name}.pdf")
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return Job(name, "orders", path, os.path.join(self.tmp.name, f"{name}.out"), [str(seconds)],
+                   timeout_s=timeout_s, memory=memory * MB)
+
+    def test_largest_first(self):
+        pool = JobPool([self.job("small", size=1), self.job("big", size=100)])
+        self.assertEqual([job.name for job in pool.pending], ["big", "small"])
+
+    def test_memory_cap(self):
+        big, small = self.job("big", memory=500), self.job("small", memory=300)
+        pool = JobPool([big, small], max_jobs=4, memory_cap=700 * MB)
+        pool.running = {1: big}
+        self.assertFalse(pool._fits(small))
+        pool.running = {}
+        # A job over the whole cap still runs alone
+        self.assertTrue(pool._fits(self.job("huge", memory=900)))
+
+    def test_run_and_timeout(self):
+        pool = SleepPool([self.job("quick"), self.job("stuck", seconds=30, timeout_s=0.5)], max_jobs=2)
+        self.assertFalse(pool.run())
+        statuses = {job.name: job.status for job in pool.jobs}
+        self.assertEqual(statuses, {"quick": "done", "stuck": "timeout"})
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "quick.out.log")))
+
+    def test_concurrency(self):
+        jobs = [self.job(f"j{i}", seconds=0.5) for i in range(3)]
+        pool = SleepPool(jobs, max_jobs=3)
+        self.assertTrue(pool.run())
+        self.assertLess(max(job.started for job in jobs) - min(job.started for job in jobs), 0.4)
+
+    def test_pool_from_argv(self):
+        argv = ["p", "m.json", "--jobs", "2", "--memory-cap", "1GB", "--backend", "pdftotext", "--no-progress"]
+        pool = pool_from_argv(argv, [self.job("a")])
+        self.assertEqual((type(pool).__name__, pool.max_jobs, pool.memory_cap), ("JobPool", 2, 1024 * MB))
+        self.assertEqual(pool.extra_args, ["--backend", "pdftotext", "--no-progress"])
+        self.assertEqual(len(pool.pending), 1)
+        self.assertEqual(type(pool_from_argv(["p", "m.json", "--fair"], [])).__name__, "FairScheduler")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for key_index.py
+Tests index building from observer callbacks and --key lookups
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Import key index
+sys.path.insert(0, str(Path(__file__).parent))
+from key_index import KeyIndexWriter, KeyLookup, parse_key_option
+
+
+class TestKeyIndex(unittest.TestCase):
+    """Index maps keys to [cycle, position] and drives single-cycle lookups"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "Ordini.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 fake")
+        self.index_path = self.pdf_path + ".keys.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_index(self, cycles=3, per_cycle=2):
+        writer = KeyIndexWriter("orders", self.pdf_path, self.index_path)
+        writer.on_start(self.pdf_path, total_pages=7 * cycles, cycle_size=7)
+        for cycle in range(cycles):
+            for row in range(per_cycle):
+                writer.on_record(SimpleNamespace(id=f"{cycle}{row}", order_number=f"ORD/{cycle}{row}" if row else None))
+            writer.after_cycle(cycle)
+        writer.on_finish()
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def test_positions(self):
+        index = self.build_index()
+        self.assertEqual(index["keys"]["id"]["21"], [2, 1])
+        self.assertEqual(index["keys"]["order_number"], {"ORD/01": [0, 1], "ORD/11": [1, 1], "ORD/21": [2, 1]})
+        self.assertEqual(index["cycle_size"], 7)
+
+    def test_partial_run_writes_no_index(self):
+        writer = KeyIndexWriter("orders", self.pdf_path, self.index_path)
+        writer.on_start(self.pdf_path, total_pages=21, cycle_size=7, cycles=range(1, 3))
+        writer.on_finish()
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_lookup_selects_one_cycle(self):
+        self.build_index()
+        lookup = KeyLookup("orders", self.pdf_path, "order_number", "ORD/11", self.index_path)
+        self.assertEqual(lookup.selection.resolve(7, 21), range(1, 2))
+
+        records = iter([SimpleNamespace(order_number="ORD/10"), SimpleNamespace(order_number="ORD/11")])
+        found = list(lookup.apply(records))
+        self.assertEqual(len(found), 1)
+        self.assertTrue(lookup.found)
+
+    def test_unknown_key(self):
+        self.build_index()
+        with self.assertRaises(KeyError):
+            KeyLookup("orders", self.pdf_path, "id", "99", self.index_path)
+
+    def test_stale_index_falls_back_to_scan(self):
+        self.build_index()
+        with open(self.pdf_path, "ab") as f:
+            f.write(b" re-exported")
+        lookup = KeyLookup("orders", self.pdf_path, "id", "11", self.index_path)
+        self.assertIsNone(lookup.selection)
+
+    def test_parse_key_option(self):
+        self.assertEqual(parse_key_option("orders", "order_number=ORD/1"), ("order_number", "ORD/1"))
+        self.assertEqual(parse_key_option("orders", "70830"), ("id", "70830"))
+        self.assertEqual(parse_key_option("clienti", "1002040"), ("customer_profile", "1002040"))
+        with self.assertRaises(ValueError):
+            parse_key_option("prices", "x")
+
+
+if __name__ == '__main__':
+    unittest.main()
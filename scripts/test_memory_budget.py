@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for memory_budget.py
+Tests budget parsing and the governor's step-down ladder
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Import governor
+sys.path.insert(0, str(Path(__file__).parent))
+from memory_budget import MemoryBudgetGovernor, parse_memory_budget, INITIAL_BATCH_CAP
+
+MB = 1024 ** 2
+
+
+class TestParseMemoryBudget(unittest.TestCase):
+    """Budget strings accepted on the command line"""
+
+    def test_units(self):
+        self.assertEqual(parse_memory_budget("512MB"), 512 * MB)
+        self.assertEqual(parse_memory_budget("512m"), 512 * MB)
+        self.assertEqual(parse_memory_budget("1G"), 1024 * MB)
+        self.assertEqual(parse_memory_budget("1.5GiB"), 1536 * MB)
+        self.assertEqual(parse_memory_budget("2048K"), 2 * MB)
+
+    def test_plain_number_is_megabytes(self):
+        self.assertEqual(parse_memory_budget("400"), 400 * MB)
+
+    def test_invalid(self):
+        for value in ["", "abc", "-5MB", "0"]:
+            with self.assertRaises(ValueError):
+                parse_memory_budget(value)
+
+
+class TestMemoryBudgetGovernor(unittest.TestCase):
+    """Governor reacts to sampled RSS one step at a time"""
+
+    def make_governor(self, samples):
+        it = iter(samples)
+        return MemoryBudgetGovernor("test", 100 * MB, rss_sampler=lambda: next(it))
+
+    def test_under_budget_no_adjustment(self):
+        governor = self.make_governor([10 * MB, 50 * MB, 79 * MB])
+        for cycle in range(3):
+            governor.after_cycle(cycle)
+        self.assertEqual(governor.adjustments, [])
+        self.assertFalse(governor.release_caches)
+        self.assertIsNone(governor.effective_cycles_per_open(None))
+
+    def test_ladder_for_single_instance_parser(self):
+        governor = self.make_governor([90 * MB] * 10)
+        governor.effective_cycles_per_open(None)
+        governor.after_cycle(0)
+        self.assertTrue(governor.release_caches)
+        self.assertEqual(governor.adjustments[-1]["action"], "release_caches")
+
+        governor.after_cycle(1)
+        self.assertEqual(governor.effective_cycles_per_open(None), INITIAL_BATCH_CAP)
+
+        actions = []
+        for cycle in range(2, 10):
+            governor.after_cycle(cycle)
+            actions.append(governor.adjustments[-1]["action"])
+        self.assertEqual(governor.effective_cycles_per_open(None), 1)
+        self.assertIn("reopen_per_cycle", actions)
+
+    def test_reopen_per_cycle_parser_only_releases_caches(self):
+        governor = self.make_governor([95 * MB, 120 * MB, 130 * MB])
+        governor.effective_cycles_per_open(1)
+        for cycle in range(3):
+            governor.after_cycle(cycle)
+        actions = [a["action"] for a in governor.adjustments]
+        self.assertEqual(actions, ["release_caches", "budget_exceeded"])
+
+
+if __name__ == '__main__':
+    unittest.main()
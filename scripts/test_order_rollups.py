@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for order_rollups.py
+Tests amount parsing to cents and the per-customer, per-month aggregates
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Import order rollups
+sys.path.insert(0, str(Path(__file__).parent))
+from order_rollups import OrderRollups, amount_cents
+from test_pdf_cycles import ArtifactTestCase
+
+
+def order(customer, creation_date, gross, total, sales_status="Consegnato", document_status="Nessuno"):
+    return SimpleNamespace(
+        customer_profile_id=customer, creation_date=creation_date, gross_amount=gross, total_amount=total,
+        sales_status=sales_status, document_status=document_status,
+    )
+
+
+ORDERS = [
+    order("1002241", "2026-01-28T12:00:00", "105,60 €", "82,91 €"),
+    order("1002241", "2026-01-02T09:00:00", "1.791,01 €", "1.500,00 €", sales_status="Ordine aperto"),
+    order("1002241", "2026-02-03T09:00:00", "10,00 €", "-12,50 €", document_status="Documento di trasporto"),
+    order("1002300", "2026-01-15T10:00:00", None, None),
+    order(None, "2026-01-20T10:00:00", "5,00 €", "4,00 €", sales_status=None),
+    order("1002300", None, "5,00 €", "4,00 €"),
+]
+
+
+class TestAmounts(unittest.TestCase):
+    """Same rules as the backend's parseItalianCurrency, in integer cents"""
+
+    def test_amount_cents(self):
+        self.assertEqual(amount_cents("1.791,01 €"), 179101)
+        self.assertEqual(amount_cents("-12,50 €"), -1250)
+        self.assertEqual(amount_cents("409.85"), 40985)
+        # Exact in cents where float arithmetic is not
+        self.assertEqual(amount_cents("0,29 €"), 29)
+        self.assertIsNone(amount_cents(" € "))
+        self.assertIsNone(amount_cents("n/d"))
+        self.assertIsNone(amount_cents(None))
+
+
+class TestOrderRollups(ArtifactTestCase):
+    FILENAME = "orders.rollups.json"
+
+    def test_rollups(self):
+        summary = self.summary(self.build(OrderRollups("orders", "Ordini.pdf", self.path), ORDERS), "ROLLUPS")
+        self.assertEqual((summary["orders"], summary["customers"], summary["months"], summary["skipped"]), (5, 3, 2, 1))
+        with open(self.path, encoding="utf-8") as f:
+            output = json.load(f)
+        customers = {(row["customer_profile_id"], row["month"]): row for row in output["customers"]}
+        self.assertEqual(list(customers), [
+            (None, "2026-01"), ("1002241", "2026-01"), ("1002241", "2026-02"), ("1002300", "2026-01"),
+        ])
+        january = customers[("1002241", "2026-01")]
+        self.assertEqual((january["orders"], january["gross_cents"], january["total_cents"]), (2, 189661, 158291))
+        self.assertEqual(january["sales_status"], {"Consegnato": 1, "Ordine aperto": 1})
+        self.assertEqual(customers[("1002241", "2026-02")]["total_cents"], -1250)
+        self.assertEqual(customers[("1002300", "2026-01")]["unpriced"], 1)
+
+        months = {row["month"]: row for row in output["months"]}
+        self.assertEqual(months["2026-01"]["orders"], 4)
+        self.assertEqual(months["2026-01"]["total_cents"], 158691)
+        self.assertEqual(months["2026-01"]["sales_status"], {"": 1, "Consegnato": 2, "Ordine aperto": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
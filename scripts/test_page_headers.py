@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for page_headers.py
+Tests header reading without table extraction and cycle size detection
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pdfplumber
+
+# Import page header scanner
+sys.path.insert(0, str(Path(__file__).parent))
+from feature_cache import FeatureCache, set_cache_dir
+from page_headers import detect_cycle_size, scan_page_features, scan_page_headers
+from test_extraction import ORDERS_PAGE, TOTALS_PAGE, table_stream, write_pdf
+
+def is_anchor(headers):
+    return 'ID' in headers and any('ID DI VENDITA' in h for h in headers)
+
+
+class TestScanPageHeaders(unittest.TestCase):
+    """Header cells match the first row of pdfplumber's first table"""
+
+    def setUp(self):
+        set_cache_dir("off")
+
+    def tearDown(self):
+        set_cache_dir(None)
+
+    def test_matches_pdfplumber(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "export.pdf")
+            streams = [
+                table_stream(ORDERS_PAGE),
+                table_stream(TOTALS_PAGE, rects=True),
+                b"BT /F1 7 Tf 30 800 Td (no table) Tj ET",
+            ]
+            write_pdf(path, streams)
+            with pdfplumber.open(path) as pdf:
+                expected = []
+                for page in pdf.pages:
+                    tables = page.extract_tables()
+                    expected.append(tuple(h or "" for h in tables[0][0]) if tables else ())
+            self.assertEqual(scan_page_headers(path), expected)
+            self.assertEqual(expected[2], ())
+
+    def test_row_counts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "export.pdf")
+            footer = ORDERS_PAGE + [["Count=3", "", "", ""]]
+            write_pdf(path, [table_stream(ORDERS_PAGE), table_stream(footer), b"BT /F1 7 Tf 30 800 Td (no table) Tj ET"])
+            scanned = scan_page_features(path, [2, 1, 0])
+            self.assertEqual({idx: f["rows"] for idx, f in scanned.items()}, {2: 0, 1: 3, 0: 3})
+            self.assertEqual(scanned[0]["header"], ORDERS_PAGE[0])
+            self.assertEqual(scanned[1]["first_row"], ORDERS_PAGE[1])
+            self.assertEqual(scanned[2], {"header": [], "rows": 0, "table_bbox": None, "first_row": []})
+
+
+class TestDetectCycleSize(unittest.TestCase):
+    """Cycle size from the first two anchors, without reading further"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        set_cache_dir(os.path.join(self.tmp.name, "cache"))
+        self.path = os.path.join(self.tmp.name, "export.pdf")
+
+    def tearDown(self):
+        set_cache_dir(None)
+        self.tmp.cleanup()
+
+    def test_stops_at_second_anchor(self):
+        write_pdf(self.path, [table_stream(ORDERS_PAGE), table_stream(TOTALS_PAGE)] * 3)
+        self.assertEqual(detect_cycle_size(self.path, is_anchor), 2)
+        # Only the pages up to the second anchor were scanned (and cached)
+        self.assertEqual(FeatureCache.open(self.path).missing(range(6)), [3, 4, 5])
+        self.assertEqual(detect_cycle_size(self.path, is_anchor), 2)
+
+    def test_detection_failed(self):
+        write_pdf(self.path, [table_stream(ORDERS_PAGE), table_stream(TOTALS_PAGE)])
+        self.assertIsNone(detect_cycle_size(self.path, is_anchor))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for parse_progress.py
+Tests Count= footer parsing and the smoothed ETA
+"""
+
+import io
+import json
+import unittest
+import sys
+from contextlib import redirect_stderr
+from pathlib import Path
+
+# Import reporter
+sys.path.insert(0, str(Path(__file__).parent))
+from parse_progress import ProgressReporter, parse_footer_count
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestParseFooterCount(unittest.TestCase):
+    """ERP footer rows ('Count=1.515 Sum=...')"""
+
+    def test_footer_variants(self):
+        self.assertEqual(parse_footer_count(["Count=45", "", ""]), 45)
+        self.assertEqual(parse_footer_count(["", "Count=1.515", "Sum=52,00"]), 1515)
+        self.assertEqual(parse_footer_count(["count = 7"]), 7)
+
+    def test_regular_rows(self):
+        self.assertIsNone(parse_footer_count(["1002241", "Carrazza Giovanni"]))
+        self.assertIsNone(parse_footer_count([None, None]))
+        self.assertIsNone(parse_footer_count([]))
+
+
+class TestProgressReporter(unittest.TestCase):
+    """PROGRESS: lines and ETA smoothing"""
+
+    def run_cycles(self, durations, interval_s=0):
+        clock = FakeClock()
+        reporter = ProgressReporter("test", interval_s=interval_s, read_footer=False, clock=clock)
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            reporter.on_start("unused.pdf", total_pages=7 * len(durations), cycle_size=7)
+            for idx, duration in enumerate(durations):
+                clock.now += duration
+                reporter.on_record(object())
+                reporter.after_cycle(idx)
+            reporter.on_finish()
+        lines = [json.loads(l[len("PROGRESS:"):]) for l in stderr.getvalue().splitlines()]
+        return reporter, lines
+
+    def test_emits_start_cycles_and_done(self):
+        _, lines = self.run_cycles([1.0, 1.0, 1.0])
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0]["cycles_done"], 0)
+        self.assertEqual(lines[2]["pages_done"], 14)
+        self.assertEqual(lines[2]["records"], 2)
+        self.assertTrue(lines[-1]["done"])
+        self.assertEqual(lines[-1]["eta_s"], 0.0)
+
+    def test_eta_uses_smoothed_cycle_time(self):
+        _, lines = self.run_cycles([2.0, 2.0, 2.0, 2.0])
+        self.assertEqual(lines[1]["eta_s"], 6.0)  # 3 cycles left x 2s
+        self.assertEqual(lines[3]["eta_s"], 2.0)
+
+    def test_throttling(self):
+        _, lines = self.run_cycles([0.1] * 10, interval_s=5)
+        self.assertEqual([l["done"] for l in lines], [False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
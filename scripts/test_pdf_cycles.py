@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pdf_cycles.py
+Tests the full-run artifact base: partial runs, atomic publish, summary line and argv
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+
+# Import cycle helpers
+sys.path.insert(0, str(Path(__file__).parent))
+from pdf_cycles import CycleObserver, FullRunArtifact, observe_records
+
+
+class ArtifactTestCase(unittest.TestCase):
+    """Temporary output path and one replayed parse, for the tests of FullRunArtifact writers"""
+
+    FILENAME = "artifact.json"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, self.FILENAME)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, writer, records, total_pages=14, cycle_size=7, cycles=None) -> str:
+        """stderr of a parse of `records` observed by `writer`."""
+        with redirect_stderr(io.StringIO()) as stderr:
+            writer.on_start("export.pdf", total_pages, cycle_size, cycles)
+            for record in records:
+                writer.on_record(record)
+            writer.after_cycle(0)
+            writer.on_finish()
+        return stderr.getvalue()
+
+    def summary(self, stderr: str, prefix: str) -> dict:
+        return json.loads(stderr.split(f"{prefix}:", 1)[1])
+
+
+class LinesArtifact(FullRunArtifact):
+    ARTIFACT = "line list"
+    SUMMARY_PREFIX = "LINES"
+    OPTION = "--lines"
+
+    def __init__(self, parser_name, pdf_path, path, source=None):
+        super().__init__(parser_name, pdf_path, path, source)
+        self.lines = []
+        self.discarded = False
+
+    def on_record(self, record) -> None:
+        self.lines.append(record)
+
+    def write(self) -> dict:
+        self.write_json(self.lines)
+        return {"lines": len(self.lines)}
+
+    def discard(self) -> None:
+        super().discard()
+        self.discarded = True
+
+
+class FailingFinish(CycleObserver):
+    def on_finish(self) -> None:
+        raise ValueError("sanity check failed")
+
+
+class TestFullRunArtifact(ArtifactTestCase):
+    def writer(self):
+        return LinesArtifact("orders", "Ordini.pdf", self.path)
+
+    def test_full_run_written(self):
+        stderr = self.build(self.writer(), ["a", "b"])
+        self.assertEqual(self.summary(stderr, "LINES"), {"path": self.path, "lines": 2})
+        self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), ["a", "b"])
+        # Every cycle selected explicitly is still a full run
+        self.assertIn("LINES:", self.build(self.writer(), ["a"], cycles=range(2)))
+
+    def test_partial_run_not_written(self):
+        for cycles in (range(1, 2), range(0, 1)):
+            writer = self.writer()
+            stderr = self.build(writer, ["a"], cycles=cycles)
+            self.assertIn("Warning: line list not written, it needs a full run", stderr)
+            self.assertTrue(writer.discarded)
+            self.assertFalse(os.path.exists(self.path))
+            self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+
+    def test_failed_parse(self):
+        def records():
+            yield "a"
+            raise ValueError("broken page")
+
+        writer = self.writer()
+        writer.on_start("Ordini.pdf", 14, 7)
+        open(writer.tmp_path, "w").close()
+        with self.assertRaises(ValueError):
+            list(observe_records(records(), [writer]))
+        self.assertTrue(writer.discarded)
+        self.assertFalse(os.path.exists(writer.tmp_path))
+
+        # An observer failing in on_finish aborts the ones after it
+        writer = self.writer()
+        with self.assertRaises(ValueError):
+            list(observe_records(["a"], [FailingFinish(), writer]))
+        self.assertTrue(writer.discarded)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_argv(self):
+        argv = ["p", "Ordini.pdf", "--lines", self.path]
+        self.assertEqual(LinesArtifact.from_argv("orders", "Ordini.pdf", argv).path, self.path)
+        # Descriptor input is recorded as given, not as its /proc/self/fd path
+        writer = LinesArtifact.from_argv("orders", "/proc/self/fd/3", ["p", "fd:3", "--lines", self.path])
+        self.assertEqual((writer.pdf_path, writer.source), ("/proc/self/fd/3", "fd:3"))
+        self.assertEqual(self.writer().source, "Ordini.pdf")
+        self.assertIsNone(LinesArtifact.from_argv("orders", "Ordini.pdf", ["p", "Ordini.pdf"]))
+        self.assertIsNone(LinesArtifact.from_argv("orders", "Ordini.pdf", argv + ["--key", "70830"]))
+        self.assertIsNone(LinesArtifact.from_argv("orders", "Ordini.pdf", argv + ["--since", "2026-01-20"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
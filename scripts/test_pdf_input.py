@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pdf_input.py
+Tests descriptor and pipe input, the memory map and the shared buffer reader
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Import PDF input
+sys.path.insert(0, str(Path(__file__).parent))
+import extraction
+from extraction import BufferReader, map_pdf, open_pdf, pdf_stream
+from key_index import default_index_path
+from pdf_input import fd_of, open_pdf_input, resolve_pdf_arg
+from test_extraction import ORDERS_PAGE, table_stream, write_pdf
+
+
+class TestBufferReader(unittest.TestCase):
+    """Independent positions over one buffer"""
+
+    def test_read_seek(self):
+        data = b"0123456789"
+        first, second = BufferReader(data), BufferReader(data)
+        self.assertEqual(first.read(4), b"0123")
+        second.seek(-3, io.SEEK_END)
+        self.assertEqual(second.read(), b"789")
+        self.assertEqual(first.read(2), b"45")
+        first.seek(2, io.SEEK_CUR)
+        self.assertEqual(first.tell(), 8)
+        self.assertEqual(first.read(10), b"89")
+        self.assertEqual(first.read(1), b"")
+
+
+class TestPdfInput(unittest.TestCase):
+    """Descriptor input resolves to a mapped /proc/self/fd path"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self.tmp.name, "export.pdf")
+        write_pdf(self.pdf, [table_stream(ORDERS_PAGE)])
+        with open(self.pdf, "rb") as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        extraction._buffers.clear()
+        self.tmp.cleanup()
+
+    def first_table(self, path):
+        with open_pdf(path) as pdf:
+            return pdf.pages[0].extract_tables()[0]
+
+    def test_path_unchanged(self):
+        self.assertEqual(resolve_pdf_arg(self.pdf), self.pdf)
+        self.assertIsNone(fd_of(self.pdf))
+
+    def test_regular_fd(self):
+        fd = os.open(self.pdf, os.O_RDONLY)
+        try:
+            path = open_pdf_input(f"fd:{fd}")
+            self.assertEqual(fd_of(path), fd)
+            self.assertIn(path, extraction._buffers)
+            self.assertEqual(self.first_table(path), ORDERS_PAGE)
+        finally:
+            os.close(fd)
+
+    def test_pipe_fd(self):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            with os.fdopen(write_fd, "wb") as f:
+                f.write(self.data)
+            os._exit(0)
+        os.close(write_fd)
+        path = open_pdf_input(f"fd:{read_fd}")
+        os.waitpid(pid, 0)
+        self.assertNotEqual(fd_of(path), read_fd)
+        with pdf_stream(path) as stream:
+            self.assertEqual(stream.read(), self.data)
+        self.assertEqual(self.first_table(path), ORDERS_PAGE)
+        os.close(fd_of(path))
+
+    def test_empty_pipe(self):
+        read_fd, write_fd = os.pipe()
+        os.close(write_fd)
+        with self.assertRaises(ValueError):
+            resolve_pdf_arg(f"fd:{read_fd}")
+
+    def test_mmap_path(self):
+        map_pdf(self.pdf)
+        self.assertIsInstance(pdf_stream(self.pdf), BufferReader)
+        previous = extraction.current_backend()
+        try:
+            for backend in ("pdfplumber", "pdfminer"):
+                extraction.set_backend(backend)
+                self.assertEqual(self.first_table(self.pdf), ORDERS_PAGE)
+        finally:
+            extraction.set_backend(previous)
+
+    def test_index_needs_path(self):
+        self.assertEqual(default_index_path(self.pdf), f"{self.pdf}.keys.json")
+        with self.assertRaises(ValueError):
+            default_index_path("/proc/self/fd/3")
+
+
+if __name__ == '__main__':
+    unittest.main()
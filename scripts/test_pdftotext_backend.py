@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pdftotext_backend.py
+Tests table rebuilding from word boxes against pdfplumber's tables
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import pdfplumber
+
+# Import poppler backend
+sys.path.insert(0, str(Path(__file__).parent))
+import pdftotext_backend
+from pdftotext_backend import PDFTOTEXT, PopplerPDF, Word, iter_tsv_words, rebuild_table
+from test_extraction import ORDERS_PAGE, TOTALS_PAGE, table_stream, write_pdf
+
+
+def pdfplumber_words(pdf_path, first_page, last_page):
+    """Word boxes from pdfplumber, in the shape iter_tsv_words yields."""
+    with pdfplumber.open(pdf_path) as pdf:
+        for idx in range(first_page - 1, last_page):
+            for w in pdf.pages[idx].extract_words():
+                yield idx, Word(w["text"], w["x0"], w["top"], w["x1"], w["bottom"])
+
+
+class TestRebuildTable(unittest.TestCase):
+    """Cells rebuilt from word boxes match pdfplumber's ruled tables"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "export.pdf")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_same_tables(self, streams, word_source=pdfplumber_words):
+        write_pdf(self.pdf_path, streams)
+        with pdfplumber.open(self.pdf_path) as pdf:
+            expected = [page.extract_tables() for page in pdf.pages]
+        with PopplerPDF(self.pdf_path, word_source=word_source) as pdf:
+            self.assertEqual([page.extract_tables() for page in pdf.pages], expected)
+            return pdf.state.templates
+
+    def test_templates_are_reused_across_cycles(self):
+        # Two 2-page cycles: one template per cycle page
+        longer = ORDERS_PAGE + [["70.959", "ORD/26000884", "1002042", "Ditta 4"]]
+        templates = self.assert_same_tables(
+            [table_stream(ORDERS_PAGE), table_stream(TOTALS_PAGE), table_stream(longer), table_stream(TOTALS_PAGE)]
+        )
+        self.assertEqual(len(templates), 2)
+
+    def test_multiline_cell(self):
+        page = ORDERS_PAGE[:2] + [["70.961", "ORD/26000886", "", "Caffè"]]
+        stream = table_stream(page, rowh=30)
+        # Extra line above "Caffè" in the last cell of the last row
+        stream += b"\nBT /F1 7 Tf 363 727 Td (Societa) Tj ET"
+        self.assert_same_tables([stream])
+        with PopplerPDF(self.pdf_path, word_source=pdfplumber_words) as pdf:
+            self.assertEqual(pdf.pages[0].extract_table()[2][3], "Societa\nCaffè")
+
+    def test_header_mismatch(self):
+        write_pdf(self.pdf_path, [table_stream(ORDERS_PAGE), table_stream(TOTALS_PAGE)])
+        with PopplerPDF(self.pdf_path, word_source=pdfplumber_words) as pdf:
+            pdf.pages[0].extract_table()
+            template = pdf.state.templates[0]
+            self.assertIsNone(rebuild_table(pdf.words(1), pdf.rules.pages[1].edges, template))
+
+    @unittest.skipUnless(shutil.which(PDFTOTEXT), "pdftotext (poppler-utils) not installed")
+    def test_pdftotext_words(self):
+        self.assert_same_tables([table_stream(ORDERS_PAGE), table_stream(TOTALS_PAGE)], word_source=iter_tsv_words)
+
+
+class TestTsvWords(unittest.TestCase):
+    """pdftotext -tsv output, read from a stand-in executable"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tool = os.path.join(self.tmp.name, "pdftotext")
+
+    def tearDown(self):
+        pdftotext_backend.PDFTOTEXT = PDFTOTEXT
+        self.tmp.cleanup()
+
+    def fake_pdftotext(self, script: str) -> None:
+        with open(self.tool, "w") as f:
+            f.write(f"#!{sys.executable}\nimport sys\n{script}")
+        os.chmod(self.tool, 0o755)
+        pdftotext_backend.PDFTOTEXT = self.tool
+
+    def test_noisy_stderr_does_not_block(self):
+        # More syntax errors than a pipe buffer holds, written before any word
+        self.fake_pdftotext(
+            "sys.stderr.write('Syntax Error: bad xref\\n' * 20000)\n"
+            "print('level\\tpage_num\\tpar_num\\tblock_num\\tline_num\\tword_num\\tleft\\ttop\\twidth\\theight\\tconf\\ttext')\n"
+            "print('1\\t1\\t0\\t0\\t0\\t0\\t0\\t0\\t595\\t842\\t-1\\t###PAGE###')\n"
+            "print('5\\t1\\t0\\t0\\t0\\t0\\t30\\t40\\t20\\t7\\t96\\tID')\n"
+        )
+        words = []
+        reader = threading.Thread(target=lambda: words.extend(iter_tsv_words("export.pdf", 1, 1)), daemon=True)
+        reader.start()
+        reader.join(timeout=10)
+        self.assertFalse(reader.is_alive(), "iter_tsv_words blocked on pdftotext's stderr")
+        self.assertEqual(words, [(0, Word("ID", 30.0, 40.0, 50.0, 47.0))])
+
+    def test_failure_reports_stderr(self):
+        self.fake_pdftotext("sys.stderr.write('Syntax Error: no xref\\n')\nsys.exit(1)\n")
+        with self.assertRaisesRegex(RuntimeError, "no xref"):
+            list(iter_tsv_words("export.pdf", 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Unit tests for price_matrix.py
+Tests amount parsing, the SQLite lookup table, quantity tiers and as-of validity segments
+"""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Import price matrix
+sys.path.insert(0, str(Path(__file__).parent))
+from price_matrix import OPEN_END, PriceMatrix, PriceMatrixWriter, parse_italian_amount, validity_segments
+from test_pdf_cycles import ArtifactTestCase
+
+
+def price(record_id, qty_from, qty_to, da_data, importo, account="002", item="000314.016", data="31/12/2027"):
+    return SimpleNamespace(
+        id=record_id, codice_conto=account, account="Tabella", descrizione_account="Listino base",
+        item_selection=item, item_description="Fresa", da_data=da_data, data=data,
+        quantita_p2=qty_from, quantita_p3=qty_to, unita_di_prezzo="1", importo_unitario=importo,
+        valuta="EUR", prezzo_netto_brasseler="200,00 €",
+    )
+
+
+PRICES = [
+    price("100", "1", "9", "01/01/2025", "234,59 €"),
+    price("101", "10", "49", "01/02/2025", "224,59 €"),
+    price("102", "50", None, "01/03/2025", "1.214,59 €"),
+    price("103", "1", "9", "01/01/2026", "239,00 €"),
+    price("104", "1", "9", "01/01/2026", "9,00 €", account=""),
+]
+
+
+class TestAmounts(unittest.TestCase):
+    """Same rules as the backend's parseItalianPrice"""
+
+    def test_parse_italian_amount(self):
+        self.assertEqual(parse_italian_amount("1.234,56 €"), 1234.56)
+        self.assertEqual(parse_italian_amount("10.000"), 10000.0)
+        self.assertEqual(parse_italian_amount("1677.87"), 1677.87)
+        self.assertEqual(parse_italian_amount("5,00€"), 5.0)
+        self.assertIsNone(parse_italian_amount("-1.234,56"))
+        self.assertIsNone(parse_italian_amount("   "))
+        self.assertIsNone(parse_italian_amount(None))
+
+
+class TestValiditySegments(unittest.TestCase):
+    """Disjoint date segments with the winning row of each tier"""
+
+    def test_overlapping_windows(self):
+        rows = [
+            (1, 1.0, "2025-01-01", "2025-12-31"),
+            (2, 1.0, "2025-06-01", "2025-08-31"),  # temporary promotion
+            (3, 10.0, None, None),
+        ]
+        self.assertEqual(validity_segments(rows), [
+            ("0001-01-01", "2024-12-31", 10.0, 3),
+            ("2025-01-01", "2025-05-31", 1.0, 1),
+            ("2025-01-01", "2025-05-31", 10.0, 3),
+            ("2025-06-01", "2025-08-31", 1.0, 2),
+            ("2025-06-01", "2025-08-31", 10.0, 3),
+            ("2025-09-01", "2025-12-31", 1.0, 1),
+            ("2025-09-01", "2025-12-31", 10.0, 3),
+            ("2026-01-01", OPEN_END, 10.0, 3),
+        ])
+
+    def test_gaps_and_merges(self):
+        rows = [(1, 1.0, "2025-01-01", "2025-03-31"), (2, 1.0, "2025-06-01", None), (3, 1.0, "2025-02-01", "2025-01-01")]
+        self.assertEqual(validity_segments(rows), [
+            ("2025-01-01", "2025-03-31", 1.0, 1),
+            ("2025-06-01", OPEN_END, 1.0, 2),
+        ])
+
+
+class TestPriceMatrix(ArtifactTestCase):
+    FILENAME = "prices.sqlite"
+
+    def build_matrix(self, records):
+        return self.build(PriceMatrixWriter("prices", "Prezzi.pdf", self.path), records)
+
+    def test_lookup_tiers(self):
+        summary = self.summary(self.build_matrix(PRICES), "PRICE_MATRIX")
+        self.assertEqual((summary["rows"], summary["skipped"], summary["accounts"]), (4, 1, 1))
+        with PriceMatrix(self.path) as matrix:
+            # Latest validity of the first tier
+            self.assertEqual(matrix.lookup("002", "000314.016")["unit_price"], 239.0)
+            self.assertEqual(matrix.lookup("002", "000314.016", 9)["record_id"], "103")
+            self.assertEqual(matrix.lookup("002", "000314.016", 10)["unit_price"], 224.59)
+            self.assertEqual(matrix.lookup("002", "000314.016", 10 ** 6)["unit_price"], 1214.59)
+            self.assertIsNone(matrix.lookup("002", "000314.016", 0.5))
+            self.assertIsNone(matrix.lookup("001", "000314.016"))
+            self.assertEqual([t["record_id"] for t in matrix.tiers("002", "000314.016")], ["100", "103", "101", "102"])
+            self.assertEqual(matrix.meta()["rows"], "4")
+
+    def test_as_of(self):
+        self.build_matrix([
+            price("1", "1", "9", "01/01/2025", "10,00", data="31/12/2025"),
+            price("2", "1", "9", "01/06/2025", "8,00", data="31/08/2025"),
+            price("3", "10", None, "01/01/2025", "7,00", data=None),
+        ])
+        with PriceMatrix(self.path) as matrix:
+            self.assertEqual(matrix.lookup("002", "000314.016", 1, as_of="2025-03-01")["unit_price"], 10.0)
+            self.assertEqual(matrix.lookup("002", "000314.016", 1, as_of="2025-07-01")["unit_price"], 8.0)
+            self.assertEqual(matrix.lookup("002", "000314.016", 1, as_of="2025-09-01")["record_id"], "1")
+            self.assertIsNone(matrix.lookup("002", "000314.016", 1, as_of="2026-01-01"))
+            self.assertEqual(matrix.lookup("002", "000314.016", 20, as_of="2026-01-01")["record_id"], "3")
+            self.assertIsNone(matrix.lookup("002", "000314.016", 1, as_of="2024-12-31"))
+            self.assertNotIn("seg_end", matrix.lookup("002", "000314.016", 1, as_of="2025-03-01"))
+            # Without a date the latest valid_from of the tier wins
+            self.assertEqual(matrix.lookup("002", "000314.016", 1)["record_id"], "2")
+
+    def test_gap_between_tiers(self):
+        self.build_matrix([price("1", "1", "9", "01/01/2025", "1,00"), price("2", "20", None, "01/01/2025", "0,90")])
+        with PriceMatrix(self.path) as matrix:
+            self.assertIsNone(matrix.lookup("002", "000314.016", 15))
+
+    def test_failed_parse(self):
+        # Nothing is created before the parse starts, and a parse that raises drops the table it was loading
+        writer = PriceMatrixWriter("prices", "Prezzi.pdf", self.path)
+        self.assertFalse(os.path.exists(writer.tmp_path))
+        writer.on_start("Prezzi.pdf", 14, 7)
+        writer.on_record(PRICES[0])
+        writer.after_cycle(0)
+        self.assertTrue(os.path.exists(writer.tmp_path))
+        writer.on_abort()
+        self.assertIsNone(writer.db)
+        self.assertFalse(os.path.exists(writer.tmp_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Unit tests for record_fingerprint.py
+Tests value normalization, field order and the versioned fingerprint format
+"""
+
+import re
+import sys
+import unittest
+from pathlib import Path
+
+# Import record fingerprint
+sys.path.insert(0, str(Path(__file__).parent))
+from record_fingerprint import (
+    FINGERPRINT_FIELDS,
+    FINGERPRINT_VERSION,
+    canonical_value,
+    record_fingerprint,
+    with_fingerprint,
+)
+
+ARTICLE = {
+    "line_number": "1", "article_code": "H1.314.016", "quantity": 5.0, "unit_price": 16.25,
+    "discount_percent": 10.0, "line_amount": 73.13, "description": "Fresa",
+}
+
+
+class TestCanonicalValue(unittest.TestCase):
+    def test_values(self):
+        self.assertEqual(canonical_value("  Via  Roma\n12 "), "Via Roma 12")
+        self.assertEqual(canonical_value(None), canonical_value(""))
+        self.assertEqual(canonical_value(True), "true")
+        self.assertEqual(canonical_value(16.25), "16.25")
+        self.assertEqual(canonical_value(3), "3")
+
+
+class TestRecordFingerprint(unittest.TestCase):
+    def test_format_and_stability(self):
+        fingerprint = record_fingerprint("saleslines", ARTICLE)
+        self.assertRegex(fingerprint, rf"^{FINGERPRINT_VERSION}:[0-9a-f]{{16}}$")
+        self.assertEqual(fingerprint, "1:c55f0f7774bf7931")
+
+    def test_normalized_fields(self):
+        fingerprint = record_fingerprint("saleslines", ARTICLE)
+        # Extraction whitespace, None vs "" and key order do not matter
+        same = dict(reversed(list({**ARTICLE, "description": " Fresa\n"}.items())))
+        self.assertEqual(record_fingerprint("saleslines", same), fingerprint)
+        self.assertEqual(
+            record_fingerprint("saleslines", {**ARTICLE, "description": None}),
+            record_fingerprint("saleslines", {**ARTICLE, "description": ""}),
+        )
+        # Fields outside FINGERPRINT_FIELDS are ignored, listed ones are not
+        self.assertEqual(record_fingerprint("saleslines", {**ARTICLE, "ddts": [1]}), fingerprint)
+        self.assertNotEqual(record_fingerprint("saleslines", {**ARTICLE, "quantity": 6.0}), fingerprint)
+
+    def test_separator(self):
+        # Values are delimited, so moving text between fields changes the fingerprint
+        first = {**ARTICLE, "line_number": "1", "article_code": "2H"}
+        second = {**ARTICLE, "line_number": "12", "article_code": "H"}
+        self.assertNotEqual(record_fingerprint("saleslines", first), record_fingerprint("saleslines", second))
+
+    def test_with_fingerprint(self):
+        record = with_fingerprint("saleslines", dict(ARTICLE))
+        self.assertEqual(record["fingerprint"], record_fingerprint("saleslines", ARTICLE))
+        # Fingerprinting an already fingerprinted record gives the same value
+        self.assertEqual(record_fingerprint("saleslines", record), record["fingerprint"])
+
+    def test_every_parser_has_fields(self):
+        for name in ("orders", "ddt", "invoices", "products", "clienti", "prices", "saleslines"):
+            fields = FINGERPRINT_FIELDS[name]
+            self.assertEqual(len(fields), len(set(fields)), name)
+            self.assertTrue(all(re.fullmatch(r"[a-z0-9_]+", field) for field in fields), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
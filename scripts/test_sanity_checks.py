@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for sanity_checks.py
+Tests the fail-fast rules: empty first cycle, header changes, null rate and row drops
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+
+# Import sanity checks
+sys.path.insert(0, str(Path(__file__).parent))
+from sanity_checks import SanityError, SanityGuard, sanity_from_argv
+from schema_report import header_fingerprint
+
+CYCLE = [
+    [["ID", "DATA DI CREAZIONE"], ["1", "01/01/2026"]],
+    [["STATO"], ["Aperto"]],
+]
+SHIFTED = [CYCLE[1], CYCLE[0]]
+
+
+class SanityTestCase(unittest.TestCase):
+    def guard(self, **kwargs):
+        return SanityGuard("orders", ("id", "creation_date"), **kwargs)
+
+    def feed(self, guard, cycles, total_cycles=None):
+        """Run cycles of (tables, records) through the guard; the SANITY: event if it aborted."""
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            guard.on_start("x.pdf", 2 * (total_cycles or len(cycles)), 2)
+            try:
+                for idx, (tables, records) in enumerate(cycles):
+                    guard.on_tables(idx, tables)
+                    for record in records:
+                        guard.on_record(record)
+                    guard.after_cycle(idx)
+                guard.on_finish()
+            except SanityError:
+                return json.loads(stderr.getvalue().split("SANITY:", 1)[1])
+        return None
+
+
+def rows(n, creation_date="2026-01-01"):
+    return [{"id": str(i), "creation_date": creation_date} for i in range(n)]
+
+
+class TestRules(SanityTestCase):
+    """Each rule aborts on the cycle where it fails"""
+
+    def test_healthy_export(self):
+        self.assertIsNone(self.feed(self.guard(), [(CYCLE, rows(20))] * 5 + [(CYCLE, rows(1))]))
+
+    def test_empty_first_cycle(self):
+        event = self.feed(self.guard(), [(CYCLE, []), (CYCLE, rows(20))])
+        self.assertEqual((event["rule"], event["cycle"]), ("empty_first_cycle", 0))
+
+    def test_header_change(self):
+        event = self.feed(self.guard(), [(CYCLE, rows(20)), (SHIFTED, rows(20))])
+        self.assertEqual((event["rule"], event["cycle"], event["detail"]["pages"]), ("header_change", 1, [1, 2]))
+        # Past the watched cycles a header change is left to the SCHEMA: report
+        self.assertIsNone(self.feed(self.guard(sanity_cycles=1), [(CYCLE, rows(20)), (SHIFTED, rows(20))]))
+
+    def test_expected_headers(self):
+        expected = [["ID", "DATA DI CREAZIONE"], ["STATO"]]
+        self.assertIsNone(self.feed(self.guard(expected_headers=expected), [(CYCLE, rows(20))]))
+        event = self.feed(self.guard(expected_headers=expected), [(SHIFTED, rows(20))])
+        self.assertEqual(event["rule"], "header_mismatch")
+        self.assertEqual(event["detail"]["expected"], [header_fingerprint(h) for h in expected])
+
+    def test_null_rate(self):
+        cycles = [(CYCLE, rows(20, creation_date=None))] * 4
+        event = self.feed(self.guard(), cycles)
+        self.assertEqual((event["rule"], event["cycle"], event["detail"]), ("null_rate", 2, {"creation_date": 1.0}))
+        self.assertIsNone(self.feed(self.guard(max_null_rate=1.0), cycles))
+
+    def test_null_rate_short_run(self):
+        event = self.feed(self.guard(), [(CYCLE, rows(5, creation_date=""))])
+        self.assertEqual(event["rule"], "null_rate")
+
+    def test_row_drop(self):
+        event = self.feed(self.guard(), [(CYCLE, rows(20))] * 3 + [(CYCLE, rows(1)), (CYCLE, rows(20))])
+        self.assertEqual((event["rule"], event["cycle"], event["detail"]), ("row_drop", 3, {"rows": 1, "median": 20}))
+        # The last cycle of the export is usually partial
+        self.assertIsNone(self.feed(self.guard(), [(CYCLE, rows(20))] * 3 + [(CYCLE, rows(1))]))
+
+    def test_filtered_runs_skip_row_counts(self):
+        guard = sanity_from_argv("orders", ["parse-orders-pdf.py", "x.pdf", "--since", "2026-01-20"])
+        self.assertIsNone(self.feed(guard, [(CYCLE, []), (CYCLE, rows(20)), (CYCLE, [])], total_cycles=5))
+
+
+class TestArgv(unittest.TestCase):
+    def test_options(self):
+        self.assertIsNone(sanity_from_argv("orders", ["p", "x.pdf", "--no-sanity"]))
+        guard = sanity_from_argv("products", ["p", "x.pdf", "--max-null-rate", "0.2", "--sanity-cycles", "5"])
+        self.assertEqual((guard.required_fields, guard.max_null_rate, guard.sanity_cycles),
+                         (("id_articolo", "nome_articolo"), 0.2, 5))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "orders.schema.json")
+            with open(path, "w") as f:
+                json.dump({"parser": "orders", "pages": [["ID"]]}, f)
+            guard = sanity_from_argv("orders", ["p", "x.pdf", "--expect-headers", path])
+            self.assertEqual(guard.expected_headers, [["ID"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for scheduler.py
+Tests priority classes, per-tenant fair shares and checkpoint preemption
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Import scheduler
+sys.path.insert(0, str(Path(__file__).parent))
+from job_pool import Job
+from scheduler import FairScheduler, job_class
+
+# Stands in for a checkpointing parser: sleeps --sleep seconds, notes every
+# run in its --out file and exits 143 on SIGTERM like checkpoint.py
+FAKE_PARSER = """
+import signal, sys, time
+argv = sys.argv
+signal.signal(signal.SIGTERM, lambda *_: sys.exit(143))
+if "--out" in argv:
+    with open(argv[argv.index("--out") + 1], "a") as f:
+        f.write("resume\\n" if "--resume" in argv else "start\\n")
+time.sleep(float(argv[argv.index("--sleep") + 1]))
+"""
+
+
+class FakeScheduler(FairScheduler):
+    """FairScheduler whose jobs run FAKE_PARSER with the parser arguments."""
+
+    def __init__(self, jobs, **kwargs):
+        self.order = []
+        super().__init__(jobs, **kwargs)
+
+    def _command(self, job):
+        return [sys.executable, "-c", FAKE_PARSER, *super()._command(job)[2:]]
+
+    def _start(self, job):
+        self.order.append(job.name)
+        super()._start(job)
+
+
+class SchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def job(self, name, doc_type, seconds=0.0, tenant=None, **kwargs):
+        return Job(name=name, type=doc_type, path=name, out=os.path.join(self.tmp.name, f"{name}.out"),
+                   args=["--sleep", str(seconds)], tenant=tenant, **kwargs)
+
+
+class TestAdmission(SchedulerTestCase):
+    """Priority class first, then the tenant with the smallest share"""
+
+    def test_classes(self):
+        self.assertEqual(job_class(self.job("a", "saleslines")), 0)
+        self.assertEqual(job_class(self.job("b", "orders")), 1)
+        self.assertEqual(job_class(self.job("c", "orders", priority="bulk")), 2)
+        with self.assertRaises(ValueError):
+            job_class(self.job("d", "orders", priority="urgent"))
+
+    def test_order(self):
+        pool = FakeScheduler([
+            self.job("catalog", "products"),
+            self.job("a1", "orders", 0.2, tenant="agent-a"),
+            self.job("a2", "orders", tenant="agent-a"),
+            self.job("b1", "orders", tenant="agent-b"),
+            self.job("verify", "saleslines"),
+        ], max_jobs=1)
+        self.assertTrue(pool.run())
+        # b1 goes before a2: agent-a already used parse time on a1
+        self.assertEqual(pool.order, ["verify", "a1", "b1", "a2", "catalog"])
+
+    def test_bulk_leaves_a_slot(self):
+        pool = FakeScheduler([], max_jobs=2)
+        pool.running = {1: self.job("p", "products")}
+        self.assertFalse(pool._fits(self.job("c", "clienti")))
+        self.assertTrue(pool._fits(self.job("v", "saleslines")))
+
+
+class TestPreemption(SchedulerTestCase):
+    """An interactive job preempts a checkpointed bulk parse"""
+
+    def test_preempt_and_resume(self):
+        catalog = self.job("catalog", "products", 1.0)
+        pool = FakeScheduler([catalog], max_jobs=1)
+        pool.step()
+        time.sleep(0.3)
+        verify = self.job("verify", "saleslines")
+        pool.submit(verify)
+        self.assertTrue(pool.run())
+
+        self.assertEqual(pool.order, ["catalog", "verify", "catalog"])
+        self.assertEqual((catalog.status, catalog.runs, verify.status), ("done", 2, "done"))
+        with open(f"{catalog.out}.spool") as f:
+            self.assertEqual(f.read().split(), ["start", "resume"])
+
+    def test_no_preemption_without_checkpoint(self):
+        prices = self.job("prices", "prices", 0.5)
+        pool = FakeScheduler([prices], max_jobs=1)
+        pool.step()
+        pool.submit(self.job("verify", "saleslines"))
+        self.assertTrue(pool.run())
+        self.assertEqual(prices.runs, 1)
+        self.assertEqual(pool.order, ["prices", "verify"])
+
+
+if __name__ == '__main__':
+    unittest.main()
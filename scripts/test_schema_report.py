@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Unit tests for schema_report.py
+Tests header tracking, known-column matching, baselines and field population
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Import schema report
+sys.path.insert(0, str(Path(__file__).parent))
+from schema_report import SchemaMonitor, header_fingerprint, match_columns, schema_from_argv, table_headers
+
+
+@dataclass
+class Record:
+    id: str
+    name: Optional[str]
+
+
+CYCLE = [
+    [["ID", "NOME\nVENDITE"], ["1", "Rossi"]],
+    [["DATA DI CREAZIONE"], ["01/01/2026"]],
+]
+
+
+class TestHeaders(unittest.TestCase):
+    """Header rows and the get_column_value-style column match"""
+
+    def test_table_headers(self):
+        self.assertEqual(table_headers(CYCLE[0]), ("ID", "NOME VENDITE"))
+        self.assertEqual(table_headers([]), ())
+
+    def test_header_fingerprint(self):
+        self.assertEqual(len(header_fingerprint(("ID", "NOME VENDITE"))), 8)
+        # The raw cells of a page scan hash like the collapsed table headers
+        self.assertEqual(header_fingerprint(["ID", "NOME\nVENDITE"]), header_fingerprint(table_headers(CYCLE[0])))
+        self.assertNotEqual(header_fingerprint(("ID",)), header_fingerprint(("ID", "")))
+
+    def test_match_columns(self):
+        unknown, missing = match_columns(("ID", "ID DI VENDITA", "CANALE", ""), ["ID DI VENDITA", "ID", "E-MAIL"])
+        self.assertEqual(unknown, ["CANALE"])
+        self.assertEqual(missing, ["E-MAIL"])
+
+
+class TestSchemaMonitor(unittest.TestCase):
+    """Report contents"""
+
+    def run_monitor(self, monitor, cycles, records=(), total_pages=None):
+        if total_pages is not None:
+            monitor.on_start("Ordini.pdf", total_pages, len(CYCLE))
+        for idx, tables in enumerate(cycles):
+            monitor.on_tables(idx, tables)
+        for record in records:
+            monitor.on_record(record)
+        return monitor.report()
+
+    def test_stable_document(self):
+        report = self.run_monitor(
+            SchemaMonitor("orders", [["ID", "NOME VENDITE"], ["DATA DI CREAZIONE"]]),
+            [CYCLE, CYCLE],
+            [Record("1", "Rossi"), Record("2", None), Record("3", "")],
+        )
+        self.assertEqual(report["pages"][0], {
+            "page": 1, "fingerprint": header_fingerprint(("ID", "NOME VENDITE")), "headers": ["ID", "NOME VENDITE"],
+        })
+        self.assertEqual((report["unknown_columns"], report["missing_columns"]), ({}, {}))
+        self.assertEqual(report["population"], {"id": 1.0, "name": 0.333})
+        self.assertEqual(report["empty_fields"], [])
+        self.assertFalse(report["drift"])
+
+    def test_drift(self):
+        changed = [[["ID", "CANALE"], ["1", "web"]], CYCLE[1]]
+        report = self.run_monitor(SchemaMonitor("orders", [["ID", "NOME VENDITE"]]), [CYCLE, changed], [Record("1", None)])
+        self.assertEqual(report["header_changes"], [{"cycle": 1, "page": 1, "headers": ["ID", "CANALE"]}])
+        self.assertEqual(report["empty_fields"], ["name"])
+        self.assertTrue(report["drift"])
+
+    def test_cycle_layout(self):
+        report = self.run_monitor(SchemaMonitor("orders"), [CYCLE, CYCLE], total_pages=4)
+        self.assertEqual((report["cycle_size"], report["partial_cycle"]), (2, None))
+
+        # Cycle 1 lost a page: the shifted headers are changes, the trailing page a partial cycle
+        shifted = [CYCLE[1], CYCLE[0]]
+        report = self.run_monitor(SchemaMonitor("orders"), [CYCLE, shifted], total_pages=5)
+        self.assertEqual(report["partial_cycle"], {"first_page": 5, "pages": 1})
+        self.assertEqual([(c["cycle"], c["page"]) for c in report["header_changes"]], [(1, 1), (1, 2)])
+        self.assertTrue(report["drift"])
+
+    def test_known_column_missing(self):
+        report = self.run_monitor(SchemaMonitor("orders", [["ID", "E-MAIL"]]), [CYCLE])
+        self.assertEqual(report["unknown_columns"], {"1": ["NOME VENDITE"]})
+        self.assertEqual(report["missing_columns"], {"1": ["E-MAIL"]})
+        self.assertTrue(report["drift"])
+
+    def test_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "schema.json")
+            first = self.run_monitor(SchemaMonitor("ddt", baseline_path=path), [CYCLE])
+            self.assertEqual(first["baseline"]["status"], "created")
+            self.assertFalse(first["drift"])
+
+            changed = [[["ID", "CANALE"], ["1", "web"]], CYCLE[1]]
+            second = self.run_monitor(SchemaMonitor("ddt", baseline_path=path), [changed])
+            self.assertEqual(second["baseline"]["added"], {"1": ["CANALE"]})
+            self.assertEqual(second["baseline"]["removed"], {"1": ["NOME VENDITE"]})
+            self.assertTrue(second["drift"])
+            # The baseline is kept, so the drift is reported again next run
+            with open(path) as f:
+                self.assertEqual(json.load(f)["pages"][0], ["ID", "NOME VENDITE"])
+
+    def test_from_argv(self):
+        self.assertIsNone(schema_from_argv("orders", ["x.pdf", "--no-schema"]))
+        monitor = schema_from_argv("orders", ["x.pdf", "--schema-baseline", "b.json"])
+        self.assertEqual(monitor.baseline_path, "b.json")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for search_index.py
+Tests normalization, the postings written while records stream and query ranking
+"""
+
+import json
+import os
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# Import search index
+sys.path.insert(0, str(Path(__file__).parent))
+from search_index import SearchIndex, SearchIndexWriter, code_terms, compact, delta_decode, delta_encode, fold
+from test_pdf_cycles import ArtifactTestCase
+
+
+def product(id_articolo, nome_articolo, nome_ricerca, descrizione):
+    return SimpleNamespace(
+        id_articolo=id_articolo, nome_articolo=nome_articolo, nome_ricerca=nome_ricerca, descrizione=descrizione,
+    )
+
+
+PRODUCTS = [
+    product("001314.016", "H1.314.016", "FRESA1", "Fresa carburo"),
+    product("010314.016", "H10.314.016", "FRESA10", "Fresa diamantata"),
+    product("9436.204", "9436-204", "PUNTA", "Punta però"),
+    product("", "Senza codice", None, None),
+]
+
+
+class TestNormalization(unittest.TestCase):
+    def test_fold_and_compact(self):
+        self.assertEqual(fold("Però À"), "pero a")
+        self.assertEqual(compact("H1.314 016-A"), "h1314016a")
+        self.assertEqual(fold(None), "")
+
+    def test_code_terms(self):
+        self.assertEqual(code_terms("H1.314.016"), ["h1", "314", "016", "h1314016"])
+        self.assertEqual(code_terms("9436-204"), ["9436", "204", "9436204"])
+        self.assertEqual(code_terms("PUNTA"), ["punta"])
+
+    def test_delta_round_trip(self):
+        self.assertEqual(delta_encode([3, 4, 9]), [3, 1, 5])
+        self.assertEqual(delta_decode([3, 1, 5]), [3, 4, 9])
+
+
+class TestSearchIndex(ArtifactTestCase):
+    FILENAME = "products.search.json"
+
+    def build_index(self):
+        return self.build(SearchIndexWriter("products", "Prodotti.pdf", self.path), PRODUCTS)
+
+    def test_written_index(self):
+        summary = self.summary(self.build_index(), "SEARCH_INDEX")
+        self.assertEqual(summary["docs"], 3)
+        self.assertEqual(summary["bytes"], os.path.getsize(self.path))
+        with open(self.path, encoding="utf-8") as f:
+            index = json.load(f)
+        self.assertEqual(index["docs"], ["001314.016", "010314.016", "9436.204"])
+        self.assertEqual(index["text"][0], "001314016 h1314016 fresa1 fresacarburo")
+        self.assertEqual(index["terms"], sorted(index["terms"]))
+        self.assertEqual(delta_decode(index["prefixes"]["fre"]), [0, 1])
+        self.assertEqual(delta_decode(index["postings"][index["terms"].index("016")]), [0, 1])
+
+    def test_ranking(self):
+        self.build_index()
+        index = SearchIndex(self.path)
+        # Whole term before prefix
+        self.assertEqual(index.search("H1"), ["001314.016", "010314.016"])
+        self.assertEqual(index.search("h1314016"), ["001314.016"])
+        # Prefix longer than MAX_PREFIX, from the sorted terms
+        self.assertEqual(index.search("diaman"), ["010314.016"])
+        # Substrings through the trigrams
+        self.assertEqual(index.search("314016"), ["001314.016", "010314.016"])
+        self.assertEqual(index.search("mant"), ["010314.016"])
+        # Every word must match
+        self.assertEqual(index.search("fresa carb"), ["001314.016"])
+        self.assertEqual(index.search("Punta Però"), ["9436.204"])
+        self.assertEqual(index.search("fresa punta"), [])
+        self.assertEqual(index.search(" - "), [])
+        self.assertEqual(index.search("f", limit=1), ["001314.016"])
+
+
+if __name__ == '__main__':
+    unittest.main()
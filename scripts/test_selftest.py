@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for selftest.py
+Tests the embedded-PDF selftest and that parser startup stays free of the PDF libraries
+"""
+
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Import selftest
+sys.path.insert(0, str(Path(__file__).parent))
+from extraction import current_backend, set_backend
+from selftest import run_selftest, selftest_from_argv
+
+SCRIPTS = Path(__file__).parent
+
+
+class TestSelftest(unittest.TestCase):
+    """The embedded PDF parses back to SELFTEST_ROWS on every Python backend"""
+
+    def setUp(self):
+        self.backend = current_backend()
+
+    def tearDown(self):
+        set_backend(self.backend)
+
+    def test_backends(self):
+        for backend in ("pdfplumber", "pdfminer"):
+            set_backend(backend)
+            report = run_selftest("orders")
+            self.assertTrue(report["ok"], report["error"])
+            self.assertEqual(report["backend"], backend)
+            self.assertIsNotNone(report["dependencies"]["pdfplumber"]["version"])
+
+    def test_without_flag(self):
+        self.assertIsNone(selftest_from_argv("orders", ["parse-orders-pdf.py", "Ordini.pdf"]))
+
+
+class TestEntryPoints(unittest.TestCase):
+    """One spawn answers the health check; the usage path imports no PDF library"""
+
+    def test_parser_selftest(self):
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPTS / "parse-orders-pdf.py"), "--selftest", "--backend", "pdfminer"],
+            capture_output=True, text=True,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        report = json.loads(proc.stdout)
+        self.assertEqual((report["parser"], report["ok"], report["backend"]), ("orders", True, "pdfminer"))
+
+    def test_usage_path_is_lean(self):
+        for script in ("parse-orders-pdf.py", "parse-products-pdf.py"):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", str(SCRIPTS / script)],
+                capture_output=True, text=True,
+            )
+            self.assertEqual(proc.returncode, 1)
+            modules = {line.rsplit("|", 1)[-1].strip() for line in proc.stderr.splitlines() if line.startswith("import time:")}
+            self.assertNotIn("pdfplumber", modules, script)
+            self.assertNotIn("pdfminer", modules, script)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Unit tests for --shard/--pages selection (pdf_cycles.py) and shards.py
+Tests cycle-boundary alignment and gap/overlap detection in the merge
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Import selection and merge
+sys.path.insert(0, str(Path(__file__).parent))
+from pdf_cycles import CycleSelection, selection_from_argv
+from shards import check_shards, merge_shards
+
+
+class TestCycleSelection(unittest.TestCase):
+    """Shards and page ranges resolve to whole cycles"""
+
+    def test_shards_cover_every_cycle_once(self):
+        for count in range(1, 8):
+            covered = []
+            for index in range(1, count + 1):
+                covered.extend(CycleSelection.parse(shard=f"{index}/{count}").resolve(7, 7 * 10 + 3))
+            self.assertEqual(covered, list(range(10)))
+
+    def test_pages_widened_to_cycle_boundaries(self):
+        self.assertEqual(CycleSelection.parse(pages="10:20").resolve(7, 70, warn=False), range(1, 3))
+        self.assertEqual(CycleSelection.parse(pages="14:28").resolve(7, 70), range(2, 4))
+        self.assertEqual(CycleSelection.parse(pages="63:").resolve(7, 70), range(9, 10))
+        self.assertEqual(CycleSelection.parse(pages=":7").resolve(7, 70), range(0, 1))
+        self.assertEqual(CycleSelection.parse(pages="500:900").resolve(7, 70), range(10, 10))
+
+    def test_invalid_specs(self):
+        for shard in ["0/4", "5/4", "1/0", "a/b", "2"]:
+            with self.assertRaises(ValueError):
+                CycleSelection.parse(shard=shard)
+        for pages in ["10", "a:b", "-7:14"]:
+            with self.assertRaises(ValueError):
+                CycleSelection.parse(pages=pages)
+        with self.assertRaises(ValueError):
+            selection_from_argv(["x.pdf", "--shard", "1/2", "--pages", "0:7"])
+
+    def test_no_selection(self):
+        self.assertIsNone(selection_from_argv(["x.pdf", "--no-progress"]))
+
+
+def info(first, end, records=0, **overrides):
+    data = {
+        "parser": "orders", "pdf_sha256": "abc", "total_pages": 70, "cycle_size": 7,
+        "cycles_total": 10, "first_cycle": first, "end_cycle": end, "records": records,
+    }
+    data.update(overrides)
+    return data
+
+
+class TestCheckShards(unittest.TestCase):
+    """Gaps, overlaps and mismatched shards are reported"""
+
+    def test_complete(self):
+        self.assertEqual(check_shards([info(0, 4), info(4, 10)]), [])
+
+    def test_gap_and_missing_tail(self):
+        kinds = [(p["kind"], p["cycles"]) for p in check_shards([info(0, 3), info(5, 8)])]
+        self.assertEqual(kinds, [("gap", [3, 5]), ("gap", [8, 10])])
+
+    def test_overlap(self):
+        problems = check_shards([info(0, 5), info(4, 10)])
+        self.assertEqual(problems, [{"kind": "overlap", "cycles": [4, 5]}])
+
+    def test_mismatched_pdf(self):
+        problems = check_shards([info(0, 5), info(5, 10, pdf_sha256="other")])
+        self.assertEqual(problems[0]["kind"], "mismatch")
+
+
+class TestMergeShards(unittest.TestCase):
+    """Outputs are merged back in document order in the parser's format"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_ndjson_document_order(self):
+        second = self.write("b", '{"id": 3}\n{"id": 4}\n')
+        first = self.write("a", '{"id": 1}\n{"id": 2}\n')
+        merged, problems = merge_shards([(second, info(5, 10, 2)), (first, info(0, 5, 2))])
+        self.assertEqual(problems, [])
+        self.assertEqual([json.loads(line)["id"] for line in merged.splitlines()], [1, 2, 3, 4])
+
+    def test_products_document(self):
+        first = self.write("a", json.dumps({"products": [{"id": "1"}], "count": 1, "source": "P.pdf"}))
+        second = self.write("b", json.dumps({"products": [{"id": "2"}, {"id": "3"}], "count": 2, "source": "P.pdf"}))
+        merged, _ = merge_shards([(first, info(0, 5, 1)), (second, info(5, 10, 2))])
+        document = json.loads(merged)
+        self.assertEqual(document["count"], 3)
+        self.assertEqual([p["id"] for p in document["products"]], ["1", "2", "3"])
+
+    def test_gap_refused_unless_allowed(self):
+        first = self.write("a", "[]")
+        merged, problems = merge_shards([(first, info(0, 5))])
+        self.assertIsNone(merged)
+        merged, problems = merge_shards([(first, info(0, 5))], allow_gaps=True)
+        self.assertEqual(merged, "[]\n")
+        self.assertEqual(problems, [{"kind": "gap", "cycles": [5, 10]}])
+
+    def test_truncated_output_refused(self):
+        first = self.write("a", '{"id": 1}\n')
+        merged, problems = merge_shards([(first, info(0, 10, 2))], allow_gaps=True)
+        self.assertIsNone(merged)
+        self.assertEqual(problems[0]["kind"], "record_count")
+
+
+if __name__ == '__main__':
+    unittest.main()
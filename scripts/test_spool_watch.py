@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Unit tests for spool_watch.py
+Tests download completion, document type detection and the .done markers
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Import spool watch
+sys.path.insert(0, str(Path(__file__).parent))
+from feature_cache import set_cache_dir
+from job_pool import JobPool
+from spool_watch import SpoolIngest, SpoolWatcher, detect_document_type, pdf_complete
+from test_extraction import ORDERS_PAGE, TOTALS_PAGE, table_stream, write_pdf
+
+
+class EchoPool(JobPool):
+    """JobPool whose jobs print their type instead of parsing."""
+
+    def _command(self, job):
+        return [sys.executable, "-c", f"print({job.type!r})"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SpoolTestCase(unittest.TestCase):
+    def setUp(self):
+        set_cache_dir("off")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spool = Path(self.tmp.name, "spool")
+        self.out = Path(self.tmp.name, "out")
+        self.spool.mkdir()
+
+    def tearDown(self):
+        set_cache_dir(None)
+        self.tmp.cleanup()
+
+    def export(self, name, page=ORDERS_PAGE):
+        path = self.spool / name
+        write_pdf(str(path), [table_stream(page)])
+        return path
+
+
+class TestCompletion(SpoolTestCase):
+    """A PDF is handed out once it is whole and has held still"""
+
+    def test_pdf_complete(self):
+        path = self.export("Ordini.pdf")
+        self.assertTrue(pdf_complete(path))
+        data = path.read_bytes()
+        path.write_bytes(data[:len(data) // 2])
+        self.assertFalse(pdf_complete(path))
+        path.write_bytes(b"<html>session expired</html>")
+        self.assertFalse(pdf_complete(path))
+
+    def test_settle(self):
+        clock = Clock()
+        watcher = SpoolWatcher(self.spool, settle_s=1.0, clock=clock)
+        path = self.export("Ordini.pdf")
+        (self.spool / "Ordini.pdf.crdownload").write_bytes(b"%PDF-")
+        self.assertEqual(watcher.ready(), [])
+        clock.now = 0.5
+        self.assertEqual(watcher.ready(), [])
+        self.assertTrue(watcher.settling())
+        clock.now = 1.0
+        [(ready, key)] = watcher.ready()
+        self.assertEqual((ready, key[0]), (path, path.stat().st_size))
+        clock.now = 5.0
+        self.assertEqual(watcher.ready(), [])
+        self.assertFalse(watcher.settling())
+
+    def test_growing_file_waits(self):
+        clock = Clock()
+        watcher = SpoolWatcher(self.spool, settle_s=1.0, clock=clock)
+        path = self.spool / "Ordini.pdf"
+        path.write_bytes(b"%PDF-1.4\n")
+        watcher.ready()
+        clock.now = 0.9
+        self.export("Ordini.pdf")
+        watcher.ready()
+        clock.now = 1.5
+        self.assertEqual(watcher.ready(), [])
+        clock.now = 2.0
+        self.assertEqual(len(watcher.ready()), 1)
+
+    def test_incomplete(self):
+        clock = Clock()
+        watcher = SpoolWatcher(self.spool, settle_s=1.0, clock=clock)
+        (self.spool / "Ordini.pdf").write_bytes(b"%PDF-1.4\ntruncated")
+        watcher.ready()
+        clock.now = 2.0
+        self.assertEqual(watcher.ready(), [])
+        self.assertEqual(watcher.incomplete, [self.spool / "Ordini.pdf"])
+
+
+class TestDetection(SpoolTestCase):
+    """The first-page header picks the parser"""
+
+    def test_types(self):
+        self.assertEqual(detect_document_type(self.export("a.pdf")), "orders")
+        ddt = [["PDF DDT", "ID", "DDT", "ID DI VENDITA"], ["", "1", "DDT/1", "ORD/1"]]
+        self.assertEqual(detect_document_type(self.export("b.pdf", ddt)), "ddt")
+        self.assertIsNone(detect_document_type(self.export("c.pdf", TOTALS_PAGE)))
+
+
+class TestIngest(SpoolTestCase):
+    """Parsed exports get an output and a .done marker"""
+
+    def run_once(self):
+        ingest = SpoolIngest(self.spool, self.out, EchoPool([]), settle_s=0.05, polling=True)
+        ingest.run(once=True)
+
+    def test_markers(self):
+        orders = self.export("Ordini.pdf")
+        self.export("Totals.pdf", TOTALS_PAGE)
+        self.run_once()
+
+        with open(self.out / "Ordini.done") as f:
+            marker = json.load(f)
+        self.assertEqual((marker["type"], marker["status"], marker["exit_code"]), ("orders", "done", 0))
+        self.assertEqual((marker["pdf_size"], marker["pdf_mtime_ns"]), (orders.stat().st_size, orders.stat().st_mtime_ns))
+        self.assertEqual((self.out / "Ordini.out").read_text().strip(), "orders")
+        with open(self.out / "Totals.done") as f:
+            self.assertEqual(json.load(f)["status"], "unknown_type")
+
+    def test_corrupt_pdf(self):
+        self.export("Ordini.pdf")
+        # Header and trailer of a whole PDF around a body that does not parse
+        (self.spool / "Broken.pdf").write_bytes(b"%PDF-1.4\n1 0 obj\ngarbage\nendobj\nstartxref\n0\n%%EOF\n")
+        self.run_once()
+
+        with open(self.out / "Broken.done") as f:
+            marker = json.load(f)
+        self.assertEqual((marker["status"], marker["out"]), ("error", None))
+        self.assertTrue(marker["error"])
+        with open(self.out / "Ordini.done") as f:
+            self.assertEqual(json.load(f)["status"], "done")
+
+    def test_not_parsed_again(self):
+        self.export("Ordini.pdf")
+        self.run_once()
+        (self.out / "Ordini.out").unlink()
+        self.run_once()
+        self.assertFalse((self.out / "Ordini.out").exists())
+
+        # A new download under the same name is parsed
+        self.export("Ordini.pdf")
+        os.utime(self.spool / "Ordini.pdf", ns=(1, 1))
+        self.run_once()
+        self.assertTrue((self.out / "Ordini.out").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for watermark.py
+Tests --since filtering, sort detection and the early stop
+"""
+
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Import watermark filter
+sys.path.insert(0, str(Path(__file__).parent))
+from watermark import MIN_SORTED_SAMPLES, WatermarkFilter, parse_timestamp, watermark_from_argv
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def orders(days):
+    """ParsedOrder stand-ins with ISO creation_date, one per day offset."""
+    return [SimpleNamespace(id=str(i), creation_date=(START + timedelta(days=d)).isoformat()) for i, d in enumerate(days)]
+
+
+class CountingSource:
+    """Record generator that remembers how far it was consumed."""
+
+    def __init__(self, records):
+        self.records = records
+        self.consumed = 0
+
+    def __iter__(self):
+        for record in self.records:
+            self.consumed += 1
+            yield record
+
+
+class TestParseTimestamp(unittest.TestCase):
+    """Watermarks and record dates accept ISO and Italian formats"""
+
+    def test_formats(self):
+        expected = datetime(2026, 1, 20, 12, 4, 22)
+        self.assertEqual(parse_timestamp("2026-01-20T12:04:22"), expected)
+        self.assertEqual(parse_timestamp("20/01/2026 12:04:22"), expected)
+        self.assertEqual(parse_timestamp("2026-01-20"), datetime(2026, 1, 20))
+        self.assertIsNone(parse_timestamp(""))
+        self.assertIsNone(parse_timestamp("yesterday"))
+
+    def test_invalid_since(self):
+        with self.assertRaises(ValueError):
+            watermark_from_argv("orders", "creation_date", ["x.pdf", "--since", "soon"])
+        self.assertIsNone(watermark_from_argv("orders", "creation_date", ["x.pdf"]))
+
+
+class TestWatermarkFilter(unittest.TestCase):
+    """Only records at/after the watermark are emitted"""
+
+    def run_filter(self, days, since_day, early_stop=True):
+        source = CountingSource(orders(days))
+        watermark = WatermarkFilter("orders", "creation_date", START + timedelta(days=since_day), early_stop=early_stop)
+        emitted = list(watermark.apply(iter(source)))
+        return watermark, source, emitted
+
+    def test_newest_first_stops_early(self):
+        days = list(range(200, 0, -1))
+        watermark, source, emitted = self.run_filter(days, since_day=100)
+        self.assertEqual(len(emitted), 101)
+        self.assertEqual(watermark.order, "desc")
+        self.assertTrue(watermark.stopped_early)
+        self.assertLess(source.consumed, len(days))
+
+    def test_no_stop_before_enough_samples(self):
+        days = list(range(MIN_SORTED_SAMPLES - 1, 0, -1))
+        watermark, source, emitted = self.run_filter(days, since_day=MIN_SORTED_SAMPLES - 5)
+        self.assertFalse(watermark.stopped_early)
+        self.assertEqual(source.consumed, len(days))
+
+    def test_unsorted_reads_to_the_end(self):
+        days = [d if d % 2 else 300 - d for d in range(200)]
+        watermark, source, emitted = self.run_filter(days, since_day=150)
+        self.assertEqual(watermark.order, "unsorted")
+        self.assertEqual(source.consumed, len(days))
+        self.assertEqual(len(emitted), len([d for d in days if d >= 150]))
+
+    def test_same_day_records_do_not_stop(self):
+        # Sorted by day only: an earlier time on the watermark day is skipped
+        # but later records of that day must still be read
+        days = list(range(119, 59, -1)) + [59.9, 60.1, 59, 58]
+        watermark, source, emitted = self.run_filter(days, since_day=60)
+        self.assertEqual(len(emitted), len([d for d in days if d >= 60]))
+        self.assertTrue(watermark.stopped_early)
+        self.assertEqual(source.consumed, len(days) - 1)
+
+    def test_no_early_stop(self):
+        days = list(range(200, 0, -1))
+        watermark, source, emitted = self.run_filter(days, since_day=100, early_stop=False)
+        self.assertFalse(watermark.stopped_early)
+        self.assertEqual(source.consumed, len(days))
+        self.assertEqual(len(emitted), 101)
+
+
+if __name__ == '__main__':
+    unittest.main()
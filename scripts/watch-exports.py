@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Parse ERP exports as soon as their download into a spool directory finishes
+(spool_watch.py).
+
+Usage:
+    python3 watch-exports.py <spool_dir> --out-dir <dir> [options]
+
+Every complete PDF of the spool is matched to its parser by the header row
+of its first page and parsed right away; <out-dir>/<pdf stem>.out holds the
+parser's stdout, <out>.log its stderr, and <out-dir>/<pdf stem>.done is
+written when the parse has ended (see spool_watch.py for its fields).
+
+Options:
+    --out-dir DIR           where outputs and .done markers go (required)
+    --settle 1.0            seconds a file must stop growing before it is parsed
+    --poll                  poll the directory instead of using inotify
+    --once                  parse the PDFs present now, then exit
+    --jobs 4                parsers running at once (default: CPU count)
+    --memory-cap 2GB        total memory reserved by running parsers (job_pool.py)
+    --fair                  saleslines before orders before catalog parses, preempting
+                            checkpointed catalog parses (scheduler.py)
+    --backend pdfminer      passed to every parser (extraction.py)
+    --no-progress           passed to every parser
+"""
+
+import sys
+
+from job_pool import pool_from_argv
+from pdf_cycles import get_option, has_flag
+from spool_watch import SETTLE_S, SpoolIngest
+
+
+def main():
+    """Main entry point"""
+    out_dir = get_option(sys.argv, "--out-dir")
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--") or not out_dir:
+        print("Usage: watch-exports.py <spool_dir> --out-dir DIR [--settle 1.0] [--poll] [--once] [--jobs N] [--memory-cap 2GB] [--fair]", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        pool = pool_from_argv(sys.argv, [])
+        ingest = SpoolIngest(
+            sys.argv[1], out_dir, pool,
+            settle_s=float(get_option(sys.argv, "--settle") or SETTLE_S),
+            polling=has_flag(sys.argv, "--poll"),
+        )
+        ingest.run(once=has_flag(sys.argv, "--once"))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Watermark filter for incremental syncs (--since).
+
+Hourly order syncs only need the orders created since the last sync, and
+product syncs only the rows with a newer DATETIME MODIFICATO. With
+--since 2026-01-20T12:00:00 (ISO, or Italian "20/01/2026 12:00:00") the
+orders parser emits only records with creation_date >= watermark and the
+products parser only those with datetime_modificato >= watermark; records
+without a parseable date are always emitted.
+
+The filter also watches the order of the column as records stream by, per
+day (exports sorted by date keep no order within a day). Once at least
+MIN_SORTED_SAMPLES dates have been seen and no day went up (the export is
+sorted newest first, as Ordini.pdf normally is), the first record from a day
+before the watermark's day stops the parse: every record after it is older
+too, so the remaining cycles are never extracted. An unsorted or
+ascending export is filtered to the end. --no-early-stop always reads to
+the end.
+
+A summary is reported on stderr when the parse ends:
+    WATERMARK:{"parser": "orders", "field": "creation_date", "since": "...",
+               "emitted": 40, "skipped": 1, "order": "desc",
+               "stopped_early": true}
+"""
+
+import json
+import sys
+from datetime import date, datetime
+from typing import Generator, Iterable, List, Optional
+
+from pdf_cycles import get_option, has_flag
+
+# Dates that must have been seen in descending order before an early stop
+MIN_SORTED_SAMPLES = 50
+
+_FORMATS = ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"]
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """ISO 8601 or Italian DD/MM/YYYY[ HH:MM[:SS]] → datetime, else None."""
+    if not value or not value.strip():
+        return None
+    value = value.strip()
+    for fmt in _FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class WatermarkFilter:
+    """Streams records at or after the watermark, stopping early on sorted exports."""
+
+    def __init__(self, parser_name: str, field: str, since: datetime, early_stop: bool = True):
+        self.parser_name = parser_name
+        self.field = field
+        self.since = since
+        self.early_stop = early_stop
+        self.emitted = 0
+        self.skipped = 0
+        self.dates_seen = 0
+        self.order: Optional[str] = None  # "desc", "asc", "unsorted" or None (no steps yet)
+        self.stopped_early = False
+        self._previous: Optional[date] = None
+
+    def _observe(self, value: date) -> None:
+        previous, self._previous = self._previous, value
+        self.dates_seen += 1
+        if previous is None or value == previous or self.order == "unsorted":
+            return
+        step = "desc" if value < previous else "asc"
+        if self.order is None:
+            self.order = step
+        elif self.order != step:
+            self.order = "unsorted"
+
+    def apply(self, records: Iterable) -> Generator:
+        """Pass through the records at or after the watermark."""
+        try:
+            for record in records:
+                value = parse_timestamp(getattr(record, self.field, None))
+                if value is None:
+                    self.emitted += 1
+                    yield record
+                    continue
+
+                self._observe(value.date())
+                if value >= self.since:
+                    self.emitted += 1
+                    yield record
+                    continue
+
+                self.skipped += 1
+                if (
+                    self.early_stop
+                    and self.order == "desc"
+                    and self.dates_seen >= MIN_SORTED_SAMPLES
+                    and value.date() < self.since.date()
+                ):
+                    self.stopped_early = True
+                    break
+        finally:
+            if self.stopped_early and hasattr(records, "close"):
+                records.close()
+            self._report()
+
+    def _report(self) -> None:
+        summary = {
+            "parser": self.parser_name,
+            "field": self.field,
+            "since": self.since.isoformat(),
+            "emitted": self.emitted,
+            "skipped": self.skipped,
+            "order": self.order,
+            "stopped_early": self.stopped_early,
+        }
+        print(f"WATERMARK:{json.dumps(summary)}", file=sys.stderr)
+
+
+def watermark_from_argv(parser_name: str, field: str, argv: List[str]) -> Optional[WatermarkFilter]:
+    """WatermarkFilter from --since/--no-early-stop, or None without --since."""
+    since = get_option(argv, "--since")
+    if since is None:
+        return None
+    watermark = parse_timestamp(since)
+    if watermark is None:
+        raise ValueError(f"Invalid --since: {since!r} (expected e.g. 2026-01-20T12:00:00)")
+    return WatermarkFilter(parser_name, field, watermark, early_stop=not has_flag(argv, "--no-early-stop"))